@@ -46,6 +46,26 @@ export enum AssetStatus {
   Ready = 'READY'
 }
 
+export type AssetUploadBatch = {
+  __typename?: 'AssetUploadBatch';
+  errors: Array<AssetUploadError>;
+  tickets: Array<AssetUploadTicket>;
+};
+
+export type AssetUploadError = {
+  __typename?: 'AssetUploadError';
+  assetId?: Maybe<Scalars['ID']['output']>;
+  errorType: Scalars['String']['output'];
+  index: Scalars['Int']['output'];
+  message: Scalars['String']['output'];
+};
+
+export type AssetUploadItemInput = {
+  label?: InputMaybe<Scalars['String']['input']>;
+  mimeType: Scalars['String']['input'];
+  sizeBytes?: InputMaybe<Scalars['Int']['input']>;
+};
+
 export type AssetUploadTicket = {
   __typename?: 'AssetUploadTicket';
   asset: Asset;
@@ -140,6 +160,7 @@ export type FinaliseAssetInput = {
   assetId: Scalars['ID']['input'];
   gameId: Scalars['ID']['input'];
   sectionId: Scalars['ID']['input'];
+  sizeBytes?: InputMaybe<Scalars['Int']['input']>;
 };
 
 export type Game = {
@@ -200,6 +221,11 @@ export type GamesWithQuota = {
   totalQuota: Scalars['Int']['output'];
 };
 
+export type GetAssetInput = {
+  assetId: Scalars['ID']['input'];
+  gameId: Scalars['ID']['input'];
+};
+
 export type GetCharacterTemplateInput = {
   gameType: Scalars['String']['input'];
   language: Scalars['String']['input'];
@@ -244,6 +270,7 @@ export type Mutation = {
   deleteSection: SheetSection;
   joinGame: PlayerSheetSummary;
   requestAssetUpload: AssetUploadTicket;
+  requestAssetUploads: AssetUploadBatch;
   rollDice: DiceRoll;
   setSystemNotification: SystemNotification;
   updateGame: GameSummary;
@@ -314,6 +341,11 @@ export type MutationRequestAssetUploadArgs = {
 };
 
 
+export type MutationRequestAssetUploadsArgs = {
+  input: RequestAssetUploadsInput;
+};
+
+
 export type MutationRollDiceArgs = {
   input: RollDiceInput;
 };
@@ -383,6 +415,7 @@ export type PromoteAssetInput = {
 
 export type Query = {
   __typename?: 'Query';
+  getAsset: Asset;
   getCharacterTemplate: Array<TemplateSectionData>;
   getCharacterTemplates: Array<CharacterTemplateMetadata>;
   getGame: Game;
@@ -394,6 +427,11 @@ export type Query = {
 };
 
 
+export type QueryGetAssetArgs = {
+  input: GetAssetInput;
+};
+
+
 export type QueryGetCharacterTemplateArgs = {
   input: GetCharacterTemplateInput;
 };
@@ -426,6 +464,12 @@ export type RequestAssetUploadInput = {
   sizeBytes: Scalars['Int']['input'];
 };
 
+export type RequestAssetUploadsInput = {
+  assets: Array<AssetUploadItemInput>;
+  gameId: Scalars['ID']['input'];
+  sectionId: Scalars['ID']['input'];
+};
+
 export type RollDiceInput = {
   action?: InputMaybe<Scalars['String']['input']>;
   dice: Array<DiceInput>;
@@ -8,6 +8,14 @@
         }
       `;
     
+      export const getAssetQuery = `
+        query getAsset($input: GetAssetInput!) {
+          getAsset(input: $input) {
+            gameId sectionId assetId label status mimeType sizeBytes width height createdAt updatedAt type
+          }
+        }
+      `;
+    
       export const getGamesQuery = `
         query getGames {
           getGames {
@@ -186,6 +194,14 @@
         }
       `;
     
+      export const requestAssetUploadsMutation = `
+        mutation requestAssetUploads($input: RequestAssetUploadsInput!) {
+          requestAssetUploads(input: $input) {
+            tickets { asset { gameId sectionId assetId label status mimeType sizeBytes width height createdAt updatedAt type } uploadUrl uploadFields headers } errors { index assetId errorType message }
+          }
+        }
+      `;
+    
       export const _expireAssetMutation = `
         mutation _expireAsset($input: ExpireAssetInput!) {
           _expireAsset(input: $input) {
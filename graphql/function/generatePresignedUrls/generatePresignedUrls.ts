@@ -0,0 +1,67 @@
+import { util, runtime, Context } from "@aws-appsync/utils";
+import { AssetUploadBatch, AssetUploadError } from "../../../appsync/graphql";
+import type { DataAsset } from "../../lib/dataTypes";
+import { MAX_ASSET_SIZE_BYTES } from "../../lib/constants/assets";
+
+type SignedUpload = {
+  assetData: DataAsset;
+  uploadUrl: string;
+  uploadFields: Record<string, string>;
+  headers: Record<string, string>;
+};
+
+export function request(context: Context): unknown {
+  const assets = context.prev.result.assets;
+  const errors = context.prev.result.errors;
+
+  if (assets.length === 0) {
+    // Every item failed validation - no need to invoke the Lambda
+    runtime.earlyReturn({ tickets: [], errors: errors });
+  }
+
+  // Pass the whole batch to the Lambda in a single invocation, with the
+  // limit that tickets reserved without a size are signed for
+  return {
+    operation: "Invoke",
+    payload: {
+      assets: assets,
+      maxSizeBytes: MAX_ASSET_SIZE_BYTES,
+    },
+  };
+}
+
+export function response(context: Context): AssetUploadBatch | null {
+  if (context.error) {
+    util.error(context.error.message, context.error.type, context.result);
+  }
+
+  const result = context.result;
+  const validationErrors: AssetUploadError[] = context.prev.result.errors;
+  const signingErrors: AssetUploadError[] = result.errors;
+
+  const tickets = result.tickets.map((signed: SignedUpload) => {
+    const assetData = signed.assetData;
+    return {
+      asset: {
+        gameId: assetData.gameId,
+        sectionId: assetData.sectionId,
+        assetId: assetData.assetId,
+        label: assetData.label,
+        status: assetData.status,
+        mimeType: assetData.mimeType,
+        sizeBytes: assetData.sizeBytes,
+        createdAt: assetData.createdAt,
+        updatedAt: assetData.updatedAt,
+        type: assetData.type,
+      },
+      uploadUrl: signed.uploadUrl,
+      uploadFields: JSON.stringify(signed.uploadFields),
+      headers: JSON.stringify(signed.headers),
+    };
+  });
+
+  return {
+    tickets: tickets,
+    errors: [...validationErrors, ...signingErrors],
+  } as AssetUploadBatch;
+}
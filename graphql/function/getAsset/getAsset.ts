@@ -0,0 +1,39 @@
+import { util, Context, AppSyncIdentityCognito } from "@aws-appsync/utils";
+import type { DynamoDBGetItemRequest } from "@aws-appsync/utils/lib/resolver-return-types";
+import type { GetAssetInput } from "../../../appsync/graphql";
+import type { DataAsset } from "../../lib/dataTypes";
+import { DDBPrefixGame, DDBPrefixAsset } from "../../lib/constants/dbPrefixes";
+
+// A single asset record, so clients can check an upload's status without
+// fetching the whole game. checkGameAccess runs first in the pipeline.
+export function request(
+  context: Context<{ input: GetAssetInput }>,
+): DynamoDBGetItemRequest {
+  if (!context.identity) util.unauthorized();
+  const identity = context.identity as AppSyncIdentityCognito;
+  if (!identity?.sub) util.unauthorized();
+
+  const input = context.arguments.input;
+
+  return {
+    operation: "GetItem",
+    key: util.dynamodb.toMapValues({
+      PK: DDBPrefixGame + "#" + input.gameId,
+      SK: DDBPrefixAsset + "#" + input.assetId,
+    }),
+  };
+}
+
+export function response(
+  context: Context<{ input: GetAssetInput }, object, object, object, DataAsset>,
+): DataAsset {
+  if (context.error) {
+    util.error(context.error.message, context.error.type, context.result);
+  }
+
+  if (!context.result) {
+    util.error("Asset not found", "NotFound");
+  }
+
+  return context.result;
+}
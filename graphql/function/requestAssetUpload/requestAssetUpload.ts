@@ -15,6 +15,7 @@ import {
   ASSET_STATUS_PENDING,
   ALLOWED_ASSET_MIME_TYPES,
 } from "../../lib/constants/assets";
+import { expiryBucketKey } from "../../lib/assetExpiry";
 
 export function request(
   context: Context<{ input: RequestAssetUploadInput }>,
@@ -27,12 +28,13 @@ export function request(
   const assetId = util.autoId();
   const timestamp = util.time.nowISO8601();
 
-  // Set cleanup time from now (ISO-8601 format for Step Functions)
+  // Set cleanup time from now (ISO-8601, so it sorts within its expiry bucket)
   const expireUploadAtSeconds =
     util.time.nowEpochSeconds() + ASSET_CLEANUP_TIMEOUT_SECONDS;
   const expireUploadAt = util.time.epochMilliSecondsToISO8601(
     expireUploadAtSeconds * 1000,
   );
+  const expiryBucket = expiryBucketKey(expireUploadAtSeconds);
 
   // Validate mime type
   if (!ALLOWED_ASSET_MIME_TYPES.includes(input.mimeType)) {
@@ -71,6 +73,7 @@ export function request(
     createdAt: timestamp,
     updatedAt: timestamp,
     expireUploadAt: expireUploadAt,
+    GSI2PK: expiryBucket,
     type: TypeAsset,
   };
 
@@ -0,0 +1,224 @@
+import {
+  util,
+  runtime,
+  Context,
+  AppSyncIdentityCognito,
+} from "@aws-appsync/utils";
+import type { DynamoDBTransactWriteItemsRequest } from "@aws-appsync/utils/lib/resolver-return-types";
+import environment from "../../environment.json";
+import {
+  RequestAssetUploadsInput,
+  AssetUploadItemInput,
+  AssetUploadError,
+} from "../../../appsync/graphql";
+import type { DataAsset } from "../../lib/dataTypes";
+import { TypeAsset } from "../../lib/constants/entityTypes";
+import {
+  DDBPrefixGame,
+  DDBPrefixAsset,
+  DDBPrefixSection,
+} from "../../lib/constants/dbPrefixes";
+import {
+  MAX_ASSET_SIZE_BYTES,
+  MAX_ASSET_UPLOAD_BATCH_SIZE,
+  ASSET_CLEANUP_TIMEOUT_SECONDS,
+  ASSET_STATUS_PENDING,
+  ALLOWED_ASSET_MIME_TYPES,
+} from "../../lib/constants/assets";
+import { expiryBucketKey } from "../../lib/assetExpiry";
+
+function validateItem(
+  item: AssetUploadItemInput,
+  index: number,
+): AssetUploadError | null {
+  if (!ALLOWED_ASSET_MIME_TYPES.includes(item.mimeType)) {
+    return {
+      index: index,
+      errorType: "InvalidMimeType",
+      message: "Invalid mime type. Only images are allowed.",
+    };
+  }
+
+  // Without a size, the ticket accepts anything up to the limit
+  if (item.sizeBytes != null && item.sizeBytes > MAX_ASSET_SIZE_BYTES) {
+    return {
+      index: index,
+      errorType: "FileTooLarge",
+      message: `File size too large. Maximum ${MAX_ASSET_SIZE_BYTES / (1024 * 1024)}MB allowed.`,
+    };
+  }
+
+  return null;
+}
+
+export function request(
+  context: Context<{ input: RequestAssetUploadsInput }>,
+): DynamoDBTransactWriteItemsRequest {
+  if (!context.identity) util.unauthorized();
+  const identity = context.identity as AppSyncIdentityCognito;
+  if (!identity?.sub) util.unauthorized();
+
+  const input = context.arguments.input;
+  const timestamp = util.time.nowISO8601();
+
+  if (input.assets.length > MAX_ASSET_UPLOAD_BATCH_SIZE) {
+    util.error(
+      `Too many assets. Maximum ${MAX_ASSET_UPLOAD_BATCH_SIZE} per request.`,
+      "TooManyAssets",
+    );
+  }
+
+  // Set cleanup time from now (ISO-8601, so it sorts within its expiry bucket)
+  const expireUploadAtSeconds =
+    util.time.nowEpochSeconds() + ASSET_CLEANUP_TIMEOUT_SECONDS;
+  const expireUploadAt = util.time.epochMilliSecondsToISO8601(
+    expireUploadAtSeconds * 1000,
+  );
+  const expiryBucket = expiryBucketKey(expireUploadAtSeconds);
+
+  const bucket = `wildsea-${environment.name}-assets`;
+  const table = "Wildsea-" + environment.name;
+
+  // Invalid items are reported individually rather than failing the batch
+  const errors: AssetUploadError[] = [];
+  const assets: {
+    index: number;
+    assetData: DataAsset;
+    input: AssetUploadItemInput;
+  }[] = [];
+
+  input.assets.forEach((item, index) => {
+    const error = validateItem(item, index);
+    if (error) {
+      errors.push(error);
+      return;
+    }
+
+    const assetId = util.autoId();
+    const prefix = `game/${input.gameId}/section/${input.sectionId}/${assetId}`;
+
+    assets.push({
+      index: index,
+      assetData: {
+        gameId: input.gameId,
+        sectionId: input.sectionId,
+        assetId: assetId,
+        label: item.label || undefined,
+        status: ASSET_STATUS_PENDING,
+        bucket: bucket,
+        incomingKey: `incoming/${prefix}/original`,
+        originalKey: `asset/${prefix}/original`,
+        variantsPrefix: `asset/${prefix}/variants/`,
+        mimeType: item.mimeType,
+        sizeBytes: item.sizeBytes ?? undefined,
+        createdAt: timestamp,
+        updatedAt: timestamp,
+        expireUploadAt: expireUploadAt,
+        GSI2PK: expiryBucket,
+        type: TypeAsset,
+      },
+      input: item,
+    });
+  });
+
+  // Store asset data for next function
+  context.stash.assets = assets;
+  context.stash.errors = errors;
+
+  if (assets.length === 0) {
+    // Nothing valid to write - skip the data source
+    runtime.earlyReturn({ assets: assets, errors: errors });
+  }
+
+  const assetItems = assets.map((asset) => ({
+    operation: "PutItem" as const,
+    table: table,
+    key: util.dynamodb.toMapValues({
+      PK: DDBPrefixGame + "#" + input.gameId,
+      SK: DDBPrefixAsset + "#" + asset.assetData.assetId,
+    }),
+    attributeValues: util.dynamodb.toMapValues(asset.assetData),
+  }));
+
+  // Update game to decrement remainingAssets by the whole batch
+  const gameItem = {
+    operation: "UpdateItem" as const,
+    table: table,
+    key: util.dynamodb.toMapValues({
+      PK: DDBPrefixGame + "#" + input.gameId,
+      SK: DDBPrefixGame,
+    }),
+    update: {
+      expression:
+        "SET #updatedAt = :updatedAt, #remainingAssets = #remainingAssets - :count",
+      expressionNames: {
+        "#updatedAt": "updatedAt",
+        "#remainingAssets": "remainingAssets",
+      },
+      expressionValues: util.dynamodb.toMapValues({
+        ":updatedAt": timestamp,
+        ":count": assets.length,
+      }),
+    },
+    condition: {
+      expression: "#remainingAssets >= :count",
+      expressionNames: {
+        "#remainingAssets": "remainingAssets",
+      },
+      expressionValues: util.dynamodb.toMapValues({
+        ":count": assets.length,
+      }),
+      returnValuesOnConditionCheckFailure: false,
+    },
+  };
+
+  // Update section to add all asset IDs - with user ownership condition
+  const sectionItem = {
+    operation: "UpdateItem" as const,
+    table: table,
+    key: util.dynamodb.toMapValues({
+      PK: DDBPrefixGame + "#" + input.gameId,
+      SK: DDBPrefixSection + "#" + input.sectionId,
+    }),
+    update: {
+      expression:
+        "SET #updatedAt = :updatedAt, #assets = list_append(if_not_exists(#assets, :emptyList), :assetList)",
+      expressionNames: {
+        "#updatedAt": "updatedAt",
+        "#assets": "assets",
+      },
+      expressionValues: util.dynamodb.toMapValues({
+        ":updatedAt": timestamp,
+        ":emptyList": [],
+        ":assetList": assets.map((asset) => asset.assetData.assetId),
+      }),
+    },
+    condition: {
+      expression: "#userId = :userId",
+      expressionNames: {
+        "#userId": "userId",
+      },
+      expressionValues: util.dynamodb.toMapValues({
+        ":userId": identity.sub,
+      }),
+      returnValuesOnConditionCheckFailure: false,
+    },
+  };
+
+  return {
+    operation: "TransactWriteItems",
+    transactItems: [...assetItems, gameItem, sectionItem],
+  };
+}
+
+export function response(context: Context): unknown {
+  if (context.error) {
+    util.error(context.error.message, context.error.type, context.result);
+  }
+
+  // Pass asset data to next function in pipeline
+  return {
+    assets: context.stash.assets,
+    errors: context.stash.errors,
+  };
+}
@@ -0,0 +1,11 @@
+import { DDBPrefixExpiry } from "./constants/dbPrefixes";
+import { ASSET_EXPIRY_BUCKET_SECONDS } from "./constants/assets";
+
+// GSI2 partition for pending assets due to expire within the same bucket, so
+// the expiry sweep only queries the buckets that have come due
+export function expiryBucketKey(expireUploadAtSeconds: number): string {
+  const bucketStartSeconds =
+    Math.floor(expireUploadAtSeconds / ASSET_EXPIRY_BUCKET_SECONDS) *
+    ASSET_EXPIRY_BUCKET_SECONDS;
+  return DDBPrefixExpiry + "#" + bucketStartSeconds;
+}
@@ -7,6 +7,13 @@ export const MAX_ASSET_SIZE_BYTES = 0; // Disabled - usually 5 * 1024 * 1024; //
 export const ASSET_CLEANUP_TIMEOUT_SECONDS = 30; // Temporary 60 * 60; // 60 minutes
 export const PRESIGNED_URL_EXPIRES_SECONDS = 900; // 15 minutes
 export const LAMBDA_TIMEOUT_SECONDS = 30;
+// Pending assets are grouped by expiry time for the expiry sweep. Must match
+// EXPIRY_BUCKET_SECONDS in lambda/expireAssets
+export const ASSET_EXPIRY_BUCKET_SECONDS = 5 * 60; // 5 minutes
+
+// Batch upload limits (each asset is one TransactWriteItems entry, plus the
+// game and section updates, so this must stay below the 100 item limit)
+export const MAX_ASSET_UPLOAD_BATCH_SIZE = 25;
 
 // Asset status values (re-exported from assetStatus.ts)
 export {
@@ -11,3 +11,4 @@ export const DDBPrefixGamePresets = "GAMEPRESETS";
 export const DDBPrefixLanguage = "LANGUAGE";
 export const DDBPrefixNotification = "NOTIFICATION";
 export const DDBPrefixAsset = "ASSET";
+export const DDBPrefixExpiry = "EXPIRY";
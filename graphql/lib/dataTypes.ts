@@ -88,12 +88,14 @@ export interface DataAsset {
   incomingKey: string;
   originalKey: string;
   variantsPrefix: string;
+  contentHash?: string; // SHA-256 of the original, set while finalising
   mimeType: string;
-  sizeBytes: number;
+  sizeBytes?: number; // Unset until the upload arrives for a ticket reserved without a size
   width?: number;
   height?: number;
   createdAt: string;
   updatedAt: string;
   expireUploadAt: string; // Epoch seconds as string for upload expiration
+  GSI2PK?: string; // Expiry bucket, only while the asset is PENDING
   type: string; // Will be TypeAsset
 }
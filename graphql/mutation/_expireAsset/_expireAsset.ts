@@ -20,10 +20,12 @@ export function request(
       SK: DDBPrefixAsset + "#" + input.assetId,
     }),
     update: {
-      expression: "SET #status = :expired, #updatedAt = :updatedAt",
+      expression:
+        "SET #status = :expired, #updatedAt = :updatedAt REMOVE #GSI2PK",
       expressionNames: {
         "#status": "status",
         "#updatedAt": "updatedAt",
+        "#GSI2PK": "GSI2PK",
       },
       expressionValues: util.dynamodb.toMapValues({
         ":expired": ASSET_STATUS_EXPIRED,
@@ -13,7 +13,24 @@ export function request(
   const input = context.arguments.input;
   const timestamp = util.time.nowISO8601();
 
-  const { gameId, assetId } = input;
+  const { gameId, assetId, sizeBytes } = input;
+
+  // Record the uploaded object's size - a ticket reserved without a size
+  // accepted anything up to the limit
+  const sizeUpdate = sizeBytes != null ? ", #sizeBytes = :sizeBytes" : "";
+  const expressionNames: Record<string, string> = {
+    "#status": "status",
+    "#updatedAt": "updatedAt",
+    "#GSI2PK": "GSI2PK",
+  };
+  const expressionValues: Record<string, unknown> = {
+    ":finalising": ASSET_STATUS_FINALISING,
+    ":updatedAt": timestamp,
+  };
+  if (sizeBytes != null) {
+    expressionNames["#sizeBytes"] = "sizeBytes";
+    expressionValues[":sizeBytes"] = sizeBytes;
+  }
 
   return {
     operation: "UpdateItem",
@@ -22,15 +39,13 @@ export function request(
       SK: DDBPrefixAsset + "#" + assetId,
     }),
     update: {
-      expression: "SET #status = :finalising, #updatedAt = :updatedAt",
-      expressionNames: {
-        "#status": "status",
-        "#updatedAt": "updatedAt",
-      },
-      expressionValues: util.dynamodb.toMapValues({
-        ":finalising": ASSET_STATUS_FINALISING,
-        ":updatedAt": timestamp,
-      }),
+      // No longer due for expiry - drop it from the sweep index
+      expression:
+        "SET #status = :finalising, #updatedAt = :updatedAt" +
+        sizeUpdate +
+        " REMOVE #GSI2PK",
+      expressionNames: expressionNames,
+      expressionValues: util.dynamodb.toMapValues(expressionValues),
     },
     condition: {
       expression: "#status = :pending",
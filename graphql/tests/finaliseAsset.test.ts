@@ -0,0 +1,50 @@
+import { awsAppsyncUtilsMock } from "./mocks";
+
+jest.mock("@aws-appsync/utils", () => awsAppsyncUtilsMock);
+
+import { Context } from "@aws-appsync/utils";
+import { request } from "../mutation/_finaliseAsset/_finaliseAsset";
+import type { FinaliseAssetInput } from "../../appsync/graphql";
+
+const input = { gameId: "game-1", assetId: "asset-1", sectionId: "section-1" };
+
+const createContext = (fields: object) =>
+  ({
+    arguments: { input: { ...input, ...fields } },
+  }) as unknown as Context<{ input: FinaliseAssetInput }>;
+
+describe("request", () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    awsAppsyncUtilsMock.util.time.nowISO8601.mockReturnValue(
+      "2023-01-01T00:00:00.000Z",
+    );
+  });
+
+  it("should move a pending asset to finalising", () => {
+    const result = request(createContext({}));
+
+    expect(result.key).toEqual({
+      PK: { S: "GAME#game-1" },
+      SK: { S: "ASSET#asset-1" },
+    });
+    expect(result.update.expression).toBe(
+      "SET #status = :finalising, #updatedAt = :updatedAt REMOVE #GSI2PK",
+    );
+    expect(result.condition?.expressionValues).toEqual({
+      ":pending": { S: "PENDING" },
+    });
+  });
+
+  it("should record the uploaded size", () => {
+    const result = request(createContext({ sizeBytes: 1024 }));
+
+    expect(result.update.expression).toBe(
+      "SET #status = :finalising, #updatedAt = :updatedAt, #sizeBytes = :sizeBytes REMOVE #GSI2PK",
+    );
+    expect(result.update.expressionNames?.["#sizeBytes"]).toBe("sizeBytes");
+    expect(result.update.expressionValues?.[":sizeBytes"]).toEqual({
+      N: "1024",
+    });
+  });
+});
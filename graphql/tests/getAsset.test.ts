@@ -0,0 +1,77 @@
+import { awsAppsyncUtilsMock } from "./mocks";
+
+jest.mock("@aws-appsync/utils", () => awsAppsyncUtilsMock);
+
+import { Context, AppSyncIdentityCognito } from "@aws-appsync/utils";
+import { request, response } from "../function/getAsset/getAsset";
+import type { GetAssetInput } from "../../appsync/graphql";
+import type { DataAsset } from "../lib/dataTypes";
+
+const input = { gameId: "game-1", assetId: "asset-1" };
+
+describe("request", () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  it("should get the asset's record by game and asset ID", () => {
+    const context = {
+      arguments: { input },
+      identity: { sub: "test-sub" } as AppSyncIdentityCognito,
+    } as unknown as Context<{ input: GetAssetInput }>;
+
+    expect(request(context)).toEqual({
+      operation: "GetItem",
+      key: {
+        PK: { S: "GAME#game-1" },
+        SK: { S: "ASSET#asset-1" },
+      },
+    });
+  });
+
+  it("should throw an error when identity is missing", () => {
+    const context = {
+      arguments: { input },
+    } as unknown as Context<{ input: GetAssetInput }>;
+
+    expect(() => request(context)).toThrow("Unauthorized");
+  });
+});
+
+describe("response", () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  const responseContext = (fields: object) =>
+    ({
+      arguments: { input },
+      ...fields,
+    }) as unknown as Context<
+      { input: GetAssetInput },
+      object,
+      object,
+      object,
+      DataAsset
+    >;
+
+  it("should return the asset", () => {
+    const asset = { ...input, status: "FINALISING" } as DataAsset;
+
+    expect(response(responseContext({ result: asset }))).toEqual(asset);
+  });
+
+  it("should throw an error when the asset does not exist", () => {
+    expect(() => response(responseContext({ result: null }))).toThrow(
+      "Asset not found",
+    );
+  });
+
+  it("should throw an error if context.error is present", () => {
+    expect(() =>
+      response(
+        responseContext({ error: { message: "Some error", type: "SomeType" } }),
+      ),
+    ).toThrow("Some error");
+  });
+});
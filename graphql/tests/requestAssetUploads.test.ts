@@ -0,0 +1,247 @@
+import {
+  request,
+  response,
+} from "../function/requestAssetUploads/requestAssetUploads";
+import {
+  request as signRequest,
+  response as signResponse,
+} from "../function/generatePresignedUrls/generatePresignedUrls";
+import { Context } from "@aws-appsync/utils";
+import type { RequestAssetUploadsInput } from "../../appsync/graphql";
+import {
+  MAX_ASSET_SIZE_BYTES,
+  MAX_ASSET_UPLOAD_BATCH_SIZE,
+} from "../lib/constants/assets";
+
+jest.mock("@aws-appsync/utils", () => {
+  let nextId = 0;
+  return {
+    util: {
+      autoId: jest.fn(() => `asset-${nextId++}`),
+      unauthorized: jest.fn(() => {
+        throw new Error("Unauthorized");
+      }),
+      error: jest.fn((message: string) => {
+        throw new Error(message);
+      }),
+      dynamodb: {
+        toMapValues: jest.fn((obj) => obj),
+      },
+      time: {
+        nowISO8601: jest.fn(() => "2023-01-01T00:00:00.000Z"),
+        nowEpochSeconds: jest.fn(() => 1672531200),
+        epochMilliSecondsToISO8601: jest.fn(() => "2023-01-01T00:01:00.000Z"),
+      },
+    },
+    runtime: {
+      earlyReturn: jest.fn((value: unknown) => {
+        throw { earlyReturn: value };
+      }),
+    },
+  };
+});
+jest.mock("../environment.json", () => ({
+  name: "MOCK",
+}));
+
+const createMockContext = (
+  assets: RequestAssetUploadsInput["assets"],
+  identity: { sub: string } | undefined = { sub: "test-user-id" },
+) =>
+  ({
+    identity: identity,
+    arguments: {
+      input: {
+        gameId: "test-game-id",
+        sectionId: "test-section-id",
+        assets: assets,
+      },
+    },
+    stash: {},
+  }) as unknown as Context<{ input: RequestAssetUploadsInput }>;
+
+describe("requestAssetUploads request function", () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  it("should throw if identity is missing", () => {
+    const context = createMockContext([], undefined);
+    expect(() => request(context)).toThrow("Unauthorized");
+  });
+
+  it("should write every asset in a single transaction", () => {
+    const context = createMockContext([
+      { mimeType: "image/png", sizeBytes: 0, label: "one" },
+      { mimeType: "image/jpeg", sizeBytes: 0 },
+    ]);
+
+    const result = request(context);
+
+    expect(result.operation).toBe("TransactWriteItems");
+    // Two assets, plus the game and section updates
+    expect(result.transactItems).toHaveLength(4);
+
+    const [first, second, game, section] = result.transactItems;
+    expect(first.key).toEqual({
+      PK: "GAME#test-game-id",
+      SK: "ASSET#asset-0",
+    });
+    expect(second.key).toEqual({
+      PK: "GAME#test-game-id",
+      SK: "ASSET#asset-1",
+    });
+    expect(
+      (first as { attributeValues: Record<string, unknown> }).attributeValues,
+    ).toMatchObject({
+      incomingKey:
+        "incoming/game/test-game-id/section/test-section-id/asset-0/original",
+      variantsPrefix:
+        "asset/game/test-game-id/section/test-section-id/asset-0/variants/",
+      label: "one",
+      status: "PENDING",
+      // Expiry bucket containing nowEpochSeconds + ASSET_CLEANUP_TIMEOUT_SECONDS
+      GSI2PK: "EXPIRY#1672531200",
+    });
+    expect(
+      (game as { update: { expressionValues: Record<string, unknown> } }).update
+        .expressionValues[":count"],
+    ).toBe(2);
+    expect(
+      (section as { update: { expressionValues: Record<string, unknown> } })
+        .update.expressionValues[":assetList"],
+    ).toEqual(["asset-0", "asset-1"]);
+
+    expect(context.stash.assets).toHaveLength(2);
+    expect(context.stash.errors).toEqual([]);
+  });
+
+  it("should report invalid items individually", () => {
+    const context = createMockContext([
+      { mimeType: "text/plain", sizeBytes: 0 },
+      { mimeType: "image/gif", sizeBytes: 0 },
+    ]);
+
+    const result = request(context);
+
+    expect(result.transactItems).toHaveLength(3);
+    expect(context.stash.assets[0].index).toBe(1);
+    expect(context.stash.errors).toEqual([
+      {
+        index: 0,
+        errorType: "InvalidMimeType",
+        message: "Invalid mime type. Only images are allowed.",
+      },
+    ]);
+  });
+
+  it("should reserve assets without a size", () => {
+    const context = createMockContext([
+      { mimeType: "image/png" },
+      { mimeType: "image/png", sizeBytes: MAX_ASSET_SIZE_BYTES + 1 },
+    ]);
+
+    const result = request(context);
+
+    // The size is only checked when one is declared
+    expect(result.transactItems).toHaveLength(3);
+    expect(context.stash.assets[0].assetData.sizeBytes).toBeUndefined();
+    expect(context.stash.errors).toEqual([
+      expect.objectContaining({ index: 1, errorType: "FileTooLarge" }),
+    ]);
+  });
+
+  it("should return early when no items are valid", () => {
+    const context = createMockContext([
+      { mimeType: "text/plain", sizeBytes: 0 },
+    ]);
+
+    expect(() => request(context)).toThrow(
+      expect.objectContaining({
+        earlyReturn: expect.objectContaining({ assets: [] }),
+      }),
+    );
+  });
+
+  it("should reject batches over the maximum size", () => {
+    const assets = Array.from(
+      { length: MAX_ASSET_UPLOAD_BATCH_SIZE + 1 },
+      () => ({
+        mimeType: "image/png",
+        sizeBytes: 0,
+      }),
+    );
+    const context = createMockContext(assets);
+
+    expect(() => request(context)).toThrow("Too many assets");
+  });
+});
+
+describe("requestAssetUploads response function", () => {
+  it("should pass assets and errors to the next function", () => {
+    const context = {
+      stash: { assets: [{ index: 0 }], errors: [] },
+    } as unknown as Context;
+
+    expect(response(context)).toEqual({ assets: [{ index: 0 }], errors: [] });
+  });
+});
+
+describe("generatePresignedUrls", () => {
+  it("should invoke the Lambda once with the whole batch", () => {
+    const assets = [{ index: 0 }, { index: 1 }];
+    const context = {
+      prev: { result: { assets: assets, errors: [] } },
+    } as unknown as Context;
+
+    expect(signRequest(context)).toEqual({
+      operation: "Invoke",
+      payload: { assets: assets, maxSizeBytes: MAX_ASSET_SIZE_BYTES },
+    });
+  });
+
+  it("should merge tickets with validation and signing errors", () => {
+    const context = {
+      prev: {
+        result: {
+          errors: [{ index: 0, errorType: "InvalidMimeType", message: "bad" }],
+        },
+      },
+      result: {
+        tickets: [
+          {
+            assetData: {
+              gameId: "test-game-id",
+              sectionId: "test-section-id",
+              assetId: "asset-1",
+              status: "PENDING",
+              mimeType: "image/png",
+              sizeBytes: 0,
+              createdAt: "2023-01-01T00:00:00.000Z",
+              updatedAt: "2023-01-01T00:00:00.000Z",
+              type: "ASSET",
+            },
+            uploadUrl: "https://bucket.s3.amazonaws.com/",
+            uploadFields: { key: "incoming/key" },
+            headers: { assetId: "asset-1" },
+          },
+        ],
+        errors: [
+          {
+            index: 2,
+            assetId: "asset-2",
+            errorType: "PresignedUrlError",
+            message: "failed",
+          },
+        ],
+      },
+    } as unknown as Context;
+
+    const result = signResponse(context);
+
+    expect(result?.tickets).toHaveLength(1);
+    expect(result?.tickets[0].asset.assetId).toBe("asset-1");
+    expect(result?.tickets[0].uploadFields).toBe('{"key":"incoming/key"}');
+    expect(result?.errors.map((e) => e.index)).toEqual([0, 2]);
+  });
+});
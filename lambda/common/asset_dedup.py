@@ -0,0 +1,283 @@
+"""
+Content-addressed deduplication of asset originals.
+
+Players upload the same token and portrait images again and again, so each
+upload is hashed before it is moved out of incoming/. The first asset with
+a given SHA-256 keeps its own original (and variants); later assets with
+the same content are pointed at that object instead of getting a copy.
+
+The hash index lives in the main table:
+
+    PK: ASSETHASH#{sha256}   SK: ASSETHASH
+    bucket, originalKey, variantsPrefix, sizeBytes, gameId, assetId, refCount
+
+An index entry is only written once its original exists in asset/, so a
+duplicate never points at an object that is still being copied.
+
+refCount is the number of assets pointing at the original: the asset that
+indexed it, plus each one linked to it. deleteGame releases its assets'
+references, and deletes the original and its variants once none are left.
+A count of zero is final - nothing more can be linked to the entry.
+"""
+
+from asset_stream import RangedObjectReader, digest_stream
+from lambda_utils import error_code
+
+DDB_PREFIX_GAME = 'GAME'
+DDB_PREFIX_ASSET = 'ASSET'
+DDB_PREFIX_ASSET_HASH = 'ASSETHASH'
+TYPE_ASSET_HASH = 'ASSETHASH'
+ASSET_STATUS_FINALISING = 'FINALISING'
+TRANSACTION_CONDITION_FAILED = 'ConditionalCheckFailed'
+
+
+def hash_object(s3, bucket, key, buffer_bytes=None):
+    """Return (size_bytes, sha256 hex digest) of an S3 object, read in ranged GETs"""
+    with RangedObjectReader(s3, bucket, key, buffer_bytes) as reader:
+        return digest_stream(reader)
+
+
+def object_exists(s3, bucket, key):
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except Exception as e:
+        if error_code(e) in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+
+def index_key(content_hash):
+    return {
+        'PK': {'S': f"{DDB_PREFIX_ASSET_HASH}#{content_hash}"},
+        'SK': {'S': DDB_PREFIX_ASSET_HASH},
+    }
+
+
+def asset_key(game_id, asset_id):
+    return {
+        'PK': {'S': f"{DDB_PREFIX_GAME}#{game_id}"},
+        'SK': {'S': f"{DDB_PREFIX_ASSET}#{asset_id}"},
+    }
+
+
+def _cancelled_conditions(error):
+    """
+    For a cancelled transaction, return whether each item's condition failed
+
+    Cancellations for any other reason (conflicts, throttling) are raised,
+    as they say nothing about the items.
+    """
+    if error_code(error) != 'TransactionCanceledException':
+        raise error
+    codes = [reason.get('Code') for reason in error.response.get('CancellationReasons', [])]
+    if any(code not in ('None', TRANSACTION_CONDITION_FAILED) for code in codes):
+        raise error
+    return [code == TRANSACTION_CONDITION_FAILED for code in codes]
+
+
+class ContentIndex:
+    """The content hash -> original object index, and its links from asset records"""
+
+    def __init__(self, dynamodb, table_name):
+        self._dynamodb = dynamodb
+        self._table_name = table_name
+
+    def lookup(self, content_hash):
+        """Return the indexed original for a hash, or None"""
+        response = self._dynamodb.get_item(
+            TableName=self._table_name,
+            Key=index_key(content_hash),
+            ConsistentRead=True,
+        )
+        item = response.get('Item')
+        if not item:
+            return None
+        return {
+            'bucket': item['bucket']['S'],
+            'originalKey': item['originalKey']['S'],
+            'variantsPrefix': item['variantsPrefix']['S'],
+        }
+
+    def record(self, content_hash, bucket, original_key, variants_prefix, size_bytes, game_id, asset_id):
+        """
+        Index an original that now exists in asset/
+
+        Returns False if the hash is already indexed (another asset with the
+        same content was moved concurrently); both originals are kept.
+        """
+        item = dict(index_key(content_hash))
+        item.update({
+            'type': {'S': TYPE_ASSET_HASH},
+            'contentHash': {'S': content_hash},
+            'bucket': {'S': bucket},
+            'originalKey': {'S': original_key},
+            'variantsPrefix': {'S': variants_prefix},
+            'sizeBytes': {'N': str(size_bytes)},
+            'gameId': {'S': game_id},
+            'assetId': {'S': asset_id},
+            'refCount': {'N': '1'},
+        })
+        try:
+            self._dynamodb.put_item(
+                TableName=self._table_name,
+                Item=item,
+                ConditionExpression='attribute_not_exists(PK)',
+            )
+            return True
+        except Exception as e:
+            if error_code(e) == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def forget(self, content_hash, original_key):
+        """Drop an index entry whose original has gone, unless it has already been replaced"""
+        try:
+            self._dynamodb.delete_item(
+                TableName=self._table_name,
+                Key=index_key(content_hash),
+                ConditionExpression='originalKey = :originalKey',
+                ExpressionAttributeValues={':originalKey': {'S': original_key}},
+            )
+        except Exception as e:
+            if error_code(e) != 'ConditionalCheckFailedException':
+                raise
+
+    def _get_item(self, key):
+        return self._dynamodb.get_item(TableName=self._table_name, Key=key, ConsistentRead=True).get('Item')
+
+    def link_asset(self, game_id, asset_id, content_hash, original=None):
+        """
+        Record the content hash on an asset that is being finalised
+
+        If original (a lookup() result) is given, the asset is also pointed
+        at that object and its variants instead of its own keys, and the
+        original's refCount is incremented in the same transaction. Returns
+        False if the asset is no longer finalising. Raises if the entry no
+        longer points at the original, or is no longer counted.
+        """
+        expression = 'SET #contentHash = :contentHash'
+        names = {'#contentHash': 'contentHash', '#status': 'status'}
+        values = {
+            ':contentHash': {'S': content_hash},
+            ':finalising': {'S': ASSET_STATUS_FINALISING},
+        }
+        if not original:
+            try:
+                self._dynamodb.update_item(
+                    TableName=self._table_name,
+                    Key=asset_key(game_id, asset_id),
+                    UpdateExpression=expression,
+                    ConditionExpression='#status = :finalising',
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues=values,
+                )
+                return True
+            except Exception as e:
+                if error_code(e) == 'ConditionalCheckFailedException':
+                    return False
+                raise
+
+        expression += ', #originalKey = :originalKey, #variantsPrefix = :variantsPrefix'
+        names.update({'#originalKey': 'originalKey', '#variantsPrefix': 'variantsPrefix'})
+        values.update({
+            ':originalKey': {'S': original['originalKey']},
+            ':variantsPrefix': {'S': original['variantsPrefix']},
+        })
+        try:
+            self._dynamodb.transact_write_items(TransactItems=[
+                {'Update': {
+                    'TableName': self._table_name,
+                    'Key': asset_key(game_id, asset_id),
+                    'UpdateExpression': expression,
+                    # Not already linked, so a retried move doesn't count it twice
+                    'ConditionExpression': '#status = :finalising AND #originalKey <> :originalKey',
+                    'ExpressionAttributeNames': names,
+                    'ExpressionAttributeValues': values,
+                }},
+                {'Update': {
+                    'TableName': self._table_name,
+                    'Key': index_key(content_hash),
+                    'UpdateExpression': 'ADD #refCount :one',
+                    'ConditionExpression': '#originalKey = :originalKey AND #refCount > :zero',
+                    'ExpressionAttributeNames': {'#originalKey': 'originalKey', '#refCount': 'refCount'},
+                    'ExpressionAttributeValues': {
+                        ':originalKey': {'S': original['originalKey']},
+                        ':one': {'N': '1'},
+                        ':zero': {'N': '0'},
+                    },
+                }},
+            ])
+            return True
+        except Exception as e:
+            _, entry_failed = _cancelled_conditions(e)
+            if entry_failed:
+                raise
+
+        # The asset's condition failed: find out whether it was already linked
+        asset = self._get_item(asset_key(game_id, asset_id)) or {}
+        return (asset.get('status', {}).get('S') == ASSET_STATUS_FINALISING
+                and asset.get('originalKey', {}).get('S') == original['originalKey'])
+
+    def release(self, game_id, asset_id, content_hash, original_key):
+        """
+        Drop a deleted asset's reference to its original
+
+        The asset record is marked as released in the same transaction as
+        the decrement, so repeating this after a failed cleanup doesn't
+        count it twice; the record must only be deleted afterwards. Returns
+        True if nothing references the original any more, so it and its
+        variants can be deleted and the entry forgotten: either the count
+        reached zero, or the original was never indexed (another asset with
+        the same content was indexed first) and belongs to this asset alone.
+        """
+        try:
+            self._dynamodb.transact_write_items(TransactItems=[
+                {'Update': {
+                    'TableName': self._table_name,
+                    'Key': asset_key(game_id, asset_id),
+                    'UpdateExpression': 'SET #released = :released',
+                    'ConditionExpression': 'attribute_exists(PK) AND attribute_not_exists(#released)',
+                    'ExpressionAttributeNames': {'#released': 'originalReleased'},
+                    'ExpressionAttributeValues': {':released': {'BOOL': True}},
+                }},
+                {'Update': {
+                    'TableName': self._table_name,
+                    'Key': index_key(content_hash),
+                    'UpdateExpression': 'ADD #refCount :minusOne',
+                    'ConditionExpression': '#originalKey = :originalKey AND #refCount > :zero',
+                    'ExpressionAttributeNames': {'#originalKey': 'originalKey', '#refCount': 'refCount'},
+                    'ExpressionAttributeValues': {
+                        ':originalKey': {'S': original_key},
+                        ':minusOne': {'N': '-1'},
+                        ':zero': {'N': '0'},
+                    },
+                }},
+            ])
+        except Exception as e:
+            # Already released, or the entry isn't counting this original
+            _cancelled_conditions(e)
+
+        entry = self._get_item(index_key(content_hash))
+        if not entry or entry['originalKey']['S'] != original_key:
+            return True
+        if 'refCount' not in entry:
+            # Indexed before references were counted, so other assets may share it
+            return False
+        return int(entry['refCount']['N']) <= 0
+
+
+def find_duplicate(s3, index, content_hash, original_key):
+    """
+    Return the indexed original to share for this content, or None
+
+    An index entry for the asset's own key (a retried move) is not a
+    duplicate, and an entry whose object has gone is dropped.
+    """
+    existing = index.lookup(content_hash)
+    if not existing or existing['originalKey'] == original_key:
+        return None
+    if not object_exists(s3, existing['bucket'], existing['originalKey']):
+        index.forget(content_hash, existing['originalKey'])
+        return None
+    return existing
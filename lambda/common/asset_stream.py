@@ -0,0 +1,305 @@
+"""
+Bounded-memory streaming I/O for asset bytes.
+
+Assets can be as large as the upload limit allows, so nothing here reads a
+whole object into memory:
+
+- RangedObjectReader is a seekable file over an S3 object that fetches it in
+  ranged GETs and keeps only a few chunks cached, so decoders (e.g. Pillow)
+  read it incrementally.
+- MultipartUploadWriter is a writable file that uploads to S3 in parts as
+  they fill, falling back to a single PutObject for small objects.
+- MultipartFormBody streams a file from disk as a multipart/form-data body
+  for presigned POST uploads.
+- digest_stream hashes a stream chunk by chunk, for verifying uploads.
+
+Memory use is set by a single buffer size (ASSET_STREAM_BUFFER_BYTES), which
+bounds the reader's cache; the writer holds at most one part (never less
+than S3's 5 MiB minimum part size).
+"""
+
+import hashlib
+import io
+import os
+import uuid
+from collections import OrderedDict
+from lambda_utils import error_code
+
+DEFAULT_BUFFER_BYTES = 16 * 1024 * 1024
+MIN_PART_BYTES = 5 * 1024 * 1024  # S3's minimum size for all but the last part
+MIN_CHUNK_BYTES = 64 * 1024
+READER_CACHED_CHUNKS = 4
+FORM_CHUNK_BYTES = 64 * 1024
+
+
+def buffer_bytes_from_env(default=DEFAULT_BUFFER_BYTES):
+    """Return the configured stream buffer size in bytes"""
+    value = os.environ.get('ASSET_STREAM_BUFFER_BYTES')
+    if not value:
+        return default
+    buffer_bytes = int(value)
+    if buffer_bytes < MIN_CHUNK_BYTES * READER_CACHED_CHUNKS:
+        raise ValueError(f"ASSET_STREAM_BUFFER_BYTES must be at least {MIN_CHUNK_BYTES * READER_CACHED_CHUNKS}")
+    return buffer_bytes
+
+
+class RangedObjectReader(io.RawIOBase):
+    """
+    Seekable, read-only file over an S3 object, fetched in ranged GETs
+
+    At most READER_CACHED_CHUNKS chunks are held at once (least recently
+    used are dropped). With the default chunk size, an object smaller than
+    a quarter of the buffer is fetched in a single GET.
+    """
+
+    def __init__(self, s3, bucket, key, buffer_bytes=None):
+        super().__init__()
+        buffer_bytes = buffer_bytes or buffer_bytes_from_env()
+        self._s3 = s3
+        self._bucket = bucket
+        self._key = key
+        self._chunk_bytes = max(MIN_CHUNK_BYTES, buffer_bytes // READER_CACHED_CHUNKS)
+        self._chunks = OrderedDict()  # chunk index -> bytes
+        self._position = 0
+        self._size = None  # Learnt from the first response's Content-Range
+        self.requests = 0
+        self.bytes_fetched = 0
+
+    @property
+    def size(self):
+        if self._size is None:
+            self._get_chunk(0)
+        return self._size
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def readinto(self, buffer):
+        if self._position >= self.size:
+            return 0
+
+        index, offset = divmod(self._position, self._chunk_bytes)
+        chunk = self._get_chunk(index)
+        count = min(len(buffer), len(chunk) - offset)
+        buffer[:count] = chunk[offset:offset + count]
+        self._position += count
+        return count
+
+    def _get_chunk(self, index):
+        chunk = self._chunks.get(index)
+        if chunk is not None:
+            self._chunks.move_to_end(index)
+            return chunk
+
+        start = index * self._chunk_bytes
+        end = start + self._chunk_bytes - 1
+        try:
+            response = self._s3.get_object(Bucket=self._bucket, Key=self._key, Range=f"bytes={start}-{end}")
+        except Exception as e:
+            # A ranged GET of an empty object is an invalid range
+            if start == 0 and error_code(e) == 'InvalidRange':
+                self._size = 0
+                return b''
+            raise
+
+        body = response['Body']
+        try:
+            chunk = body.read()
+        finally:
+            body.close()
+        self.requests += 1
+        self.bytes_fetched += len(chunk)
+
+        if self._size is None:
+            content_range = response.get('ContentRange')  # "bytes 0-1023/4096"
+            self._size = int(content_range.rsplit('/', 1)[1]) if content_range else len(chunk)
+
+        self._chunks[index] = chunk
+        while len(self._chunks) > READER_CACHED_CHUNKS:
+            self._chunks.popitem(last=False)
+        return chunk
+
+
+class MultipartUploadWriter(io.RawIOBase):
+    """
+    Writable file that streams to an S3 object in multipart upload parts
+
+    Nothing is uploaded until a full part is buffered; if the file is closed
+    before then, the object is written with a single PutObject. Extra
+    arguments (ContentType, CacheControl, Metadata, ...) are passed to
+    PutObject/CreateMultipartUpload. Use as a context manager so that an
+    exception aborts the upload rather than completing it; a writer that is
+    garbage collected without being closed is aborted too.
+    """
+
+    def __init__(self, s3, bucket, key, part_bytes=MIN_PART_BYTES, **put_args):
+        super().__init__()
+        self._s3 = s3
+        self._bucket = bucket
+        self._key = key
+        self._part_bytes = part_bytes
+        self._put_args = put_args
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self.bytes_written = 0
+        if part_bytes < MIN_PART_BYTES:
+            raise ValueError(f"part_bytes must be at least {MIN_PART_BYTES}")
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.bytes_written
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed file")
+        view = memoryview(data).cast('B')
+        # Take the data a part at a time, so a large write never buffers more than one part
+        offset = 0
+        while offset < len(view):
+            size = min(self._part_bytes - len(self._buffer), len(view) - offset)
+            self._buffer += view[offset:offset + size]
+            offset += size
+            self.bytes_written += size
+            if len(self._buffer) == self._part_bytes:
+                self._upload_part(self._buffer)
+                self._buffer = bytearray()
+        return len(view)
+
+    def _upload_part(self, data):
+        if self._upload_id is None:
+            response = self._s3.create_multipart_upload(Bucket=self._bucket, Key=self._key, **self._put_args)
+            self._upload_id = response['UploadId']
+
+        part_number = len(self._parts) + 1
+        response = self._s3.upload_part(
+            Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+            PartNumber=part_number, Body=bytes(data)
+        )
+        self._parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self._s3.put_object(Bucket=self._bucket, Key=self._key, Body=bytes(self._buffer), **self._put_args)
+            else:
+                if self._buffer:
+                    self._upload_part(self._buffer)
+                self._s3.complete_multipart_upload(
+                    Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+                    MultipartUpload={'Parts': self._parts}
+                )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self):
+        """Discard the upload without writing the object"""
+        if self._upload_id is not None:
+            self._s3.abort_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id)
+            self._upload_id = None
+        self._buffer = bytearray()
+        super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def __del__(self):
+        # IOBase.__del__ closes the file, which would complete a partial object
+        if not self.closed:
+            print(f"Aborting upload to {self._key}: writer was not closed")
+            self.abort()
+        super().__del__()
+
+
+class MultipartFormBody:
+    """
+    multipart/form-data body for a presigned POST, streamed from a file
+
+    Iterating yields the form fields, then the file in chunks, then the
+    closing boundary; content_length is known up front, so it can be sent
+    as the request body without building it in memory.
+    """
+
+    def __init__(self, fields, file_path, content_type, filename=None, chunk_bytes=FORM_CHUNK_BYTES):
+        self.boundary = f"FormBoundary{uuid.uuid4().hex}"
+        self._file_path = file_path
+        self._chunk_bytes = chunk_bytes
+
+        # S3 requires the file to be the last field
+        head = []
+        for name, value in fields.items():
+            head.append(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{value}\r\n'
+            )
+        head.append(
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="{filename or os.path.basename(file_path)}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        )
+        self._head = ''.join(head).encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self.content_length = len(self._head) + os.path.getsize(file_path) + len(self._tail)
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        # Lets requests send a Content-Length rather than chunking, which S3 POST rejects
+        return self.content_length
+
+    def __iter__(self):
+        yield self._head
+        with open(self._file_path, 'rb') as f:
+            while True:
+                chunk = f.read(self._chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk
+        yield self._tail
+
+
+def digest_stream(source, chunk_bytes=MIN_CHUNK_BYTES):
+    """Return (size_bytes, sha256 hex digest) of a binary file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = source.read(chunk_bytes)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    return size, digest.hexdigest()
@@ -0,0 +1,74 @@
+"""
+Helpers shared by the table stream and scheduled Lambdas.
+
+Each function's zip bundles this module alongside its lambda_function.py
+(see the archive_file blocks in terraform/module/wildsea), so it is
+imported as a top-level module.
+"""
+
+import json
+import time
+
+_clients = {}
+
+
+def get_client(service, max_pool_connections=None):
+    """
+    Return a cached botocore client
+
+    max_pool_connections sizes the connection pool for a Lambda's
+    concurrent calls; botocore's default of 10 is used otherwise. Clients
+    are cached by service, so each Lambda should pass the same size.
+    """
+    if service not in _clients:
+        import botocore.session
+        from botocore.config import Config
+
+        options = {}
+        if max_pool_connections:
+            options['max_pool_connections'] = max_pool_connections
+        _clients[service] = botocore.session.get_session().create_client(service, config=Config(
+            read_timeout=30,
+            connect_timeout=5,
+            retries={'max_attempts': 3, 'mode': 'standard'},
+            **options,
+        ))
+    return _clients[service]
+
+
+def error_code(error):
+    """Return the AWS error code of a botocore ClientError, or None for any other exception"""
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def parse_records(records, parse):
+    """Return parse(record) for each stream record, skipping malformed ones"""
+    parsed = []
+    for record in records:
+        try:
+            parsed.append(parse(record))
+        except (KeyError, IndexError, ValueError) as e:
+            # A malformed record will never succeed; retrying it would block the shard
+            print(f"Skipping malformed record {record.get('eventID')}: {str(e)}")
+    return parsed
+
+
+def print_metrics(namespace, metrics, properties=None):
+    """
+    Log metrics in CloudWatch embedded metric format
+
+    metrics is a list of (name, unit, value) tuples; properties are logged
+    alongside them without becoming metrics or dimensions.
+    """
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [[]],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, unit, _ in metrics],
+            }],
+        },
+        **(properties or {}),
+        **{name: value for name, _, value in metrics},
+    }))
@@ -0,0 +1,253 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+from asset_dedup import ContentIndex
+from lambda_utils import get_client, parse_records, print_metrics
+
+# Constants
+DDB_PREFIX_GAME = 'GAME'
+DDB_PREFIX_PLAYER = 'PLAYER'
+DDB_PREFIX_ASSET = 'ASSET'
+ASSET_STATUSES_WITH_ORIGINAL = ('FINALISING', 'READY')  # Moved, or being moved, to asset/
+MAX_CONCURRENT_WRITES = 8
+MAX_EVENT_ENTRIES = 10  # PutEvents limit
+MAX_BATCH_WRITE_ITEMS = 25  # BatchWriteItem limit
+MAX_DELETE_KEYS = 1000  # DeleteObjects limit
+MAX_UNPROCESSED_RETRIES = 5
+METRICS_NAMESPACE = 'Wildsea/GameDeletion'
+
+@dataclass
+class DeletionStats:
+    """Throughput of one game's cleanup"""
+    game_id: str
+    pages: int = 0
+    items: int = 0
+    player_events: int = 0
+    items_deleted: int = 0
+    uploads_deleted: int = 0
+    originals_deleted: int = 0
+    originals_kept: int = 0
+    write_calls: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, errors=(), **counts):
+        """Add one write's counts and errors; called from the worker threads"""
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+            self.errors.extend(errors)
+
+    @property
+    def items_per_second(self):
+        return self.items / self.seconds if self.seconds else 0.0
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def query_game_items(dynamodb, table_name, game_id, stats):
+    """Yield each page of items in the game's partition, other than the game record itself"""
+    params = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'PK = :pk',
+        'ProjectionExpression': 'PK, SK, userId, incomingKey, #status, originalKey, variantsPrefix, contentHash',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':pk': {'S': f"{DDB_PREFIX_GAME}#{game_id}"}},
+    }
+    while True:
+        response = dynamodb.query(**params)
+        stats.pages += 1
+        items = [item for item in response.get('Items', []) if item['SK']['S'] != DDB_PREFIX_GAME]
+        stats.items += len(items)
+        yield items
+        if 'LastEvaluatedKey' not in response:
+            return
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def send_delete_player_events(events_client, game_id, user_ids, stats):
+    """Send up to MAX_EVENT_ENTRIES DeletePlayer events in one call"""
+    entries = [{
+        'Source': os.environ['DELETE_SOURCE'],
+        'DetailType': os.environ['DELETE_PLAYER_DETAIL_TYPE'],
+        'EventBusName': os.environ['EVENT_BUS_NAME'],
+        'Detail': json.dumps({'gameId': game_id, 'userId': user_id}),
+    } for user_id in user_ids]
+    response = events_client.put_events(Entries=entries)
+    # Entries are returned in request order
+    errors = [f"DeletePlayer event for {user_id}: {entry['ErrorCode']}"
+              for user_id, entry in zip(user_ids, response.get('Entries', [])) if entry.get('ErrorCode')]
+    stats.record(errors, write_calls=1, player_events=len(user_ids) - len(errors))
+
+def batch_delete_items(dynamodb, table_name, keys, stats):
+    """Delete up to MAX_BATCH_WRITE_ITEMS items, retrying unprocessed ones with backoff"""
+    requests = [{'DeleteRequest': {'Key': key}} for key in keys]
+    for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+        if attempt:
+            # Full jitter, so concurrent batches don't retry in step
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+        response = dynamodb.batch_write_item(RequestItems={table_name: requests})
+        unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+        stats.record(write_calls=1, items_deleted=len(requests) - len(unprocessed))
+        if not unprocessed:
+            return
+        requests = unprocessed
+    stats.record([f"{len(requests)} items still unprocessed after {MAX_UNPROCESSED_RETRIES} retries"])
+
+def delete_uploads(s3, bucket, keys, stats):
+    """Delete up to MAX_DELETE_KEYS incoming uploads"""
+    response = s3.delete_objects(Bucket=bucket, Delete={
+        'Objects': [{'Key': key} for key in keys],
+        'Quiet': True,
+    })
+    errors = [f"Upload {error['Key']}: {error.get('Code')}" for error in response.get('Errors', [])]
+    stats.record(errors, write_calls=1, uploads_deleted=len(keys) - len(errors))
+
+def list_keys(s3, bucket, prefix):
+    keys = []
+    params = {'Bucket': bucket, 'Prefix': prefix}
+    while True:
+        response = s3.list_objects_v2(**params)
+        keys.extend(entry['Key'] for entry in response.get('Contents', []))
+        if not response.get('IsTruncated'):
+            return keys
+        params['ContinuationToken'] = response['NextContinuationToken']
+
+def release_original(s3, index, bucket, game_id, asset, released, stats):
+    """
+    Drop an asset's reference to its original, deleting the original and
+    its variants once nothing references them
+
+    The asset's key is added to released when it is safe to delete the
+    asset record; until then, a retried cleanup will find it again.
+    """
+    asset_id = asset['SK']['S'].split('#', 1)[1]
+    original_key = asset['originalKey']['S']
+    content_hash = asset.get('contentHash', {}).get('S')
+
+    # Without a content hash, the asset was moved without deduplication and the original is its own
+    if content_hash and not index.release(game_id, asset_id, content_hash, original_key):
+        stats.record(originals_kept=1)
+        released.append({'PK': asset['PK'], 'SK': asset['SK']})
+        return
+
+    keys = [original_key]
+    if 'variantsPrefix' in asset:
+        keys += list_keys(s3, bucket, asset['variantsPrefix']['S'])
+    for chunk in _chunks(keys, MAX_DELETE_KEYS):
+        response = s3.delete_objects(Bucket=bucket, Delete={
+            'Objects': [{'Key': key} for key in chunk],
+            'Quiet': True,
+        })
+        errors = [f"Original {error['Key']}: {error.get('Code')}" for error in response.get('Errors', [])]
+        stats.record(errors, write_calls=1)
+        if errors:
+            return
+    if content_hash:
+        index.forget(content_hash, original_key)
+    stats.record(originals_deleted=1)
+    released.append({'PK': asset['PK'], 'SK': asset['SK']})
+
+def delete_game(game_id, dynamodb, events_client, s3, table_name, bucket):
+    """
+    Clean up everything left in a deleted game's partition
+
+    Players and NPCs are removed through DeletePlayer events, so deletePlayer
+    notifies their subscribers and removes their sections. Everything else
+    (sections, assets) is deleted directly, along with any uploads still in
+    incoming/. Each moved asset's reference to its original is released
+    first, and the original and its variants are deleted once no other
+    asset (in this game or another) shares them through the content index.
+    """
+    stats = DeletionStats(game_id=game_id)
+    index = ContentIndex(dynamodb, table_name)
+    started = time.monotonic()
+    released = []  # Asset records whose originals have been dealt with
+
+    def run(function, *args):
+        try:
+            function(*args, stats)
+        except Exception as e:
+            stats.record([f"{function.__name__}: {str(e)}"])
+
+    # Each page's writes are in flight while the next page is fetched
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_WRITES) as executor:
+        for items in query_game_items(dynamodb, table_name, game_id, stats):
+            players = [item['SK']['S'].split('#', 1)[1] for item in items
+                       if item['SK']['S'].startswith(DDB_PREFIX_PLAYER + '#')]
+            assets = [item for item in items if item['SK']['S'].startswith(DDB_PREFIX_ASSET + '#')]
+            with_originals = [item for item in assets if 'originalKey' in item
+                              and item.get('status', {}).get('S') in ASSET_STATUSES_WITH_ORIGINAL]
+            # Those records are deleted once their originals are released
+            held = {item['SK']['S'] for item in with_originals}
+            keys = [{'PK': item['PK'], 'SK': item['SK']} for item in items
+                    if not item['SK']['S'].startswith(DDB_PREFIX_PLAYER + '#') and item['SK']['S'] not in held]
+            uploads = [item['incomingKey']['S'] for item in assets if 'incomingKey' in item]
+
+            for chunk in _chunks(players, MAX_EVENT_ENTRIES):
+                executor.submit(run, send_delete_player_events, events_client, game_id, chunk)
+            for chunk in _chunks(keys, MAX_BATCH_WRITE_ITEMS):
+                executor.submit(run, batch_delete_items, dynamodb, table_name, chunk)
+            for chunk in _chunks(uploads, MAX_DELETE_KEYS):
+                executor.submit(run, delete_uploads, s3, bucket, chunk)
+            for asset in with_originals:
+                executor.submit(run, release_original, s3, index, bucket, game_id, asset, released)
+
+    # Only now can the released assets' records go
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_WRITES) as executor:
+        for chunk in _chunks(released, MAX_BATCH_WRITE_ITEMS):
+            executor.submit(run, batch_delete_items, dynamodb, table_name, chunk)
+
+    stats.seconds = time.monotonic() - started
+    return stats
+
+def log_metrics(stats):
+    """Log the deletion's throughput in CloudWatch embedded metric format"""
+    print_metrics(METRICS_NAMESPACE, [
+        ('ItemsFound', 'Count', stats.items),
+        ('PlayerEvents', 'Count', stats.player_events),
+        ('ItemsDeleted', 'Count', stats.items_deleted),
+        ('UploadsDeleted', 'Count', stats.uploads_deleted),
+        ('OriginalsDeleted', 'Count', stats.originals_deleted),
+        ('OriginalsKept', 'Count', stats.originals_kept),
+        ('WriteCalls', 'Count', stats.write_calls),
+        ('Errors', 'Count', len(stats.errors)),
+        ('Duration', 'Seconds', round(stats.seconds, 3)),
+        ('ItemsPerSecond', 'Count/Second', round(stats.items_per_second, 1)),
+    ], {'gameId': stats.game_id})
+
+def lambda_handler(event, context):
+    """
+    Clean up the partitions of deleted games
+
+    Invoked by the DynamoDB stream event source mapping with REMOVE records
+    for game records. Cleanup is idempotent, so a game that fails is
+    reported as a partial batch failure and swept again from the start.
+    """
+    table_name = os.environ['TABLE_NAME']
+    bucket = os.environ['ASSET_BUCKET']
+    dynamodb = get_client('dynamodb', MAX_CONCURRENT_WRITES)
+    events_client = get_client('events', MAX_CONCURRENT_WRITES)
+    s3 = get_client('s3', MAX_CONCURRENT_WRITES)
+
+    def parse(record):
+        return record['dynamodb']['Keys']['PK']['S'].split('#', 1)[1], record['dynamodb']['SequenceNumber']
+
+    failures = []
+    for game_id, sequence_number in parse_records(event.get('Records', []), parse):
+        stats = delete_game(game_id, dynamodb, events_client, s3, table_name, bucket)
+        log_metrics(stats)
+        if stats.errors:
+            for error in stats.errors:
+                print(f"Failed to clean up game {game_id}: {error}")
+            failures.append({'itemIdentifier': sequence_number})
+            # Records after a failure are retried with it, so stop here
+            break
+
+    return {'batchItemFailures': failures}
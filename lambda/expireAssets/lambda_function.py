@@ -0,0 +1,210 @@
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+from lambda_utils import get_client, error_code
+
+# Constants
+EXPIRY_BUCKET_SECONDS = 5 * 60  # ASSET_EXPIRY_BUCKET_SECONDS
+MAX_SWEEP_BUCKETS = 288  # A day of buckets per sweep, so catching up after an outage is spread over several
+INDEX_LAG_BUCKETS = 1  # Swept buckets to check again, for index entries that arrived late
+EXPIRY_INDEX_NAME = 'GSI2'
+DDB_PREFIX_EXPIRY = 'EXPIRY'
+DDB_PREFIX_EXPIRY_SWEEP = 'EXPIRYSWEEP'
+TYPE_EXPIRY_SWEEP = 'EXPIRYSWEEP'
+ASSET_STATUS_PENDING = 'PENDING'
+MAX_EVENT_ENTRIES = 10  # PutEvents limit
+
+class ExpirySweepError(Exception):
+    """Raised when some due assets could not be sent for expiry"""
+    pass
+
+@dataclass
+class SweepResult:
+    buckets: int = 0
+    due: int = 0
+    sent: int = 0
+    failed: List[str] = field(default_factory=list)
+    next_bucket: Optional[int] = None  # Where the next sweep starts
+
+def bucket_start(epoch_seconds):
+    return (epoch_seconds // EXPIRY_BUCKET_SECONDS) * EXPIRY_BUCKET_SECONDS
+
+def bucket_key(bucket_start_seconds):
+    return f"{DDB_PREFIX_EXPIRY}#{bucket_start_seconds}"
+
+def due_buckets(start_bucket, now_seconds):
+    """Starts of the expiry buckets from start_bucket up to the current one, oldest first"""
+    current = bucket_start(now_seconds)
+    return list(range(start_bucket, current + 1, EXPIRY_BUCKET_SECONDS))[:MAX_SWEEP_BUCKETS]
+
+def cursor_key():
+    return {'PK': {'S': DDB_PREFIX_EXPIRY_SWEEP}, 'SK': {'S': DDB_PREFIX_EXPIRY_SWEEP}}
+
+def load_cursor(dynamodb, table_name):
+    """The bucket the last sweep left off at, or None before the first sweep"""
+    item = dynamodb.get_item(TableName=table_name, Key=cursor_key(), ConsistentRead=True).get('Item')
+    return int(item['bucketStart']['N']) if item else None
+
+def save_cursor(dynamodb, table_name, start_bucket):
+    """Record where the next sweep starts, unless a concurrent sweep has already moved past it"""
+    try:
+        dynamodb.put_item(
+            TableName=table_name,
+            Item={
+                **cursor_key(),
+                'type': {'S': TYPE_EXPIRY_SWEEP},
+                'bucketStart': {'N': str(start_bucket)},
+                'updatedAt': {'S': to_iso8601(time.time())},
+            },
+            ConditionExpression='attribute_not_exists(PK) OR bucketStart <= :bucketStart',
+            ExpressionAttributeValues={':bucketStart': {'N': str(start_bucket)}},
+        )
+    except Exception as e:
+        if error_code(e) != 'ConditionalCheckFailedException':
+            raise
+
+def oldest_bucket(dynamodb, table_name):
+    """Start of the oldest expiry bucket with an asset in it, or None if there are none"""
+    # The index only holds pending assets, so scanning it is cheap
+    params = {
+        'TableName': table_name,
+        'IndexName': EXPIRY_INDEX_NAME,
+        'ProjectionExpression': '#bucket',
+        'ExpressionAttributeNames': {'#bucket': 'GSI2PK'},
+    }
+    oldest = None
+    while True:
+        response = dynamodb.scan(**params)
+        for item in response.get('Items', []):
+            start = int(item['GSI2PK']['S'].split('#', 1)[1])
+            oldest = start if oldest is None else min(oldest, start)
+        if 'LastEvaluatedKey' not in response:
+            return oldest
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def to_iso8601(epoch_seconds):
+    """Format like AppSync's util.time.epochMilliSecondsToISO8601, so the strings compare correctly"""
+    moment = datetime.fromtimestamp(epoch_seconds, tz=timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond // 1000:03d}Z"
+
+def query_due_assets(dynamodb, table_name, expiry_bucket, now_iso):
+    """Yield (gameId, assetId) for pending assets in a bucket that are due by now"""
+    params = {
+        'TableName': table_name,
+        'IndexName': EXPIRY_INDEX_NAME,
+        'KeyConditionExpression': '#bucket = :bucket AND #expireUploadAt <= :now',
+        # The index is sparse, but it is updated asynchronously
+        'FilterExpression': '#status = :pending',
+        'ProjectionExpression': '#gameId, #assetId',
+        'ExpressionAttributeNames': {
+            '#bucket': 'GSI2PK',
+            '#expireUploadAt': 'expireUploadAt',
+            '#status': 'status',
+            '#gameId': 'gameId',
+            '#assetId': 'assetId',
+        },
+        'ExpressionAttributeValues': {
+            ':bucket': {'S': expiry_bucket},
+            ':now': {'S': now_iso},
+            ':pending': {'S': ASSET_STATUS_PENDING},
+        },
+    }
+    while True:
+        response = dynamodb.query(**params)
+        for item in response.get('Items', []):
+            yield item['gameId']['S'], item['assetId']['S']
+        if 'LastEvaluatedKey' not in response:
+            return
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def expire_event(game_id, asset_id):
+    return {
+        'Source': os.environ['EXPIRE_SOURCE'],
+        'DetailType': os.environ['EXPIRE_DETAIL_TYPE'],
+        'EventBusName': os.environ['EVENT_BUS_NAME'],
+        'Detail': json.dumps({'gameId': game_id, 'assetId': asset_id}),
+    }
+
+def send_expire_events(events_client, assets, result):
+    """Send ExpireAsset events MAX_EVENT_ENTRIES at a time, recording any that fail"""
+    for start in range(0, len(assets), MAX_EVENT_ENTRIES):
+        chunk = assets[start:start + MAX_EVENT_ENTRIES]
+        try:
+            response = events_client.put_events(Entries=[expire_event(*asset) for asset in chunk])
+        except Exception as e:
+            print(f"Failed to send {len(chunk)} expiry events: {str(e)}")
+            result.failed.extend(asset_id for _, asset_id in chunk)
+            continue
+        # Entries are returned in request order
+        for (_, asset_id), entry in zip(chunk, response.get('Entries', [])):
+            if entry.get('ErrorCode'):
+                print(f"Failed to send expiry event for asset {asset_id}: {entry['ErrorCode']}")
+                result.failed.append(asset_id)
+            else:
+                result.sent += 1
+
+def sweep(dynamodb, events_client, table_name, now_seconds, start_bucket):
+    """
+    Send ExpireAsset events for every pending asset in the buckets from
+    start_bucket that is due by now_seconds
+
+    The next sweep starts from the oldest bucket with an event that failed
+    to send, or else INDEX_LAG_BUCKETS before the last bucket swept.
+    """
+    result = SweepResult()
+    now_iso = to_iso8601(now_seconds)
+    buckets = due_buckets(start_bucket, now_seconds)
+    failed_bucket = None
+    for expiry_bucket in buckets:
+        result.buckets += 1
+        failed = len(result.failed)
+        assets = list(query_due_assets(dynamodb, table_name, bucket_key(expiry_bucket), now_iso))
+        result.due += len(assets)
+        send_expire_events(events_client, assets, result)
+        if failed_bucket is None and len(result.failed) > failed:
+            failed_bucket = expiry_bucket
+
+    if failed_bucket is not None:
+        result.next_bucket = failed_bucket
+    elif buckets:
+        # Every asset in a bucket before the current one was due, so only index lag can add to it
+        caught_up = bucket_start(now_seconds) - INDEX_LAG_BUCKETS * EXPIRY_BUCKET_SECONDS
+        result.next_bucket = max(start_bucket, min(buckets[-1] + EXPIRY_BUCKET_SECONDS, caught_up))
+    else:
+        result.next_bucket = start_bucket
+    return result
+
+def run_sweep(dynamodb, events_client, table_name, now_seconds):
+    """Sweep from where the last sweep left off, or from the oldest bucket on the first run"""
+    start_bucket = load_cursor(dynamodb, table_name)
+    if start_bucket is None:
+        # New uploads expire in the current bucket at the earliest, so never start after it
+        oldest = oldest_bucket(dynamodb, table_name)
+        start_bucket = bucket_start(now_seconds) if oldest is None else min(oldest, bucket_start(now_seconds))
+    result = sweep(dynamodb, events_client, table_name, now_seconds, start_bucket)
+    save_cursor(dynamodb, table_name, result.next_bucket)
+    return result
+
+def lambda_handler(event, context):
+    """
+    Sweep the expiry index for pending assets whose upload window has passed
+
+    Invoked on a schedule. Each sweep resumes from the bucket recorded by
+    the last one, so missed or failed sweeps are caught up on. Sending the
+    same asset twice is harmless: _expireAsset only changes assets that are
+    still PENDING, and removes them from the index when it does.
+    """
+    now_seconds = int(time.time())
+
+    result = run_sweep(get_client('dynamodb'), get_client('events'), os.environ['TABLE_NAME'], now_seconds)
+    print(f"Checked {result.buckets} buckets: {result.due} assets due, "
+          f"{result.sent} expiry events sent, {len(result.failed)} failed")
+
+    if result.failed:
+        # Let the asynchronous invocation retry; already-sent assets will be skipped or ignored
+        raise ExpirySweepError(f"Failed to send expiry events for {len(result.failed)} assets")
+
+    return {'due': result.due, 'sent': result.sent}
@@ -0,0 +1,114 @@
+import os
+from asset_stream import RangedObjectReader, MultipartUploadWriter, buffer_bytes_from_env
+from variants import generate_variants
+
+# Constants
+ORIGINAL_SUFFIX = '/original'
+VARIANTS_SUFFIX = '/variants/'
+VARIANT_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_s3_client = None
+
+def get_s3_client():
+    """
+    Return the cached S3 client
+
+    S3_ENDPOINT_URL points the client at a local S3 stand-in (MinIO, moto)
+    for testing; in Lambda it is unset and the regional endpoint is used.
+    """
+    global _s3_client
+    if _s3_client is None:
+        import botocore.session
+        from botocore.config import Config
+
+        _s3_client = botocore.session.get_session().create_client(
+            's3',
+            endpoint_url=os.environ.get('S3_ENDPOINT_URL') or None,
+            config=Config(
+                signature_version='s3v4',
+                read_timeout=30,
+                connect_timeout=5,
+                retries={'max_attempts': 3},
+                s3={'addressing_style': 'path'} if os.environ.get('S3_ENDPOINT_URL') else None,
+            )
+        )
+    return _s3_client
+
+class VariantGenerationError(Exception):
+    """Custom exception for variant generation errors"""
+    pass
+
+def variants_prefix_for(original_key):
+    """Map asset/.../{assetId}/original to asset/.../{assetId}/variants/"""
+    if not original_key.startswith('asset/') or not original_key.endswith(ORIGINAL_SUFFIX):
+        raise ValueError(f"Not a promoted asset original: {original_key}")
+    return original_key[:-len(ORIGINAL_SUFFIX)] + VARIANTS_SUFFIX
+
+def process_asset(bucket, key):
+    """
+    Generate and upload every variant of one asset
+
+    The original is decoded from ranged GETs and each variant is streamed
+    back to S3 as it is encoded, so neither is held in memory whole.
+    """
+    s3 = get_s3_client()
+    variants_prefix = variants_prefix_for(key)
+
+    def open_output(variant_key, mime_type):
+        return MultipartUploadWriter(
+            s3, bucket, variant_key,
+            ContentType=mime_type,
+            CacheControl=VARIANT_CACHE_CONTROL,
+        )
+
+    with RangedObjectReader(s3, bucket, key, buffer_bytes_from_env()) as original:
+        variants = generate_variants(original, variants_prefix, open_output)
+        print(f"Read {original.bytes_fetched} of {original.size} bytes in {original.requests} requests")
+
+    for variant in variants:
+        print(f"Wrote {variant.key} ({variant.width}x{variant.height}, {variant.size_bytes} bytes)")
+
+    return {
+        'variantsPrefix': variants_prefix,
+        'variants': [
+            {'key': v.key, 'mimeType': v.mime_type, 'width': v.width, 'height': v.height, 'sizeBytes': v.size_bytes}
+            for v in variants
+        ]
+    }
+
+def lambda_handler(event, context):
+    """
+    Generate image variants for a promoted asset
+
+    Invoked by the asset-promoted EventBridge rule, alongside _promoteAsset:
+    {
+        "detail": {
+            "bucket": "bucket-name",
+            "key": "asset/game/{gameId}/section/{sectionId}/{assetId}/original",
+            "gameId": "...",
+            "sectionId": "...",
+            "assetId": "...",
+            "deduplicated": true   # Only for an asset sharing another's original
+        }
+    }
+    """
+    detail = event.get('detail', {})
+    bucket = detail.get('bucket')
+    key = detail.get('key')
+
+    # A duplicate shares an original whose variants already exist
+    if detail.get('deduplicated'):
+        print(f"Skipping deduplicated asset {detail.get('assetId')}, which shares {key}")
+        return {'skipped': True}
+
+    try:
+        if not bucket or not key:
+            raise ValueError("Missing required parameters: bucket or key")
+        return process_asset(bucket, key)
+
+    except ValueError as e:
+        print(f"Validation error: {str(e)}")
+        raise VariantGenerationError(f"Invalid parameters: {str(e)}")
+    except Exception as e:
+        print(f"Unexpected error for {key}: {str(e)}")
+        raise VariantGenerationError(f"Failed to generate variants: {str(e)}")
@@ -0,0 +1,122 @@
+"""
+Image variant generation for promoted assets.
+
+Each asset gets a small set of resized copies under its variantsPrefix, so
+clients can show a thumbnail without downloading the original. The original
+is decoded once, at the size of the largest variant, and every smaller
+variant is resized from that rather than from the full-size image.
+
+The source is read incrementally (see asset_stream.RangedObjectReader), so
+the memory needed is set by the decoded image, which MAX_IMAGE_PIXELS and
+JPEG draft mode bound, rather than by the size of the original file.
+"""
+
+from dataclasses import dataclass
+from typing import IO, Callable, Iterable, List
+
+from PIL import Image, ImageOps, features
+
+# Refuse to decode anything larger than this; a small, highly-compressed
+# file can otherwise expand to gigabytes of pixels
+MAX_IMAGE_PIXELS = 50_000_000
+
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    name: str
+    max_dimension: int
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    extension: str
+    pillow_format: str
+    mime_type: str
+    options: dict
+
+
+@dataclass
+class Variant:
+    key: str
+    mime_type: str
+    width: int
+    height: int
+    size_bytes: int
+
+
+# Largest first: each variant is resized from the previous one
+VARIANT_SPECS = (
+    VariantSpec('preview', 1024),
+    VariantSpec('thumb', 256),
+)
+
+WEBP = OutputFormat('webp', 'WEBP', 'image/webp', {'quality': 80, 'method': 4})
+AVIF = OutputFormat('avif', 'AVIF', 'image/avif', {'quality': 60, 'speed': 8})
+
+
+def available_formats() -> List[OutputFormat]:
+    """Return the output formats this Pillow build can encode"""
+    formats = []
+    if features.check('webp'):
+        formats.append(WEBP)
+    if features.check('avif'):
+        formats.append(AVIF)
+    return formats
+
+
+def variant_key(variants_prefix: str, spec: VariantSpec, output_format: OutputFormat) -> str:
+    return f"{variants_prefix}{spec.name}.{output_format.extension}"
+
+
+def _load(source: IO[bytes], max_dimension: int) -> Image.Image:
+    """Decode the first frame of the image, no larger than needed"""
+    image = Image.open(source)
+    # JPEG can decode straight to a 1/2, 1/4 or 1/8 scale, which is far
+    # cheaper than decoding at full size and resizing
+    image.draft('RGB', (max_dimension, max_dimension))
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    return image
+
+
+def generate_variants(source: IO[bytes], variants_prefix: str,
+                      open_output: Callable[[str, str], IO[bytes]],
+                      specs: Iterable[VariantSpec] = VARIANT_SPECS,
+                      formats: Iterable[OutputFormat] = None) -> List[Variant]:
+    """
+    Build every variant of the image in source
+
+    source must be a seekable binary file. Each variant is encoded straight
+    into open_output(key, mime_type), a writable file used as a context
+    manager. Variants are never larger than the original: a 200px image
+    produces a 200px "preview".
+    """
+    specs = sorted(specs, key=lambda s: s.max_dimension, reverse=True)
+    formats = list(formats) if formats is not None else available_formats()
+    if not formats:
+        raise RuntimeError("No variant output formats are available in this Pillow build")
+
+    image = _load(source, specs[0].max_dimension)
+    variants = []
+
+    for spec in specs:
+        image.thumbnail((spec.max_dimension, spec.max_dimension), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        for output_format in formats:
+            key = variant_key(variants_prefix, spec, output_format)
+            with open_output(key, output_format.mime_type) as output:
+                image.save(output, format=output_format.pillow_format, **output_format.options)
+                size_bytes = output.tell()
+            variants.append(Variant(
+                key=key,
+                mime_type=output_format.mime_type,
+                width=image.width,
+                height=image.height,
+                size_bytes=size_bytes,
+            ))
+
+    return variants
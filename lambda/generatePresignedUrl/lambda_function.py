@@ -1,59 +1,90 @@
 import json
-import boto3
+import os
 from botocore.exceptions import ClientError
-from botocore.config import Config
+from presigned_post import PresignedPostSigner, EnvironmentCredentials, is_virtual_host_bucket
 
 # Constants
 PRESIGNED_URL_EXPIRES_SECONDS = 900  # 15 minutes
+MAX_BATCH_SIZE = 25  # MAX_ASSET_UPLOAD_BATCH_SIZE
 
-# Initialize S3 client outside handler for better performance
-# Configure with timeout to prevent hanging executions
-s3_client = boto3.client('s3', config=Config(
-    read_timeout=30,
-    connect_timeout=5,
-    retries={'max_attempts': 3}
-))
+# Signing a POST needs no network call, so nothing heavy is built at import
+# time: the signer and the S3 client are created on first use and cached
+# for the lifetime of the execution environment
+_signer = None
+_s3_client = None
+
+def get_signer():
+    """Return the cached local presigned POST signer"""
+    global _signer
+    if _signer is None:
+        region = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION')
+        # Lambda provides the execution role's credentials in the environment;
+        # anywhere else, fall back to botocore's full credential chain
+        credentials = EnvironmentCredentials.load()
+        if credentials is None:
+            import botocore.session
+            credentials = botocore.session.get_session().get_credentials()
+        _signer = PresignedPostSigner(credentials, region)
+    return _signer
+
+def get_s3_client():
+    """Return the cached S3 client, only needed for buckets that need endpoint resolution"""
+    global _s3_client
+    if _s3_client is None:
+        import botocore.session
+        from botocore.config import Config
+
+        # Configure with timeout to prevent hanging executions
+        _s3_client = botocore.session.get_session().create_client('s3', config=Config(
+            signature_version='s3v4',
+            read_timeout=30,
+            connect_timeout=5,
+            retries={'max_attempts': 3}
+        ))
+    return _s3_client
 
 class PresignedUrlError(Exception):
     """Custom exception for presigned URL generation errors"""
     pass
 
-def lambda_handler(event, context):
+def upload_size_range(size_bytes, max_size_bytes):
     """
-    Generate S3 presigned POST URL for file upload
-
-    Expected input from AppSync pipeline:
-    {
-        "assetData": {
-            "bucket": "bucket-name",
-            "originalKey": "path/to/file",
-            "mimeType": "image/jpeg",
-            "sizeBytes": 1024
-        },
-        "input": {
-            "sizeBytes": 1024,
-            "mimeType": "image/jpeg"
-        }
-    }
+    The content-length-range an upload is signed for: exactly the declared
+    size, or anything from 1 byte up to max_size_bytes for a ticket reserved
+    without one (only an empty upload while the limit is 0)
     """
+    if size_bytes is not None:
+        return size_bytes, size_bytes
+    if max_size_bytes is None:
+        raise ValueError("Missing required parameters: sizeBytes or maxSizeBytes")
+    return min(1, max_size_bytes), max_size_bytes
 
-    try:
-        # Extract data from previous pipeline function
-        asset_data = event.get('assetData', {})
-        input_data = event.get('input', {})
+def sign_upload(asset_data, input_data, max_size_bytes=None):
+    """
+    Generate the presigned POST for a single asset
 
-        bucket = asset_data.get('bucket')
-        key = asset_data.get('incomingKey')
-        mime_type = input_data.get('mimeType')
-        size_bytes = input_data.get('sizeBytes')
-        game_id = asset_data.get('gameId')
-        section_id = asset_data.get('sectionId')
-        asset_id = asset_data.get('assetId')
-        created_at = asset_data.get('createdAt')
+    Returns the ticket dict that the AppSync response function expects.
+    Raises ValueError for missing parameters and ClientError for AWS failures.
+    """
+    bucket = asset_data.get('bucket')
+    key = asset_data.get('incomingKey')
+    mime_type = input_data.get('mimeType')
+    game_id = asset_data.get('gameId')
+    section_id = asset_data.get('sectionId')
+    asset_id = asset_data.get('assetId')
+    created_at = asset_data.get('createdAt')
 
-        if not all([bucket, key, mime_type, size_bytes is not None, game_id, section_id, asset_id, created_at]):
-            raise ValueError("Missing required parameters: bucket, key, mimeType, sizeBytes, gameId, sectionId, assetId, or createdAt")
+    if not all([bucket, key, mime_type, game_id, section_id, asset_id, created_at]):
+        raise ValueError("Missing required parameters: bucket, key, mimeType, gameId, sectionId, assetId, or createdAt")
+    min_size_bytes, max_size_bytes = upload_size_range(input_data.get('sizeBytes'), max_size_bytes)
 
+    # Generate presigned POST
+    if is_virtual_host_bucket(bucket):
+        response = get_signer().sign_asset_upload(
+            bucket, key, mime_type, min_size_bytes, max_size_bytes, game_id, section_id,
+            asset_id, created_at, PRESIGNED_URL_EXPIRES_SECONDS
+        )
+    else:
         # Fields to include in the presigned POST (including custom headers)
         fields = {
             "Content-Type": mime_type,
@@ -66,15 +97,14 @@ def lambda_handler(event, context):
         # Conditions for the presigned POST
         conditions = [
             {"Content-Type": mime_type},
-            ["content-length-range", size_bytes, size_bytes],  # Exact size match
+            ["content-length-range", min_size_bytes, max_size_bytes],
             {"x-amz-meta-gameid": game_id},
             {"x-amz-meta-sectionid": section_id},
             {"x-amz-meta-assetid": asset_id},
             {"x-amz-meta-requestedtime": created_at}
         ]
 
-        # Generate presigned POST
-        response = s3_client.generate_presigned_post(
+        response = get_s3_client().generate_presigned_post(
             Bucket=bucket,
             Key=key,
             Fields=fields,
@@ -82,21 +112,108 @@ def lambda_handler(event, context):
             ExpiresIn=PRESIGNED_URL_EXPIRES_SECONDS
         )
 
-        # Extract headers that client needs to send
-        headers = {
-            "gameId": game_id,
-            "sectionId": section_id,
-            "assetId": asset_id,
-            "requestedTime": created_at
-        }
+    # Extract headers that client needs to send
+    headers = {
+        "gameId": game_id,
+        "sectionId": section_id,
+        "assetId": asset_id,
+        "requestedTime": created_at
+    }
+
+    # Return both asset data and presigned URL for final response
+    return {
+        'assetData': asset_data,
+        'uploadUrl': response['url'],
+        'uploadFields': response['fields'],
+        'headers': headers
+    }
+
+def sign_upload_batch(assets, max_size_bytes=None):
+    """
+    Generate presigned POSTs for a list of {assetData, input} entries
+
+    Entries without a sizeBytes are signed for any size up to
+    max_size_bytes. A failure on one entry does not fail the batch; it is
+    reported in the errors list against the entry's index and asset ID
+    instead.
+    """
+    if not isinstance(assets, list):
+        raise ValueError("assets must be a list")
+    if len(assets) > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many assets in batch: {len(assets)} (maximum {MAX_BATCH_SIZE})")
 
-        # Return both asset data and presigned URL for final response
-        return {
-            'assetData': asset_data,
-            'uploadUrl': response['url'],
-            'uploadFields': response['fields'],
-            'headers': headers
+    tickets = []
+    errors = []
+
+    for position, entry in enumerate(assets):
+        entry = entry or {}
+        # Report errors against the caller's index if it supplied one
+        index = entry.get('index', position)
+        asset_data = entry.get('assetData', {})
+        input_data = entry.get('input', {})
+
+        try:
+            tickets.append(sign_upload(asset_data, input_data, max_size_bytes))
+        except ClientError as e:
+            print(f"AWS error for asset {index}: {str(e)}")
+            errors.append(_batch_error(index, asset_data, "PresignedUrlError", f"Failed to generate presigned URL: {str(e)}"))
+        except ValueError as e:
+            print(f"Validation error for asset {index}: {str(e)}")
+            errors.append(_batch_error(index, asset_data, "InvalidParameters", f"Invalid parameters: {str(e)}"))
+        except Exception as e:
+            print(f"Unexpected error for asset {index}: {str(e)}")
+            errors.append(_batch_error(index, asset_data, "PresignedUrlError", f"Failed to generate presigned URL: {str(e)}"))
+
+    return {
+        'tickets': tickets,
+        'errors': errors
+    }
+
+def _batch_error(index, asset_data, error_type, message):
+    """Build a per-item error entry for a batch response"""
+    return {
+        'index': index,
+        'assetId': asset_data.get('assetId'),
+        'errorType': error_type,
+        'message': message
+    }
+
+def lambda_handler(event, context):
+    """
+    Generate S3 presigned POST URL for file upload
+
+    Expected input from AppSync pipeline:
+    {
+        "assetData": {
+            "bucket": "bucket-name",
+            "originalKey": "path/to/file",
+            "mimeType": "image/jpeg",
+            "sizeBytes": 1024
+        },
+        "input": {
+            "sizeBytes": 1024,
+            "mimeType": "image/jpeg"
         }
+    }
+
+    Or, in batch mode, a list of the above, where an input without a
+    sizeBytes accepts any size up to maxSizeBytes:
+    {
+        "assets": [
+            {"index": 0, "assetData": {...}, "input": {...}},
+            ...
+        ],
+        "maxSizeBytes": 5242880
+    }
+    which returns {"tickets": [...], "errors": [...]}
+    """
+
+    try:
+        if 'assets' in event:
+            return sign_upload_batch(event['assets'], event.get('maxSizeBytes'))
+
+        # Extract data from previous pipeline function
+        return sign_upload(event.get('assetData', {}), event.get('input', {}))
 
     except ClientError as e:
         print(f"AWS error: {str(e)}")
@@ -106,4 +223,4 @@ def lambda_handler(event, context):
         raise PresignedUrlError(f"Invalid parameters: {str(e)}")
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
-        raise PresignedUrlError(f"Failed to generate presigned URL: {str(e)}")
\ No newline at end of file
+        raise PresignedUrlError(f"Failed to generate presigned URL: {str(e)}")
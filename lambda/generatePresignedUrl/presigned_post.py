@@ -0,0 +1,176 @@
+"""
+SigV4 presigned POST signing for asset uploads, without the boto3 presign machinery.
+
+Every upload policy has the same shape (the six asset conditions plus the
+bucket, key and SigV4 fields), so the policy document is filled in from a
+template, and the SigV4 signing key is cached for the day/region/service it
+is valid for. The output matches botocore's S3SigV4PostAuth byte-for-byte.
+"""
+
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import re
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+SERVICE = 's3'
+ISO8601 = '%Y-%m-%dT%H:%M:%SZ'
+SIGV4_TIMESTAMP = '%Y%m%dT%H%M%SZ'
+
+# Bucket names that can be addressed as {bucket}.s3.amazonaws.com - anything
+# else (e.g. names containing dots) needs boto3's endpoint resolution
+VIRTUAL_HOST_BUCKET = re.compile(r'^[a-z0-9][a-z0-9-]{1,61}[a-z0-9]$')
+
+# json.dumps() layout of the policy botocore builds for our conditions
+POLICY_TEMPLATE = (
+    '{{"expiration": {expiration}, "conditions": ['
+    '{{"Content-Type": {mime_type}}}, '
+    '["content-length-range", {min_size_bytes}, {max_size_bytes}], '
+    '{{"x-amz-meta-gameid": {game_id}}}, '
+    '{{"x-amz-meta-sectionid": {section_id}}}, '
+    '{{"x-amz-meta-assetid": {asset_id}}}, '
+    '{{"x-amz-meta-requestedtime": {created_at}}}, '
+    '{{"bucket": {bucket}}}, '
+    '{{"key": {key}}}, '
+    '{{"x-amz-algorithm": "' + ALGORITHM + '"}}, '
+    '{{"x-amz-credential": {credential}}}, '
+    '{{"x-amz-date": {timestamp}}}'
+    '{token_condition}]}}'
+)
+TOKEN_CONDITION_TEMPLATE = ', {{"x-amz-security-token": {token}}}'
+
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _hmac_sha256(key, message):
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+def is_virtual_host_bucket(bucket):
+    """Return True if the bucket can be signed for without endpoint resolution"""
+    return bool(VIRTUAL_HOST_BUCKET.match(bucket)) and '--' not in bucket
+
+
+class EnvironmentCredentials:
+    """
+    Static credentials from the AWS_* environment variables
+
+    Lambda puts the execution role's credentials there for the lifetime of
+    the execution environment, so there is nothing to refresh.
+    """
+
+    def __init__(self, access_key, secret_key, token=None):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.token = token
+
+    @classmethod
+    def load(cls):
+        """Return credentials from the environment, or None if they are not set"""
+        access_key = os.environ.get('AWS_ACCESS_KEY_ID')
+        secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+        if not access_key or not secret_key:
+            return None
+        return cls(access_key, secret_key, os.environ.get('AWS_SESSION_TOKEN') or None)
+
+    def get_frozen_credentials(self):
+        return self
+
+
+class PresignedPostSigner:
+    """
+    Signs asset upload POST policies with cached SigV4 signing keys
+
+    credentials is a botocore Credentials object (or EnvironmentCredentials);
+    it is asked for a frozen copy on each call, so refreshable credentials
+    keep working.
+    """
+
+    def __init__(self, credentials, region, clock=_utcnow):
+        self._credentials = credentials
+        self._region = region
+        self._clock = clock
+        self._signing_key = None  # (secret_key, datestamp, key)
+
+    def _get_signing_key(self, secret_key, datestamp):
+        cached = self._signing_key
+        if cached and cached[0] == secret_key and cached[1] == datestamp:
+            return cached[2]
+
+        k_date = _hmac_sha256(f"AWS4{secret_key}".encode('utf-8'), datestamp)
+        k_region = _hmac_sha256(k_date, self._region)
+        k_service = _hmac_sha256(k_region, SERVICE)
+        k_signing = _hmac_sha256(k_service, 'aws4_request')
+
+        self._signing_key = (secret_key, datestamp, k_signing)
+        return k_signing
+
+    def sign_asset_upload(self, bucket, key, mime_type, min_size_bytes, max_size_bytes,
+                          game_id, section_id, asset_id, created_at, expires_in):
+        """
+        Generate the presigned POST for an asset upload of min_size_bytes
+        to max_size_bytes
+
+        Returns {'url': ..., 'fields': {...}} in the same form as
+        S3.Client.generate_presigned_post().
+        """
+        if not is_virtual_host_bucket(bucket):
+            raise ValueError(f"Bucket '{bucket}' needs endpoint resolution")
+
+        credentials = self._credentials.get_frozen_credentials()
+        now = self._clock()
+        timestamp = now.strftime(SIGV4_TIMESTAMP)
+        datestamp = timestamp[0:8]
+        expiration = (now + datetime.timedelta(seconds=expires_in)).strftime(ISO8601)
+        credential = f"{credentials.access_key}/{datestamp}/{self._region}/{SERVICE}/aws4_request"
+
+        token_condition = ''
+        if credentials.token is not None:
+            token_condition = TOKEN_CONDITION_TEMPLATE.format(token=json.dumps(credentials.token))
+
+        policy = POLICY_TEMPLATE.format(
+            expiration=json.dumps(expiration),
+            mime_type=json.dumps(mime_type),
+            min_size_bytes=json.dumps(min_size_bytes),
+            max_size_bytes=json.dumps(max_size_bytes),
+            game_id=json.dumps(game_id),
+            section_id=json.dumps(section_id),
+            asset_id=json.dumps(asset_id),
+            created_at=json.dumps(created_at),
+            bucket=json.dumps(bucket),
+            key=json.dumps(key),
+            credential=json.dumps(credential),
+            timestamp=json.dumps(timestamp),
+            token_condition=token_condition,
+        )
+        encoded_policy = base64.b64encode(policy.encode('utf-8')).decode('utf-8')
+
+        signing_key = self._get_signing_key(credentials.secret_key, datestamp)
+        signature = hmac.new(signing_key, encoded_policy.encode('utf-8'), hashlib.sha256).hexdigest()
+
+        # Same field order as botocore
+        fields = {
+            "Content-Type": mime_type,
+            "x-amz-meta-gameid": game_id,
+            "x-amz-meta-sectionid": section_id,
+            "x-amz-meta-assetid": asset_id,
+            "x-amz-meta-requestedtime": created_at,
+            "key": key,
+            "x-amz-algorithm": ALGORITHM,
+            "x-amz-credential": credential,
+            "x-amz-date": timestamp,
+        }
+        if credentials.token is not None:
+            fields["x-amz-security-token"] = credentials.token
+        fields["policy"] = encoded_policy
+        fields["x-amz-signature"] = signature
+
+        return {
+            'url': f"https://{bucket}.s3.amazonaws.com/",
+            'fields': fields
+        }
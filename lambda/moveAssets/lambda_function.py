@@ -0,0 +1,240 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+from asset_dedup import ContentIndex, hash_object, find_duplicate
+from asset_stream import buffer_bytes_from_env
+from lambda_utils import get_client, error_code, parse_records
+
+# Constants
+MAX_CONCURRENT_MOVES = 16
+MAX_CONCURRENT_PARTS = 8
+MULTIPART_COPY_THRESHOLD_BYTES = 64 * 1024 * 1024  # Larger objects are copied in parallel parts
+MULTIPART_COPY_PART_BYTES = 32 * 1024 * 1024
+MAX_DELETE_KEYS = 1000  # DeleteObjects limit
+MAX_EVENT_ENTRIES = 10  # PutEvents limit
+PROMOTE_SOURCE = 'asset.promoted'
+PROMOTE_DETAIL_TYPE = 'ObjectCreated'
+
+@dataclass
+class MoveJob:
+    """One stream record's asset, and what still has to happen to it"""
+    sequence_number: str
+    bucket: str
+    game_id: str
+    section_id: str
+    asset_id: str
+    incoming_key: str
+    original_key: str
+    variants_prefix: str
+    size_bytes: int
+    delete_incoming: bool = False
+    promote_event: Optional[dict] = None
+    error: Optional[str] = None
+
+@dataclass
+class MoveResult:
+    moved: int = 0
+    deduplicated: int = 0
+    skipped: int = 0
+    failed: List[MoveJob] = field(default_factory=list)
+
+def parse_record(record, bucket):
+    """Build a MoveJob from a DynamoDB stream record of an asset entering FINALISING"""
+    image = record['dynamodb']['NewImage']
+    return MoveJob(
+        sequence_number=record['dynamodb']['SequenceNumber'],
+        bucket=bucket,
+        game_id=image['gameId']['S'],
+        section_id=image['sectionId']['S'],
+        asset_id=image['assetId']['S'],
+        incoming_key=image['incomingKey']['S'],
+        original_key=image['originalKey']['S'],
+        variants_prefix=image['variantsPrefix']['S'],
+        size_bytes=int(image['sizeBytes']['N']),
+    )
+
+def copy_object(s3, bucket, source_key, destination_key, size_bytes):
+    """Server-side copy, in parallel parts for large objects"""
+    source = {'Bucket': bucket, 'Key': source_key}
+    if size_bytes < MULTIPART_COPY_THRESHOLD_BYTES:
+        s3.copy_object(Bucket=bucket, Key=destination_key, CopySource=source, MetadataDirective='COPY')
+        return
+
+    # Multipart copies don't carry metadata across, so take it from the source
+    head = s3.head_object(Bucket=bucket, Key=source_key)
+    upload_id = s3.create_multipart_upload(
+        Bucket=bucket, Key=destination_key,
+        ContentType=head.get('ContentType', 'binary/octet-stream'),
+        Metadata=head.get('Metadata', {}),
+    )['UploadId']
+
+    def copy_part(part_number):
+        start = (part_number - 1) * MULTIPART_COPY_PART_BYTES
+        end = min(start + MULTIPART_COPY_PART_BYTES, size_bytes) - 1
+        response = s3.upload_part_copy(
+            Bucket=bucket, Key=destination_key, UploadId=upload_id, PartNumber=part_number,
+            CopySource=source, CopySourceRange=f"bytes={start}-{end}",
+        )
+        return {'ETag': response['CopyPartResult']['ETag'], 'PartNumber': part_number}
+
+    part_count = -(-size_bytes // MULTIPART_COPY_PART_BYTES)
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PARTS) as executor:
+            parts = list(executor.map(copy_part, range(1, part_count + 1)))
+        s3.complete_multipart_upload(
+            Bucket=bucket, Key=destination_key, UploadId=upload_id,
+            MultipartUpload={'Parts': parts},
+        )
+    except Exception:
+        s3.abort_multipart_upload(Bucket=bucket, Key=destination_key, UploadId=upload_id)
+        raise
+
+def move_asset(job, s3, index):
+    """
+    Copy (or deduplicate) one asset; deleting the upload and sending
+    promotion events are left to the batch
+
+    Safe to repeat: a stream batch is retried from its first failed record,
+    so records after it may already have been moved.
+    """
+    content_hash = None
+    original = None
+    size_bytes = job.size_bytes
+    try:
+        size_bytes, content_hash = hash_object(s3, job.bucket, job.incoming_key, buffer_bytes_from_env())
+        original = find_duplicate(s3, index, content_hash, job.original_key)
+        if not index.link_asset(job.game_id, job.asset_id, content_hash, original):
+            # Already promoted, expired or cancelled - just clear up the upload
+            print(f"Asset {job.asset_id} is no longer finalising, removing its upload")
+            job.delete_incoming = True
+            return 'skipped'
+    except Exception as e:
+        if error_code(e) in ('NoSuchKey', '404', 'InvalidRange'):
+            # A previous attempt moved it, or the upload expired
+            print(f"Asset {job.asset_id} has no upload at {job.incoming_key}, nothing to move")
+            return 'skipped'
+        if error_code(e) in ('AccessDenied', '403'):
+            # A missing key looks like this without s3:ListBucket, but so does a real denial - retry it
+            raise
+        # Deduplication is an optimisation - move the asset as usual if it fails
+        print(f"Deduplication failed for asset {job.asset_id}, moving it anyway: {str(e)}")
+        content_hash = None
+        original = None
+        size_bytes = job.size_bytes
+
+    if original:
+        job.promote_event = {
+            'Source': PROMOTE_SOURCE,
+            'DetailType': PROMOTE_DETAIL_TYPE,
+            'EventBusName': os.environ['EVENT_BUS_NAME'],
+            'Detail': json.dumps({
+                'gameId': job.game_id,
+                'sectionId': job.section_id,
+                'assetId': job.asset_id,
+                'bucket': job.bucket,
+                'key': original['originalKey'],
+                'deduplicated': True,
+            }),
+        }
+        job.delete_incoming = True
+        return 'deduplicated'
+
+    copy_object(s3, job.bucket, job.incoming_key, job.original_key, size_bytes)
+    if content_hash:
+        # If another asset with the same content got there first, both originals are kept
+        index.record(content_hash, job.bucket, job.original_key, job.variants_prefix,
+                     size_bytes, job.game_id, job.asset_id)
+    job.delete_incoming = True
+    return 'moved'
+
+def send_promote_events(events_client, jobs):
+    """Send the promotion events for deduplicated assets, MAX_EVENT_ENTRIES at a time"""
+    pending = [job for job in jobs if job.promote_event and not job.error]
+    for start in range(0, len(pending), MAX_EVENT_ENTRIES):
+        chunk = pending[start:start + MAX_EVENT_ENTRIES]
+        try:
+            response = events_client.put_events(Entries=[job.promote_event for job in chunk])
+        except Exception as e:
+            for job in chunk:
+                job.error = f"Failed to send promotion event: {str(e)}"
+            continue
+        # Entries are returned in request order
+        for job, entry in zip(chunk, response.get('Entries', [])):
+            if entry.get('ErrorCode'):
+                job.error = f"Failed to send promotion event: {entry['ErrorCode']}"
+
+def delete_uploads(s3, jobs):
+    """Delete the moved uploads, MAX_DELETE_KEYS per DeleteObjects call"""
+    pending = [job for job in jobs if job.delete_incoming and not job.error]
+    for start in range(0, len(pending), MAX_DELETE_KEYS):
+        chunk = pending[start:start + MAX_DELETE_KEYS]
+        by_key = {job.incoming_key: job for job in chunk}
+        try:
+            response = s3.delete_objects(Bucket=chunk[0].bucket, Delete={
+                'Objects': [{'Key': key} for key in by_key],
+                'Quiet': True,
+            })
+        except Exception as e:
+            for job in chunk:
+                job.error = f"Failed to delete upload: {str(e)}"
+            continue
+        for error in response.get('Errors', []):
+            job = by_key.get(error['Key'])
+            if job:
+                job.error = f"Failed to delete upload: {error.get('Code')}"
+
+def move_batch(jobs, s3, index, events_client):
+    """Move a batch of assets concurrently, then send events and delete uploads in bulk"""
+    result = MoveResult()
+
+    def run(job):
+        try:
+            return move_asset(job, s3, index)
+        except Exception as e:
+            job.error = str(e)
+            return 'failed'
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_MOVES) as executor:
+        outcomes = list(executor.map(run, jobs))
+
+    send_promote_events(events_client, jobs)
+    delete_uploads(s3, jobs)
+
+    for job, outcome in zip(jobs, outcomes):
+        if job.error:
+            print(f"Failed to move asset {job.asset_id}: {job.error}")
+            result.failed.append(job)
+        elif outcome == 'moved':
+            result.moved += 1
+        elif outcome == 'deduplicated':
+            result.deduplicated += 1
+        else:
+            result.skipped += 1
+    return result
+
+def lambda_handler(event, context):
+    """
+    Move finalised assets from incoming/ to asset/
+
+    Invoked by the DynamoDB stream event source mapping with a batch of
+    asset records entering FINALISING. Failed records are reported as
+    partial batch failures (by sequence number), so only they and the
+    records after them are retried.
+    """
+    bucket = os.environ['ASSET_BUCKET']
+    records = event.get('Records', [])
+
+    jobs = parse_records(records, lambda record: parse_record(record, bucket))
+
+    # Room for one large object's part copies alongside the other moves
+    pool_connections = MAX_CONCURRENT_MOVES + MAX_CONCURRENT_PARTS
+    s3 = get_client('s3', pool_connections)
+    index = ContentIndex(get_client('dynamodb', pool_connections), os.environ['TABLE_NAME'])
+    result = move_batch(jobs, s3, index, get_client('events', pool_connections))
+
+    failures = [{'itemIdentifier': job.sequence_number} for job in result.failed]
+    print(f"Moved {result.moved}, deduplicated {result.deduplicated}, skipped {result.skipped}, "
+          f"failed {len(failures)} of {len(records)} records")
+    return {'batchItemFailures': failures}
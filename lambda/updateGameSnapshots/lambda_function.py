@@ -0,0 +1,276 @@
+import base64
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from lambda_utils import get_client, error_code, parse_records, print_metrics
+
+# Constants
+DDB_PREFIX_GAME = 'GAME'
+DDB_PREFIX_SNAPSHOT = 'GAMESNAPSHOT'
+TYPE_SNAPSHOT = 'GAMESNAPSHOT'
+SNAPSHOT_FORMAT = 1
+MAX_SNAPSHOT_BYTES = 380 * 1024  # Compressed; leaves room under the 400 KB item limit for the other attributes
+COMPRESS_LEVEL = 6
+MAX_CONCURRENT_GAMES = 8
+MAX_CONDITIONAL_RETRIES = 3
+METRICS_NAMESPACE = 'Wildsea/GameSnapshots'
+
+@dataclass
+class Change:
+    """One stream record's change to an item in a game partition"""
+    sequence_number: str
+    game_id: str
+    sk: str
+    item: Optional[dict]  # None once the item is removed
+
+@dataclass
+class Snapshot:
+    """A game partition's items, keyed by SK, and the version of the snapshot item they came from"""
+    items: Dict[str, dict]
+    version: int = 0
+    data: Optional[bytes] = None  # Compressed, as stored
+    oversized: bool = False
+
+@dataclass
+class SnapshotStats:
+    games: int = 0
+    changes: int = 0
+    rebuilt: int = 0
+    written: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    oversized: int = 0
+    conflicts: int = 0
+    invalidated: int = 0
+    bytes: int = 0
+    compressed_bytes: int = 0
+    seconds: float = 0.0
+    failed: List[str] = field(default_factory=list)
+
+def snapshot_key(game_id):
+    return {'PK': {'S': f"{DDB_PREFIX_SNAPSHOT}#{game_id}"}, 'SK': {'S': DDB_PREFIX_SNAPSHOT}}
+
+def parse_record(record):
+    """Build a Change from a DynamoDB stream record for an item in a game partition"""
+    change = record['dynamodb']
+    keys = change['Keys']
+    prefix, game_id = keys['PK']['S'].split('#', 1)
+    if prefix != DDB_PREFIX_GAME or not game_id:
+        raise ValueError(f"not a game partition: {keys['PK']['S']}")
+    return Change(
+        sequence_number=change['SequenceNumber'],
+        game_id=game_id,
+        sk=keys['SK']['S'],
+        item=None if record['eventName'] == 'REMOVE' else change['NewImage'],
+    )
+
+def _json_default(value):
+    # boto3 gives binary attributes as bytes; stream records already carry them as base64
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError(f"Can't serialise {type(value).__name__}")
+
+def encode_items(items):
+    """Compress a partition's items, in SK order as the getGame query returns them"""
+    body = json.dumps({'format': SNAPSHOT_FORMAT, 'items': [items[sk] for sk in sorted(items)]},
+                      separators=(',', ':'), default=_json_default).encode('utf-8')
+    # A fixed mtime, so unchanged items compress to the same bytes
+    return body, gzip.compress(body, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+def decode_items(data):
+    """The items of a stored snapshot, in SK order"""
+    return json.loads(gzip.decompress(data))['items']
+
+def load_snapshot(dynamodb, table_name, game_id):
+    """The game's current snapshot, or None if it has none"""
+    item = dynamodb.get_item(TableName=table_name, Key=snapshot_key(game_id), ConsistentRead=True).get('Item')
+    if not item:
+        return None
+    version = int(item['version']['N'])
+    if 'snapshot' not in item:
+        return Snapshot(items={}, version=version, oversized=True)
+    data = item['snapshot']['B']
+    return Snapshot(items={entry['SK']['S']: entry for entry in decode_items(data)}, version=version, data=data)
+
+def query_partition(dynamodb, table_name, game_id):
+    """Every item in the game's partition, read consistently so it includes the changes being applied"""
+    items = {}
+    params = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'PK = :pk',
+        'ExpressionAttributeValues': {':pk': {'S': f"{DDB_PREFIX_GAME}#{game_id}"}},
+        'ConsistentRead': True,
+    }
+    while True:
+        response = dynamodb.query(**params)
+        items.update((item['SK']['S'], item) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def _version_condition(snapshot):
+    if snapshot:
+        return {'ConditionExpression': 'version = :version',
+                'ExpressionAttributeValues': {':version': {'N': str(snapshot.version)}}}
+    return {'ConditionExpression': 'attribute_not_exists(PK)'}
+
+def save_snapshot(dynamodb, table_name, game_id, snapshot, items, sequence_number, stats):
+    """Write, or delete, the game's snapshot if the items changed it, unless another write got there first"""
+    if DDB_PREFIX_GAME not in items:
+        # The game record is gone, so getGame fails anyway; deleteGame removes the rest of the partition
+        if snapshot:
+            dynamodb.delete_item(TableName=table_name, Key=snapshot_key(game_id), **_version_condition(snapshot))
+            stats.deleted += 1
+        return
+
+    body, data = encode_items(items)
+    too_large = len(data) > MAX_SNAPSHOT_BYTES
+    if snapshot and (data == snapshot.data or (too_large and snapshot.oversized)):
+        stats.unchanged += 1
+        return
+
+    item = {
+        **snapshot_key(game_id),
+        'type': {'S': TYPE_SNAPSHOT},
+        'gameId': {'S': game_id},
+        'itemCount': {'N': str(len(items))},
+        'sizeBytes': {'N': str(len(body))},
+        'version': {'N': str(snapshot.version + 1 if snapshot else 1)},
+        'sequenceNumber': {'S': sequence_number},
+        'updatedAt': {'S': datetime.now(timezone.utc).isoformat()},
+    }
+    if not too_large:
+        item['snapshot'] = {'B': data}
+    else:
+        # Too big for one item - readers fall back to querying the partition
+        print(f"Snapshot for game {game_id} is {len(data)} bytes compressed, over {MAX_SNAPSHOT_BYTES}")
+        stats.oversized += 1
+    dynamodb.put_item(TableName=table_name, Item=item, **_version_condition(snapshot))
+    stats.written += 1
+    stats.bytes += len(body)
+    stats.compressed_bytes += len(data)
+
+def update_game(dynamodb, table_name, game_id, changes, stats):
+    """
+    Apply one game's changes, in stream order, to its snapshot
+
+    A game without a usable snapshot is rebuilt from a consistent query of
+    its partition, which already includes these changes. Applying changes
+    is idempotent, so records retried after a partial batch failure just
+    set the same items again. The snapshot's version guards against a
+    concurrent writer; on a conflict the snapshot is reloaded and the
+    changes applied again.
+    """
+    for _ in range(MAX_CONDITIONAL_RETRIES + 1):
+        snapshot = load_snapshot(dynamodb, table_name, game_id)
+        if snapshot is None or snapshot.oversized:
+            items = query_partition(dynamodb, table_name, game_id)
+            stats.rebuilt += 1
+        else:
+            items = dict(snapshot.items)
+            for change in changes:
+                if change.item is None:
+                    items.pop(change.sk, None)
+                else:
+                    items[change.sk] = change.item
+        try:
+            save_snapshot(dynamodb, table_name, game_id, snapshot, items, changes[-1].sequence_number, stats)
+            return
+        except Exception as e:
+            if error_code(e) != 'ConditionalCheckFailedException':
+                raise
+            stats.conflicts += 1
+    raise RuntimeError(f"snapshot still changing after {MAX_CONDITIONAL_RETRIES} retries")
+
+def invalidate_snapshot(dynamodb, table_name, game_id, stats):
+    """
+    Delete the snapshot of a game whose changes couldn't be applied
+
+    The event source mapping drops records once they run out of retries or
+    get too old, which would leave the snapshot stale for good. Without one,
+    readers query the partition and the game's next change rebuilds it.
+    """
+    try:
+        dynamodb.delete_item(TableName=table_name, Key=snapshot_key(game_id))
+        stats.invalidated += 1
+    except Exception as e:
+        print(f"Failed to invalidate snapshot for game {game_id}: {str(e)}")
+
+def update_snapshots(changes, dynamodb, table_name):
+    """Update the snapshot of every game in a batch, concurrently; returns the stats and failed game ids"""
+    by_game: Dict[str, List[Change]] = {}
+    for change in changes:
+        by_game.setdefault(change.game_id, []).append(change)
+
+    stats = SnapshotStats(games=len(by_game), changes=len(changes))
+    started = time.monotonic()
+
+    def run(game_id):
+        # Each game gets its own stats, so the threads don't share counters
+        game_stats = SnapshotStats()
+        try:
+            update_game(dynamodb, table_name, game_id, by_game[game_id], game_stats)
+        except Exception as e:
+            print(f"Failed to update snapshot for game {game_id}: {str(e)}")
+            game_stats.failed.append(game_id)
+            invalidate_snapshot(dynamodb, table_name, game_id, game_stats)
+        return game_stats
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_GAMES) as executor:
+        for game_stats in executor.map(run, by_game):
+            for name in ('rebuilt', 'written', 'unchanged', 'deleted', 'oversized', 'conflicts',
+                         'invalidated', 'bytes', 'compressed_bytes'):
+                setattr(stats, name, getattr(stats, name) + getattr(game_stats, name))
+            stats.failed += game_stats.failed
+
+    stats.seconds = time.monotonic() - started
+    return stats, by_game
+
+def log_metrics(stats):
+    """Log the batch's snapshot updates in CloudWatch embedded metric format"""
+    print_metrics(METRICS_NAMESPACE, [
+        ('Games', 'Count', stats.games),
+        ('Changes', 'Count', stats.changes),
+        ('Rebuilt', 'Count', stats.rebuilt),
+        ('Written', 'Count', stats.written),
+        ('Unchanged', 'Count', stats.unchanged),
+        ('Deleted', 'Count', stats.deleted),
+        ('Oversized', 'Count', stats.oversized),
+        ('Conflicts', 'Count', stats.conflicts),
+        ('Failed', 'Count', len(stats.failed)),
+        ('Invalidated', 'Count', stats.invalidated),
+        ('SnapshotBytes', 'Bytes', stats.bytes),
+        ('CompressedBytes', 'Bytes', stats.compressed_bytes),
+        ('Duration', 'Seconds', round(stats.seconds, 3)),
+    ])
+
+def lambda_handler(event, context):
+    """
+    Keep a compressed snapshot of each game's partition up to date
+
+    Invoked by the DynamoDB stream event source mapping with a batch of
+    changes to items in GAME# partitions. Each changed game's snapshot is
+    updated once per batch, so getGame could be served from one GetItem
+    rather than a query of the whole partition. A failed game is reported
+    as a partial batch failure from its first record, so it and everything
+    after it is retried, and its snapshot is deleted in case the records
+    are dropped before a retry succeeds.
+    """
+    table_name = os.environ['TABLE_NAME']
+    records = event.get('Records', [])
+
+    changes = parse_records(records, parse_record)
+
+    stats, by_game = update_snapshots(changes, get_client('dynamodb', MAX_CONCURRENT_GAMES), table_name)
+    log_metrics(stats)
+
+    # Records are retried from the earliest failure reported
+    failures = [{'itemIdentifier': by_game[game_id][0].sequence_number} for game_id in stats.failed]
+    print(f"Updated {stats.written}, unchanged {stats.unchanged}, deleted {stats.deleted}, "
+          f"failed {len(failures)} of {stats.games} game snapshots from {len(records)} records")
+    return {'batchItemFailures': failures}
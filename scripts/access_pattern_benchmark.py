@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Access-pattern benchmark: runs each read in DYNAMODB.md against DynamoDB
+Local (or moto) at several game sizes, and flags the ones whose cost grows
+with the size of a game.
+
+For each scale in SCALES a table is filled by generate_dataset.py with
+games whose players and NPCs are that many times the base size, plus the
+character templates from presets/templates.json. Each pattern then runs
+SAMPLES times against random games, users, sections and assets, sending the
+same request as its resolver, with every page read. For each pattern and
+scale it records:
+
+  latency    round trip for all pages (p50, p95)
+  capacity   ConsumedCapacity as the endpoint reports it
+  model_rcu  read units DynamoDB would charge: eventually consistent, half a
+             unit per 4 KB read, rounded up per page
+  pages      pages actually returned, and the 1 MB pages DynamoDB would need
+  read       items read (ScannedCount) against items returned (Count)
+  bytes      bytes read against bytes returned after projection
+
+Local stand-ins don't charge like DynamoDB (moto reports a flat unit), so
+the modelled units and pages come from the generated items' sizes. Those
+are what the flags use:
+
+  grows with game size  modelled units grow faster than FLAG_SLOPE against
+                        items per game, on a log-log fit across scales
+  pages                 needs more than one 1 MB page at some scale
+  read amplification    reads more than FLAG_AMPLIFICATION times the bytes
+                        it returns, such as a projection over whole items
+
+Without AWS_ENDPOINT_URL, an in-process moto server is used. moto answers
+index queries by scanning the whole table, so its latencies only show the
+shape of a result; use DynamoDB Local for latency. The tables are deleted
+afterwards unless KEEP_TABLES is set.
+
+Environment:
+  SCALES              Game size multipliers, comma separated (default 1,4,16)
+  GAMES               Games per scale (default 20)
+  USERS               Size of the user pool (default 100)
+  SAMPLES             Requests per pattern and scale (default 50)
+  SEED                Random seed for the data and the samples (default 1)
+  TABLE_PREFIX        Tables are named <prefix>-<scale>x (default Wildsea-bench)
+  FLAG_SLOPE          Log-log growth above which a pattern is flagged (default 0.5)
+  FLAG_AMPLIFICATION  Read/returned bytes above which a pattern is flagged (default 4)
+  REPORT              Path to write the results to, as JSON
+  KEEP_TABLES         Set to leave the tables in place
+  AWS_ENDPOINT_URL    e.g. http://localhost:8000 for DynamoDB Local
+
+Usage: python3 access_pattern_benchmark.py
+"""
+
+import json
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from dynamodb_batch import create_client, create_table
+from generate_dataset import Dataset, DatasetConfig, generate, item_size, write_dataset
+from latency_histogram import LatencyHistogram
+from seed_presets import DEFAULT_TEMPLATES_FILE, template_items
+
+PAGE_BYTES = 1024 * 1024
+READ_UNIT_BYTES = 4096
+GSI2_ATTRIBUTES = ('PK', 'SK', 'GSI2PK', 'expireUploadAt', 'gameId', 'assetId', 'status')
+
+Item = Dict[str, dict]
+
+
+@dataclass
+class TierData:
+    """A scale's dataset, indexed the way each table and index partitions it"""
+    scale: int
+    table_name: str
+    dataset: Dataset
+    partitions: Dict[str, List[Item]] = field(default_factory=dict)
+    gsi1: Dict[str, List[Item]] = field(default_factory=dict)
+    gsi2: Dict[str, List[Item]] = field(default_factory=dict)
+
+    def index(self, items: List[Item]):
+        for item in items:
+            self.partitions.setdefault(item['PK']['S'], []).append(item)
+            if 'GSI1PK' in item:
+                self.gsi1.setdefault(item['GSI1PK']['S'], []).append(item)
+            if 'GSI2PK' in item:
+                self.gsi2.setdefault(item['GSI2PK']['S'], []).append(
+                    {name: value for name, value in item.items() if name in GSI2_ATTRIBUTES})
+        # Queries read in sort key order, which decides where pages break
+        for items in self.partitions.values():
+            items.sort(key=lambda item: item['SK']['S'])
+        for items in self.gsi1.values():
+            items.sort(key=lambda item: item['PK']['S'])
+
+    @property
+    def items_per_game(self) -> float:
+        return sum(game.items for game in self.dataset.games) / len(self.dataset.games)
+
+
+@dataclass
+class Sample:
+    """One request: its parameters, and the items DynamoDB reads to serve it"""
+    request: dict
+    read: List[Item]
+
+
+@dataclass
+class Pattern:
+    name: str
+    operation: str  # query or get_item
+    description: str
+    sample: Callable[[TierData, random.Random], Optional[Sample]]
+
+
+@dataclass
+class Measurement:
+    """A pattern's results at one scale"""
+    pattern: str
+    scale: int
+    items_per_game: float
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    requests: int = 0
+    capacity: float = 0.0
+    model_rcu: float = 0.0
+    pages: int = 0
+    model_pages: int = 0
+    max_model_pages: int = 0
+    scanned: int = 0
+    returned: int = 0
+    bytes_read: int = 0
+    bytes_returned: int = 0
+
+    def mean(self, total: float) -> float:
+        return total / self.requests if self.requests else 0.0
+
+    def summary(self) -> dict:
+        return {
+            'pattern': self.pattern,
+            'scale': self.scale,
+            'items_per_game': round(self.items_per_game, 1),
+            'requests': self.requests,
+            'p50_ms': round(self.latency.percentile(50) * 1000, 3),
+            'p95_ms': round(self.latency.percentile(95) * 1000, 3),
+            'capacity': round(self.mean(self.capacity), 2),
+            'model_rcu': round(self.mean(self.model_rcu), 2),
+            'pages': round(self.mean(self.pages), 2),
+            'model_pages': round(self.mean(self.model_pages), 2),
+            'max_model_pages': self.max_model_pages,
+            'scanned': round(self.mean(self.scanned), 1),
+            'returned': round(self.mean(self.returned), 1),
+            'bytes_read': round(self.mean(self.bytes_read)),
+            'bytes_returned': round(self.mean(self.bytes_returned)),
+        }
+
+
+def model_reads(read: List[Item], operation: str):
+    """Read units and pages DynamoDB would use to read these items"""
+    if operation == 'get_item':
+        size = item_size(read[0]) if read else 0
+        return 0.5 * max(1, math.ceil(size / READ_UNIT_BYTES)), 1
+    units, pages, page_bytes = 0.0, 1, 0
+    for item in read:
+        size = item_size(item)
+        if page_bytes and page_bytes + size > PAGE_BYTES:
+            units += 0.5 * math.ceil(page_bytes / READ_UNIT_BYTES)
+            pages, page_bytes = pages + 1, 0
+        page_bytes += size
+    units += 0.5 * max(1, math.ceil(page_bytes / READ_UNIT_BYTES))
+    return units, pages
+
+
+def _game(tier: TierData, rng: random.Random):
+    game = rng.choice(tier.dataset.games)
+    return game, tier.partitions[f"GAME#{game.game_id}"]
+
+
+def _of_type(items: List[Item], item_type: str) -> List[Item]:
+    return [item for item in items if item['type']['S'] == item_type]
+
+
+def _sample_get_game(tier, rng):
+    game, items = _game(tier, rng)
+    return Sample({'KeyConditionExpression': 'PK = :pk',
+                   'ExpressionAttributeValues': {':pk': {'S': f"GAME#{game.game_id}"}}}, items)
+
+
+def _sample_find_all_players(tier, rng):
+    game, items = _game(tier, rng)
+    return Sample({'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :player)',
+                   'ProjectionExpression': 'userId',
+                   'ExpressionAttributeValues': {':pk': {'S': f"GAME#{game.game_id}"}, ':player': {'S': 'PLAYER#'}}},
+                  [item for item in items if item['SK']['S'].startswith('PLAYER#')])
+
+
+def _sample_get_item(item_type):
+    def sample(tier, rng):
+        game, items = _game(tier, rng)
+        candidates = _of_type(items, item_type)
+        if not candidates:
+            return None
+        item = rng.choice(candidates)
+        return Sample({'Key': {'PK': item['PK'], 'SK': item['SK']}}, [item])
+    return sample
+
+
+def _sample_get_games(tier, rng, count=False):
+    game = rng.choice(tier.dataset.games)
+    user_id = rng.choice([game.gm_user_id, *game.player_user_ids])
+    request = {'IndexName': 'GSI1', 'KeyConditionExpression': 'GSI1PK = :pk',
+               'ExpressionAttributeValues': {':pk': {'S': f"USER#{user_id}"}}}
+    if count:
+        request['Select'] = 'COUNT'
+    return Sample(request, tier.gsi1.get(f"USER#{user_id}", []))
+
+
+def _sample_find_all_sections(tier, rng):
+    game, items = _game(tier, rng)
+    owner = rng.choice(_of_type(items, 'SECTION') or items)['userId']['S']
+    pk = f"GAME#{game.game_id}"
+    return Sample({'IndexName': 'GSI1', 'KeyConditionExpression': 'GSI1PK = :gsi1pk AND PK = :pk',
+                   'ProjectionExpression': 'sectionId',
+                   'ExpressionAttributeValues': {':gsi1pk': {'S': f"SECTIONUSER#{owner}"}, ':pk': {'S': pk}}},
+                  [item for item in tier.gsi1.get(f"SECTIONUSER#{owner}", []) if item['PK']['S'] == pk])
+
+
+def _sample_get_game_with_token(tier, rng):
+    game, items = _game(tier, rng)
+    join = _of_type(items, 'GAME')[0]['GSI1PK']['S']
+    return Sample({'IndexName': 'GSI1', 'KeyConditionExpression': 'GSI1PK = :gsi1pk',
+                   'ExpressionAttributeValues': {':gsi1pk': {'S': join}}}, tier.gsi1[join])
+
+
+def _sample_templates(tier, rng):
+    pk = rng.choice([pk for pk in tier.partitions if pk.startswith('TEMPLATE#')])
+    return Sample({'KeyConditionExpression': '#PK = :pk',
+                   'ProjectionExpression': '#templateName, #displayName, #gameType, #language',
+                   'ExpressionAttributeNames': {'#PK': 'PK', '#templateName': 'templateName',
+                                                '#displayName': 'displayName', '#gameType': 'gameType',
+                                                '#language': 'language'},
+                   'ExpressionAttributeValues': {':pk': {'S': pk}}}, tier.partitions[pk])
+
+
+def _sample_template(tier, rng):
+    item = rng.choice([item for pk, items in tier.partitions.items() if pk.startswith('TEMPLATE#')
+                       for item in items])
+    return Sample({'Key': {'PK': item['PK'], 'SK': item['SK']}}, [item])
+
+
+def _sample_expiry_bucket(tier, rng):
+    if not tier.gsi2:
+        return None
+    bucket = rng.choice(sorted(tier.gsi2))
+    due = max(item['expireUploadAt']['S'] for item in tier.gsi2[bucket])
+    return Sample({'IndexName': 'GSI2', 'KeyConditionExpression': 'GSI2PK = :bucket AND expireUploadAt <= :now',
+                   'ExpressionAttributeValues': {':bucket': {'S': bucket}, ':now': {'S': due}}},
+                  tier.gsi2[bucket])
+
+
+PATTERNS = [
+    Pattern('getGame', 'query', 'PK = GAME#{gameId}', _sample_get_game),
+    Pattern('findAllPlayers', 'query', 'PK = GAME#{gameId} AND begins_with(SK, PLAYER#)', _sample_find_all_players),
+    Pattern('checkGameAccess', 'get_item', 'GAME#{gameId} / PLAYER#{userId}', _sample_get_item('CHARACTER')),
+    Pattern('getSectionData', 'get_item', 'GAME#{gameId} / SECTION#{sectionId}', _sample_get_item('SECTION')),
+    Pattern('getAsset', 'get_item', 'GAME#{gameId} / ASSET#{assetId}', _sample_get_item('ASSET')),
+    Pattern('getGames', 'query', 'GSI1: GSI1PK = USER#{userId}', _sample_get_games),
+    Pattern('getUserGameCount', 'query', 'GSI1: GSI1PK = USER#{userId}, COUNT',
+            lambda tier, rng: _sample_get_games(tier, rng, count=True)),
+    Pattern('findAllSections', 'query', 'GSI1: SECTIONUSER#{userId} AND PK = GAME#{gameId}', _sample_find_all_sections),
+    Pattern('getGameWithToken', 'query', 'GSI1: GSI1PK = JOIN#{joinCode}', _sample_get_game_with_token),
+    Pattern('getCharacterTemplates', 'query', 'PK = TEMPLATE#{gameType}#{language}', _sample_templates),
+    Pattern('getCharacterTemplate', 'get_item', 'TEMPLATE#... / TEMPLATE#{templateName}', _sample_template),
+    Pattern('expireAssets', 'query', 'GSI2: GSI2PK = EXPIRY#{bucket} AND expireUploadAt <= now', _sample_expiry_bucket),
+]
+
+
+def run_sample(dynamodb, table_name: str, pattern: Pattern, sample: Sample, measurement: Measurement):
+    """Send one request, reading every page, and add its numbers to the measurement"""
+    request = {'TableName': table_name, 'ReturnConsumedCapacity': 'TOTAL', **sample.request}
+    returned = []
+    started = time.perf_counter()
+    if pattern.operation == 'get_item':
+        response = dynamodb.get_item(**request)
+        measurement.pages += 1
+        measurement.capacity += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+        scanned = 1 if 'Item' in response else 0
+        returned = [response['Item']] if 'Item' in response else []
+        count = len(returned)
+    else:
+        scanned = count = 0
+        while True:
+            response = dynamodb.query(**request)
+            measurement.pages += 1
+            measurement.capacity += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+            scanned += response['ScannedCount']
+            count += response['Count']
+            returned += response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                break
+            request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    measurement.latency.record(time.perf_counter() - started)
+
+    units, pages = model_reads(sample.read, pattern.operation)
+    measurement.requests += 1
+    measurement.model_rcu += units
+    measurement.model_pages += pages
+    measurement.max_model_pages = max(measurement.max_model_pages, pages)
+    measurement.scanned += scanned
+    measurement.returned += count
+    measurement.bytes_read += sum(item_size(item) for item in sample.read)
+    measurement.bytes_returned += sum(item_size(item) for item in returned)
+
+
+def build_tier(dynamodb, scale: int, config: DatasetConfig, prefix: str) -> TierData:
+    """Generate and write one scale's table"""
+    tier_config = DatasetConfig(**{**config.__dict__,
+                                   'players_median': config.players_median * scale,
+                                   'players_max': max(config.players_max, config.players_median * scale * 4),
+                                   'npcs_median': config.npcs_median * scale,
+                                   'npcs_max': max(config.npcs_max, config.npcs_median * scale * 4)})
+    tier = TierData(scale=scale, table_name=f"{prefix}-{scale}x", dataset=generate(tier_config))
+    with open(DEFAULT_TEMPLATES_FILE, encoding='utf-8') as f:
+        templates = template_items(json.load(f))
+    tier.dataset.items += templates
+    tier.index(tier.dataset.items)
+
+    create_table(dynamodb, tier.table_name)
+    stats = write_dataset(dynamodb, tier.table_name, tier.dataset)
+    if stats.errors:
+        raise RuntimeError(f"Writing {tier.table_name} failed: {stats.errors[0]}")
+    print(f"{tier.table_name}: {len(tier.dataset.games)} games, {tier.items_per_game:.0f} items per game, "
+          f"{stats.put} items written in {stats.write_seconds:.1f}s")
+    return tier
+
+
+def scaling_slope(points: List[tuple]) -> float:
+    """Least-squares slope of log(y) against log(x)"""
+    points = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread if spread else 0.0
+
+
+def flag_patterns(measurements: List[Measurement], max_slope: float, max_amplification: float) -> Dict[str, List[str]]:
+    """Reasons each pattern is flagged, by pattern name"""
+    flags = {}
+    for pattern in PATTERNS:
+        results = [m for m in measurements if m.pattern == pattern.name and m.requests]
+        reasons = []
+        slope = scaling_slope([(m.items_per_game, m.mean(m.model_rcu)) for m in results])
+        if slope > max_slope:
+            reasons.append(f"grows with game size: read units ~ items^{slope:.2f}")
+        paged = [m for m in results if m.max_model_pages > 1]
+        if paged:
+            reasons.append(f"needs up to {max(m.max_model_pages for m in paged)} 1 MB pages "
+                           f"from {min(m.scale for m in paged)}x")
+        for m in results:
+            if m.bytes_returned and m.bytes_read / m.bytes_returned > max_amplification:
+                reasons.append(f"reads {m.bytes_read / m.bytes_returned:.0f}x the bytes it returns at {m.scale}x")
+                break
+        if reasons:
+            flags[pattern.name] = reasons
+    return flags
+
+
+def print_results(measurements: List[Measurement], flags: Dict[str, List[str]]):
+    print(f"\n{'pattern':<22}{'scale':>6}{'items/game':>11}{'p50 ms':>9}{'p95 ms':>9}{'capacity':>9}"
+          f"{'model RCU':>10}{'pages':>7}{'model pg':>9}{'read':>8}{'returned':>9}{'KB read':>9}{'KB ret':>8}")
+    for m in measurements:
+        s = m.summary()
+        print(f"{m.pattern:<22}{str(m.scale) + 'x':>6}{s['items_per_game']:>11.0f}{s['p50_ms']:>9.2f}"
+              f"{s['p95_ms']:>9.2f}{s['capacity']:>9.1f}{s['model_rcu']:>10.1f}{s['pages']:>7.1f}"
+              f"{s['model_pages']:>9.1f}{s['scanned']:>8.1f}{s['returned']:>9.1f}"
+              f"{s['bytes_read'] / 1024:>9.1f}{s['bytes_returned'] / 1024:>8.1f}")
+    print()
+    if not flags:
+        print("✓ No pattern scales badly with game size")
+    for name, reasons in flags.items():
+        print(f"⚠ {name}: {'; '.join(reasons)}")
+
+
+def start_local_aws():
+    """Start an in-process moto server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+
+def main():
+    scales = [int(scale) for scale in (os.getenv('SCALES') or '1,4,16').split(',')]
+    samples = int(os.getenv('SAMPLES') or 50)
+    prefix = os.getenv('TABLE_PREFIX') or 'Wildsea-bench'
+    max_slope = float(os.getenv('FLAG_SLOPE') or 0.5)
+    max_amplification = float(os.getenv('FLAG_AMPLIFICATION') or 4)
+    config = DatasetConfig(games=int(os.getenv('GAMES') or 20), users=int(os.getenv('USERS') or 100),
+                           players_median=2, npcs_median=1, seed=int(os.getenv('SEED') or 1))
+
+    server = None
+    if not os.getenv('AWS_ENDPOINT_URL'):
+        # Dummy credentials - nothing is sent to AWS
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+        endpoint_url, server = start_local_aws()
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+    print(f"Using endpoint: {os.environ['AWS_ENDPOINT_URL']}")
+
+    dynamodb = create_client()
+    tiers = []
+    measurements = []
+    try:
+        for scale in scales:
+            tier = build_tier(dynamodb, scale, config, prefix)
+            tiers.append(tier)
+            for pattern in PATTERNS:
+                measurement = Measurement(pattern.name, scale, tier.items_per_game)
+                # The same draws at every scale, so patterns that don't depend on the game read the same keys
+                rng = random.Random(f"{config.seed}-{pattern.name}")
+                for _ in range(samples):
+                    sample = pattern.sample(tier, rng)
+                    if sample:
+                        run_sample(dynamodb, tier.table_name, pattern, sample, measurement)
+                measurements.append(measurement)
+
+        flags = flag_patterns(measurements, max_slope, max_amplification)
+        print_results(measurements, flags)
+        report = os.getenv('REPORT')
+        if report:
+            with open(report, 'w', encoding='utf-8') as f:
+                json.dump({'scales': scales, 'samples': samples,
+                           'patterns': {pattern.name: pattern.description for pattern in PATTERNS},
+                           'results': [m.summary() for m in measurements], 'flags': flags}, f, indent=2)
+            print(f"Report written to {report}")
+    finally:
+        if not os.getenv('KEEP_TABLES'):
+            for tier in tiers:
+                dynamodb.delete_table(TableName=tier.table_name)
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
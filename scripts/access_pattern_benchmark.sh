@@ -0,0 +1,45 @@
+#!/bin/bash
+set -e
+
+# Usage: ./scripts/access_pattern_benchmark.sh
+#
+# Runs the access-pattern benchmark against DynamoDB Local, started here in its own container.
+# Set AWS_ENDPOINT_URL to use a stand-in that is already running instead.
+
+# REPORT=path.json exports the results when the run ends
+REPORT_ARGS=()
+if [ -n "$REPORT" ]; then
+    REPORT_DIR=$(cd "$(dirname "$REPORT")" && pwd)
+    REPORT_ARGS=(-v "$REPORT_DIR:/reports" -e REPORT="/reports/$(basename "$REPORT")")
+fi
+
+if [ -z "$AWS_ENDPOINT_URL" ]; then
+    echo "Starting DynamoDB Local..."
+    docker run -d --rm --name wildsea-dynamodb-local -p 8000:8000 \
+        amazon/dynamodb-local -jar DynamoDBLocal.jar -inMemory > /dev/null
+    trap 'docker stop wildsea-dynamodb-local > /dev/null' EXIT
+    AWS_ENDPOINT_URL=http://localhost:8000
+fi
+
+echo "Running access-pattern benchmark in Docker container..."
+echo "Endpoint: $AWS_ENDPOINT_URL"
+
+# The dataset generator reads the template catalogue and the UI's seed data.
+# Local stand-ins accept any credentials.
+docker run --rm \
+    -v "$(pwd)/scripts:/work/scripts" \
+    -v "$(pwd)/presets:/work/presets" \
+    -v "$(pwd)/ui/src/seed:/work/ui/src/seed" \
+    -e AWS_ENDPOINT_URL="$AWS_ENDPOINT_URL" \
+    -e AWS_ACCESS_KEY_ID=local \
+    -e AWS_SECRET_ACCESS_KEY=local \
+    -e AWS_DEFAULT_REGION=ap-southeast-2 \
+    -e SCALES="$SCALES" \
+    -e GAMES="$GAMES" \
+    -e USERS="$USERS" \
+    -e SAMPLES="$SAMPLES" \
+    -e SEED="$SEED" \
+    "${REPORT_ARGS[@]}" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install --quiet boto3 && python -u /work/scripts/access_pattern_benchmark.py"
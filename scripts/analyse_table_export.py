@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Hot-partition and item-size analyser for DynamoDB table exports.
+
+Everything in a game lives under one GAME#{gameId} partition, and section
+content is stored as JSON strings, so busy games risk hot partitions and
+large sections creep towards the 400 KB item limit. This reads an export
+to S3 (DynamoDB JSON or Amazon Ion, gzipped or not) one item at a time,
+from a downloaded copy or straight from S3, so memory grows with the
+number of partitions, not items. For each partition it records item
+counts, bytes, the largest item and the largest attribute, plus totals by
+attribute name.
+
+Write rates come from stream records, either saved to files (JSON lines,
+or JSON documents with a Records list, as Lambda receives them) or read
+from the table's stream itself, which keeps 24 hours. Each write is
+charged as DynamoDB does: a unit per 1 KB of the larger of the old and new
+images. Records are counted in one-second buckets for each partition, to
+find its peak.
+
+Games are ranked by risk, the highest of three ratios, each 1.0 at a limit:
+
+  item   largest item against the 400 KB item limit
+  read   partition bytes against the 1 MB a getGame query page can read
+  write  peak write units per second against a partition's 1,000
+
+Ion exports need the amazon.ion package (pip install amazon.ion).
+
+Environment:
+  EXPORT        Export to read: a directory, a data file, or s3://bucket/prefix (required)
+  STREAM_FILES  Stream record files, comma separated (.gz is read as gzip)
+  STREAM_ARN    Stream to read write rates from, e.g. the table's LatestStreamArn
+  TOP           Partitions and items to list (default 20)
+  REPORT        Path to write the full results to, as JSON
+
+Usage: python3 analyse_table_export.py
+"""
+
+import gzip
+import heapq
+import io
+import json
+import math
+import os
+import sys
+from collections import Counter
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from generate_dataset import attribute_size, item_size
+
+MAX_ITEM_BYTES = 400 * 1024
+PAGE_BYTES = 1024 * 1024
+PARTITION_WRITE_UNITS = 1000  # Write units per second a single partition can take
+WRITE_UNIT_BYTES = 1024
+DATA_SUFFIXES = ('.json', '.json.gz', '.ion', '.ion.gz')
+
+Item = Dict[str, dict]
+
+
+@dataclass
+class AttributeStats:
+    """Sizes of one attribute name across every item"""
+    count: int = 0
+    bytes: int = 0
+    largest: int = 0
+    largest_key: Tuple[str, str] = ('', '')
+
+
+@dataclass
+class PartitionStats:
+    pk: str
+    items: int = 0
+    bytes: int = 0
+    largest_item: int = 0
+    largest_item_sk: str = ''
+    largest_attribute: int = 0
+    largest_attribute_name: str = ''
+    largest_attribute_sk: str = ''
+    types: Counter = field(default_factory=Counter)
+    writes: int = 0
+    write_units: int = 0
+    units_by_second: Counter = field(default_factory=Counter)
+
+    @property
+    def peak_write_units(self) -> int:
+        """Most write units in any one second"""
+        return max(self.units_by_second.values(), default=0)
+
+    def risk(self) -> Tuple[float, str]:
+        """The highest of the item, read and write ratios, and which it was"""
+        ratios = {
+            'item': self.largest_item / MAX_ITEM_BYTES,
+            'read': self.bytes / PAGE_BYTES,
+            'write': self.peak_write_units / PARTITION_WRITE_UNITS,
+        }
+        reason = max(ratios, key=ratios.get)
+        return ratios[reason], reason
+
+    def summary(self, window: float) -> dict:
+        risk, reason = self.risk()
+        return {
+            'pk': self.pk,
+            'items': self.items,
+            'bytes': self.bytes,
+            'types': dict(self.types),
+            'largest_item': {'bytes': self.largest_item, 'sk': self.largest_item_sk},
+            'largest_attribute': {'bytes': self.largest_attribute, 'name': self.largest_attribute_name,
+                                  'sk': self.largest_attribute_sk},
+            'writes': self.writes,
+            'write_units': self.write_units,
+            'writes_per_second': round(self.writes / window, 3),
+            'peak_write_units_per_second': self.peak_write_units,
+            'risk': round(risk, 3),
+            'risk_reason': reason,
+        }
+
+
+class ExportAnalysis:
+    """Running totals for an export and its stream records"""
+
+    def __init__(self, top: int = 20):
+        self.top = top
+        self.items = 0
+        self.bytes = 0
+        self.stream_records = 0
+        self.first_write: Optional[float] = None
+        self.last_write: Optional[float] = None
+        self.partitions: Dict[str, PartitionStats] = {}
+        self.attributes: Dict[str, AttributeStats] = {}
+        self._largest_items: List[Tuple[int, str, str]] = []  # min-heap of the top largest
+
+    def partition(self, pk: str) -> PartitionStats:
+        if pk not in self.partitions:
+            self.partitions[pk] = PartitionStats(pk)
+        return self.partitions[pk]
+
+    def add_item(self, item: Item):
+        pk, sk = item['PK']['S'], item.get('SK', {}).get('S', '')
+        size = item_size(item)
+        self.items += 1
+        self.bytes += size
+        partition = self.partition(pk)
+        partition.items += 1
+        partition.bytes += size
+        partition.types[item.get('type', {}).get('S', '')] += 1
+        if size > partition.largest_item:
+            partition.largest_item, partition.largest_item_sk = size, sk
+
+        for name, value in item.items():
+            size_of_attribute = attribute_size(name, value)
+            stats = self.attributes.setdefault(name, AttributeStats())
+            stats.count += 1
+            stats.bytes += size_of_attribute
+            if size_of_attribute > stats.largest:
+                stats.largest, stats.largest_key = size_of_attribute, (pk, sk)
+            if size_of_attribute > partition.largest_attribute:
+                partition.largest_attribute = size_of_attribute
+                partition.largest_attribute_name, partition.largest_attribute_sk = name, sk
+
+        entry = (size, pk, sk)
+        if len(self._largest_items) < self.top:
+            heapq.heappush(self._largest_items, entry)
+        elif entry > self._largest_items[0]:
+            heapq.heapreplace(self._largest_items, entry)
+
+    def add_stream_record(self, record: dict):
+        """Count one stream record's write against its partition"""
+        change = record.get('dynamodb', {})
+        keys = change.get('Keys', {})
+        if 'PK' not in keys:
+            return
+        sizes = [item_size(change[image]) for image in ('NewImage', 'OldImage') if image in change]
+        size = max(sizes) if sizes else change.get('SizeBytes', 0)
+        units = max(1, math.ceil(size / WRITE_UNIT_BYTES))
+        moment = _epoch_seconds(change.get('ApproximateCreationDateTime', 0))
+
+        self.stream_records += 1
+        partition = self.partition(keys['PK']['S'])
+        partition.writes += 1
+        partition.write_units += units
+        partition.units_by_second[int(moment)] += units
+        self.first_write = moment if self.first_write is None else min(self.first_write, moment)
+        self.last_write = moment if self.last_write is None else max(self.last_write, moment)
+
+    @property
+    def stream_seconds(self) -> float:
+        """The time the stream records cover, which average write rates are over"""
+        if self.first_write is None:
+            return 1.0
+        return max(1.0, self.last_write - self.first_write)
+
+    def largest_items(self) -> List[Tuple[int, str, str]]:
+        return sorted(self._largest_items, reverse=True)
+
+    def ranked_games(self) -> List[PartitionStats]:
+        games = [partition for pk, partition in self.partitions.items() if pk.startswith('GAME#')]
+        return sorted(games, key=lambda partition: partition.risk()[0], reverse=True)
+
+
+def _epoch_seconds(moment) -> float:
+    """ApproximateCreationDateTime as boto3 (datetime) or a saved record (epoch seconds) has it"""
+    if isinstance(moment, datetime):
+        return moment.timestamp()
+    return float(moment)
+
+
+def _from_ion(value) -> dict:
+    """An Ion export value as a DynamoDB attribute value"""
+    from amazon.ion.core import IonType
+    from amazon.ion.simple_types import IonPyNull
+
+    annotations = [annotation.text for annotation in getattr(value, 'ion_annotations', ())]
+    if value is None or isinstance(value, IonPyNull):
+        return {'NULL': True}
+    # Ion booleans are ints in Python
+    if getattr(value, 'ion_type', None) == IonType.BOOL or isinstance(value, bool):
+        return {'BOOL': bool(value)}
+    if isinstance(value, str):
+        return {'S': str(value)}
+    if isinstance(value, bytes):
+        return {'B': bytes(value)}
+    if isinstance(value, Mapping):
+        return {'M': {name: _from_ion(entry) for name, entry in value.items()}}
+    if isinstance(value, list):
+        for annotation, kind in (('$dynamodb_SS', 'SS'), ('$dynamodb_NS', 'NS'), ('$dynamodb_BS', 'BS')):
+            if annotation in annotations:
+                return {kind: [entry if kind == 'BS' else str(entry) for entry in value]}
+        return {'L': [_from_ion(entry) for entry in value]}
+    return {'N': str(value)}
+
+
+def _is_data_file(name: str) -> bool:
+    base = os.path.basename(name)
+    return base.endswith(DATA_SUFFIXES) and not base.startswith(('manifest-', '_'))
+
+
+def _lines(name: str, raw) -> Iterator[str]:
+    stream = gzip.GzipFile(fileobj=raw) if name.endswith('.gz') else raw
+    yield from io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def _ion_items(name: str, raw) -> Iterator[Item]:
+    try:
+        from amazon.ion import simpleion
+    except ImportError:
+        print("Error: Ion exports need the amazon.ion package (pip install amazon.ion)")
+        sys.exit(1)
+
+    stream = gzip.GzipFile(fileobj=raw) if name.endswith('.gz') else raw
+    # Values can be up to the item limit, more than the C reader buffers by default
+    values = simpleion.load(stream, single_value=False, parse_eagerly=False,
+                            text_buffer_size_limit=4 * MAX_ITEM_BYTES)
+    for value in values:
+        yield _from_ion(value['Item'])['M']
+
+
+def read_export(export: str) -> Iterator[Item]:
+    """Every item in an export, one at a time"""
+    for name, opener in _export_files(export):
+        with opener() as raw:
+            if '.ion' in os.path.basename(name):
+                yield from _ion_items(name, raw)
+            else:
+                for line in _lines(name, raw):
+                    if line.strip():
+                        yield json.loads(line)['Item']
+
+
+def _export_files(export: str):
+    if export.startswith('s3://'):
+        import boto3
+
+        bucket, _, prefix = export[len('s3://'):].partition('/')
+        s3 = boto3.client('s3')
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+            for entry in page.get('Contents', []):
+                if _is_data_file(entry['Key']):
+                    key = entry['Key']
+                    yield key, lambda key=key: s3.get_object(Bucket=bucket, Key=key)['Body']
+    elif os.path.isdir(export):
+        for directory, _, names in sorted(os.walk(export)):
+            for name in sorted(names):
+                if _is_data_file(name):
+                    path = os.path.join(directory, name)
+                    yield path, lambda path=path: open(path, 'rb')
+    else:
+        yield export, lambda: open(export, 'rb')
+
+
+def read_stream_files(paths: Iterable[str]) -> Iterator[dict]:
+    """Stream records from JSON lines files, or JSON documents with a Records list"""
+    for path in paths:
+        with open(path, 'rb') as raw:
+            lines = _lines(path, raw)
+            first = next(lines, '')
+            try:
+                documents = [json.loads(first)] if first.strip() else []
+            except json.JSONDecodeError:
+                # A single pretty-printed document
+                documents = [json.loads(first + ''.join(lines))]
+            else:
+                documents = _chain(documents, (json.loads(line) for line in lines if line.strip()))
+            for document in documents:
+                yield from document.get('Records', [document])
+
+
+def _chain(first, rest):
+    yield from first
+    yield from rest
+
+
+def read_stream(stream_arn: str) -> Iterator[dict]:
+    """Every record still held by a DynamoDB stream, shard by shard"""
+    import boto3
+
+    streams = boto3.client('dynamodbstreams')
+    params = {'StreamArn': stream_arn}
+    while True:
+        description = streams.describe_stream(**params)['StreamDescription']
+        for shard in description['Shards']:
+            iterator = streams.get_shard_iterator(StreamArn=stream_arn, ShardId=shard['ShardId'],
+                                                  ShardIteratorType='TRIM_HORIZON')['ShardIterator']
+            while iterator:
+                response = streams.get_records(ShardIterator=iterator, Limit=1000)
+                yield from response['Records']
+                # An open shard keeps handing out iterators; stop once it's caught up
+                if not response['Records']:
+                    break
+                iterator = response.get('NextShardIterator')
+        if 'LastEvaluatedShardId' not in description:
+            return
+        params['ExclusiveStartShardId'] = description['LastEvaluatedShardId']
+
+
+def analyse(items: Iterable[Item], stream_records: Iterable[dict] = (), top: int = 20) -> ExportAnalysis:
+    analysis = ExportAnalysis(top)
+    for item in items:
+        analysis.add_item(item)
+    for record in stream_records:
+        analysis.add_stream_record(record)
+    return analysis
+
+
+def print_analysis(analysis: ExportAnalysis):
+    games = analysis.ranked_games()
+    print(f"{analysis.items} items, {analysis.bytes / 1e6:.1f} MB in {len(analysis.partitions)} partitions "
+          f"({len(games)} games); {analysis.stream_records} stream records over {analysis.stream_seconds:.0f}s")
+
+    print(f"\nGames by risk (item: largest item / 400 KB, read: partition / 1 MB, write: peak WCU/s / 1000)")
+    print(f"{'partition':<46}{'items':>7}{'KB':>9}{'largest KB':>11}{'largest attribute':>26}"
+          f"{'writes/s':>9}{'peak WCU/s':>11}{'risk':>7}  reason")
+    for partition in games[:analysis.top]:
+        risk, reason = partition.risk()
+        attribute = f"{partition.largest_attribute_name} {partition.largest_attribute / 1024:.1f} KB"
+        print(f"{partition.pk:<46}{partition.items:>7}{partition.bytes / 1024:>9.1f}"
+              f"{partition.largest_item / 1024:>11.1f}{attribute:>26}{partition.writes / analysis.stream_seconds:>9.2f}"
+              f"{partition.peak_write_units:>11}{risk:>7.2f}  {reason}")
+
+    print("\nLargest items")
+    for size, pk, sk in analysis.largest_items():
+        warning = '  ⚠ over 75% of the item limit' if size > MAX_ITEM_BYTES * 0.75 else ''
+        print(f"  {size / 1024:>8.1f} KB  {pk} {sk}{warning}")
+
+    print("\nAttributes by total size")
+    print(f"  {'name':<22}{'items':>8}{'total MB':>10}{'mean B':>9}{'largest KB':>11}")
+    attributes = sorted(analysis.attributes.items(), key=lambda entry: entry[1].bytes, reverse=True)
+    for name, stats in attributes[:analysis.top]:
+        print(f"  {name:<22}{stats.count:>8}{stats.bytes / 1e6:>10.2f}{stats.bytes / stats.count:>9.0f}"
+              f"{stats.largest / 1024:>11.1f}")
+
+    over = [partition for partition in games if partition.bytes > PAGE_BYTES]
+    if over:
+        print(f"\n⚠ {len(over)} games need more than one 1 MB page for getGame")
+    hot = [partition for partition in games if partition.peak_write_units > PARTITION_WRITE_UNITS / 2]
+    if hot:
+        print(f"⚠ {len(hot)} games peaked above half a partition's write throughput")
+
+
+def main():
+    export = os.getenv('EXPORT')
+    if not export:
+        print("Error: EXPORT is required")
+        sys.exit(1)
+    top = int(os.getenv('TOP') or 20)
+
+    stream_records = []
+    stream_files = os.getenv('STREAM_FILES')
+    if stream_files:
+        stream_records = read_stream_files(path for path in stream_files.split(',') if path)
+    elif os.getenv('STREAM_ARN'):
+        stream_records = read_stream(os.getenv('STREAM_ARN'))
+
+    analysis = analyse(read_export(export), stream_records, top)
+    print_analysis(analysis)
+
+    report = os.getenv('REPORT')
+    if report:
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump({
+                'items': analysis.items,
+                'bytes': analysis.bytes,
+                'stream_records': analysis.stream_records,
+                'games': [partition.summary(analysis.stream_seconds) for partition in analysis.ranked_games()],
+                'largest_items': [{'bytes': size, 'pk': pk, 'sk': sk} for size, pk, sk in analysis.largest_items()],
+                'attributes': {name: {'count': stats.count, 'bytes': stats.bytes, 'largest': stats.largest,
+                                      'largest_key': list(stats.largest_key)}
+                               for name, stats in analysis.attributes.items()},
+            }, f, indent=2)
+        print(f"Report written to {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+AppSync real-time subscriptions for the load scripts, on the standard library.
+
+Speaks AppSync's graphql-ws protocol over a minimal RFC 6455 WebSocket on
+asyncio streams: connection_init and connection_ack, then start and
+start_ack for each subscription, with its data messages delivered to a
+callback as they arrive. The frame functions are shared with the mock
+real-time server.
+
+Subscriptions are authorised with a Cognito access token, sent in the
+connection URL's header parameter and in each start message.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import ssl
+import time
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+SUBPROTOCOL = 'graphql-ws'
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+DEFAULT_TIMEOUT_SECONDS = 10
+
+
+class RealtimeError(Exception):
+    """Raised when a connection or subscription is refused or lost"""
+    pass
+
+
+def accept_key(key: str) -> str:
+    """Sec-WebSocket-Accept for a Sec-WebSocket-Key"""
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')  # nosec B324 - required by RFC 6455
+
+
+def _mask(payload: bytes, key: bytes) -> bytes:
+    if not payload:
+        return payload
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+
+def encode_frame(opcode: int, payload: bytes, masked: bool) -> bytes:
+    """One final frame; clients must mask what they send, servers must not"""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if masked else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += length.to_bytes(2, 'big')
+    else:
+        header.append(mask_bit | 127)
+        header += length.to_bytes(8, 'big')
+    if masked:
+        key = os.urandom(4)
+        return bytes(header) + key + _mask(payload, key)
+    return bytes(header) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, bool, bytes]:
+    """(opcode, final, payload) of the next frame"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = int.from_bytes(await reader.readexactly(2), 'big')
+    elif length == 127:
+        length = int.from_bytes(await reader.readexactly(8), 'big')
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    return first & 0x0F, bool(first & 0x80), _mask(payload, key) if key else payload
+
+
+async def read_message(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, masked: bool) -> Optional[str]:
+    """The next text message, answering pings on the way; None once the peer closes"""
+    fragments = []
+    while True:
+        opcode, final, payload = await read_frame(reader)
+        if opcode == OPCODE_PING:
+            writer.write(encode_frame(OPCODE_PONG, payload, masked))
+            continue
+        if opcode == OPCODE_PONG:
+            continue
+        if opcode == OPCODE_CLOSE:
+            return None
+        fragments.append(payload)
+        if final:
+            return b''.join(fragments).decode('utf-8')
+
+
+def realtime_url(graphql_url: str) -> str:
+    """
+    The real-time endpoint for a GraphQL endpoint
+
+    AppSync's own domains swap appsync-api for appsync-realtime-api; custom
+    domains serve it at /graphql/realtime. REALTIME_URL overrides both.
+    """
+    override = os.getenv('REALTIME_URL')
+    if override:
+        return override
+    parsed = urlparse(graphql_url)
+    scheme = 'wss' if parsed.scheme == 'https' else 'ws'
+    if '.appsync-api.' in parsed.netloc:
+        return f"{scheme}://{parsed.netloc.replace('.appsync-api.', '.appsync-realtime-api.')}{parsed.path}"
+    return f"{scheme}://{parsed.netloc}{parsed.path.rstrip('/')}/realtime"
+
+
+def _encode_json(value: dict) -> str:
+    return base64.b64encode(json.dumps(value).encode('utf-8')).decode('ascii')
+
+
+class RealtimeClient:
+    """
+    One WebSocket connection to the real-time endpoint, carrying any number
+    of subscriptions
+
+    on_data(subscription_id, payload, received_at) is called for each data
+    message, with received_at from time.perf_counter() as the frame is read.
+    """
+
+    def __init__(self, graphql_url: str, access_token: str,
+                 on_data: Callable[[str, dict, float], None], timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        self.graphql_url = graphql_url
+        self.url = realtime_url(graphql_url)
+        self.authorization = {'host': urlparse(graphql_url).netloc, 'Authorization': access_token}
+        self.on_data = on_data
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._receiver: Optional[asyncio.Task] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._acknowledged: Optional[asyncio.Future] = None
+        self.errors = []
+
+    async def _handshake(self):
+        parsed = urlparse(self.url)
+        secure = parsed.scheme == 'wss'
+        host = parsed.hostname
+        port = parsed.port or (443 if secure else 80)
+        self._reader, self._writer = await asyncio.open_connection(
+            host, port, ssl=ssl.create_default_context() if secure else None,
+            server_hostname=host if secure else None,
+        )
+        path = (parsed.path or '/') + '?' + urlencode({'header': _encode_json(self.authorization),
+                                                       'payload': _encode_json({})})
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        request = [f"GET {path} HTTP/1.1", f"Host: {parsed.netloc}", "Upgrade: websocket",
+                   "Connection: Upgrade", f"Sec-WebSocket-Key: {key}", "Sec-WebSocket-Version: 13",
+                   f"Sec-WebSocket-Protocol: {SUBPROTOCOL}"]
+        self._writer.write(("\r\n".join(request) + "\r\n\r\n").encode('latin-1'))
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if b' 101 ' not in status_line or headers.get('sec-websocket-accept') != accept_key(key):
+            raise RealtimeError(f"WebSocket upgrade refused: {status_line.decode('latin-1').strip()}")
+
+    async def connect(self):
+        """Open the connection and wait for AppSync's connection_ack"""
+        try:
+            await asyncio.wait_for(self._handshake(), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            raise RealtimeError(f"Connect to {self.url} failed: {str(e) or type(e).__name__}") from e
+        self._acknowledged = asyncio.get_running_loop().create_future()
+        self._receiver = asyncio.create_task(self._receive())
+        await self._send({'type': 'connection_init'})
+        await asyncio.wait_for(self._acknowledged, self.timeout)
+
+    @property
+    def connected(self) -> bool:
+        """Whether the connection is still up and delivering messages"""
+        return self._receiver is not None and not self._receiver.done()
+
+    async def _send(self, message: dict):
+        self._writer.write(encode_frame(OPCODE_TEXT, json.dumps(message).encode('utf-8'), masked=True))
+        await self._writer.drain()
+
+    def _fail_pending(self, error: Exception):
+        for future in [self._acknowledged, *self._pending.values()]:
+            if future and not future.done():
+                future.set_exception(error)
+
+    async def _receive(self):
+        try:
+            while True:
+                text = await read_message(self._reader, self._writer, masked=True)
+                received_at = time.perf_counter()
+                if text is None:
+                    raise RealtimeError("Connection closed by the server")
+                message = json.loads(text)
+                kind = message.get('type')
+                if kind == 'data':
+                    self.on_data(message.get('id'), message.get('payload') or {}, received_at)
+                elif kind == 'connection_ack':
+                    self._acknowledged.set_result(message.get('payload') or {})
+                elif kind == 'start_ack':
+                    future = self._pending.pop(message.get('id'), None)
+                    if future and not future.done():
+                        future.set_result(True)
+                elif kind in ('error', 'start_error', 'connection_error'):
+                    error = RealtimeError(json.dumps(message.get('payload') or message))
+                    self.errors.append(str(error))
+                    future = self._pending.pop(message.get('id'), None) if message.get('id') else self._acknowledged
+                    if future and not future.done():
+                        future.set_exception(error)
+                # 'ka' keep-alives need no answer
+        except (asyncio.IncompleteReadError, OSError, RealtimeError) as e:
+            self._fail_pending(e if isinstance(e, RealtimeError) else RealtimeError(str(e) or type(e).__name__))
+        except asyncio.CancelledError:
+            pass
+
+    async def subscribe(self, query: str, variables: dict) -> str:
+        """Start a subscription and wait for its start_ack, returning its id"""
+        subscription_id = str(uuid.uuid4())
+        self._pending[subscription_id] = asyncio.get_running_loop().create_future()
+        await self._send({
+            'id': subscription_id,
+            'type': 'start',
+            'payload': {
+                'data': json.dumps({'query': query, 'variables': variables}),
+                'extensions': {'authorization': self.authorization},
+            },
+        })
+        await asyncio.wait_for(self._pending[subscription_id], self.timeout)
+        return subscription_id
+
+    async def close(self):
+        if self._receiver:
+            self._receiver.cancel()
+        if self._writer:
+            try:
+                self._writer.write(encode_frame(OPCODE_CLOSE, b'', masked=True))
+                self._writer.close()
+            except (OSError, RuntimeError):
+                pass
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Pre-signed upload ticket pool for requestAssetUploads.
+
+Tickets are reserved ahead of time in batches (one requestAssetUploads call,
+so one Lambda invocation, per refill) and kept in a small per-slot cache.
+Claiming a ticket is then a local operation, which takes the GraphQL and
+Lambda round trips off the upload critical path when many images are pasted
+in a row.
+
+Pooled tickets are reserved without a size: their presigned POST accepts
+anything from 1 byte up to MAX_ASSET_SIZE_BYTES, and the asset's size is
+recorded when the upload arrives. The Content-Type is still signed, so a
+slot is (gameId, sectionId, mimeType). Tickets are evicted before either the
+presigned POST expires (PRESIGNED_URL_EXPIRES_SECONDS) or the pending asset
+is cleaned up (ASSET_CLEANUP_TIMEOUT_SECONDS), whichever is sooner.
+
+Every reserved ticket uses up one of the game's remainingAssets, and expiry
+doesn't give it back, so an evicted ticket is quota spent for nothing. A
+slot is only topped up once it has been claimed from refill_after_claims
+times within a ticket's lifetime: an occasional paste costs one ticket, as
+it would without the pool, and when a run of pastes stops at most
+target_size tickets are left to expire. Measured with
+test-scripts/test_asset_ticket_pool.py, for 200 claims:
+
+  pastes                          hits   tickets reserved   never claimed
+  steady, a second apart           99%         205                5
+  bursts of 5, a minute apart      60%         400              200
+  single, a minute apart            0%         200                0
+
+Short bursts are the worst case: each one's refill is left to expire, so
+they cost twice the quota of uploading without the pool.
+
+bulk_asset_upload.py claims its tickets from a pool with TICKET_POOL=1.
+
+The pool is synchronous; main() runs the shared GraphQL client on a
+background event loop, so every refill reuses its keep-alive connection.
+
+Environment:
+  GRAPHQL_URL, COGNITO_CLIENT_ID, AWS_REGION   The deployment (required)
+  COGNITO_USERNAME, COGNITO_PASSWORD           User to sign in as (required)
+  GAME_ID, SECTION_ID                          Section to reserve tickets in (required)
+  CLAIMS                                       Tickets to claim (default 10)
+
+Usage: python3 asset_ticket_pool.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from cognito_auth import AuthError
+from graphql_client import Document, sign_in
+from load_generator import TransportError
+
+# Keep in sync with graphql/lib/constants/assets.ts
+PRESIGNED_URL_EXPIRES_SECONDS = 900
+ASSET_CLEANUP_TIMEOUT_SECONDS = 30
+MAX_ASSET_UPLOAD_BATCH_SIZE = 25
+
+# Don't hand out a ticket that is about to expire before the upload finishes
+DEFAULT_SAFETY_MARGIN_SECONDS = 5
+# Only keep tickets for a slot once it has been claimed from again
+DEFAULT_REFILL_AFTER_CLAIMS = 2
+
+REQUEST_ASSET_UPLOADS_MUTATION = Document("""
+mutation RequestAssetUploads($input: RequestAssetUploadsInput!) {
+    requestAssetUploads(input: $input) {
+        tickets {
+            uploadUrl
+            uploadFields
+            headers
+            asset {
+                gameId
+                sectionId
+                assetId
+                status
+                mimeType
+                sizeBytes
+                createdAt
+                type
+            }
+        }
+        errors {
+            index
+            assetId
+            errorType
+            message
+        }
+    }
+}
+""")
+
+SlotKey = Tuple[str, str, str]
+
+@dataclass
+class UploadTicket:
+    asset: dict
+    upload_url: str
+    upload_fields: dict
+    headers: dict
+    expires_at: float
+
+    @property
+    def asset_id(self) -> str:
+        return self.asset['assetId']
+
+@dataclass
+class PoolStats:
+    claims: int = 0
+    hits: int = 0
+    misses: int = 0
+    evicted: int = 0
+    reserved: int = 0
+    refills: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.claims if self.claims else 0.0
+
+@dataclass
+class _Slot:
+    tickets: Deque[UploadTicket] = field(default_factory=deque)
+    refilling: bool = False
+    claims: int = 0  # Claims since the slot was last idle for a ticket's lifetime
+    last_claimed_at: Optional[float] = None
+
+def _parse_json_field(value):
+    """AWSJSON fields arrive as JSON strings (sometimes double-encoded)"""
+    while isinstance(value, str):
+        value = json.loads(value)
+    return value
+
+async def request_asset_uploads(client, game_id, section_id, items):
+    """Call requestAssetUploads and return (tickets, errors) as raw dicts"""
+    data = await client.execute(REQUEST_ASSET_UPLOADS_MUTATION, {
+        "input": {
+            "gameId": game_id,
+            "sectionId": section_id,
+            "assets": items
+        }
+    })
+    batch = data['requestAssetUploads']
+    return batch['tickets'], batch['errors']
+
+class AssetTicketPool:
+    """
+    Per-slot cache of pre-signed upload tickets with TTL eviction
+
+    fetch_tickets(game_id, section_id, items) must return (tickets, errors)
+    in the shape of the requestAssetUploads response.
+    """
+
+    def __init__(self, fetch_tickets: Callable[[str, str, List[dict]], Tuple[List[dict], List[dict]]],
+                 target_size: int = 5, low_water_mark: int = 2,
+                 ttl_seconds: Optional[float] = None,
+                 safety_margin_seconds: float = DEFAULT_SAFETY_MARGIN_SECONDS,
+                 refill_after_claims: int = DEFAULT_REFILL_AFTER_CLAIMS,
+                 background_refill: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 0 < target_size <= MAX_ASSET_UPLOAD_BATCH_SIZE:
+            raise ValueError(f"target_size must be between 1 and {MAX_ASSET_UPLOAD_BATCH_SIZE}")
+        if ttl_seconds is None:
+            ttl_seconds = min(PRESIGNED_URL_EXPIRES_SECONDS, ASSET_CLEANUP_TIMEOUT_SECONDS)
+
+        self._fetch_tickets = fetch_tickets
+        self._target_size = target_size
+        self._low_water_mark = min(low_water_mark, target_size)
+        self._ttl_seconds = ttl_seconds - safety_margin_seconds
+        self._refill_after_claims = refill_after_claims
+        self._background_refill = background_refill
+        self._clock = clock
+        self._slots: Dict[SlotKey, _Slot] = {}
+        self._lock = threading.Lock()
+        self.stats = PoolStats()
+
+    def _slot(self, key: SlotKey) -> _Slot:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _Slot()
+        return slot
+
+    def _evict_expired(self, slot: _Slot):
+        """Drop tickets from the front of the queue once they are too old to use"""
+        now = self._clock()
+        while slot.tickets and slot.tickets[0].expires_at <= now:
+            slot.tickets.popleft()
+            self.stats.evicted += 1
+
+    def _reserve(self, key: SlotKey, count: int) -> List[UploadTicket]:
+        """Reserve and sign count tickets, for any size up to the limit, with a single batch request"""
+        game_id, section_id, mime_type = key
+        items = [{"mimeType": mime_type} for _ in range(count)]
+
+        reserved_at = self._clock()
+        tickets, errors = self._fetch_tickets(game_id, section_id, items)
+        for error in errors:
+            print(f"  Ticket reservation failed ({error.get('errorType')}): {error.get('message')}")
+
+        expires_at = reserved_at + self._ttl_seconds
+        result = [
+            UploadTicket(
+                asset=ticket['asset'],
+                upload_url=ticket['uploadUrl'],
+                upload_fields=_parse_json_field(ticket['uploadFields']),
+                headers=_parse_json_field(ticket['headers']),
+                expires_at=expires_at
+            )
+            for ticket in tickets
+        ]
+        with self._lock:
+            self.stats.reserved += len(result)
+            self.stats.refills += 1
+        return result
+
+    def _refill(self, key: SlotKey):
+        try:
+            with self._lock:
+                slot = self._slot(key)
+                self._evict_expired(slot)
+                needed = self._target_size - len(slot.tickets)
+            if needed > 0:
+                tickets = self._reserve(key, needed)
+                with self._lock:
+                    slot.tickets.extend(tickets)
+        except Exception as e:
+            print(f"  Ticket pool refill failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._slot(key).refilling = False
+
+    def _needs_refill(self, slot: _Slot) -> bool:
+        """Mark the slot as refilling if it is low and none is running (caller holds the lock)"""
+        if slot.refilling or len(slot.tickets) > self._low_water_mark:
+            return False
+        if slot.claims < self._refill_after_claims:
+            # Tickets for a slot that may not be claimed from again would only use up quota
+            return False
+        slot.refilling = True
+        return True
+
+    def _start_refill(self, key: SlotKey):
+        if self._background_refill:
+            threading.Thread(target=self._refill, args=(key,), daemon=True).start()
+        else:
+            self._refill(key)
+
+    def prefill(self, game_id: str, section_id: str, mime_type: str):
+        """Synchronously fill a slot up to the target size"""
+        key = (game_id, section_id, mime_type)
+        with self._lock:
+            self._slot(key).refilling = True
+        self._refill(key)
+
+    def claim(self, game_id: str, section_id: str, mime_type: str) -> UploadTicket:
+        """
+        Take a ticket for an upload of any size up to the limit
+
+        Served from the pool when a fresh ticket is available; otherwise a
+        single ticket is reserved directly. Once the slot has been claimed
+        from refill_after_claims times without a ticket's lifetime passing
+        in between, it is topped up for the next claim.
+        """
+        key = (game_id, section_id, mime_type)
+        with self._lock:
+            self.stats.claims += 1
+            slot = self._slot(key)
+            now = self._clock()
+            if slot.last_claimed_at is not None and now - slot.last_claimed_at >= self._ttl_seconds:
+                slot.claims = 0
+            slot.claims += 1
+            slot.last_claimed_at = now
+            self._evict_expired(slot)
+            ticket = slot.tickets.popleft() if slot.tickets else None
+            if ticket:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+            refill = self._needs_refill(slot)
+
+        if refill:
+            self._start_refill(key)
+
+        if ticket is None:
+            tickets = self._reserve(key, 1)
+            if not tickets:
+                raise RuntimeError("Failed to reserve an upload ticket")
+            ticket = tickets[0]
+        return ticket
+
+    def size(self, game_id: str, section_id: str, mime_type: str) -> int:
+        """Number of unexpired tickets currently pooled for a slot"""
+        with self._lock:
+            slot = self._slot((game_id, section_id, mime_type))
+            self._evict_expired(slot)
+            return len(slot.tickets)
+
+def main():
+    # Get required environment variables
+    graphql_url = os.getenv('GRAPHQL_URL')
+    client_id = os.getenv('COGNITO_CLIENT_ID')
+    region = os.getenv('AWS_REGION')
+    game_id = os.getenv('GAME_ID')
+    section_id = os.getenv('SECTION_ID')
+    username = os.getenv('COGNITO_USERNAME')
+    password = os.getenv('COGNITO_PASSWORD')
+    claims = int(os.getenv('CLAIMS', '10'))
+
+    if not all([graphql_url, client_id, region, game_id, section_id, username, password]):
+        print("Error: Missing required environment variables")
+        print("Required: GRAPHQL_URL, COGNITO_CLIENT_ID, AWS_REGION, GAME_ID, SECTION_ID, COGNITO_USERNAME, COGNITO_PASSWORD")
+        sys.exit(1)
+
+    # Refills run on the pool's threads; the client lives on this loop
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    def run(coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    print("Getting Cognito access token...")
+    try:
+        client = run(sign_in(graphql_url, username, password, client_id, region, max_connections=2))
+    except (AuthError, TransportError) as e:
+        print(f"Failed to get access token: {str(e)}")
+        sys.exit(1)
+
+    def fetch(game, section, items):
+        return run(request_asset_uploads(client, game, section, items))
+
+    pool = AssetTicketPool(fetch)
+    slot = (game_id, section_id, "image/jpeg")
+
+    print("Prefilling ticket pool...")
+    start = time.perf_counter()
+    pool.prefill(*slot)
+    print(f"  Reserved {pool.size(*slot)} tickets in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"\nClaiming {claims} tickets...")
+    for _ in range(claims):
+        start = time.perf_counter()
+        ticket = pool.claim(*slot)
+        print(f"  {ticket.asset_id}: claimed in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    stats = pool.stats
+    print(f"\nClaims: {stats.claims}, hits: {stats.hits} ({stats.hit_rate:.0%}), misses: {stats.misses}")
+    print(f"Reserved: {stats.reserved} in {stats.refills} batch(es), evicted: {stats.evicted}")
+    run(client.close())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the generatePresignedUrl Lambda.
+
+Each sample runs in a fresh interpreter, so it sees the same cold start the
+Lambda runtime does: it records the time to import lambda_function, the
+latency of the first invocation, and a warm invocation for comparison.
+Results can be saved and compared against a previous run to catch regressions.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec B404 - runs our own interpreter with a fixed script
+import sys
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'generatePresignedUrl')
+
+# Runs inside the child interpreter; prints one JSON line of timings in ms
+SAMPLE_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import lambda_function
+imported = time.perf_counter()
+event = {
+    'assetData': {
+        'bucket': 'wildsea-benchmark-assets',
+        'incomingKey': 'incoming/game/g/section/s/a/original',
+        'gameId': 'g',
+        'sectionId': 's',
+        'assetId': 'a',
+        'createdAt': '2024-01-01T00:00:00.000Z',
+    },
+    'input': {'mimeType': 'image/png', 'sizeBytes': 1024},
+}
+lambda_function.lambda_handler(event, None)
+first = time.perf_counter()
+lambda_function.lambda_handler(event, None)
+warm = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_invoke_ms': (first - imported) * 1000,
+    'warm_invoke_ms': (warm - first) * 1000,
+}))
+"""
+
+# Dummy credentials - signing is local, so nothing is sent to AWS
+BENCHMARK_ENV = {
+    'AWS_ACCESS_KEY_ID': 'AKIABENCHMARK',
+    'AWS_SECRET_ACCESS_KEY': 'benchmark-secret',
+    'AWS_SESSION_TOKEN': 'benchmark-token',
+    'AWS_REGION': 'ap-southeast-2',
+    'AWS_DEFAULT_REGION': 'ap-southeast-2',
+}
+
+@dataclass
+class StartupSample:
+    import_ms: float
+    first_invoke_ms: float
+    warm_invoke_ms: float
+
+@dataclass
+class StartupSummary:
+    samples: int
+    import_ms_median: float
+    import_ms_max: float
+    first_invoke_ms_median: float
+    first_invoke_ms_max: float
+    warm_invoke_ms_median: float
+
+def run_sample() -> StartupSample:
+    """Run one cold start in a fresh interpreter"""
+    env = dict(os.environ)
+    env.update(BENCHMARK_ENV)
+    # Don't let a stale bytecode cache in the Lambda directory skew results
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+
+    output = subprocess.run(  # nosec B603 - fixed argv, no shell
+        [sys.executable, '-c', SAMPLE_SCRIPT, LAMBDA_DIR],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return StartupSample(**json.loads(output.strip().splitlines()[-1]))
+
+def summarise(samples: List[StartupSample]) -> StartupSummary:
+    """Reduce samples to medians (and maxima for the cold path)"""
+    return StartupSummary(
+        samples=len(samples),
+        import_ms_median=statistics.median(s.import_ms for s in samples),
+        import_ms_max=max(s.import_ms for s in samples),
+        first_invoke_ms_median=statistics.median(s.first_invoke_ms for s in samples),
+        first_invoke_ms_max=max(s.first_invoke_ms for s in samples),
+        warm_invoke_ms_median=statistics.median(s.warm_invoke_ms for s in samples),
+    )
+
+def compare_to_baseline(summary: StartupSummary, baseline: dict, tolerance_pct: float) -> List[str]:
+    """Return a description of each median that regressed beyond the tolerance"""
+    regressions = []
+    for field in ('import_ms_median', 'first_invoke_ms_median', 'warm_invoke_ms_median'):
+        previous = baseline.get(field)
+        current = getattr(summary, field)
+        if previous and current > previous * (1 + tolerance_pct / 100):
+            regressions.append(f"{field}: {previous:.2f} -> {current:.2f} ms")
+    return regressions
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, default=10, help='Number of cold starts to run (default: 10)')
+    parser.add_argument('--output', help='Write the summary as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against a summary written by a previous --output')
+    parser.add_argument('--tolerance', type=float, default=25.0,
+                        help='Allowed regression against the baseline, in percent (default: 25)')
+    args = parser.parse_args(argv)
+
+    samples = []
+    for i in range(args.samples):
+        sample = run_sample()
+        samples.append(sample)
+        print(f"Sample {i + 1}/{args.samples}: import {sample.import_ms:.1f} ms, "
+              f"first invoke {sample.first_invoke_ms:.2f} ms, warm invoke {sample.warm_invoke_ms:.3f} ms")
+
+    summary = summarise(samples)
+    print("\nSTARTUP SUMMARY (medians):")
+    print(f"  Import:       {summary.import_ms_median:.1f} ms (max {summary.import_ms_max:.1f} ms)")
+    print(f"  First invoke: {summary.first_invoke_ms_median:.2f} ms (max {summary.first_invoke_ms_max:.2f} ms)")
+    print(f"  Warm invoke:  {summary.warm_invoke_ms_median:.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(asdict(summary), f, indent=2)
+        print(f"\nSummary written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(summary, baseline, args.tolerance)
+        if regressions:
+            print(f"\n✗ Startup regressed by more than {args.tolerance:.0f}%:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\n✓ Within {args.tolerance:.0f}% of baseline")
+
+
+if __name__ == "__main__":
+    main()
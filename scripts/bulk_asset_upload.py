@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Bulk asset upload load test: many assets through requestAssetUploads, the
+presigned POST to S3 and finalisation at once, rather than one at a time.
+
+The stages are pipelined. Tickets are requested in batches, a few batches
+at a time, and each asset's upload starts as soon as its ticket arrives.
+Uploads are streamed from disk over one pooled keep-alive session, with at
+most UPLOAD_WINDOW in flight. Every asset's finalisation is tracked on a
+single updatedAsset subscription, opened before the first ticket is
+requested so no event is missed. If the subscription can't be opened, or
+drops, the assets still waiting are polled with getAsset instead, batched
+into a few requests each round and backing off exponentially; finalise and
+promote times are then only as accurate as the polling interval.
+
+A pending asset is cleaned up ASSET_CLEANUP_TIMEOUT_SECONDS after its
+ticket is issued, so tickets are only requested a little ahead of the
+uploads: at most UPLOAD_WINDOW plus a batch per ticket request can be
+waiting for an upload slot.
+
+Reports aggregate upload throughput (MB/s) and latency percentiles for each
+stage of an asset's journey:
+
+  ticket      requestAssetUploads round trip for the asset's batch
+  queued      waiting for an upload slot after the ticket arrived
+  upload      the presigned POST
+  finalise    upload complete to the FINALISING event
+  promote     FINALISING to READY
+  end_to_end  ticket requested to READY
+
+Each asset is a distinct file, so uploads aren't short-circuited by the
+content-hash deduplication. The requestAssetUploads size limit
+(MAX_ASSET_SIZE_BYTES in graphql/lib/constants/assets.ts) applies, so the
+default size is 0, the most the deployed limit accepts. If the tickets are
+refused as FileTooLarge the run stops at once, quoting the limit.
+
+Set TICKET_POOL=1 to claim tickets one at a time, as pastes arrive, from an
+AssetTicketPool (asset_ticket_pool.py) instead: tickets reserved ahead
+without a size, refilled TICKET_BATCH_SIZE at a time in the background. The
+ticket stage is then the claim, and the pool's hit rate is reported.
+
+Set MOCK_GRAPHQL=1 to run against the local mock API, which also stands in
+for S3 and the finalisation pipeline, with no deployment or credentials
+needed. The mock refuses assets over MOCK_MAX_ASSET_SIZE_BYTES (default the
+deployed limit).
+
+Environment:
+  ASSET_COUNT           Assets to upload (default 50)
+  ASSET_SIZE_BYTES      Size of each asset (default 0)
+  UPLOAD_WINDOW         Uploads in flight at once (default 8)
+  TICKET_BATCH_SIZE     Assets per requestAssetUploads call (default 10, at most 25)
+  TICKET_CONCURRENCY    requestAssetUploads calls in flight at once (default 2)
+  TICKET_POOL           Set to claim tickets from a pool
+  FINALISE_TIMEOUT      Seconds to wait for READY after the last upload (default 60)
+  LATENCY_REPORT        Path to export per-stage latency to, .json or .csv
+
+Usage: python3 bulk_asset_upload.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from appsync_realtime import RealtimeClient, RealtimeError
+from asset_ticket_pool import AssetTicketPool, request_asset_uploads
+from cognito_auth import AuthError, CognitoSession, create_cognito_transport
+from graphql_client import Document, GraphQLClient, GraphQLError, validate_url
+from latency_histogram import LatencyHistogram, export_report, format_summary
+from load_generator import TransportError, create_transport
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common'))
+from asset_stream import MultipartFormBody  # noqa: E402
+
+MIME_TYPE = 'image/jpeg'
+DEFAULT_ASSETS = 50
+DEFAULT_ASSET_BYTES = 0  # Within MAX_ASSET_SIZE_BYTES in graphql/lib/constants/assets.ts
+DEFAULT_UPLOAD_WINDOW = 8
+DEFAULT_TICKET_BATCH_SIZE = 10
+DEFAULT_TICKET_CONCURRENCY = 2
+DEFAULT_FINALISE_TIMEOUT_SECONDS = 60
+MAX_ASSET_UPLOAD_BATCH_SIZE = 25  # Keep in sync with graphql/lib/constants/assets.ts
+UPLOAD_TIMEOUT_SECONDS = 120
+POLL_SECONDS = 0.05
+POLL_INITIAL_SECONDS = 0.1
+POLL_MAX_SECONDS = 2.0
+POLL_BATCH_SIZE = 25  # getAsset queries per polling request
+STAGES = ('ticket', 'queued', 'upload', 'finalise', 'promote', 'end_to_end')
+FAILED_STATUSES = ('EXPIRED', 'CANCELED')
+
+JPEG_HEADER = bytes([0xFF, 0xD8, 0xFF, 0xE0, 0x00, 0x10, 0x4A, 0x46, 0x49, 0x46, 0x00, 0x01])
+JPEG_EOF = bytes([0xFF, 0xD9])
+
+REQUEST_ASSET_UPLOADS = Document("""
+mutation requestAssetUploads($input: RequestAssetUploadsInput!) {
+  requestAssetUploads(input: $input) {
+    tickets { uploadUrl uploadFields asset { assetId status } }
+    errors { index errorType message }
+  }
+}
+""")
+
+GET_ASSET = Document("""
+query getAsset($input: GetAssetInput!) {
+  getAsset(input: $input) { assetId status }
+}
+""")
+
+UPDATED_ASSET = """
+subscription updatedAsset($gameId: ID!) {
+  updatedAsset(gameId: $gameId) { gameId assetId status }
+}
+"""
+
+
+class AssetSizeError(Exception):
+    """The deployment refused the assets' size; every other ticket would be refused too"""
+
+
+@dataclass
+class AssetUpload:
+    """One asset's way through the pipeline, as time.perf_counter() timestamps"""
+    index: int
+    file_path: str
+    size_bytes: int
+    ticket: Optional[dict] = None
+    requested_at: Optional[float] = None
+    ticketed_at: Optional[float] = None
+    upload_started_at: Optional[float] = None
+    uploaded_at: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def asset_id(self) -> Optional[str]:
+        return self.ticket['asset']['assetId'] if self.ticket else None
+
+
+class FinalisationTracker:
+    """Every asset's FINALISING and READY times, from the updatedAsset subscription or polling"""
+
+    def __init__(self):
+        self.finalised: Dict[str, float] = {}
+        self.ready: Dict[str, float] = {}
+        self.failed: Dict[str, str] = {}
+
+    def record(self, asset_id: str, status: str, seen_at: float):
+        if status in ('FINALISING', 'READY'):
+            # Polling can miss FINALISING altogether; it was no later than READY
+            self.finalised.setdefault(asset_id, seen_at)
+        if status == 'READY':
+            self.ready.setdefault(asset_id, seen_at)
+        elif status in FAILED_STATUSES:
+            self.failed.setdefault(asset_id, status)
+
+    def on_data(self, subscription_id, payload, received_at):
+        asset = (payload.get('data') or {}).get('updatedAsset') or {}
+        self.record(asset.get('assetId'), asset.get('status'), received_at)
+
+    def done(self, asset_id: str) -> bool:
+        return asset_id in self.ready or asset_id in self.failed
+
+
+def _parse_json_field(value):
+    """AWSJSON fields arrive as JSON strings (sometimes double-encoded)"""
+    while isinstance(value, str):
+        value = json.loads(value)
+    return value
+
+
+def create_test_asset(file_path: str, size_bytes: int):
+    """A JPEG-shaped file of exactly size_bytes, with random filler so each one is distinct"""
+    with open(file_path, 'wb') as f:
+        if size_bytes < len(JPEG_HEADER) + len(JPEG_EOF):
+            f.write(os.urandom(size_bytes))
+            return
+        f.write(JPEG_HEADER)
+        f.write(os.urandom(size_bytes - len(JPEG_HEADER) - len(JPEG_EOF)))
+        f.write(JPEG_EOF)
+
+
+def create_upload_session(window: int) -> requests.Session:
+    """One keep-alive connection pool, big enough for every upload in flight"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=window)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def upload_asset(session: requests.Session, ticket: dict, file_path: str):
+    """Stream one file to its presigned POST, raising RuntimeError if S3 refuses it"""
+    validate_url(ticket['uploadUrl'])
+    body = MultipartFormBody(_parse_json_field(ticket['uploadFields']), file_path, MIME_TYPE)
+    response = session.post(ticket['uploadUrl'], data=body, headers={'Content-Type': body.content_type},
+                            timeout=UPLOAD_TIMEOUT_SECONDS)
+    if response.status_code not in (200, 201, 204):
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+
+class BulkUploader:
+    """Pipelines ticket requests, uploads and finalisation tracking for a set of assets"""
+
+    def __init__(self, client: GraphQLClient, session: requests.Session, game_id: str, section_id: str,
+                 window: int, batch_size: int, ticket_concurrency: int, pool: Optional[AssetTicketPool] = None):
+        self.client = client
+        self.pool = pool
+        self.session = session
+        self.game_id = game_id
+        self.section_id = section_id
+        self.window = window
+        self.batch_size = batch_size
+        self._ticket_slots = asyncio.Semaphore(ticket_concurrency)
+        self._upload_slots = asyncio.Semaphore(window)
+        # Tickets requested but not yet uploading; bounds how stale a ticket can get
+        self._ahead = asyncio.Semaphore(window + batch_size * ticket_concurrency)
+        self._reserving = asyncio.Lock()  # A batch takes all its places at once, or batches deadlock
+        self._executor = ThreadPoolExecutor(max_workers=window)
+        self._uploads: List[asyncio.Task] = []
+
+    async def _upload(self, asset: AssetUpload):
+        try:
+            async with self._upload_slots:
+                asset.upload_started_at = time.perf_counter()
+                await asyncio.get_running_loop().run_in_executor(
+                    self._executor, upload_asset, self.session, asset.ticket, asset.file_path)
+                asset.uploaded_at = time.perf_counter()
+        except (requests.RequestException, RuntimeError, ValueError) as e:
+            asset.error = f"upload: {str(e)}"
+        finally:
+            self._ahead.release()
+
+    async def _request_batch(self, batch: List[AssetUpload]):
+        async with self._reserving:
+            for _ in batch:
+                await self._ahead.acquire()
+        async with self._ticket_slots:
+            requested_at = time.perf_counter()
+            try:
+                data = await self.client.execute(REQUEST_ASSET_UPLOADS, {'input': {
+                    'gameId': self.game_id,
+                    'sectionId': self.section_id,
+                    'assets': [{'mimeType': MIME_TYPE, 'sizeBytes': asset.size_bytes, 'label': 'Bulk upload test'}
+                               for asset in batch],
+                }})
+                result = data['requestAssetUploads']
+            except (GraphQLError, TransportError) as e:
+                result = {'tickets': [], 'errors': [{'index': n, 'errorType': 'RequestFailed', 'message': str(e)}
+                                                    for n in range(len(batch))]}
+            ticketed_at = time.perf_counter()
+
+        # Tickets come back in input order, skipping the items that failed
+        failed = {error['index']: error for error in result['errors']}
+        too_large = next((error for error in failed.values() if error.get('errorType') == 'FileTooLarge'), None)
+        if too_large:
+            for _ in batch:
+                self._ahead.release()
+            raise AssetSizeError(f"{batch[0].size_bytes} byte assets refused: {too_large.get('message')} "
+                                 f"Set ASSET_SIZE_BYTES within the limit.")
+        tickets = iter(result['tickets'])
+        for n, asset in enumerate(batch):
+            asset.requested_at = requested_at
+            if n in failed:
+                asset.error = f"ticket: {failed[n].get('errorType')}: {failed[n].get('message')}"
+                self._ahead.release()
+                continue
+            asset.ticket = next(tickets)
+            asset.ticketed_at = ticketed_at
+            self._uploads.append(asyncio.create_task(self._upload(asset)))
+
+    async def _claim(self, asset: AssetUpload):
+        """Take the asset's ticket from the pool, which reserves one directly if it has none"""
+        await self._ahead.acquire()
+        asset.requested_at = time.perf_counter()
+        try:
+            ticket = await asyncio.get_running_loop().run_in_executor(
+                None, self.pool.claim, self.game_id, self.section_id, MIME_TYPE)
+        except (GraphQLError, TransportError, RuntimeError) as e:
+            asset.error = f"ticket: {str(e)}"
+            self._ahead.release()
+            return
+        asset.ticketed_at = time.perf_counter()
+        asset.ticket = {'asset': ticket.asset, 'uploadUrl': ticket.upload_url, 'uploadFields': ticket.upload_fields}
+        self._uploads.append(asyncio.create_task(self._upload(asset)))
+
+    async def run(self, assets: List[AssetUpload]):
+        """Ticket and upload every asset, returning once the last upload has finished"""
+        ticket_requests = []
+        try:
+            if self.pool:
+                # One claim after another, as pasted images arrive
+                for asset in assets:
+                    await self._claim(asset)
+            else:
+                batches = [assets[n:n + self.batch_size] for n in range(0, len(assets), self.batch_size)]
+                ticket_requests = [asyncio.create_task(self._request_batch(batch)) for batch in batches]
+                await asyncio.gather(*ticket_requests)
+            await asyncio.gather(*self._uploads)
+        except AssetSizeError:
+            for task in ticket_requests + self._uploads:
+                task.cancel()
+            raise
+        finally:
+            self._executor.shutdown(wait=False)
+
+
+async def poll_statuses(client: GraphQLClient, tracker: FinalisationTracker, game_id: str, asset_ids: List[str]):
+    async def poll(batch):
+        try:
+            results = await client.execute_batch(
+                [(GET_ASSET, {'input': {'gameId': game_id, 'assetId': asset_id}}) for asset_id in batch])
+        except (GraphQLError, TransportError):
+            return
+        received_at = time.perf_counter()
+        for asset_id, result in zip(batch, results):
+            if not isinstance(result, GraphQLError):
+                tracker.record(asset_id, result['getAsset']['status'], received_at)
+
+    await asyncio.gather(*(poll(asset_ids[start:start + POLL_BATCH_SIZE])
+                           for start in range(0, len(asset_ids), POLL_BATCH_SIZE)))
+
+
+async def wait_for_ready(tracker: FinalisationTracker, subscriber: Optional[RealtimeClient], client: GraphQLClient,
+                         game_id: str, assets: List[AssetUpload], timeout: float) -> float:
+    """Wait until every uploaded asset is READY (or failed), returning the seconds waited"""
+    started = time.perf_counter()
+    pending = [asset.asset_id for asset in assets if asset.uploaded_at]
+    delay = POLL_INITIAL_SECONDS
+    while time.perf_counter() - started < timeout:
+        waiting = [asset_id for asset_id in pending if not tracker.done(asset_id)]
+        if not waiting:
+            break
+        if subscriber and subscriber.connected:
+            await asyncio.sleep(POLL_SECONDS)
+            continue
+        await poll_statuses(client, tracker, game_id, waiting)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, POLL_MAX_SECONDS)
+    return time.perf_counter() - started
+
+
+def stage_histograms(assets: List[AssetUpload], tracker: FinalisationTracker) -> Dict[str, LatencyHistogram]:
+    histograms = {stage: LatencyHistogram() for stage in STAGES}
+    for asset in assets:
+        if asset.ticketed_at is None:
+            continue
+        histograms['ticket'].record(asset.ticketed_at - asset.requested_at)
+        if asset.uploaded_at is None:
+            continue
+        histograms['queued'].record(asset.upload_started_at - asset.ticketed_at)
+        histograms['upload'].record(asset.uploaded_at - asset.upload_started_at)
+        finalised = tracker.finalised.get(asset.asset_id)
+        ready = tracker.ready.get(asset.asset_id)
+        if finalised is not None:
+            histograms['finalise'].record(finalised - asset.uploaded_at)
+        if finalised is not None and ready is not None:
+            histograms['promote'].record(ready - finalised)
+        if ready is not None:
+            histograms['end_to_end'].record(ready - asset.requested_at)
+    return histograms
+
+
+def create_ticket_pool(client: GraphQLClient, batch_size: int) -> AssetTicketPool:
+    """A pool whose refills, on its own threads, run requestAssetUploads on this event loop"""
+    loop = asyncio.get_running_loop()
+
+    def fetch(game_id, section_id, items):
+        return asyncio.run_coroutine_threadsafe(request_asset_uploads(client, game_id, section_id, items),
+                                                loop).result()
+
+    return AssetTicketPool(fetch, target_size=batch_size)
+
+
+def print_results(assets: List[AssetUpload], tracker: FinalisationTracker,
+                  histograms: Dict[str, LatencyHistogram]) -> dict:
+    uploaded = [asset for asset in assets if asset.uploaded_at is not None]
+    total_bytes = sum(asset.size_bytes for asset in uploaded)
+    upload_seconds = (max(asset.uploaded_at for asset in uploaded) -
+                      min(asset.upload_started_at for asset in uploaded)) if uploaded else 0.0
+    ready = [asset for asset in uploaded if asset.asset_id in tracker.ready]
+    failed = {asset.asset_id: tracker.failed[asset.asset_id] for asset in uploaded if asset.asset_id in tracker.failed}
+    errors = [asset.error for asset in assets if asset.error]
+
+    print(f"\nUploaded {len(uploaded)}/{len(assets)} assets, {total_bytes / 1e6:.1f} MB in {upload_seconds:.2f}s")
+    if upload_seconds:
+        print(f"  Throughput: {total_bytes / 1e6 / upload_seconds:.2f} MB/s, "
+              f"{len(uploaded) / upload_seconds:.1f} assets/s")
+    print(f"  READY: {len(ready)}, failed: {len(failed)}, "
+          f"not finalised: {len(uploaded) - len(ready) - len(failed)}")
+    if errors:
+        print(f"  {len(errors)} assets failed before finalisation, e.g. {errors[0]}")
+    for asset_id, status in list(failed.items())[:5]:
+        print(f"  ✗ {asset_id}: {status}")
+
+    print("\nLatency by stage (ms):")
+    for stage in STAGES:
+        print(f"  {stage:<11} {format_summary(histograms[stage]) if histograms[stage].count else 'no samples'}")
+
+    return {
+        'assets': len(assets),
+        'uploaded': len(uploaded),
+        'ready': len(ready),
+        'failed': len(failed) + len(errors),
+        'uploaded_bytes': total_bytes,
+        'upload_seconds': round(upload_seconds, 3),
+        'megabytes_per_second': round(total_bytes / 1e6 / upload_seconds, 3) if upload_seconds else 0.0,
+    }
+
+
+async def bulk_upload(graphql_url: str, token: str, game_id: str, section_id: str) -> bool:
+    count = int(os.getenv('ASSET_COUNT') or DEFAULT_ASSETS)
+    size_bytes = int(os.getenv('ASSET_SIZE_BYTES') or DEFAULT_ASSET_BYTES)
+    window = int(os.getenv('UPLOAD_WINDOW') or DEFAULT_UPLOAD_WINDOW)
+    batch_size = int(os.getenv('TICKET_BATCH_SIZE') or DEFAULT_TICKET_BATCH_SIZE)
+    ticket_concurrency = int(os.getenv('TICKET_CONCURRENCY') or DEFAULT_TICKET_CONCURRENCY)
+    finalise_timeout = float(os.getenv('FINALISE_TIMEOUT') or DEFAULT_FINALISE_TIMEOUT_SECONDS)
+    use_pool = bool(os.getenv('TICKET_POOL'))
+    if not 0 < batch_size <= MAX_ASSET_UPLOAD_BATCH_SIZE:
+        raise ValueError(f"TICKET_BATCH_SIZE must be between 1 and {MAX_ASSET_UPLOAD_BATCH_SIZE}")
+
+    if use_pool:
+        tickets = f"tickets claimed from a pool refilled {batch_size} at a time"
+    else:
+        tickets = f"tickets in batches of {batch_size} ({ticket_concurrency} at a time)"
+    print(f"{count} assets of {size_bytes} bytes, {window} uploads in flight, {tickets}")
+
+    tracker = FinalisationTracker()
+    subscriber = RealtimeClient(graphql_url, token, tracker.on_data)
+    client = GraphQLClient(create_transport(graphql_url, ticket_concurrency), token)
+    session = create_upload_session(window)
+    pool = create_ticket_pool(client, batch_size) if use_pool else None
+    with tempfile.TemporaryDirectory() as directory:
+        assets = []
+        for n in range(count):
+            file_path = os.path.join(directory, f"asset-{n}.jpg")
+            create_test_asset(file_path, size_bytes)
+            assets.append(AssetUpload(n, file_path, size_bytes))
+
+        try:
+            try:
+                await subscriber.connect()
+                await subscriber.subscribe(UPDATED_ASSET, {'gameId': game_id})
+            except (RealtimeError, asyncio.TimeoutError) as e:
+                print(f"⚠ updatedAsset subscription unavailable, polling getAsset instead: {str(e) or type(e).__name__}")
+                await subscriber.close()
+                subscriber = None
+            started = time.perf_counter()
+            await BulkUploader(client, session, game_id, section_id, window, batch_size,
+                               ticket_concurrency, pool).run(assets)
+            print(f"Ticketed and uploaded in {time.perf_counter() - started:.2f}s, waiting for finalisation...")
+            waited = await wait_for_ready(tracker, subscriber, client, game_id, assets, finalise_timeout)
+            print(f"  Waited {waited:.2f}s after the last upload")
+        finally:
+            if subscriber:
+                await subscriber.close()
+            await client.close()
+            session.close()
+
+    histograms = stage_histograms(assets, tracker)
+    totals = print_results(assets, tracker, histograms)
+    if pool:
+        stats = pool.stats
+        # Tickets never claimed are left to expire, and their quota isn't returned
+        claimed = sum(1 for asset in assets if asset.ticket)
+        print(f"\nTicket pool: {stats.hits}/{stats.claims} claims served ({stats.hit_rate:.0%}), "
+              f"{stats.reserved} tickets reserved, {stats.reserved - claimed} never claimed")
+        totals['ticket_pool_hit_rate'] = round(stats.hit_rate, 3)
+
+    report_path = os.getenv('LATENCY_REPORT')
+    if report_path:
+        overall = LatencyHistogram()
+        overall.merge(histograms['end_to_end'])
+        rows = [{'stage': stage, **histograms[stage].summary()} for stage in STAGES]
+        export_report(report_path, rows, overall, totals=totals, label='stage', metadata={
+            'graphql_url': graphql_url, 'asset_size_bytes': size_bytes, 'upload_window': window,
+            'ticket_batch_size': batch_size, 'ticket_concurrency': ticket_concurrency, 'ticket_pool': use_pool,
+        })
+        print(f"\nLatency report written to {report_path}")
+
+    return totals['ready'] == count
+
+
+def main():
+    if os.getenv('MOCK_GRAPHQL'):
+        from mock_graphql_server import MAX_ASSET_SIZE_BYTES, start_mock_server
+        from mock_realtime_server import start_mock_realtime_server
+        finalise_delay = float(os.getenv('MOCK_FINALISE_MS') or 50) / 1000
+        max_asset_size = int(os.getenv('MOCK_MAX_ASSET_SIZE_BYTES') or MAX_ASSET_SIZE_BYTES)
+        graphql_url, graphql_server = start_mock_server(finalise_delay=finalise_delay,
+                                                        max_asset_size_bytes=max_asset_size)
+        os.environ['REALTIME_URL'], _ = start_mock_realtime_server(graphql_server)
+        os.environ['COGNITO_ENDPOINT'] = graphql_url
+        client_id, region, game_id, section_id = 'mock-client', 'mock', 'mock-game', 'mock-section'
+        username, password = 'bulk-upload', 'mock-password'
+        print(f"Using mock GraphQL API and uploads at {graphql_url}")
+    else:
+        graphql_url = os.getenv('GRAPHQL_URL')
+        client_id = os.getenv('COGNITO_CLIENT_ID')
+        region = os.getenv('AWS_REGION')
+        game_id = os.getenv('GAME_ID')
+        section_id = os.getenv('SECTION_ID')
+        username = os.getenv('COGNITO_USERNAME')
+        password = os.getenv('COGNITO_PASSWORD')
+        if not all([graphql_url, client_id, region, game_id, section_id, username, password]):
+            print("Error: Missing required environment variables")
+            print("Required: GRAPHQL_URL, COGNITO_CLIENT_ID, AWS_REGION, GAME_ID, SECTION_ID, "
+                  "COGNITO_USERNAME, COGNITO_PASSWORD")
+            print("Or set MOCK_GRAPHQL=1 to use a local mock API")
+            sys.exit(1)
+
+    validate_url(graphql_url)
+
+    async def run():
+        auth_transport = create_cognito_transport(region, 1)
+        try:
+            token = await CognitoSession(auth_transport, username, password, client_id).token()
+        finally:
+            await auth_transport.close()
+        return await bulk_upload(graphql_url, token, game_id, section_id)
+
+    try:
+        ok = asyncio.run(run())
+    except AuthError as e:
+        print(f"Sign-in failed: {str(e)}")
+        sys.exit(1)
+    except AssetSizeError as e:
+        print(f"✗ {str(e)}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(1)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
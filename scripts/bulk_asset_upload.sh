@@ -0,0 +1,80 @@
+#!/bin/bash
+set -e
+
+# Usage: GAME_ID=... SECTION_ID=... COGNITO_USERNAME=... COGNITO_PASSWORD='pass' ./scripts/bulk_asset_upload.sh
+#    or: MOCK_GRAPHQL=1 ./scripts/bulk_asset_upload.sh
+
+# LATENCY_REPORT=path.json (or .csv) exports per-stage latency when the run ends
+REPORT_ARGS=()
+if [ -n "$LATENCY_REPORT" ]; then
+    REPORT_DIR=$(cd "$(dirname "$LATENCY_REPORT")" && pwd)
+    REPORT_ARGS=(-v "$REPORT_DIR:/reports" -e LATENCY_REPORT="/reports/$(basename "$LATENCY_REPORT")")
+fi
+
+# Upload settings shared by mock and real runs
+UPLOAD_ARGS=(
+    -e ASSET_COUNT="$ASSET_COUNT"
+    -e ASSET_SIZE_BYTES="$ASSET_SIZE_BYTES"
+    -e UPLOAD_WINDOW="$UPLOAD_WINDOW"
+    -e TICKET_BATCH_SIZE="$TICKET_BATCH_SIZE"
+    -e TICKET_CONCURRENCY="$TICKET_CONCURRENCY"
+    -e TICKET_POOL="$TICKET_POOL"
+    -e FINALISE_TIMEOUT="$FINALISE_TIMEOUT"
+)
+
+# The upload body is streamed by the shared Lambda layer's asset_stream module
+MOUNT_ARGS=(
+    -v "$(pwd)/scripts:/work/scripts"
+    -v "$(pwd)/lambda/common:/work/lambda/common"
+)
+
+# MOCK_GRAPHQL=1 runs against a local mock API, S3 and finalisation pipeline, with no deployment or credentials needed
+if [ -n "$MOCK_GRAPHQL" ]; then
+    echo "Running bulk asset upload test against the mock API in Docker container..."
+    docker run --rm \
+        "${MOUNT_ARGS[@]}" \
+        -e MOCK_GRAPHQL=1 \
+        -e MOCK_FINALISE_MS="$MOCK_FINALISE_MS" \
+        -e MOCK_MAX_ASSET_SIZE_BYTES="$MOCK_MAX_ASSET_SIZE_BYTES" \
+        "${UPLOAD_ARGS[@]}" \
+        "${REPORT_ARGS[@]}" \
+        python:3.11-slim \
+        sh -c "pip install --quiet requests && python -u /work/scripts/bulk_asset_upload.py"
+    exit 0
+fi
+
+if [ -z "$GAME_ID" ] || [ -z "$SECTION_ID" ] || [ -z "$COGNITO_USERNAME" ] || [ -z "$COGNITO_PASSWORD" ]; then
+    echo "Error: GAME_ID, SECTION_ID, COGNITO_USERNAME and COGNITO_PASSWORD are required"
+    echo "Usage:"
+    echo "  GAME_ID=... SECTION_ID=... COGNITO_USERNAME=... COGNITO_PASSWORD='pass' ./scripts/bulk_asset_upload.sh"
+    exit 1
+fi
+
+# Change to correct terraform directory and get outputs
+cd terraform/environment/wildsea-dev
+TERRAFORM_OUTPUT=$(AWS_PROFILE=wildsea terraform output -json)
+cd - > /dev/null
+
+# Parse terraform outputs using jq
+GRAPHQL_URL=$(echo "$TERRAFORM_OUTPUT" | jq -r '.graphql_uri.value')
+COGNITO_CLIENT_ID=$(echo "$TERRAFORM_OUTPUT" | jq -r '.cognito_web_client_id.value')
+AWS_REGION=$(echo "$TERRAFORM_OUTPUT" | jq -r '.region.value')
+
+echo "Running bulk asset upload test in Docker container..."
+echo "GraphQL URL: $GRAPHQL_URL"
+echo "Game ID: $GAME_ID"
+echo "Section ID: $SECTION_ID"
+
+docker run --rm \
+    "${MOUNT_ARGS[@]}" \
+    -e GRAPHQL_URL="$GRAPHQL_URL" \
+    -e COGNITO_CLIENT_ID="$COGNITO_CLIENT_ID" \
+    -e AWS_REGION="$AWS_REGION" \
+    -e GAME_ID="$GAME_ID" \
+    -e SECTION_ID="$SECTION_ID" \
+    -e COGNITO_USERNAME="$COGNITO_USERNAME" \
+    -e COGNITO_PASSWORD="$COGNITO_PASSWORD" \
+    "${UPLOAD_ARGS[@]}" \
+    "${REPORT_ARGS[@]}" \
+    python:3.11-slim \
+    sh -c "pip install --quiet requests 'httpx[http2]' && python -u /work/scripts/bulk_asset_upload.py"
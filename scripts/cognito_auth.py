@@ -0,0 +1,139 @@
+"""
+Cognito sign-in for the load scripts, with token caching and refresh.
+
+Each CognitoSession signs its user in once with USER_PASSWORD_AUTH, then
+renews the access token with REFRESH_TOKEN_AUTH shortly before it expires,
+falling back to a password sign-in if the refresh token is rejected.
+Concurrent callers share a single sign-in or refresh.
+
+A TokenCache keeps sessions' tokens in a JSON file between runs, so a load
+test with many users doesn't sign them all in every time it starts.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from load_generator import TransportError, create_transport
+
+REFRESH_MARGIN_SECONDS = 300  # Renew this long before the access token expires
+AUTH_TARGET = 'AWSCognitoIdentityProviderService.InitiateAuth'
+
+
+class AuthError(Exception):
+    """Raised when a user can't be signed in"""
+    pass
+
+
+def cognito_endpoint(region: str) -> str:
+    """The Cognito user pool API for a region, unless COGNITO_ENDPOINT points elsewhere"""
+    endpoint = os.getenv('COGNITO_ENDPOINT')
+    if endpoint:
+        return endpoint
+    # Validate region to ensure we only hit AWS endpoints
+    if not region or not region.replace('-', '').isalnum():
+        raise ValueError("Invalid AWS region")
+    return f"https://cognito-idp.{region}.amazonaws.com/"
+
+
+class TokenCache:
+    """Tokens by username, kept in a JSON file readable only by its owner"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.tokens: Dict[str, dict] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.tokens = json.load(f)
+
+    def get(self, username: str) -> Optional[dict]:
+        return self.tokens.get(username)
+
+    def put(self, username: str, tokens: dict):
+        self.tokens[username] = tokens
+
+    def save(self):
+        if not self.path:
+            return
+        descriptor = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            json.dump(self.tokens, f)
+
+
+class CognitoSession:
+    """One user's tokens, renewed as needed"""
+
+    def __init__(self, transport, username: str, password: str, client_id: str,
+                 cache: Optional[TokenCache] = None):
+        self.transport = transport
+        self.username = username
+        self._password = password
+        self.client_id = client_id
+        self.cache = cache
+        self._lock = asyncio.Lock()
+        self.sign_ins = 0
+        self.refreshes = 0
+        cached = cache.get(username) if cache else None
+        self._tokens = dict(cached) if cached else {}
+
+    async def _initiate_auth(self, flow: str, parameters: dict) -> dict:
+        body = json.dumps({'AuthFlow': flow, 'ClientId': self.client_id, 'AuthParameters': parameters})
+        try:
+            status, content = await self.transport.post(body.encode('utf-8'), {
+                'X-Amz-Target': AUTH_TARGET,
+                'Content-Type': 'application/x-amz-json-1.1',
+            })
+        except TransportError as e:
+            raise AuthError(f"{self.username}: {str(e)}") from e
+        result = json.loads(content or b'{}')
+        if status != 200 or 'AuthenticationResult' not in result:
+            raise AuthError(f"{self.username}: {result.get('message') or result.get('__type') or f'HTTP {status}'}")
+        return result['AuthenticationResult']
+
+    def _store(self, result: dict):
+        self._tokens = {
+            'accessToken': result['AccessToken'],
+            # A refresh doesn't return a new refresh token
+            'refreshToken': result.get('RefreshToken', self._tokens.get('refreshToken')),
+            'expiresAt': time.time() + result.get('ExpiresIn', 3600),
+        }
+        if self.cache:
+            self.cache.put(self.username, self._tokens)
+
+    def _fresh(self) -> bool:
+        return bool(self._tokens.get('accessToken')) and \
+            self._tokens.get('expiresAt', 0) - REFRESH_MARGIN_SECONDS > time.time()
+
+    async def token(self) -> str:
+        """A current access token, signing in or refreshing first if needed"""
+        if self._fresh():
+            return self._tokens['accessToken']
+        async with self._lock:
+            # Another caller may have renewed it while this one waited
+            if self._fresh():
+                return self._tokens['accessToken']
+            if self._tokens.get('refreshToken'):
+                try:
+                    self._store(await self._initiate_auth('REFRESH_TOKEN_AUTH', {
+                        'REFRESH_TOKEN': self._tokens['refreshToken'],
+                    }))
+                    self.refreshes += 1
+                    return self._tokens['accessToken']
+                except AuthError as e:
+                    print(f"Refresh failed, signing in again: {str(e)}")
+            self._store(await self._initiate_auth('USER_PASSWORD_AUTH', {
+                'USERNAME': self.username,
+                'PASSWORD': self._password,
+            }))
+            self.sign_ins += 1
+            return self._tokens['accessToken']
+
+    def expire(self):
+        """Treat the access token as expired, e.g. after the API rejects it"""
+        self._tokens['expiresAt'] = 0
+
+
+def create_cognito_transport(region: str, max_connections: int):
+    return create_transport(cognito_endpoint(region), max_connections)
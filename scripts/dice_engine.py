@@ -0,0 +1,145 @@
+"""
+Python port of the rollDice resolver's dice logic.
+
+Mirrors graphql/mutation/rollDice/rollDice.ts: a d100 under deltaGreen reads
+0-99 and every other die 1 to its size, each die's modifier is added to its
+value, and the grade is taken from the total. Keep the two in step.
+
+The scalar functions take a random() like Math.random, so the resolver's
+Jest cases can be replayed exactly. The vectorised functions need NumPy and
+grade whole arrays of totals at once, for the simulator. The analytic
+functions give each total's and grade's exact probability, by convolving the
+dice's distributions.
+"""
+
+import random as _random
+from typing import Callable, Dict, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# RollTypes in graphql/lib/constants/rollTypes.ts
+ROLL_TYPE_SUM = 'sum'
+ROLL_TYPE_DELTA_GREEN = 'deltaGreen'
+
+# Grades in graphql/lib/constants/rollTypes.ts
+GRADE_NEUTRAL = 'NEUTRAL'
+GRADE_CRITICAL_SUCCESS = 'CRITICAL_SUCCESS'
+GRADE_SUCCESS = 'SUCCESS'
+GRADE_FUMBLE = 'FUMBLE'
+GRADE_FAILURE = 'FAILURE'
+GRADES = (GRADE_CRITICAL_SUCCESS, GRADE_SUCCESS, GRADE_FAILURE, GRADE_FUMBLE, GRADE_NEUTRAL)
+
+
+def die_range(size: int, roll_type: str) -> range:
+    """Unmodified values a die can roll"""
+    if roll_type == ROLL_TYPE_DELTA_GREEN and size == 100:
+        return range(0, 100)  # Percentile dice
+    return range(1, size + 1)
+
+
+def roll_die(size: int, roll_type: str, modifier: int = 0,
+             random: Callable[[], float] = _random.random) -> int:
+    """One die's value, modifier included"""
+    if roll_type == ROLL_TYPE_DELTA_GREEN and size == 100:
+        base = int(random() * 100)  # 0-99 for percentile rolls
+    else:
+        base = int(random() * size) + 1  # 1-size for standard dice
+    return base + (modifier or 0)
+
+
+def delta_green_grade(value: int, target: int) -> str:
+    """calculateDeltaGreenGrade"""
+    # 00 and 01 are always critical success
+    if value in (0, 1):
+        return GRADE_CRITICAL_SUCCESS
+
+    # Matching digits (doubles): critical success if <= target, fumble if > target
+    if value >= 11 and value // 10 == value % 10:
+        return GRADE_CRITICAL_SUCCESS if value <= target else GRADE_FUMBLE
+
+    return GRADE_SUCCESS if value <= target else GRADE_FAILURE
+
+
+def calculate_grade(roll_type: str, value: int, target: int) -> str:
+    """calculateGrade"""
+    if roll_type == ROLL_TYPE_DELTA_GREEN:
+        return delta_green_grade(value, target)
+    return GRADE_NEUTRAL
+
+
+def roll_dice(roll_input: dict, random: Callable[[], float] = _random.random) -> dict:
+    """The rolled fields of the resolver's DiceRoll for a RollDiceInput"""
+    rolled = []
+    total = 0
+    for die in roll_input['dice']:
+        value = roll_die(die['size'], roll_input['rollType'], die.get('modifier') or 0, random)
+        total += value
+        rolled.append({'__typename': 'SingleDie', 'type': die['type'], 'size': die['size'], 'value': value})
+    return {
+        'gameId': roll_input.get('gameId'),
+        'diceList': rolled,
+        'value': total,
+        'grade': calculate_grade(roll_input['rollType'], total, roll_input['target']),
+        'rollType': roll_input['rollType'],
+        'target': roll_input['target'],
+    }
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for vectorised rolls")
+
+
+def roll_totals(dice: Sequence[dict], roll_type: str, count: int, generator=None):
+    """Totals of count rolls of the dice, as a NumPy array"""
+    _require_numpy()
+    generator = generator or np.random.default_rng()
+    totals = np.zeros(count, dtype=np.int32)
+    for die in dice:
+        values = die_range(die['size'], roll_type)
+        totals += generator.integers(values.start, values.stop, size=count, dtype=np.int32)
+        totals += die.get('modifier') or 0
+    return totals
+
+
+def grade_codes(totals, roll_type: str, target: int):
+    """Each total's grade as an index into GRADES, calculated the way delta_green_grade does"""
+    _require_numpy()
+    if roll_type != ROLL_TYPE_DELTA_GREEN:
+        return np.full(totals.shape, GRADES.index(GRADE_NEUTRAL), dtype=np.int8)
+    doubles = (totals >= 11) & (totals // 10 == totals % 10)
+    within = totals <= target
+    return np.select(
+        [(totals == 0) | (totals == 1), doubles & within, doubles, within],
+        [GRADES.index(GRADE_CRITICAL_SUCCESS), GRADES.index(GRADE_CRITICAL_SUCCESS),
+         GRADES.index(GRADE_FUMBLE), GRADES.index(GRADE_SUCCESS)],
+        default=GRADES.index(GRADE_FAILURE),
+    ).astype(np.int8)
+
+
+def total_distribution(dice: Sequence[dict], roll_type: str) -> Dict[int, float]:
+    """Exact probability of each total, convolving the dice's uniform distributions"""
+    distribution = {0: 1.0}
+    for die in dice:
+        values = die_range(die['size'], roll_type)
+        modifier = die.get('modifier') or 0
+        p = 1 / len(values)
+        combined: Dict[int, float] = {}
+        for total, probability in distribution.items():
+            for value in values:
+                key = total + value + modifier
+                combined[key] = combined.get(key, 0.0) + probability * p
+        distribution = combined
+    return distribution
+
+
+def grade_probabilities(dice: Sequence[dict], roll_type: str, target: int,
+                        distribution: Optional[Dict[int, float]] = None) -> Dict[str, float]:
+    """Exact probability of each grade"""
+    probabilities = {grade: 0.0 for grade in GRADES}
+    for total, probability in (distribution or total_distribution(dice, roll_type)).items():
+        probabilities[calculate_grade(roll_type, total, target)] += probability
+    return probabilities
@@ -0,0 +1,116 @@
+"""
+Parallel BatchWriteItem for the table tooling.
+
+Write requests are sent in calls of up to MAX_BATCH_WRITE_ITEMS from a
+thread pool, with unprocessed items retried with full-jitter exponential
+backoff, as the deleteGame Lambda does. create_table makes a table with
+the deployed key schema and indexes (terraform/module/wildsea/table.tf),
+for running against DynamoDB Local or moto.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import List
+
+DEFAULT_CONCURRENCY = 8
+MAX_BATCH_WRITE_ITEMS = 25  # BatchWriteItem limit
+MAX_UNPROCESSED_RETRIES = 5
+
+
+@dataclass
+class WriteStats:
+    """Counts for the writes of one run"""
+    put: int = 0
+    deleted: int = 0
+    write_calls: int = 0
+    retries: int = 0
+    write_seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, errors=(), **counts):
+        """Add one write's counts and errors; called from the worker threads"""
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+            self.errors.extend(errors)
+
+    @property
+    def items_per_second(self) -> float:
+        return (self.put + self.deleted) / self.write_seconds if self.write_seconds else 0.0
+
+
+def create_client(concurrency: int = DEFAULT_CONCURRENCY):
+    """A DynamoDB client with a connection for each concurrent call; honours AWS_ENDPOINT_URL"""
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client('dynamodb', config=Config(
+        retries={'max_attempts': 5, 'mode': 'standard'},
+        max_pool_connections=concurrency,
+    ))
+
+
+def batch_write(dynamodb, table_name: str, requests: List[dict], stats: WriteStats):
+    """Write up to MAX_BATCH_WRITE_ITEMS requests, retrying unprocessed ones with backoff"""
+    for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+        if attempt:
+            # Full jitter, so concurrent batches don't retry in step
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+        response = dynamodb.batch_write_item(RequestItems={table_name: requests})
+        unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+        processed = [request for request in requests if request not in unprocessed]
+        stats.record(write_calls=1, retries=1 if attempt else 0,
+                     put=sum(1 for request in processed if 'PutRequest' in request),
+                     deleted=sum(1 for request in processed if 'DeleteRequest' in request))
+        if not unprocessed:
+            return
+        requests = unprocessed
+    stats.record([f"{len(requests)} items still unprocessed after {MAX_UNPROCESSED_RETRIES} retries"])
+
+
+def write_all(dynamodb, table_name: str, requests: List[dict], executor: Executor, stats: WriteStats):
+    """Send every request in parallel batches, adding the time taken to stats"""
+
+    def write(batch):
+        try:
+            batch_write(dynamodb, table_name, batch, stats)
+        except Exception as e:
+            stats.record([f"batch_write: {str(e)}"])
+
+    started = time.monotonic()
+    futures = [executor.submit(write, requests[start:start + MAX_BATCH_WRITE_ITEMS])
+               for start in range(0, len(requests), MAX_BATCH_WRITE_ITEMS)]
+    for future in futures:
+        future.result()
+    stats.write_seconds += time.monotonic() - started
+
+
+def create_table(dynamodb, table_name: str):
+    """Create a table shaped like the deployed one and wait for it"""
+    dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'}
+                              for name in ['PK', 'SK', 'GSI1PK', 'GSI2PK', 'expireUploadAt']],
+        GlobalSecondaryIndexes=[
+            {
+                'IndexName': 'GSI1',
+                'KeySchema': [{'AttributeName': 'GSI1PK', 'KeyType': 'HASH'},
+                              {'AttributeName': 'PK', 'KeyType': 'RANGE'}],
+                'Projection': {'ProjectionType': 'ALL'},
+            },
+            {
+                'IndexName': 'GSI2',
+                'KeySchema': [{'AttributeName': 'GSI2PK', 'KeyType': 'HASH'},
+                              {'AttributeName': 'expireUploadAt', 'KeyType': 'RANGE'}],
+                'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': ['gameId', 'assetId', 'status']},
+            },
+        ],
+        BillingMode='PAY_PER_REQUEST',
+        StreamSpecification={'StreamEnabled': True, 'StreamViewType': 'NEW_AND_OLD_IMAGES'},
+    )
+    dynamodb.get_waiter('table_exists').wait(TableName=table_name)
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator: fills a table with games shaped like real
+campaigns, so getGame, getGames and the other access patterns in
+DYNAMODB.md can be measured at scale.
+
+Each game gets a GAME record, a GM, player characters and NPCs, their
+sections and the sections' assets, with the attributes and GSI1/GSI2 keys
+the resolvers write. Players, NPCs, sections per sheet and rich-text
+content sizes follow clipped log-normal distributions around the medians
+below, so most games are small and a few are large campaigns with dozens
+of players and hundreds of sections. Players are drawn from a shared user
+pool with a long-tailed popularity, so some users are in many games and
+USER# lookups on GSI1 vary in size too.
+
+Everything, including IDs and timestamps, comes from SEED, so the same
+settings always produce the same items. Items are written with parallel
+BatchWriteItem calls (see dynamodb_batch.py) and throughput is reported.
+
+Point AWS_ENDPOINT_URL at DynamoDB Local or moto to generate locally, with
+CREATE_TABLE=1 to create the table first. Against a deployed table, the
+games are real games for the generated user IDs, so use a table that can
+be thrown away.
+
+Environment:
+  TABLE_NAME            Table to fill (required unless DRY_RUN is set)
+  GAMES                 Games to generate (default 50)
+  USERS                 Size of the user pool (default 200)
+  PLAYERS_MEDIAN        Median player characters per game (default 4)
+  PLAYERS_MAX           Most player characters in a game (default 48)
+  NPCS_MEDIAN           Median NPCs per game (default 2)
+  NPCS_MAX              Most NPCs in a game (default 40)
+  SECTIONS_MEDIAN       Median sections per character sheet (default 6)
+  SECTIONS_MAX          Most sections on a sheet (default 30)
+  CONTENT_MEDIAN_BYTES  Median rich-text section size (default 2048)
+  CONTENT_MAX_BYTES     Largest rich-text section (default 131072)
+  ASSETS_PER_SECTION    Mean assets per section (default 0.3)
+  SEED                  Random seed (default 1)
+  CONCURRENCY           BatchWriteItem calls in flight at once (default 8)
+  CREATE_TABLE          Set to create the table first
+  MANIFEST              Path to write the generated games and users to, as JSON
+  DRY_RUN               Set to generate and report without writing
+
+Usage: python3 generate_dataset.py
+"""
+
+import base64
+import json
+import math
+import os
+import random
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from dynamodb_batch import DEFAULT_CONCURRENCY, WriteStats, create_client, create_table, write_all
+from seed_presets import SEED_DIR, SEED_ITEMS
+
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+JOIN_CODE_CHARS = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
+ASSET_EXPIRY_BUCKET_SECONDS = 300  # ASSET_EXPIRY_BUCKET_SECONDS in graphql/lib/constants/assets.ts
+INITIAL_CHARACTER_QUOTA = 20
+INITIAL_SECTION_QUOTA = 50
+INITIAL_ASSET_QUOTA = 100
+MIME_TYPES = ['image/jpeg', 'image/png', 'image/webp']
+WORDS = ('the ship rope salt wind spit crew hunt rot bone chart storm wood ash tide '
+         'agent cell case handler night file witness ritual signal account safehouse').split()
+
+GAME_TYPES = {
+    'wildsea': {
+        'theme': 'wildsea',
+        'gm_name': 'Firefly',
+        'character_name': 'Unnamed Character',
+        'sections': ['KEYVALUE', 'TRACKABLE', 'BURNABLE', 'RICHTEXT', 'CLOCKS', 'TRACKABLE', 'RICHTEXT'],
+    },
+    'deltaGreen': {
+        'theme': 'deltaGreen',
+        'gm_name': 'Handler',
+        'character_name': 'Unnamed Agent',
+        'sections': ['KEYVALUE', 'DELTAGREENSTATS', 'DELTAGREENDERED', 'DELTAGREENSKILLS', 'DELTAGREENBONDS',
+                     'DELTAGREENSANLOSS', 'DELTAGREENWEAPONS', 'RICHTEXT', 'RICHTEXT'],
+    },
+}
+
+# Section content generated from the UI's seed data, by section type
+SEEDED_SECTIONS = {
+    'DELTAGREENSTATS': 'deltaGreenStats',
+    'DELTAGREENDERED': 'deltaGreenDerived',
+    'DELTAGREENSKILLS': 'deltaGreenSkills',
+}
+
+Item = Dict[str, dict]
+
+
+@dataclass
+class DatasetConfig:
+    games: int = 50
+    users: int = 200
+    players_median: int = 4
+    players_max: int = 48
+    npcs_median: int = 2
+    npcs_max: int = 40
+    sections_median: int = 6
+    sections_max: int = 30
+    content_median_bytes: int = 2048
+    content_max_bytes: int = 131072
+    assets_per_section: float = 0.3
+    seed: int = 1
+
+    @classmethod
+    def from_env(cls) -> 'DatasetConfig':
+        config = cls()
+        for name, default in asdict(config).items():
+            value = os.getenv(name.upper())
+            if value:
+                setattr(config, name, type(default)(value))
+        return config
+
+
+@dataclass
+class GameSummary:
+    """What was generated for one game"""
+    game_id: str
+    game_type: str
+    gm_user_id: str
+    player_user_ids: List[str]
+    npcs: int
+    sections: int
+    assets: int
+    items: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class Dataset:
+    items: List[Item] = field(default_factory=list)
+    games: List[GameSummary] = field(default_factory=list)
+    users: List[str] = field(default_factory=list)
+
+
+def item_size(item: Item) -> int:
+    """Approximate stored size of an item in bytes, as DynamoDB counts it"""
+    return sum(attribute_size(name, value) for name, value in item.items())
+
+
+def attribute_size(name: str, value: dict) -> int:
+    """Size of one top-level attribute: its name plus its value"""
+    return len(name.encode('utf-8')) + _value_size(value)
+
+
+def _value_size(value: dict) -> int:
+    kind, data = next(iter(value.items()))
+    if kind == 'S':
+        return len(data.encode('utf-8'))
+    if kind == 'N':
+        return len(data.lstrip('-').replace('.', '')) // 2 + 1
+    if kind == 'B':
+        # boto3 gives bytes; table exports carry binary as base64
+        return len(data) if isinstance(data, (bytes, bytearray)) else len(base64.b64decode(data))
+    if kind in ('BOOL', 'NULL'):
+        return 1
+    if kind in ('SS', 'NS', 'BS'):
+        return sum(_value_size({kind[0]: entry}) for entry in data)
+    if kind == 'L':
+        return 3 + sum(1 + _value_size(entry) for entry in data)
+    if kind == 'M':
+        return 3 + sum(1 + len(name.encode('utf-8')) + _value_size(entry) for name, entry in data.items())
+    raise ValueError(f"Unknown attribute type {kind}")
+
+
+class Generator:
+    """Builds the items for a dataset from a seeded random source"""
+
+    def __init__(self, config: DatasetConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.seeds = {}
+
+    def uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def count(self, median: float, maximum: int, minimum: int = 0, sigma: float = 1.0) -> int:
+        """A clipped log-normal count: mostly near the median, occasionally much larger"""
+        if median <= 0:
+            return minimum
+        return max(minimum, min(maximum, round(median * math.exp(self.rng.gauss(0, sigma)))))
+
+    def poisson(self, mean: float) -> int:
+        threshold, count, product = math.exp(-mean), 0, self.rng.random()
+        while product > threshold:
+            count += 1
+            product *= self.rng.random()
+        return count
+
+    def text(self, size: int) -> str:
+        words, length = [], 0
+        while length < size:
+            word = self.rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return ' '.join(words)[:size]
+
+    def timestamp(self, after: datetime, within_days: float) -> datetime:
+        return after + timedelta(seconds=self.rng.uniform(0, within_days * 86400))
+
+    def join_code(self) -> str:
+        return ''.join(self.rng.choice(JOIN_CODE_CHARS) for _ in range(6))
+
+    def seed_entries(self, name: str) -> List[dict]:
+        if name not in self.seeds:
+            with open(os.path.join(SEED_DIR, f"{name}.en.json"), encoding='utf-8') as f:
+                self.seeds[name] = [SEED_ITEMS[name](entry) for entry in json.load(f)]
+        return self.seeds[name]
+
+    def content(self, section_type: str) -> dict:
+        """Section content shaped as the UI writes it for the section type"""
+        config = self.config
+        if section_type in SEEDED_SECTIONS:
+            items = [dict(entry) for entry in self.seed_entries(SEEDED_SECTIONS[section_type])]
+            for entry in items:
+                if 'score' in entry:
+                    entry['score'] = self.rng.randint(3, 18)
+                if 'roll' in entry:
+                    entry['roll'] = min(99, entry['roll'] + self.rng.choice([0, 0, 10, 20, 30]))
+                    entry['used'] = self.rng.random() < 0.2
+            return {'showEmpty': False, 'items': items}
+        if section_type == 'RICHTEXT':
+            size = self.count(config.content_median_bytes, config.content_max_bytes, minimum=16)
+            return {'showEmpty': False, 'items': [
+                {'id': self.uuid(), 'name': '', 'description': '', 'markdown': self.text(size)}]}
+
+        items = []
+        for _ in range(self.count(5, 40, minimum=1)):
+            entry = {'id': self.uuid(), 'name': self.text(self.rng.randint(4, 24)),
+                     'description': self.text(self.count(40, 1000))}
+            if section_type == 'KEYVALUE':
+                entry['value'] = self.text(self.rng.randint(0, 60))
+            elif section_type in ('TRACKABLE', 'CLOCKS'):
+                entry['length'] = self.rng.randint(1, 8)
+                entry['ticked' if section_type == 'TRACKABLE' else 'current'] = self.rng.randint(0, entry['length'])
+            elif section_type == 'BURNABLE':
+                entry['length'] = self.rng.randint(1, 6)
+                entry['states'] = [self.rng.choice(['unticked', 'ticked', 'burnt']) for _ in range(entry['length'])]
+            elif section_type == 'DELTAGREENBONDS':
+                entry.update(value=self.rng.randint(0, 18), symptoms=self.text(self.rng.randint(0, 80)))
+            elif section_type == 'DELTAGREENWEAPONS':
+                entry.update(skillId='skill-firearms', baseRange='15m', damage='1D10', armorPiercing='N/A',
+                             lethality='N/A', killRadius='N/A', ammo=str(self.rng.randint(1, 30)))
+            items.append(entry)
+        return {'showEmpty': self.rng.random() < 0.5, 'items': items}
+
+    def generate(self) -> Dataset:
+        config = self.config
+        dataset = Dataset(users=[self.uuid() for _ in range(config.users)])
+        # Long-tailed popularity: a few users are in many games
+        weights = [1 / (rank + 1) for rank in range(len(dataset.users))]
+        for _ in range(config.games):
+            gm_user_id = self.rng.choices(dataset.users, weights)[0]
+            wanted = min(self.count(config.players_median, config.players_max), len(dataset.users) - 1)
+            players = set()
+            while len(players) < wanted:
+                user_id = self.rng.choices(dataset.users, weights)[0]
+                if user_id != gm_user_id:
+                    players.add(user_id)
+            self.game(dataset, gm_user_id, sorted(players), self.count(config.npcs_median, config.npcs_max))
+        return dataset
+
+    def game(self, dataset: Dataset, gm_user_id: str, player_user_ids: List[str], npcs: int):
+        config = self.config
+        game_id = self.uuid()
+        game_type = self.rng.choice(list(GAME_TYPES))
+        defaults = GAME_TYPES[game_type]
+        pk = f"GAME#{game_id}"
+        created = self.timestamp(BASE_TIME, 365)
+        summary = GameSummary(game_id=game_id, game_type=game_type, gm_user_id=gm_user_id,
+                              player_user_ids=player_user_ids, npcs=npcs, sections=0, assets=0)
+        game_name = self.text(self.rng.randint(8, 40))
+        game_description = self.text(self.count(120, 2000))
+        shared = {'gameId': _s(game_id), 'gameName': _s(game_name), 'gameType': _s(game_type),
+                  'gameDescription': _s(game_description), 'gmUserId': _s(gm_user_id)}
+        items = []
+
+        # GM, player characters and NPCs, each with their sheet's sections
+        sheets = [(gm_user_id, 'GM', defaults['gm_name'])]
+        sheets += [(user_id, 'CHARACTER', defaults['character_name']) for user_id in player_user_ids]
+        sheets += [(self.uuid(), 'NPC', self.text(self.rng.randint(6, 30))) for _ in range(npcs)]
+        assets = 0
+        for user_id, player_type, character_name in sheets:
+            joined = self.timestamp(created, 30)
+            sections = self.count(config.sections_median, config.sections_max)
+            player = {
+                'PK': _s(pk), 'SK': _s(f"PLAYER#{user_id}"), **shared,
+                'userId': _s(user_id), 'characterName': _s(character_name), 'type': _s(player_type),
+                'createdAt': _s(_iso(joined)), 'updatedAt': _s(_iso(self.timestamp(joined, 60))),
+                'remainingSections': _n(max(INITIAL_SECTION_QUOTA - sections, 0)),
+            }
+            if player_type != 'NPC':
+                player['GSI1PK'] = _s(f"USER#{user_id}")
+            items.append(player)
+            for position in range(sections):
+                section_type = self.rng.choice(defaults['sections'])
+                section_id = self.uuid()
+                section_created = self.timestamp(joined, 30)
+                updated = _iso(self.timestamp(section_created, 90))
+                section = {
+                    'PK': _s(pk), 'SK': _s(f"SECTION#{section_id}"),
+                    'gameId': _s(game_id), 'userId': _s(user_id), 'sectionId': _s(section_id),
+                    'sectionName': _s(self.text(self.rng.randint(4, 30))), 'sectionType': _s(section_type),
+                    'GSI1PK': _s(f"SECTIONUSER#{user_id}"),
+                    'content': _s(json.dumps(self.content(section_type), separators=(',', ':'))),
+                    'position': _n(position), 'createdAt': _s(_iso(section_created)), 'updatedAt': _s(updated),
+                    'type': _s('SECTION'), 'playerType': _s(player_type),
+                }
+                asset_ids = [self.uuid() for _ in range(self.poisson(config.assets_per_section))]
+                if asset_ids:
+                    section['assets'] = {'L': [_s(asset_id) for asset_id in asset_ids]}
+                items.append(section)
+                items += [self.asset(game_id, section_id, asset_id, section_created) for asset_id in asset_ids]
+                assets += len(asset_ids)
+            summary.sections += sections
+
+        players = len(player_user_ids)
+        game = {
+            'PK': _s(pk), 'SK': _s('GAME'), **shared,
+            'GSI1PK': _s(f"JOIN#{self.join_code()}"), 'type': _s('GAME'), 'theme': _s(defaults['theme']),
+            'createdAt': _s(_iso(created)), 'updatedAt': _s(_iso(self.timestamp(created, 120))),
+            'remainingCharacters': _n(max(INITIAL_CHARACTER_QUOTA - 1 - npcs - players, 0)),
+            'remainingSections': _n(INITIAL_SECTION_QUOTA),
+            'remainingAssets': _n(max(INITIAL_ASSET_QUOTA - assets, 0)),
+        }
+        game['joinCode'] = _s(game['GSI1PK']['S'].split('#', 1)[1])
+        if player_user_ids:
+            game['players'] = {'SS': player_user_ids}
+        items.insert(0, game)
+
+        summary.assets = assets
+        summary.items = len(items)
+        summary.bytes = sum(item_size(item) for item in items)
+        dataset.items += items
+        dataset.games.append(summary)
+
+    def asset(self, game_id: str, section_id: str, asset_id: str, after: datetime) -> Item:
+        """An asset, mostly READY; a few are still PENDING in their GSI2 expiry bucket, or EXPIRED"""
+        prefix = f"game/{game_id}/section/{section_id}/{asset_id}"
+        created = self.timestamp(after, 30)
+        expire = created + timedelta(hours=1)
+        status = self.rng.choices(['READY', 'PENDING', 'EXPIRED'], [90, 5, 5])[0]
+        asset = {
+            'PK': _s(f"GAME#{game_id}"), 'SK': _s(f"ASSET#{asset_id}"),
+            'gameId': _s(game_id), 'sectionId': _s(section_id), 'assetId': _s(asset_id), 'status': _s(status),
+            'bucket': _s('wildsea-dataset-assets'),
+            'incomingKey': _s(f"incoming/{prefix}/original"), 'originalKey': _s(f"asset/{prefix}/original"),
+            'variantsPrefix': _s(f"asset/{prefix}/variants/"),
+            'mimeType': _s(self.rng.choice(MIME_TYPES)), 'sizeBytes': _n(self.count(400_000, 10_000_000, 1000)),
+            'createdAt': _s(_iso(created)), 'updatedAt': _s(_iso(created + timedelta(seconds=5))),
+            'expireUploadAt': _s(_iso(expire)), 'type': _s('ASSET'),
+        }
+        if self.rng.random() < 0.5:
+            asset['label'] = _s(self.text(self.rng.randint(4, 40)))
+        if status == 'READY':
+            asset['contentHash'] = _s(f"{self.rng.getrandbits(256):064x}")
+        elif status == 'PENDING':
+            bucket = int(expire.timestamp()) // ASSET_EXPIRY_BUCKET_SECONDS * ASSET_EXPIRY_BUCKET_SECONDS
+            asset['GSI2PK'] = _s(f"EXPIRY#{bucket}")
+        return asset
+
+
+def _s(value: str) -> dict:
+    return {'S': value}
+
+
+def _n(value) -> dict:
+    return {'N': str(value)}
+
+
+def _iso(moment: datetime) -> str:
+    """ISO-8601 as AppSync's util.time.nowISO8601 writes it"""
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond // 1000:03d}Z"
+
+
+def generate(config: DatasetConfig) -> Dataset:
+    return Generator(config).generate()
+
+
+def write_dataset(dynamodb, table_name: str, dataset: Dataset, concurrency: int = DEFAULT_CONCURRENCY) -> WriteStats:
+    stats = WriteStats()
+    requests = [{'PutRequest': {'Item': item}} for item in dataset.items]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        write_all(dynamodb, table_name, requests, executor, stats)
+    return stats
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+
+def print_summary(dataset: Dataset):
+    games = dataset.games
+    total_bytes = sum(game.bytes for game in games)
+    print(f"Generated {len(games)} games, {len(dataset.items)} items, {total_bytes / 1e6:.1f} MB "
+          f"for {len(dataset.users)} users")
+    for name, values in [
+        ('players', [len(game.player_user_ids) for game in games]),
+        ('npcs', [game.npcs for game in games]),
+        ('sections', [game.sections for game in games]),
+        ('assets', [game.assets for game in games]),
+        ('items', [game.items for game in games]),
+        ('KB', [game.bytes / 1024 for game in games]),
+    ]:
+        values = sorted(values)
+        print(f"  {name:<9} per game  p50 {_percentile(values, 50):>8.0f}  p90 {_percentile(values, 90):>8.0f}  "
+              f"max {values[-1]:>8.0f}")
+    largest = max(item_size(item) for item in dataset.items)
+    print(f"  largest item {largest / 1024:.1f} KB")
+
+
+def main():
+    table_name = os.getenv('TABLE_NAME')
+    dry_run = bool(os.getenv('DRY_RUN'))
+    if not table_name and not dry_run:
+        print("Error: TABLE_NAME is required")
+        sys.exit(1)
+    concurrency = int(os.getenv('CONCURRENCY') or DEFAULT_CONCURRENCY)
+
+    config = DatasetConfig.from_env()
+    dataset = generate(config)
+    print_summary(dataset)
+
+    manifest = os.getenv('MANIFEST')
+    if manifest:
+        with open(manifest, 'w', encoding='utf-8') as f:
+            json.dump({'config': asdict(config), 'users': dataset.users,
+                       'games': [asdict(game) for game in dataset.games]}, f, indent=2)
+        print(f"Manifest written to {manifest}")
+    if dry_run:
+        return
+
+    dynamodb = create_client(concurrency)
+    if os.getenv('CREATE_TABLE'):
+        create_table(dynamodb, table_name)
+    stats = write_dataset(dynamodb, table_name, dataset, concurrency)
+    print(f"Wrote {stats.put} items to {table_name} in {stats.write_seconds:.2f}s "
+          f"({stats.items_per_second:.0f} items/s) with {stats.write_calls} BatchWriteItem calls, "
+          f"{stats.retries} for unprocessed items")
+    for error in stats.errors:
+        print(f"  ✗ {error}")
+    if stats.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+The GraphQL client shared by the Python tooling.
+
+One GraphQLClient holds a pool of keep-alive connections (see
+load_generator) and sends every request for a process over it:
+
+- Authentication is a fixed access token, or a CognitoSession whose token
+  is renewed before it expires; a request rejected with 401 renews the
+  session's token and is retried once.
+- Queries are Documents, parsed and minified once. The start of each
+  request body is encoded when the Document is created, so a request only
+  serialises its variables. AppSync has no persisted query support, so the
+  text is always sent; Documents are its closest equivalent.
+- execute_batch() sends several operations of the same type in a single
+  request, as one document with each operation's root field under an
+  alias and its variables renamed to match. AppSync resolves the fields
+  independently, so one failing doesn't fail the others.
+- Responses may be gzip-compressed.
+- Hooks are called with an OperationTiming after every request, for
+  latency histograms or tracing.
+
+validate_url() is the one URL check for the tools: HTTPS, or plain HTTP to
+a local mock API.
+"""
+
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+
+from cognito_auth import CognitoSession, TokenCache, create_cognito_transport
+from load_generator import DEFAULT_TIMEOUT_SECONDS, TransportError, create_transport
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1')
+DEFAULT_CONNECTIONS = 10
+BATCH_ALIAS = 'b'
+
+# Block strings, strings, comments, spreads, punctuators and names/numbers
+_TOKEN_PATTERN = re.compile(r'"""(?:\\"""|[^"]|"(?!""))*"""|"(?:\\.|[^"\\])*"|#[^\n]*|\.\.\.|[!$&()\[\]{}:=@|]|[\w.+-]+')
+_IGNORED = re.compile(r'[\s,]+')
+
+
+def validate_url(url: str, allowed_hosts: Optional[Sequence[str]] = None) -> None:
+    """Raise ValueError unless url is HTTPS (or HTTP to localhost), has no credentials, and its host is allowed"""
+    parsed = urlparse(url)
+    local = parsed.scheme == "http" and parsed.hostname in LOCAL_HOSTS
+    if not (parsed.scheme == "https" or local) or not parsed.netloc or parsed.username or parsed.password:
+        raise ValueError("URL must be HTTPS, contain a host, and have no credentials")
+    if allowed_hosts and not local:
+        host = (parsed.hostname or "").lower()
+        if not any(host == h or host.endswith("." + h) for h in (h.lower() for h in allowed_hosts)):
+            raise ValueError(f"Host '{host}' is not in the allowed list")
+
+
+def _tokenise(text: str) -> List[str]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        ignored = _IGNORED.match(text, position)
+        if ignored:
+            position = ignored.end()
+            continue
+        match = _TOKEN_PATTERN.match(text, position)
+        if not match:
+            raise ValueError(f"Unexpected character {text[position]!r} in GraphQL document")
+        if not match.group().startswith('#'):
+            tokens.append(match.group())
+        position = match.end()
+    return tokens
+
+
+def _join(tokens: List[str]) -> str:
+    """Tokens as text, with a space only where two names would otherwise run together"""
+    parts = []
+    for token in tokens:
+        if parts and (parts[-1][-1:].isalnum() or parts[-1][-1:] == '_') and (token[0].isalnum() or token[0] == '_'):
+            parts.append(' ')
+        parts.append(token)
+    return ''.join(parts)
+
+
+def _matching(tokens: List[str], start: int) -> int:
+    """Index of the bracket closing the one at tokens[start]"""
+    opening = tokens[start]
+    closing = {'(': ')', '{': '}', '[': ']'}[opening]
+    depth = 0
+    for index in range(start, len(tokens)):
+        if tokens[index] == opening:
+            depth += 1
+        elif tokens[index] == closing:
+            depth -= 1
+            if depth == 0:
+                return index
+    raise ValueError(f"Unbalanced {opening!r} in GraphQL document")
+
+
+@dataclass
+class RootField:
+    """A top-level field of an operation, with the variable behind each argument"""
+    alias: Optional[str]
+    name: str
+    arguments: Dict[str, Optional[str]]  # Argument name -> variable name, or None for a literal
+    tokens: List[str]
+
+    @property
+    def key(self) -> str:
+        """The field's key in the response data"""
+        return self.alias or self.name
+
+
+class Document:
+    """
+    A single GraphQL operation, parsed once
+
+    Keeps the minified text, the operation type and name, the variable
+    definitions and the root fields. Fragment definitions aren't supported;
+    inline fragments are.
+    """
+
+    def __init__(self, text: str):
+        tokens = _tokenise(text)
+        if not tokens:
+            raise ValueError("Empty GraphQL document")
+        if tokens[0] == '{':
+            self.operation, self.name, position = 'query', None, 0
+        else:
+            self.operation = tokens[0]
+            if self.operation not in ('query', 'mutation', 'subscription'):
+                raise ValueError(f"Unsupported GraphQL definition '{tokens[0]}'")
+            position = 1
+            self.name = tokens[1] if tokens[1] not in ('(', '{', '@') else None
+            position += 1 if self.name else 0
+
+        self.variable_tokens: List[str] = []
+        if tokens[position] == '(':
+            end = _matching(tokens, position)
+            self.variable_tokens = tokens[position + 1:end]
+            position = end + 1
+        if tokens[position] != '{':
+            raise ValueError("Directives on operations aren't supported")
+        end = _matching(tokens, position)
+        if end != len(tokens) - 1:
+            raise ValueError("A Document holds exactly one operation")
+
+        self.selection_tokens = tokens[position + 1:end]
+        self.root_fields = self._root_fields(self.selection_tokens)
+        self.text = _join(tokens)
+        self.sha256 = hashlib.sha256(self.text.encode('utf-8')).hexdigest()
+        self._prefix = (f'{{"query":{json.dumps(self.text)},"operationName":{json.dumps(self.name)},'
+                        '"variables":').encode('utf-8')
+
+    @staticmethod
+    def _root_fields(tokens: List[str]) -> List[RootField]:
+        fields = []
+        position = 0
+        while position < len(tokens):
+            start = position
+            if tokens[position] == '...':
+                raise ValueError("Fragments at the root of an operation aren't supported")
+            alias = None
+            name = tokens[position]
+            if position + 1 < len(tokens) and tokens[position + 1] == ':':
+                alias, name = name, tokens[position + 2]
+                position += 2
+            position += 1
+            arguments = {}
+            if position < len(tokens) and tokens[position] == '(':
+                end = _matching(tokens, position)
+                arguments = Document._arguments(tokens[position + 1:end])
+                position = end + 1
+            while position < len(tokens) and tokens[position] == '@':
+                position += 2
+                if position < len(tokens) and tokens[position] == '(':
+                    position = _matching(tokens, position) + 1
+            if position < len(tokens) and tokens[position] == '{':
+                position = _matching(tokens, position) + 1
+            fields.append(RootField(alias, name, arguments, tokens[start:position]))
+        return fields
+
+    @staticmethod
+    def _arguments(tokens: List[str]) -> Dict[str, Optional[str]]:
+        arguments = {}
+        position = 0
+        while position < len(tokens):
+            name = tokens[position]
+            value = position + 2
+            if tokens[value] == '$':
+                arguments[name] = tokens[value + 1]
+                position = value + 2
+            else:
+                arguments[name] = None
+                position = _matching(tokens, value) + 1 if tokens[value] in '({[' else value + 1
+        return arguments
+
+    @property
+    def field(self) -> str:
+        """The first root field's name, which names the operation in reports"""
+        return self.root_fields[0].name
+
+    def encode(self, variables: Optional[dict]) -> bytes:
+        """The request body for this operation"""
+        return self._prefix + json.dumps(variables or {}).encode('utf-8') + b'}'
+
+
+def _rename_variables(tokens: List[str], prefix: str) -> List[str]:
+    renamed = list(tokens)
+    for index in range(len(renamed) - 1):
+        if renamed[index] == '$':
+            renamed[index + 1] = prefix + renamed[index + 1]
+    return renamed
+
+
+def merge_documents(documents: Sequence[Document]) -> Document:
+    """
+    One document running every document's root fields
+
+    Each document's fields are aliased b<n> (b<n>_<m> for its later fields)
+    and its variables are prefixed b<n>_.
+    """
+    operations = {document.operation for document in documents}
+    if len(operations) != 1:
+        raise ValueError("A batch can't mix queries and mutations")
+    definitions, selections = [], []
+    for n, document in enumerate(documents):
+        prefix = f"{BATCH_ALIAS}{n}_"
+        if definitions and document.variable_tokens:
+            definitions.append(',')
+        definitions.extend(_rename_variables(document.variable_tokens, prefix))
+        for m, field in enumerate(document.root_fields):
+            body = field.tokens[2:] if field.alias else field.tokens
+            alias = f"{BATCH_ALIAS}{n}" + (f"_{m}" if m else '')
+            selections.extend([alias, ':'] + _rename_variables(body, prefix))
+    header = [operations.pop(), 'batch'] + (['('] + definitions + [')'] if definitions else [])
+    return Document(_join(header + ['{'] + selections + ['}']))
+
+
+def batch_variables(operations: Sequence[Tuple[Document, Optional[dict]]]) -> dict:
+    return {f"{BATCH_ALIAS}{n}_{name}": value
+            for n, (_, variables) in enumerate(operations) for name, value in (variables or {}).items()}
+
+
+def _split_batch(documents: Sequence[Document], data: dict, errors: List[dict]) -> List[Union[dict, 'GraphQLError']]:
+    """Each document's data, keyed as if it had been sent alone, or its first error"""
+    failures: Dict[str, dict] = {}
+    for error in errors:
+        path = error.get('path') or []
+        failures.setdefault(str(path[0]) if path else '', error)
+    results = []
+    for n, document in enumerate(documents):
+        result = {}
+        error = None
+        for m, field in enumerate(document.root_fields):
+            alias = f"{BATCH_ALIAS}{n}" + (f"_{m}" if m else '')
+            error = error or failures.get(alias) or failures.get('')
+            result[field.key] = data.get(alias)
+        results.append(GraphQLError(error.get('message', 'GraphQL error'), errors=[error]) if error else result)
+    return results
+
+
+class GraphQLError(Exception):
+    """Raised for HTTP errors and GraphQL errors in a response"""
+
+    def __init__(self, message: str, status: int = 200, errors: Optional[List[dict]] = None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors or []
+
+
+@dataclass
+class OperationTiming:
+    """One request, as reported to the client's hooks"""
+    operation: str
+    operations: int
+    status: Optional[int]
+    elapsed: float
+    request_bytes: int
+    response_bytes: int
+    error: Optional[str] = None
+
+
+def _as_document(query: Union[Document, str]) -> Document:
+    return query if isinstance(query, Document) else Document(query)
+
+
+class GraphQLClient:
+    """
+    Sends authenticated GraphQL requests over a pooled transport
+
+    auth is an access token, or a session (such as a CognitoSession) with
+    async token() and expire() methods.
+    """
+
+    def __init__(self, transport, auth: Union[str, CognitoSession, None] = None):
+        self.transport = transport
+        self.auth = auth
+        self.hooks: List[Callable[[OperationTiming], None]] = []
+        self.closing = []  # Other transports to close with this client
+
+    async def _token(self, auth) -> str:
+        return auth if isinstance(auth, str) else await auth.token()
+
+    async def _post(self, body: bytes, auth, label: str, operations: int) -> dict:
+        started = time.perf_counter()
+        status, content = None, b''
+        error = None
+        try:
+            status, content = await self.transport.post(body, {
+                'Content-Type': 'application/json',
+                'Accept-Encoding': 'gzip',
+                'Authorization': f"Bearer {await self._token(auth)}",
+            })
+            if status != 200:
+                raise GraphQLError(f"HTTP {status}", status)
+            return json.loads(content)
+        except (GraphQLError, TransportError, ValueError) as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            timing = OperationTiming(label, operations, status, time.perf_counter() - started,
+                                     len(body), len(content), error)
+            for hook in self.hooks:
+                hook(timing)
+
+    async def _send(self, body: bytes, auth, label: str, operations: int) -> dict:
+        auth = auth or self.auth
+        try:
+            return await self._post(body, auth, label, operations)
+        except GraphQLError as e:
+            if e.status != 401 or isinstance(auth, str):
+                raise
+            auth.expire()
+            return await self._post(body, auth, label, operations)
+
+    async def execute(self, query: Union[Document, str], variables: Optional[dict] = None,
+                      auth: Union[str, CognitoSession, None] = None) -> dict:
+        """
+        Return the response's data, raising GraphQLError for HTTP or GraphQL errors
+
+        auth overrides the client's, so many users can share one client's
+        connections.
+        """
+        document = _as_document(query)
+        result = await self._send(document.encode(variables), auth, document.field, 1)
+        if result.get('errors'):
+            raise GraphQLError(result['errors'][0].get('message', 'GraphQL error'), errors=result['errors'])
+        return result.get('data') or {}
+
+    async def execute_batch(self, operations: Sequence[Tuple[Union[Document, str], Optional[dict]]],
+                            auth: Union[str, CognitoSession, None] = None) -> List[Union[dict, GraphQLError]]:
+        """
+        Run several queries (or several mutations) in one request
+
+        Returns each operation's data, in order, or the GraphQLError it
+        failed with; a failed request raises instead.
+        """
+        documents = [_as_document(query) for query, _ in operations]
+        merged = merge_documents(documents)
+        variables = batch_variables([(document, variables) for document, (_, variables) in zip(documents, operations)])
+        result = await self._send(merged.encode(variables), auth, f"batch({documents[0].field})", len(documents))
+        return _split_batch(documents, result.get('data') or {}, result.get('errors') or [])
+
+    async def close(self):
+        await self.transport.close()
+        for transport in self.closing:
+            await transport.close()
+
+
+async def sign_in(graphql_url: str, username: str, password: str, client_id: str, region: str,
+                  max_connections: int = DEFAULT_CONNECTIONS, cache: Optional[TokenCache] = None,
+                  timeout: float = DEFAULT_TIMEOUT_SECONDS) -> GraphQLClient:
+    """A client for graphql_url signed in through Cognito, whose token is renewed as needed"""
+    validate_url(graphql_url)
+    auth_transport = create_cognito_transport(region, 1)
+    session = CognitoSession(auth_transport, username, password, client_id, cache)
+    client = GraphQLClient(create_transport(graphql_url, max_connections, timeout), session)
+    client.closing.append(auth_transport)
+    try:
+        await session.token()
+    except BaseException:
+        await client.close()
+        raise
+    return client
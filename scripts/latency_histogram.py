@@ -0,0 +1,149 @@
+"""
+HDR-style latency histogram for the load scripts.
+
+Latencies are counted in log-linear buckets: exact below 2^SIGNIFICANT_BITS
+microseconds, then 2^(SIGNIFICANT_BITS-1) buckets per power of two, so any
+recorded value is within 1/64 (about 1.6%) of its bucket's bounds. Memory is
+a fixed array of counts however many requests are recorded, and histograms
+from separate loops or runs can be merged by adding counts.
+"""
+
+import csv
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SIGNIFICANT_BITS = 7
+MAX_LATENCY_SECONDS = 120
+REPORT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _percentile_name(percentile: float) -> str:
+    """50 -> p50, 99.9 -> p999"""
+    return 'p' + f"{percentile:g}".replace('.', '')
+
+
+class LatencyHistogram:
+    """Log-bucketed latency counts, recorded in seconds with microsecond resolution"""
+
+    def __init__(self, max_seconds: float = MAX_LATENCY_SECONDS):
+        self._linear = 1 << SIGNIFICANT_BITS
+        self._half = self._linear >> 1
+        self._max_value = int(max_seconds * 1_000_000)
+        self._counts = [0] * (self._index(self._max_value) + 1)
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        if value < self._linear:
+            return value
+        shift = value.bit_length() - SIGNIFICANT_BITS
+        return self._linear + (shift - 1) * self._half + ((value >> shift) - self._half)
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        """Lowest and highest microsecond values counted in a bucket"""
+        if index < self._linear:
+            return index, index
+        shift = (index - self._linear) // self._half + 1
+        top = (index - self._linear) % self._half + self._half
+        return top << shift, ((top + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        """Count one latency; anything over max_seconds is counted in the top bucket"""
+        value = min(max(int(seconds * 1_000_000), 0), self._max_value)
+        self._counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add another histogram's counts into this one"""
+        if len(other._counts) != len(self._counts):
+            raise ValueError("Histograms have different ranges")
+        for index, count in enumerate(other._counts):
+            self._counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, percentile: float) -> float:
+        """Latency in seconds at or below which the given percentage of requests fell"""
+        if not self.count:
+            return 0.0
+        # Rank of the request at this percentile, rounding up as HdrHistogram does
+        rank = max(1, -(-self.count * percentile // 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                # The bucket's highest value, but never more than was actually seen
+                return min(self._bounds(index)[1], self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count / 1_000_000 if self.count else 0.0
+
+    def buckets(self) -> Iterator[Tuple[float, float, int]]:
+        """Yield (lowest seconds, highest seconds, count) for each non-empty bucket"""
+        for index, count in enumerate(self._counts):
+            if count:
+                low, high = self._bounds(index)
+                yield low / 1_000_000, high / 1_000_000, count
+
+    def summary(self) -> Dict[str, float]:
+        """Count, plus min, mean, max and REPORT_PERCENTILES in milliseconds"""
+        result = {
+            'count': self.count,
+            'min_ms': round((self.min or 0) / 1000, 3),
+            'mean_ms': round(self.mean * 1000, 3),
+            'max_ms': round((self.max or 0) / 1000, 3),
+        }
+        for percentile in REPORT_PERCENTILES:
+            result[f"{_percentile_name(percentile)}_ms"] = round(self.percentile(percentile) * 1000, 3)
+        return result
+
+
+def format_summary(histogram: LatencyHistogram) -> str:
+    """One-line percentile summary for the live screen"""
+    if not histogram.count:
+        return "no requests"
+    parts = [f"{_percentile_name(percentile)} {histogram.percentile(percentile) * 1000:.1f}"
+             for percentile in REPORT_PERCENTILES]
+    return f"{'  '.join(parts)}  max {histogram.max / 1000:.1f} ms"
+
+
+def export_report(path: str, loops: List[dict], histogram: LatencyHistogram,
+                  totals: Optional[dict] = None, metadata: Optional[dict] = None, label: str = 'loop'):
+    """
+    Write per-loop rows and the overall latency distribution
+
+    A .json path gets everything: metadata, each loop's row, the overall
+    summary with totals and the non-empty buckets, so runs against different
+    deployments can be compared or re-merged later. Any other path gets a
+    CSV with one row per loop, plus a final 'total' row. Rows are labelled
+    by their label field, which need not be a loop number.
+    """
+    overall = {**histogram.summary(), **(totals or {})}
+    if path.endswith('.json'):
+        report = {
+            'metadata': metadata or {},
+            'loops': loops,
+            'overall': overall,
+            'buckets': [{'low_ms': low * 1000, 'high_ms': high * 1000, 'count': count}
+                        for low, high, count in histogram.buckets()],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return
+
+    fields = list(loops[0].keys()) if loops else [label] + list(overall.keys())
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(loops)
+        writer.writerow({**overall, label: 'total'})
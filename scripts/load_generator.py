@@ -0,0 +1,244 @@
+"""
+asyncio load generation for the GraphQL API.
+
+Requests go over pooled keep-alive connections, so each one costs a round
+trip rather than a TCP and TLS handshake. httpx is used when it is
+installed, with HTTP/2 if h2 is available too; otherwise a small HTTP/1.1
+keep-alive pool on asyncio streams is used, so the scripts still run with
+only the standard library. Both decode gzip-compressed responses.
+
+graphql_client sends GraphQL requests over these transports.
+
+run_load() drives an async operation either closed-loop (a fixed number of
+workers, each starting its next call when the last finishes) or open-loop
+at a constant arrival rate. In open-loop mode latency is measured from
+when each call was due to start, so time spent queueing for a connection
+when the API falls behind is counted rather than hidden.
+"""
+
+import asyncio
+import gzip
+import ssl
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional
+from urllib.parse import urlparse
+
+DEFAULT_TIMEOUT_SECONDS = 30
+
+
+class TransportError(Exception):
+    """Raised when a request fails below the GraphQL layer"""
+    pass
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HttpxTransport:
+    """Pooled keep-alive transport on httpx, using HTTP/2 when h2 is installed"""
+
+    def __init__(self, url: str, max_connections: int, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        import httpx
+
+        self.url = url
+        self._client = httpx.AsyncClient(
+            http2=_h2_available(),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        self.http_version = None
+
+    @property
+    def name(self) -> str:
+        return f"httpx ({self.http_version or ('HTTP/2' if _h2_available() else 'HTTP/1.1')})"
+
+    async def post(self, body: bytes, headers: dict) -> tuple[int, bytes]:
+        import httpx
+
+        try:
+            response = await self._client.post(self.url, content=body, headers=headers)
+        except httpx.HTTPError as e:
+            raise TransportError(str(e) or type(e).__name__) from e
+        self.http_version = response.http_version
+        return response.status_code, response.content
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    def close(self):
+        self.writer.close()
+
+
+class HTTP1Pool:
+    """Minimal keep-alive HTTP/1.1 POST client over asyncio streams"""
+
+    def __init__(self, url: str, max_connections: int, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        parsed = urlparse(url)
+        self.url = url
+        self._https = parsed.scheme == 'https'
+        self._host = parsed.hostname
+        self._port = parsed.port or (443 if self._https else 80)
+        self._path = (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else '')
+        self._host_header = parsed.netloc
+        self._ssl = ssl.create_default_context() if self._https else None
+        self._timeout = timeout
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: List[_Connection] = []
+        self.connections_opened = 0
+        self.name = 'asyncio (HTTP/1.1)'
+
+    async def _open(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(
+            self._host, self._port, ssl=self._ssl,
+            server_hostname=self._host if self._https else None,
+        )
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def _exchange(self, connection: _Connection, body: bytes, headers: dict) -> tuple[int, bytes, bool]:
+        lines = [f"POST {self._path} HTTP/1.1", f"Host: {self._host_header}",
+                 f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        connection.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+        await connection.writer.drain()
+
+        status_line = await connection.reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await connection.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await connection.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await connection.reader.readline()
+                    break
+                chunks.append(await connection.reader.readexactly(size))
+                await connection.reader.readline()
+            content = b''.join(chunks)
+        else:
+            content = await connection.reader.readexactly(int(response_headers.get('content-length', 0)))
+        if response_headers.get('content-encoding', '').lower() == 'gzip':
+            content = gzip.decompress(content)
+
+        connection.requests += 1
+        reusable = response_headers.get('connection', '').lower() != 'close'
+        return status, content, reusable
+
+    async def post(self, body: bytes, headers: dict) -> tuple[int, bytes]:
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            # A reused connection may have been closed by the server while idle;
+            # that is retried once on a fresh connection
+            for attempt in range(2):
+                if connection is None:
+                    try:
+                        connection = await asyncio.wait_for(self._open(), self._timeout)
+                    except (OSError, asyncio.TimeoutError) as e:
+                        raise TransportError(f"Connect failed: {str(e) or type(e).__name__}") from e
+                reused = connection.requests > 0
+                try:
+                    status, content, reusable = await asyncio.wait_for(
+                        self._exchange(connection, body, headers), self._timeout)
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+                    connection.close()
+                    connection = None
+                    if reused and attempt == 0 and not isinstance(e, asyncio.TimeoutError):
+                        continue
+                    raise TransportError(str(e) or type(e).__name__) from e
+                if reusable:
+                    self._idle.append(connection)
+                else:
+                    connection.close()
+                return status, content
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+def create_transport(url: str, max_connections: int, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+    """httpx if it is installed, otherwise the standard library HTTP/1.1 pool"""
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        return HTTP1Pool(url, max_connections, timeout)
+    return HttpxTransport(url, max_connections, timeout)
+
+
+@dataclass
+class Sample:
+    """One completed call: its result, and how long it took from when it was due"""
+    result: Any
+    latency: float
+
+
+@dataclass
+class LoadRun:
+    samples: List[Sample] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return len(self.samples) / self.elapsed if self.elapsed else 0.0
+
+
+async def run_load(operation: Callable[[], Awaitable[Any]], count: int, concurrency: int,
+                   rate: Optional[float] = None) -> LoadRun:
+    """
+    Call operation() count times and time each call
+
+    With no rate, concurrency workers call it back to back (closed loop).
+    With a rate, calls start at a constant rate per second whether or not
+    earlier ones have finished (open loop); concurrency should then match
+    the transport's connection limit, which is what actually bounds the
+    requests in flight.
+    """
+    run = LoadRun()
+    started = time.perf_counter()
+
+    async def timed(due: float):
+        result = await operation()
+        run.samples.append(Sample(result, time.perf_counter() - due))
+
+    if rate:
+        tasks = []
+        for n in range(count):
+            due = started + n / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(timed(due)))
+        await asyncio.gather(*tasks)
+    else:
+        remaining = iter(range(count))
+
+        async def worker():
+            for _ in remaining:
+                await timed(time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+
+    run.elapsed = time.perf_counter() - started
+    return run
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the GraphQL API, for running the load scripts offline.
+
+Speaks HTTP/1.1 with keep-alive and answers the operations the scripts
+send, by root field, with data shaped like the real API's. Several
+aliased root fields in one request (a batch) are resolved independently,
+and responses are gzip-compressed for clients that accept it. It stores
+nothing but the assets it has issued tickets for, and checks only that a
+bearer token is present and, if it is one of its own, unexpired.
+
+Requests with an X-Amz-Target header are answered as Cognito InitiateAuth
+calls, for USER_PASSWORD_AUTH and REFRESH_TOKEN_AUTH with any credentials,
+so point COGNITO_ENDPOINT at the mock's URL to sign in through it.
+
+Upload tickets point back at the mock, which accepts the presigned POST at
+/upload and then, like the S3 event pipeline, resolves _finaliseAsset and
+_promoteAsset for the asset after finalise_delay each. As in the deployed
+API, assets larger than max_asset_size_bytes are refused a ticket, and an
+upload must be exactly the size its ticket was issued for; a ticket reserved
+without a size takes 1 byte up to the limit, and finalisation records the
+size that arrived.
+
+Usage: python3 mock_graphql_server.py [port] [latency_ms] [token_lifetime_seconds] [finalise_delay_ms]
+                                      [max_asset_size_bytes]
+"""
+
+import gzip
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import dice_engine
+from graphql_client import Document
+
+FORM_FIELD_PATTERN = re.compile(rb'name="([^"]+)"\r\n\r\n([^\r]*)\r\n')
+FORM_FILE_PATTERN = re.compile(rb'name="file"[^\r]*\r\n(?:[^\r]+\r\n)*\r\n')
+UPLOAD_PATH = '/upload'
+TOKEN_PREFIX = 'mock'
+DEFAULT_TOKEN_LIFETIME_SECONDS = 3600
+GAME_SECTIONS = 6  # Sections in each mock player sheet
+ASSET_UPLOAD_SECONDS = 15 * 60
+MAX_ASSET_SIZE_BYTES = 0  # Keep in sync with graphql/lib/constants/assets.ts
+DEFAULT_FINALISE_DELAY_SECONDS = 0.05
+UPLOAD_READ_BYTES = 64 * 1024
+GZIP_MIN_BYTES = 1000  # Smaller responses are sent uncompressed, as AppSync does
+
+
+class ResolverError(Exception):
+    """An error a resolver raises with util.error(), reported with its errorType"""
+
+    def __init__(self, message, error_type):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _timestamp(moment=None):
+    return (moment or _now()).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def roll_dice(variables, server):
+    roll = variables['input']
+    return {**dice_engine.roll_dice(roll), 'action': roll.get('action'), 'rolledAt': _timestamp()}
+
+
+def _section(game_id, user_id, section_id, position=0, **fields):
+    now = _timestamp()
+    return {
+        'userId': user_id,
+        'gameId': game_id,
+        'sectionId': section_id,
+        'type': 'SECTION',
+        'sectionName': fields.get('sectionName') or f"Section {position}",
+        'sectionType': 'KEYVALUE',
+        'content': fields.get('content') or json.dumps({'items': []}),
+        'position': fields.get('position', position),
+        'createdAt': now,
+        'updatedAt': now,
+        'assets': [],
+    }
+
+
+def get_game(variables, server):
+    game_id = variables['input']['gameId']
+    now = _timestamp()
+    return {
+        'gameId': game_id,
+        'gameName': f"Game {game_id}",
+        'gameType': 'deltaGreen',
+        'gameDescription': None,
+        'playerSheets': [{
+            'userId': 'mock-player',
+            'gameId': game_id,
+            'characterName': 'Mock Character',
+            'type': 'CHARACTER',
+            'sections': [_section(game_id, 'mock-player', f"section-{n}", n) for n in range(GAME_SECTIONS)],
+        }],
+        'joinCode': None,
+        'gmUserId': 'mock-gm',
+        'createdAt': now,
+        'updatedAt': now,
+        'type': 'GAME',
+        'remainingCharacters': 10,
+        'remainingSections': 50,
+    }
+
+
+def update_section(variables, server):
+    section = variables['input']
+    fields = {key: section[key] for key in ('sectionName', 'content', 'position') if section.get(key) is not None}
+    return _section(section['gameId'], 'mock-player', section['sectionId'], **fields)
+
+
+def _too_large(server, size_bytes):
+    """The resolvers' FileTooLarge message, or None if the size is allowed"""
+    if size_bytes <= server.max_asset_size_bytes:
+        return None
+    return f"File size too large. Maximum {server.max_asset_size_bytes / (1024 * 1024):g}MB allowed."
+
+
+def _asset_ticket(server, game_id, section_id, request):
+    asset_id = str(uuid.uuid4())
+    prefix = f"incoming/game/{game_id}/section/{section_id}/{asset_id}"
+    now = _now()
+    size_bytes = request.get('sizeBytes')
+    ticket = {
+        'asset': {
+            'gameId': game_id,
+            'sectionId': section_id,
+            'assetId': asset_id,
+            'status': 'PENDING',
+            'mimeType': request['mimeType'],
+            'sizeBytes': size_bytes,
+            'label': request.get('label'),
+            'createdAt': _timestamp(now),
+            'expireUploadAt': _timestamp(now + timedelta(seconds=ASSET_UPLOAD_SECONDS)),
+            'type': 'ASSET',
+        },
+        'uploadUrl': server.upload_url,
+        'uploadFields': json.dumps({'key': f"{prefix}/original", 'Content-Type': request['mimeType']}),
+        'headers': json.dumps({}),
+    }
+    server.assets[asset_id] = ticket['asset']
+    # The presigned POST's content-length-range
+    if size_bytes is None:
+        server.upload_sizes[asset_id] = (min(1, server.max_asset_size_bytes), server.max_asset_size_bytes)
+    else:
+        server.upload_sizes[asset_id] = (size_bytes, size_bytes)
+    return ticket
+
+
+def request_asset_upload(variables, server):
+    request = variables['input']
+    message = _too_large(server, request['sizeBytes'])
+    if message:
+        raise ResolverError(message, 'FileTooLarge')
+    return _asset_ticket(server, request['gameId'], request['sectionId'], request)
+
+
+def request_asset_uploads(variables, server):
+    request = variables['input']
+    tickets, errors = [], []
+    for index, item in enumerate(request['assets']):
+        # Without a size, the ticket accepts anything up to the limit
+        message = _too_large(server, item['sizeBytes']) if item.get('sizeBytes') is not None else None
+        if message:
+            errors.append({'index': index, 'errorType': 'FileTooLarge', 'message': message})
+        else:
+            tickets.append(_asset_ticket(server, request['gameId'], request['sectionId'], item))
+    return {'tickets': tickets, 'errors': errors}
+
+
+def get_asset(variables, server):
+    asset = server.assets.get(variables['input']['assetId'])
+    if not asset or asset['gameId'] != variables['input']['gameId']:
+        raise ValueError("Asset not found")
+    return asset
+
+
+def _uploaded_asset(key, mime_type, size_bytes, status):
+    """The asset an upload's key belongs to, as the asset mutations return it"""
+    _, _, game_id, _, section_id, asset_id, _ = key.split('/')
+    now = _timestamp()
+    return {
+        'gameId': game_id,
+        'sectionId': section_id,
+        'assetId': asset_id,
+        'status': status,
+        'mimeType': mime_type,
+        'sizeBytes': size_bytes,
+        'createdAt': now,
+        'updatedAt': now,
+        'type': 'ASSET',
+    }
+
+
+RESOLVERS = {
+    'rollDice': roll_dice,
+    'getGame': get_game,
+    'updateSection': update_section,
+    'requestAssetUpload': request_asset_upload,
+    'requestAssetUploads': request_asset_uploads,
+    'getAsset': get_asset,
+}
+
+
+def _publish(server, field, data):
+    for listener in server.listeners:
+        listener(field, data)
+
+
+def _transition(server, field, asset):
+    """An asset mutation from the event pipeline: record the new status, then notify subscribers"""
+    server.assets[asset['assetId']] = {**server.assets.get(asset['assetId'], {}), **asset}
+    _publish(server, field, asset)
+
+
+def _issue_tokens(username, lifetime):
+    expires = int(time.time() + lifetime)
+    return {
+        'AccessToken': f"{TOKEN_PREFIX}.{username}.{expires}.{uuid.uuid4().hex}",
+        'ExpiresIn': lifetime,
+        'TokenType': 'Bearer',
+    }
+
+
+def _token_expired(token):
+    parts = token.split('.')
+    if len(parts) != 4 or parts[0] != TOKEN_PREFIX:
+        return False  # Not one of ours; accepted as-is
+    return int(parts[2]) <= time.time()
+
+
+class MockGraphQLHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+    disable_nagle_algorithm = True  # Headers and body are written separately
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if len(body) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _initiate_auth(self, request):
+        """Cognito InitiateAuth: any password signs in, and any mock refresh token refreshes"""
+        with self.server.lock:
+            self.server.auth_requests += 1
+        flow = request.get('AuthFlow')
+        parameters = request.get('AuthParameters') or {}
+        lifetime = self.server.token_lifetime
+        if flow == 'USER_PASSWORD_AUTH' and parameters.get('USERNAME') and parameters.get('PASSWORD'):
+            result = _issue_tokens(parameters['USERNAME'], lifetime)
+            result['RefreshToken'] = f"refresh.{parameters['USERNAME']}"
+        elif flow == 'REFRESH_TOKEN_AUTH' and parameters.get('REFRESH_TOKEN', '').startswith('refresh.'):
+            result = _issue_tokens(parameters['REFRESH_TOKEN'].split('.', 1)[1], lifetime)
+        else:
+            self._reply(400, {'__type': 'NotAuthorizedException', 'message': 'Incorrect username or password.'})
+            return
+        self._reply(200, {'AuthenticationResult': result, 'ChallengeParameters': {}})
+
+    def _upload(self):
+        """A presigned POST: read it through, then finalise and promote the asset as S3 events would"""
+        remaining = int(self.headers.get('Content-Length', 0))
+        head = b''
+        while remaining:
+            chunk = self.rfile.read(min(remaining, UPLOAD_READ_BYTES))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            if len(head) < UPLOAD_READ_BYTES:
+                head += chunk
+        fields = {name.decode('utf-8'): value.decode('utf-8') for name, value in FORM_FIELD_PATTERN.findall(head)}
+        file_part = FORM_FILE_PATTERN.search(head)
+        boundary = self.headers.get('Content-Type', '').partition('boundary=')[2]
+        if remaining or 'key' not in fields or not file_part or not boundary:
+            self._reply(400, {'message': 'Malformed upload'})
+            return
+        size_bytes = int(self.headers['Content-Length'])
+        # The file runs from the end of its part's headers to the closing boundary
+        file_bytes = size_bytes - file_part.end() - len(f"\r\n--{boundary}--\r\n")
+        min_bytes, max_bytes = self.server.upload_sizes.get(fields['key'].split('/')[5], (0, -1))
+        if not min_bytes <= file_bytes <= max_bytes:
+            code = 'EntityTooSmall' if file_bytes < min_bytes else 'EntityTooLarge'
+            self._reply(400, {'code': code, 'message': f"{file_bytes} bytes, outside {min_bytes}-{max_bytes}"})
+            return
+        with self.server.lock:
+            self.server.uploads += 1
+            self.server.uploaded_bytes += size_bytes
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+        delay = self.server.finalise_delay
+        for field, status, after in (('_finaliseAsset', 'FINALISING', delay), ('_promoteAsset', 'READY', 2 * delay)):
+            asset = _uploaded_asset(fields['key'], fields.get('Content-Type'), file_bytes, status)
+            timer = threading.Timer(after, _transition, (self.server, field, asset))
+            timer.daemon = True
+            timer.start()
+
+    def do_POST(self):
+        if self.path.startswith(UPLOAD_PATH):
+            self._upload()
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.requests += 1
+        if self.headers.get('X-Amz-Target'):
+            self._initiate_auth(json.loads(body))
+            return
+        authorization = self.headers.get('Authorization', '')
+        if not authorization:
+            self._reply(401, {'errors': [{'message': 'Unauthorized'}]})
+            return
+        if _token_expired(authorization.split(' ')[-1]):
+            self._reply(401, {'errors': [{'errorType': 'UnauthorizedException', 'message': 'Token has expired.'}]})
+            return
+
+        request = json.loads(body)
+        try:
+            fields = Document(request.get('query', '')).root_fields
+        except (ValueError, IndexError):
+            fields = []
+        if not fields or any(field.name not in RESOLVERS for field in fields):
+            self._reply(200, {'errors': [{'message': 'Unsupported operation'}]})
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        variables = request.get('variables') or {}
+        data, errors, resolved = {}, [], []
+        for field in fields:
+            arguments = {name: variables.get(variable) for name, variable in field.arguments.items() if variable}
+            try:
+                data[field.key] = RESOLVERS[field.name](arguments, self.server)
+                resolved.append((field.name, data[field.key]))
+            except ResolverError as e:
+                data[field.key] = None
+                errors.append({'errorType': e.error_type, 'message': str(e), 'path': [field.key]})
+            except (KeyError, TypeError, ValueError) as e:
+                data[field.key] = None
+                errors.append({'message': f"Invalid input: {e}", 'path': [field.key]})
+        self._reply(200, {'data': data, 'errors': errors} if errors else {'data': data})
+        for name, result in resolved:
+            _publish(self.server, name, result)
+
+def start_mock_server(port=0, latency=0.0, token_lifetime=DEFAULT_TOKEN_LIFETIME_SECONDS,
+                      finalise_delay=DEFAULT_FINALISE_DELAY_SECONDS, max_asset_size_bytes=MAX_ASSET_SIZE_BYTES):
+    """Serve the mock API from a background thread, returning (url, server)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockGraphQLHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    server.auth_requests = 0
+    server.latency = latency
+    server.token_lifetime = token_lifetime
+    server.finalise_delay = finalise_delay
+    server.max_asset_size_bytes = max_asset_size_bytes
+    server.uploads = 0
+    server.uploaded_bytes = 0
+    server.assets = {}  # By asset ID, as issued and then finalised
+    server.upload_sizes = {}  # By asset ID, the (min, max) file size its upload may have
+    server.listeners = []  # Called with (field, data) for each resolved operation
+    host, port = server.server_address
+    server.upload_url = f"http://{host}:{port}{UPLOAD_PATH}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://{host}:{port}/graphql", server
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    token_lifetime = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_TOKEN_LIFETIME_SECONDS
+    finalise_delay = float(sys.argv[4]) / 1000 if len(sys.argv) > 4 else DEFAULT_FINALISE_DELAY_SECONDS
+    max_asset_size_bytes = int(sys.argv[5]) if len(sys.argv) > 5 else MAX_ASSET_SIZE_BYTES
+    url, server = start_mock_server(port, latency, token_lifetime, finalise_delay, max_asset_size_bytes)
+    print(f"Mock GraphQL API at {url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
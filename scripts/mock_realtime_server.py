@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for AppSync's real-time endpoint, for running the
+subscription scripts offline.
+
+Speaks the graphql-ws protocol over WebSockets and fans out each mutation
+the mock GraphQL API resolves to the subscriptions on it, following the
+schema's @aws_subscribe mutations and filtering on gameId. Like AppSync, a
+subscriber gets nothing it didn't subscribe to, but unlike AppSync it gets
+the mutation's whole result rather than the selected fields.
+
+Usage: python3 mock_realtime_server.py [graphql_port] [realtime_port] [delivery_latency_ms]
+"""
+
+import asyncio
+import base64
+import json
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from appsync_realtime import OPCODE_CLOSE, OPCODE_TEXT, SUBPROTOCOL, accept_key, encode_frame, read_message
+from graphql_client import Document
+from mock_graphql_server import start_mock_server
+
+# @aws_subscribe mutations in graphql/schema.graphql
+SUBSCRIPTIONS = {
+    'updatedSection': ('createSection', 'updateSection', 'deleteSection'),
+    'diceRolled': ('rollDice',),
+    'updatedAsset': ('_expireAsset', '_finaliseAsset', '_promoteAsset', 'deleteAsset'),
+}
+CONNECTION_TIMEOUT_MS = 300000
+
+
+class MockRealtimeServer:
+    """graphql-ws over WebSockets on its own event loop thread"""
+
+    def __init__(self, delivery_latency: float = 0.0):
+        self.delivery_latency = delivery_latency
+        self.loop = asyncio.new_event_loop()
+        self.subscriptions = {}  # (writer, id) -> (subscription field, variables)
+        self.connections = 0
+        self.delivered = 0
+        self._server = None
+        self.url = None
+
+    def start(self, port: int = 0):
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, '127.0.0.1', port))
+            host, bound_port = self._server.sockets[0].getsockname()[:2]
+            self.url = f"ws://{host}:{bound_port}/graphql/realtime"
+            ready.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+
+    def publish(self, mutation: str, data: dict):
+        """Called from the mock API's threads with each resolved mutation"""
+        self.loop.call_soon_threadsafe(self._fan_out, mutation, data)
+
+    def _fan_out(self, mutation: str, data: dict):
+        for (writer, subscription_id), (field, variables) in list(self.subscriptions.items()):
+            if mutation not in SUBSCRIPTIONS.get(field, ()):
+                continue
+            if variables.get('gameId') and variables['gameId'] != data.get('gameId'):
+                continue
+            message = json.dumps({'id': subscription_id, 'type': 'data', 'payload': {'data': {field: data}}})
+            if self.delivery_latency:
+                self.loop.call_later(self.delivery_latency, self._deliver, writer, message)
+            else:
+                self._deliver(writer, message)
+
+    def _deliver(self, writer, message: str):
+        if writer.is_closing():
+            return
+        writer.write(encode_frame(OPCODE_TEXT, message.encode('utf-8'), masked=False))
+        self.delivered += 1
+
+    def _send(self, writer, message: dict):
+        writer.write(encode_frame(OPCODE_TEXT, json.dumps(message).encode('utf-8'), masked=False))
+
+    async def _upgrade(self, reader, writer) -> bool:
+        request_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        query = parse_qs(urlparse(request_line.split()[1].decode('latin-1')).query) if request_line else {}
+        authorized = False
+        try:
+            header = json.loads(base64.b64decode(query.get('header', [''])[0]))
+            authorized = bool(header.get('Authorization'))
+        except (ValueError, TypeError):
+            pass
+        if headers.get('upgrade', '').lower() != 'websocket' or 'sec-websocket-key' not in headers or not authorized:
+            writer.write(b"HTTP/1.1 401 Unauthorized\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return False
+
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept_key(headers['sec-websocket-key'])}\r\n"
+                      f"Sec-WebSocket-Protocol: {SUBPROTOCOL}\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+        return True
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            if not await self._upgrade(reader, writer):
+                return
+            while True:
+                text = await read_message(reader, writer, masked=False)
+                if text is None:
+                    writer.write(encode_frame(OPCODE_CLOSE, b'', masked=False))
+                    return
+                message = json.loads(text)
+                kind = message.get('type')
+                if kind == 'connection_init':
+                    self._send(writer, {'type': 'connection_ack',
+                                        'payload': {'connectionTimeoutMs': CONNECTION_TIMEOUT_MS}})
+                elif kind == 'start':
+                    self._start(writer, message)
+                elif kind == 'stop':
+                    self.subscriptions.pop((writer, message.get('id')), None)
+                    self._send(writer, {'type': 'complete', 'id': message.get('id')})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for key in [key for key in self.subscriptions if key[0] is writer]:
+                del self.subscriptions[key]
+            writer.close()
+
+    def _start(self, writer, message: dict):
+        subscription_id = message.get('id')
+        payload = message.get('payload') or {}
+        request = json.loads(payload.get('data') or '{}')
+        try:
+            field = Document(request.get('query', '')).field
+        except (ValueError, IndexError):
+            field = None
+        authorization = (payload.get('extensions') or {}).get('authorization') or {}
+        if not authorization.get('Authorization'):
+            error = {'errorType': 'UnauthorizedException', 'message': 'Permission denied'}
+        elif field not in SUBSCRIPTIONS:
+            error = {'errorType': 'UnsupportedOperation', 'message': f"Unsupported subscription {field}"}
+        else:
+            self.subscriptions[(writer, subscription_id)] = (field, request.get('variables') or {})
+            self._send(writer, {'type': 'start_ack', 'id': subscription_id})
+            return
+        self._send(writer, {'type': 'error', 'id': subscription_id, 'payload': {'errors': [error]}})
+
+    def stop(self):
+        def shutdown():
+            self._server.close()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(shutdown)
+
+
+def start_mock_realtime_server(graphql_server, port: int = 0, delivery_latency: float = 0.0):
+    """Serve subscriptions fed by a mock GraphQL server's mutations, returning (url, server)"""
+    server = MockRealtimeServer(delivery_latency)
+    server.start(port)
+    graphql_server.listeners.append(server.publish)
+    return server.url, server
+
+
+def main():
+    graphql_port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    realtime_port = int(sys.argv[2]) if len(sys.argv) > 2 else 8081
+    delivery_latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0
+    graphql_url, graphql_server = start_mock_server(graphql_port)
+    realtime_url, realtime_server = start_mock_realtime_server(graphql_server, realtime_port, delivery_latency)
+    print(f"Mock GraphQL API at {graphql_url}")
+    print(f"Mock real-time endpoint at {realtime_url} (set REALTIME_URL to use it)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        realtime_server.stop()
+        graphql_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
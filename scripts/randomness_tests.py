@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Statistical tests of dice rolls against a fair die.
+
+Distribution tests (chi-square, Kolmogorov-Smirnov) read per-face count
+arrays. Sequence tests (runs, lag-1 serial correlation, gap) read the rolls
+in the order they were made. p-values are exact for chi-square, through the
+regularised incomplete gamma function, and asymptotic for the others.
+
+NumPy is used when it is installed, so a million-roll dataset is analysed in
+milliseconds; otherwise the same tests run in pure Python.
+
+Faces follow rollDice: a d100 under deltaGreen reads 0-99, and every other
+die reads 1 to its size, so any size the API accepts can be tested.
+
+Usage: python3 randomness_tests.py <file of rolls> <die size> [rollType]
+"""
+
+import math
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Die sizes offered by the UI; rollDice itself accepts any positive size
+DIE_SIZES = (4, 6, 8, 10, 12, 20, 100)
+ROLL_TYPE_DELTA_GREEN = 'deltaGreen'
+SIGNIFICANCE = 0.05
+STRONG_SIGNIFICANCE = 0.01
+GAMMA_EPSILON = 1e-14
+GAMMA_MAX_ITERATIONS = 1000
+GAP_MIN_EXPECTED = 5  # Smallest expected count for the gap test's tail bucket
+
+
+@dataclass
+class TestResult:
+    name: str
+    statistic: float
+    p_value: float
+    detail: str = ''
+
+    @property
+    def assessment(self) -> str:
+        if self.p_value > SIGNIFICANCE:
+            return "GOOD"
+        if self.p_value > STRONG_SIGNIFICANCE:
+            return "FAIR"
+        return "POOR"
+
+
+def face_range(size: int, roll_type: Optional[str] = None) -> Tuple[int, int]:
+    """Lowest and highest unmodified value of a die, as rollDice rolls it"""
+    if size < 1:
+        raise ValueError(f"Invalid die size {size}")
+    if roll_type == ROLL_TYPE_DELTA_GREEN and size == 100:
+        return 0, 99
+    return 1, size
+
+
+def count_faces(values: Sequence[int], min_value: int, max_value: int):
+    """Per-face counts, ignoring values outside the die's range"""
+    if np is not None:
+        values = np.asarray(values, dtype=np.int64)
+        values = values[(values >= min_value) & (values <= max_value)]
+        return np.bincount(values - min_value, minlength=max_value - min_value + 1)
+    counts = [0] * (max_value - min_value + 1)
+    for value in values:
+        if min_value <= value <= max_value:
+            counts[value - min_value] += 1
+    return counts
+
+
+def _gamma_series(a: float, x: float) -> float:
+    """Regularised lower incomplete gamma P(a, x) by its series, for x < a + 1"""
+    term = total = 1.0 / a
+    denominator = a
+    for _ in range(GAMMA_MAX_ITERATIONS):
+        denominator += 1
+        term *= x / denominator
+        total += term
+        if abs(term) < abs(total) * GAMMA_EPSILON:
+            break
+    return total * math.exp(-x + a * math.log(x) - math.lgamma(a))
+
+
+def _gamma_continued_fraction(a: float, x: float) -> float:
+    """Regularised upper incomplete gamma Q(a, x) by Lentz's continued fraction, for x >= a + 1"""
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, GAMMA_MAX_ITERATIONS + 1):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < GAMMA_EPSILON:
+            break
+    return h * math.exp(-x + a * math.log(x) - math.lgamma(a))
+
+
+def regularized_gamma_q(a: float, x: float) -> float:
+    """Q(a, x) = 1 - P(a, x), the upper regularised incomplete gamma function"""
+    if a <= 0:
+        raise ValueError("a must be positive")
+    if x <= 0:
+        return 1.0
+    if x < a + 1:
+        return max(0.0, 1.0 - _gamma_series(a, x))
+    return _gamma_continued_fraction(a, x)
+
+
+def chi_square_p_value(statistic: float, degrees_of_freedom: int) -> float:
+    """Probability of a chi-square statistic at least this large by chance"""
+    return regularized_gamma_q(degrees_of_freedom / 2, statistic / 2)
+
+
+def _normal_p_value(z: float) -> float:
+    """Two-sided p-value of a standard normal z-score"""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def chi_square_test(counts) -> TestResult:
+    """Goodness of fit of per-face counts to a uniform distribution"""
+    faces = len(counts)
+    if np is not None:
+        counts = np.asarray(counts, dtype=np.float64)
+        n = counts.sum()
+        expected = n / faces
+        statistic = float(((counts - expected) ** 2).sum() / expected) if n else 0.0
+    else:
+        n = sum(counts)
+        expected = n / faces
+        statistic = sum((count - expected) ** 2 for count in counts) / expected if n else 0.0
+    if not n or faces < 2:
+        return TestResult('Chi-square', 0.0, 1.0, "Not enough data")
+    return TestResult('Chi-square', statistic, chi_square_p_value(statistic, faces - 1),
+                      f"df = {faces - 1}")
+
+
+def _kolmogorov_p_value(statistic: float, n: int) -> float:
+    """Asymptotic Kolmogorov distribution, with Stephens' small-sample correction"""
+    root_n = math.sqrt(n)
+    lam = (root_n + 0.12 + 0.11 / root_n) * statistic
+    if lam < 0.2:
+        return 1.0
+    total = 0.0
+    for k in range(1, 101):
+        term = 2 * (-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam)
+        total += term
+        if abs(term) < 1e-10:
+            break
+    return min(max(total, 0.0), 1.0)
+
+
+def ks_test(counts) -> TestResult:
+    """
+    Kolmogorov-Smirnov distance between the rolls' and a fair die's CDFs
+
+    The p-value is the continuous distribution's, which is conservative for
+    a die: a real bias shows up, but p-values run a little high.
+    """
+    faces = len(counts)
+    if np is not None:
+        counts = np.asarray(counts, dtype=np.float64)
+        n = int(counts.sum())
+        if n:
+            observed = np.cumsum(counts) / n
+            expected = np.arange(1, faces + 1) / faces
+            statistic = float(np.abs(observed - expected).max())
+    else:
+        n = sum(counts)
+        statistic = 0.0
+        running = 0
+        for face, count in enumerate(counts, 1):
+            running += count
+            statistic = max(statistic, abs(running / n - face / faces)) if n else 0.0
+    if not n:
+        return TestResult('Kolmogorov-Smirnov', 0.0, 1.0, "Not enough data")
+    return TestResult('Kolmogorov-Smirnov', statistic, _kolmogorov_p_value(statistic, n))
+
+
+def runs_test(values: Sequence[int], min_value: int, max_value: int) -> TestResult:
+    """Wald-Wolfowitz runs above and below the die's midpoint; rolls on the midpoint are skipped"""
+    midpoint = (min_value + max_value) / 2
+    if np is not None:
+        values = np.asarray(values, dtype=np.float64)
+        above = values[values != midpoint] > midpoint
+        n = len(above)
+        n_above = int(above.sum())
+        runs = int(np.count_nonzero(above[1:] != above[:-1])) + 1 if n else 0
+    else:
+        above = [value > midpoint for value in values if value != midpoint]
+        n = len(above)
+        n_above = sum(above)
+        runs = sum(1 for previous, current in zip(above, above[1:]) if previous != current) + 1 if n else 0
+    n_below = n - n_above
+    if not n_above or not n_below or n < 3:
+        return TestResult('Runs', 0.0, 1.0, "Not enough data")
+    expected = 2 * n_above * n_below / n + 1
+    variance = 2 * n_above * n_below * (2 * n_above * n_below - n) / (n * n * (n - 1))
+    z = (runs - expected) / math.sqrt(variance)
+    return TestResult('Runs', z, _normal_p_value(z), f"{runs} runs, {expected:.1f} expected")
+
+
+def serial_correlation_test(values: Sequence[int]) -> TestResult:
+    """Lag-1 autocorrelation, which is about N(-1/n, 1/n) for independent rolls"""
+    n = len(values)
+    if n < 3:
+        return TestResult('Serial correlation', 0.0, 1.0, "Not enough data")
+    if np is not None:
+        values = np.asarray(values, dtype=np.float64)
+        deviations = values - values.mean()
+        denominator = float(np.dot(deviations, deviations))
+        numerator = float(np.dot(deviations[:-1], deviations[1:]))
+    else:
+        mean = sum(values) / n
+        deviations = [value - mean for value in values]
+        denominator = sum(d * d for d in deviations)
+        numerator = sum(a * b for a, b in zip(deviations, deviations[1:]))
+    if not denominator:
+        return TestResult('Serial correlation', 1.0, 0.0, "Every roll was the same")
+    r = numerator / denominator
+    z = (r + 1 / n) * math.sqrt(n)
+    return TestResult('Serial correlation', r, _normal_p_value(z))
+
+
+def gap_test(values: Sequence[int], min_value: int, max_value: int) -> TestResult:
+    """
+    Knuth's gap test: lengths of the gaps between rolls in the lower half of the die
+
+    Gaps of 0 to t-1 non-hits get their own buckets and longer ones share a
+    tail bucket, with t chosen so every bucket expects GAP_MIN_EXPECTED gaps.
+    """
+    faces = max_value - min_value + 1
+    hit_faces = faces // 2
+    if hit_faces < 1:
+        return TestResult('Gap', 0.0, 1.0, "Die too small")
+    upper = min_value + hit_faces  # Hits are min_value <= value < upper
+    p = hit_faces / faces
+
+    if np is not None:
+        values = np.asarray(values, dtype=np.int64)
+        hits = np.flatnonzero((values >= min_value) & (values < upper))
+        gaps = np.diff(hits) - 1
+    else:
+        hits = [i for i, value in enumerate(values) if min_value <= value < upper]
+        gaps = [b - a - 1 for a, b in zip(hits, hits[1:])]
+    total = len(gaps)
+
+    # Longest t with every bucket, including the tail, expecting enough gaps
+    t = 0
+    while total * p * (1 - p) ** t >= GAP_MIN_EXPECTED and total * (1 - p) ** (t + 1) >= GAP_MIN_EXPECTED:
+        t += 1
+    if t < 1:
+        return TestResult('Gap', 0.0, 1.0, "Not enough data")
+
+    if np is not None:
+        observed = np.bincount(np.minimum(gaps, t), minlength=t + 1).tolist()
+    else:
+        observed = [0] * (t + 1)
+        for gap in gaps:
+            observed[min(gap, t)] += 1
+    expected = [total * p * (1 - p) ** r for r in range(t)] + [total * (1 - p) ** t]
+    statistic = sum((o - e) ** 2 / e for o, e in zip(observed, expected))
+    return TestResult('Gap', statistic, chi_square_p_value(statistic, t), f"{total} gaps, df = {t}")
+
+
+def run_all(values: Sequence[int], min_value: int, max_value: int, counts=None) -> List[TestResult]:
+    """Every test, over the rolls in order; counts are taken from them if not given"""
+    if counts is None:
+        counts = count_faces(values, min_value, max_value)
+    return [
+        chi_square_test(counts),
+        ks_test(counts),
+        runs_test(values, min_value, max_value),
+        serial_correlation_test(values),
+        gap_test(values, min_value, max_value),
+    ]
+
+
+def print_results(results: List[TestResult]):
+    for result in results:
+        detail = f" ({result.detail})" if result.detail else ''
+        print(f"  {result.name}: statistic = {result.statistic:.4f}, p = {result.p_value:.4f}{detail}"
+              f" - {result.assessment}")
+
+
+def _read_values(path: str) -> List[int]:
+    with open(path, encoding='utf-8') as f:
+        return [int(token) for token in f.read().split()]
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python3 randomness_tests.py <file of rolls> <die size> [rollType]")
+        sys.exit(1)
+
+    size = int(sys.argv[2])
+    roll_type = sys.argv[3] if len(sys.argv) > 3 else None
+    min_value, max_value = face_range(size, roll_type)
+    values = _read_values(sys.argv[1])
+    if np is not None:
+        values = np.asarray(values, dtype=np.int64)
+
+    print(f"{len(values)} rolls of d{size} ({min_value}-{max_value}), "
+          f"{'NumPy' if np is not None else 'pure Python'}:")
+    results = run_all(values, min_value, max_value)
+    print_results(results)
+    if any(result.assessment == "POOR" for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Multi-user, multi-game load test against the GraphQL API.
+
+Signs in every user in the scenario, then sends a weighted mix of rollDice,
+updateSection, getGame and requestAssetUpload at a constant rate, each from
+a random user against one of that user's games, over one pool of keep-alive
+connections. Reports throughput, errors and latency percentiles for each
+operation.
+
+Tokens are cached (in TOKEN_CACHE, if set, between runs) and refreshed
+before they expire; a request rejected with 401 renews its user's token and
+is retried once by the shared GraphQLClient.
+
+The scenario file is JSON:
+
+    {
+      "users": [{"username": "...", "password": "...",
+                 "games": [{"gameId": "...", "sectionId": "..."}]}],
+      "mix": {"rollDice": 50, "getGame": 30, "updateSection": 15, "requestAssetUpload": 5},
+      "rate": 50, "durationSeconds": 60, "concurrency": 20
+    }
+
+A user's password defaults to COGNITO_PASSWORD, and each section must be
+one the user can update. requestAssetUpload leaves PENDING assets behind,
+which the expiry sweep removes. It declares UPLOAD_SIZE_BYTES (or the
+scenario's "uploadSizeBytes"), default 0 so it is within the deployment's
+MAX_ASSET_SIZE_BYTES; larger sizes are refused with FileTooLarge.
+
+Set MOCK_GRAPHQL=1 to run against a local mock API and Cognito instead, with
+USERS users (default 20) spread over GAMES games (default 5). The mock
+refuses uploads over MOCK_MAX_ASSET_SIZE_BYTES (default the deployed limit).
+
+Usage: python3 scenario_load_test.py [scenario.json]
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from cognito_auth import AuthError, CognitoSession, TokenCache, create_cognito_transport
+from graphql_client import Document, GraphQLClient, GraphQLError, validate_url
+from latency_histogram import LatencyHistogram, export_report, format_summary
+from load_generator import TransportError, create_transport, run_load
+
+DEFAULT_MIX = {'rollDice': 50, 'getGame': 30, 'updateSection': 15, 'requestAssetUpload': 5}
+DEFAULT_RATE = 20
+DEFAULT_DURATION_SECONDS = 30
+DEFAULT_CONCURRENCY = 20
+MOCK_USERS = 20
+MOCK_GAMES = 5
+MOCK_GAMES_PER_USER = 2
+SIGN_IN_CONCURRENCY = 5  # Cognito rate-limits InitiateAuth
+DEFAULT_UPLOAD_SIZE_BYTES = 0  # Allowed whatever MAX_ASSET_SIZE_BYTES is set to
+
+ROLL_DICE = Document("""
+mutation rollDice($input: RollDiceInput!) {
+  rollDice(input: $input) { gameId value grade }
+}
+""")
+
+UPDATE_SECTION = Document("""
+mutation updateSection($input: UpdateSectionInput!) {
+  updateSection(input: $input) { gameId sectionId updatedAt }
+}
+""")
+
+GET_GAME = Document("""
+query getGame($input: GetGameInput!) {
+  getGame(input: $input) {
+    gameId
+    gameName
+    playerSheets { userId characterName sections { sectionId sectionName content } }
+  }
+}
+""")
+
+REQUEST_ASSET_UPLOAD = Document("""
+mutation requestAssetUpload($input: RequestAssetUploadInput!) {
+  requestAssetUpload(input: $input) { uploadUrl asset { assetId status } }
+}
+""")
+
+
+def roll_dice(game):
+    return ROLL_DICE, {'input': {'gameId': game['gameId'], 'dice': [{'type': 'd100', 'size': 100}],
+                                 'rollType': 'deltaGreen', 'target': 50}}
+
+
+def update_section(game):
+    content = json.dumps({'items': [{'name': 'Load test', 'description': str(time.time())}]})
+    return UPDATE_SECTION, {'input': {'gameId': game['gameId'], 'sectionId': game['sectionId'], 'content': content}}
+
+
+def get_game(game):
+    return GET_GAME, {'input': {'gameId': game['gameId'], 'language': 'en'}}
+
+
+def request_asset_upload(game, size_bytes=DEFAULT_UPLOAD_SIZE_BYTES):
+    return REQUEST_ASSET_UPLOAD, {'input': {'gameId': game['gameId'], 'sectionId': game['sectionId'],
+                                            'mimeType': 'image/png', 'sizeBytes': size_bytes,
+                                            'label': 'Load test'}}
+
+
+OPERATIONS = {
+    'rollDice': roll_dice,
+    'updateSection': update_section,
+    'getGame': get_game,
+    'requestAssetUpload': request_asset_upload,
+}
+
+
+@dataclass
+class User:
+    session: CognitoSession
+    games: List[dict]
+
+
+@dataclass
+class OperationStats:
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: int = 0
+    error_messages: Dict[str, int] = field(default_factory=dict)
+
+
+def mock_scenario(users: int, games: int) -> dict:
+    """Users spread over games, each with a section of their own in each game"""
+    return {'users': [{
+        'username': f"loadtest-{n}",
+        'password': 'mock-password',
+        'games': [{'gameId': f"game-{(n + offset) % games}", 'sectionId': f"section-{n}-{(n + offset) % games}"}
+                  for offset in range(min(MOCK_GAMES_PER_USER, games))],
+    } for n in range(users)]}
+
+
+async def sign_in_all(users: List[User]) -> float:
+    """Sign every user in (or load their cached tokens), returning the seconds taken"""
+    started = time.perf_counter()
+    slots = asyncio.Semaphore(SIGN_IN_CONCURRENCY)
+
+    async def sign_in(user):
+        async with slots:
+            await user.session.token()
+
+    await asyncio.gather(*(sign_in(user) for user in users))
+    return time.perf_counter() - started
+
+
+def summarise(samples) -> Dict[str, OperationStats]:
+    stats: Dict[str, OperationStats] = {name: OperationStats() for name in OPERATIONS}
+    for sample in samples:
+        name, error = sample.result
+        operation = stats[name]
+        operation.histogram.record(sample.latency)
+        if error:
+            operation.errors += 1
+            operation.error_messages[error] = operation.error_messages.get(error, 0) + 1
+    return stats
+
+
+def report_rows(stats: Dict[str, OperationStats], elapsed: float) -> List[dict]:
+    return [{
+        'operation': name,
+        'errors': operation.errors,
+        'error_rate': round(operation.errors / operation.histogram.count, 4),
+        'throughput': round(operation.histogram.count / elapsed, 1),
+        **operation.histogram.summary(),
+    } for name, operation in stats.items() if operation.histogram.count]
+
+
+def print_report(stats: Dict[str, OperationStats], elapsed: float, overall: LatencyHistogram):
+    print(f"\n{'OPERATION':<20} {'REQUESTS':>8} {'ERRORS':>7} {'REQ/S':>7}  LATENCY (ms)")
+    for name, operation in stats.items():
+        if not operation.histogram.count:
+            continue
+        print(f"{name:<20} {operation.histogram.count:>8} {operation.errors:>7} "
+              f"{operation.histogram.count / elapsed:>7.1f}  {format_summary(operation.histogram)}")
+    errors = sum(operation.errors for operation in stats.values())
+    print(f"{'all':<20} {overall.count:>8} {errors:>7} {overall.count / elapsed:>7.1f}  {format_summary(overall)}")
+
+    for name, operation in stats.items():
+        for message, count in sorted(operation.error_messages.items(), key=lambda item: -item[1])[:3]:
+            print(f"  {name}: {count} x {message}")
+
+
+async def run_scenario(scenario: dict, graphql_url: str, client_id: str, region: str,
+                       token_cache: TokenCache) -> bool:
+    mix = scenario.get('mix') or DEFAULT_MIX
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    rate = float(os.getenv('SCENARIO_RATE') or scenario.get('rate') or DEFAULT_RATE)
+    duration = float(os.getenv('SCENARIO_DURATION') or scenario.get('durationSeconds') or DEFAULT_DURATION_SECONDS)
+    concurrency = int(os.getenv('SCENARIO_CONCURRENCY') or scenario.get('concurrency') or DEFAULT_CONCURRENCY)
+    upload_size = int(os.getenv('UPLOAD_SIZE_BYTES') or scenario.get('uploadSizeBytes') or DEFAULT_UPLOAD_SIZE_BYTES)
+    operations = dict(OPERATIONS, requestAssetUpload=lambda game: request_asset_upload(game, upload_size))
+
+    auth_transport = create_cognito_transport(region, SIGN_IN_CONCURRENCY)
+    client = GraphQLClient(create_transport(graphql_url, concurrency))
+    default_password = os.getenv('COGNITO_PASSWORD')
+    users = [User(CognitoSession(auth_transport, user['username'], user.get('password') or default_password,
+                                 client_id, token_cache), user['games'])
+             for user in scenario['users'] if user.get('games')]
+    if not users:
+        raise ValueError("The scenario has no users with games")
+
+    try:
+        games = {game['gameId'] for user in users for game in user.games}
+        print(f"Signing in {len(users)} users ({len(games)} games)...")
+        try:
+            seconds = await sign_in_all(users)
+        except AuthError as e:
+            print(f"Sign-in failed: {str(e)}")
+            return False
+        sign_ins = sum(user.session.sign_ins for user in users)
+        print(f"✓ {sign_ins} signed in, {len(users) - sign_ins} from the token cache, in {seconds:.2f}s")
+        token_cache.save()
+
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        count = max(1, int(rate * duration))
+        print(f"Sending {count} requests at {rate:g}/s over {concurrency} connections via {client.transport.name}: "
+              + ", ".join(f"{name} {weight}" for name, weight in mix.items()))
+
+        async def operation():
+            user = random.choice(users)
+            name = random.choices(names, weights)[0]
+            query, variables = operations[name](random.choice(user.games))
+            try:
+                await client.execute(query, variables, auth=user.session)
+                return name, None
+            except (GraphQLError, TransportError, AuthError) as e:
+                return name, str(e)
+
+        run = await run_load(operation, count, concurrency, rate)
+    finally:
+        await client.close()
+        await auth_transport.close()
+        token_cache.save()
+
+    stats = summarise(run.samples)
+    overall = LatencyHistogram()
+    for operation in stats.values():
+        overall.merge(operation.histogram)
+    print_report(stats, run.elapsed, overall)
+    refreshes = sum(user.session.refreshes for user in users)
+    print(f"\nTokens: {sum(user.session.sign_ins for user in users)} sign-ins, {refreshes} refreshes")
+    if run.elapsed > duration * 1.2:
+        print(f"⚠ The run took {run.elapsed:.1f}s rather than {duration:g}s: "
+              f"the API or the {concurrency} connections couldn't keep up with {rate:g}/s")
+
+    report_path = os.getenv('LATENCY_REPORT')
+    if report_path:
+        errors = sum(operation.errors for operation in stats.values())
+        export_report(report_path, report_rows(stats, run.elapsed), overall, totals={
+            'errors': errors,
+            'error_rate': round(errors / overall.count, 4) if overall.count else 0.0,
+            'throughput': round(overall.count / run.elapsed, 1),
+        }, metadata={
+            'graphql_url': graphql_url,
+            'users': len(users),
+            'games': len(games),
+            'mix': mix,
+            'rate': rate,
+            'concurrency': concurrency,
+        }, label='operation')
+        print(f"Latency report written to {report_path}")
+
+    return not any(operation.errors for operation in stats.values())
+
+
+def _load_scenario(path: Optional[str]) -> Optional[dict]:
+    if not path:
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    scenario = _load_scenario(sys.argv[1] if len(sys.argv) > 1 else None)
+    token_cache = TokenCache(os.getenv('TOKEN_CACHE'))
+
+    if os.getenv('MOCK_GRAPHQL'):
+        from mock_graphql_server import MAX_ASSET_SIZE_BYTES, start_mock_server
+        token_lifetime = int(os.getenv('MOCK_TOKEN_LIFETIME') or 3600)
+        max_asset_size = int(os.getenv('MOCK_MAX_ASSET_SIZE_BYTES') or MAX_ASSET_SIZE_BYTES)
+        graphql_url, server = start_mock_server(token_lifetime=token_lifetime, max_asset_size_bytes=max_asset_size)
+        os.environ['COGNITO_ENDPOINT'] = graphql_url
+        client_id, region = 'mock-client', 'mock'
+        scenario = scenario or mock_scenario(int(os.getenv('USERS') or MOCK_USERS),
+                                             int(os.getenv('GAMES') or MOCK_GAMES))
+        print(f"Using mock GraphQL API and Cognito at {graphql_url}")
+    else:
+        graphql_url = os.getenv('GRAPHQL_URL')
+        client_id = os.getenv('COGNITO_CLIENT_ID')
+        region = os.getenv('AWS_REGION')
+        if not all([graphql_url, client_id, region, scenario]):
+            print("Error: Missing required configuration")
+            print("Required: GRAPHQL_URL, COGNITO_CLIENT_ID, AWS_REGION and a scenario file")
+            print("Or set MOCK_GRAPHQL=1 to use a local mock API")
+            sys.exit(1)
+
+    validate_url(graphql_url)
+    try:
+        ok = asyncio.run(run_scenario(scenario, graphql_url, client_id, region, token_cache))
+    except KeyboardInterrupt:
+        sys.exit(1)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
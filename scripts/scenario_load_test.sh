@@ -0,0 +1,73 @@
+#!/bin/bash
+set -e
+
+# Usage: ./scripts/scenario_load_test.sh scenario.json
+#    or: MOCK_GRAPHQL=1 ./scripts/scenario_load_test.sh
+
+# LATENCY_REPORT=path.json (or .csv) exports per-operation latency when the run ends
+REPORT_ARGS=()
+if [ -n "$LATENCY_REPORT" ]; then
+    REPORT_DIR=$(cd "$(dirname "$LATENCY_REPORT")" && pwd)
+    REPORT_ARGS=(-v "$REPORT_DIR:/reports" -e LATENCY_REPORT="/reports/$(basename "$LATENCY_REPORT")")
+fi
+
+# Load settings shared by mock and real runs
+LOAD_ARGS=(
+    -e SCENARIO_RATE="$SCENARIO_RATE"
+    -e SCENARIO_DURATION="$SCENARIO_DURATION"
+    -e SCENARIO_CONCURRENCY="$SCENARIO_CONCURRENCY"
+    -e UPLOAD_SIZE_BYTES="$UPLOAD_SIZE_BYTES"
+)
+
+# MOCK_GRAPHQL=1 runs against a local mock API and Cognito, with no deployment or credentials needed
+if [ -n "$MOCK_GRAPHQL" ]; then
+    echo "Running scenario load test against the mock API in Docker container..."
+    docker run --rm \
+        -v "$(pwd)/scripts:/scripts" \
+        -e MOCK_GRAPHQL=1 \
+        -e USERS="$USERS" \
+        -e GAMES="$GAMES" \
+        -e MOCK_MAX_ASSET_SIZE_BYTES="$MOCK_MAX_ASSET_SIZE_BYTES" \
+        "${LOAD_ARGS[@]}" \
+        "${REPORT_ARGS[@]}" \
+        python:3.11-slim \
+        python -u /scripts/scenario_load_test.py
+    exit 0
+fi
+
+if [ -z "$1" ] || [ ! -f "$1" ]; then
+    echo "Error: a scenario file is required"
+    echo "Usage:"
+    echo "  COGNITO_PASSWORD='pass' ./scripts/scenario_load_test.sh scenario.json"
+    exit 1
+fi
+SCENARIO_DIR=$(cd "$(dirname "$1")" && pwd)
+SCENARIO_FILE=$(basename "$1")
+
+# Change to correct terraform directory and get outputs
+cd terraform/environment/wildsea-dev
+TERRAFORM_OUTPUT=$(AWS_PROFILE=wildsea terraform output -json)
+cd - > /dev/null
+
+# Parse terraform outputs using jq
+GRAPHQL_URL=$(echo "$TERRAFORM_OUTPUT" | jq -r '.graphql_uri.value')
+COGNITO_CLIENT_ID=$(echo "$TERRAFORM_OUTPUT" | jq -r '.cognito_web_client_id.value')
+AWS_REGION=$(echo "$TERRAFORM_OUTPUT" | jq -r '.region.value')
+
+echo "Running scenario load test in Docker container..."
+echo "GraphQL URL: $GRAPHQL_URL"
+echo "Scenario: $1"
+
+# Tokens are cached next to the scenario, so repeat runs don't sign every user in again
+docker run --rm \
+    -v "$(pwd)/scripts:/scripts" \
+    -v "$SCENARIO_DIR:/scenario" \
+    -e GRAPHQL_URL="$GRAPHQL_URL" \
+    -e COGNITO_CLIENT_ID="$COGNITO_CLIENT_ID" \
+    -e AWS_REGION="$AWS_REGION" \
+    -e COGNITO_PASSWORD="$COGNITO_PASSWORD" \
+    -e TOKEN_CACHE="/scenario/.${SCENARIO_FILE%.json}-tokens.json" \
+    "${LOAD_ARGS[@]}" \
+    "${REPORT_ARGS[@]}" \
+    python:3.11-slim \
+    sh -c "pip install --quiet 'httpx[http2]' && python -u /scripts/scenario_load_test.py \"/scenario/$SCENARIO_FILE\""
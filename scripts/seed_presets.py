@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Seed the weapons presets and character templates into the table.
+
+The catalogues are data files rather than one Terraform resource per item:
+the Delta Green weapons (deltagreen-weapons.json, one GAMEPRESETS# item per
+weapon per language) and the character templates (presets/templates.json,
+one TEMPLATE# item each). Items are built exactly as Terraform wrote them,
+so a table Terraform seeded needs no writes.
+
+Each catalogue partition is read with Query and compared with the
+catalogue, and only the differences are written: new and changed items are
+put, and items no longer in the catalogue are deleted. Writes go out as
+parallel BatchWriteItem calls of up to 25 requests, retrying unprocessed
+items with full-jitter exponential backoff.
+
+Template sections whose items are {"seed": "<name>"} are filled from the
+UI's ui/src/seed/<name>.<language>.json, as the Terraform templates were.
+If the weapons file doesn't exist, weapons presets are left as they are.
+
+Environment:
+  TABLE_NAME        Table to seed (required)
+  WEAPONS_FILE      Weapons catalogue (default deltagreen-weapons.json)
+  TEMPLATES_FILE    Templates catalogue (default presets/templates.json)
+  SEED_CONCURRENCY  BatchWriteItem calls in flight at once (default 8)
+  DRY_RUN           Set to report the changes without writing them
+  AWS_ENDPOINT_URL  A local stand-in, e.g. http://localhost:8000 for DynamoDB Local
+
+Usage: python3 seed_presets.py
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from dynamodb_batch import DEFAULT_CONCURRENCY, WriteStats, create_client, write_all
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_WEAPONS_FILE = os.path.join(ROOT, 'deltagreen-weapons.json')
+DEFAULT_TEMPLATES_FILE = os.path.join(ROOT, 'presets', 'templates.json')
+SEED_DIR = os.path.join(ROOT, 'ui', 'src', 'seed')
+DB_PREFIX_GAMEPRESETS = 'GAMEPRESETS'
+DB_PREFIX_TEMPLATE = 'TEMPLATE'
+WEAPONS_DATA_SET = 'deltagreen-weapons'
+
+# Terraform's jsonencode escapes these, like Go's encoding/json
+_JSON_ESCAPES = {'<': '\\u003c', '>': '\\u003e', '&': '\\u0026', '\u2028': '\\u2028', '\u2029': '\\u2029'}
+
+Item = Dict[str, dict]
+
+
+def terraform_jsonencode(value) -> str:
+    """JSON as Terraform's jsonencode writes it: sorted keys, no whitespace, HTML characters escaped"""
+    text = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    for character, escape in _JSON_ESCAPES.items():
+        text = text.replace(character, escape)
+    return text
+
+
+def weapon_languages(weapon: dict) -> List[str]:
+    return sorted(key[len('display_name_'):] for key in weapon if key.startswith('display_name_'))
+
+
+def weapon_items(weapons: Dict[str, dict]) -> List[Item]:
+    """A GAMEPRESETS# item for each weapon in each language it has a display name for"""
+    items = []
+    for key, weapon in weapons.items():
+        for language in weapon_languages(weapon):
+            data = {**weapon['weapon_data'],
+                    'description': weapon[f"description_{language}"],
+                    'skillId': weapon[f"skillId_{language}"]}
+            items.append({
+                'PK': {'S': f"{DB_PREFIX_GAMEPRESETS}#{WEAPONS_DATA_SET}#{language}"},
+                'SK': {'S': f"{DB_PREFIX_GAMEPRESETS}#{key}"},
+                'dataSetName': {'S': WEAPONS_DATA_SET},
+                'language': {'S': language},
+                'displayName': {'S': weapon[f"display_name_{language}"]},
+                'data': {'S': terraform_jsonencode(data)},
+                'type': {'S': DB_PREFIX_GAMEPRESETS},
+            })
+    return items
+
+
+def _stat_item(stat: dict) -> dict:
+    return {
+        'id': f"stat-{stat['abbreviation'].lower()}",
+        'name': stat['name'],
+        'description': '',
+        'score': 10,
+        'distinguishingFeatures': '',
+        'abbreviation': stat['abbreviation'],
+    }
+
+
+def _derived_item(derived: dict) -> dict:
+    return {
+        'id': f"{derived['attributeType'].lower()}-item",
+        'name': derived['name'],
+        'description': '',
+        'attributeType': derived['attributeType'],
+        'current': derived['defaultCurrent'],
+    }
+
+
+def _skill_item(skill: dict) -> dict:
+    return {
+        'id': f"skill-{skill['name'].lower().replace(' ', '-')}",
+        'name': skill['name'],
+        'description': skill.get('description', ''),
+        'roll': skill['roll'],
+        'used': False,
+        'hasUsedFlag': skill.get('hasUsedFlag', True),
+    }
+
+
+# Section items generated from the UI's seed data, by seed file name
+SEED_ITEMS = {
+    'deltaGreenStats': _stat_item,
+    'deltaGreenDerived': _derived_item,
+    'deltaGreenSkills': _skill_item,
+}
+
+
+def _seed_items(name: str, language: str, seed_dir: str) -> List[dict]:
+    if name not in SEED_ITEMS:
+        raise ValueError(f"Unknown seed '{name}'")
+    with open(os.path.join(seed_dir, f"{name}.{language}.json"), encoding='utf-8') as f:
+        return [SEED_ITEMS[name](entry) for entry in json.load(f)]
+
+
+def template_items(templates: List[dict], seed_dir: str = SEED_DIR) -> List[Item]:
+    """A TEMPLATE# item for each template, with its sections' content encoded as the UI reads it"""
+    items = []
+    for template in templates:
+        sections = []
+        for section in template['sections']:
+            content = dict(section['content'])
+            if isinstance(content.get('items'), dict):
+                content['items'] = _seed_items(content['items']['seed'], template['language'], seed_dir)
+            sections.append({**section, 'content': terraform_jsonencode(content)})
+        items.append({
+            'PK': {'S': f"{DB_PREFIX_TEMPLATE}#{template['gameType']}#{template['language']}"},
+            'SK': {'S': f"{DB_PREFIX_TEMPLATE}#{template['templateName']}"},
+            'templateName': {'S': template['templateName']},
+            'displayName': {'S': template['displayName']},
+            'gameType': {'S': template['gameType']},
+            'language': {'S': template['language']},
+            'type': {'S': DB_PREFIX_TEMPLATE},
+            'sections': {'S': terraform_jsonencode(sections)},
+        })
+    return items
+
+
+@dataclass
+class SeedStats(WriteStats):
+    """Counts for one seeding run"""
+    partitions: int = 0
+    existing: int = 0
+    unchanged: int = 0
+    read_seconds: float = 0.0
+
+
+def read_partition(dynamodb, table_name: str, pk: str) -> Dict[str, Item]:
+    """Every item in a partition, by sort key"""
+    items = {}
+    params = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'PK = :pk',
+        'ExpressionAttributeValues': {':pk': {'S': pk}},
+    }
+    while True:
+        response = dynamodb.query(**params)
+        for item in response.get('Items', []):
+            items[item['SK']['S']] = item
+        if 'LastEvaluatedKey' not in response:
+            return items
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def diff_items(desired: Iterable[Item], existing: Dict[str, Dict[str, Item]],
+               stats: SeedStats) -> List[dict]:
+    """The write requests that make each partition match the catalogue"""
+    requests = []
+    wanted = {}
+    for item in desired:
+        wanted.setdefault(item['PK']['S'], {})[item['SK']['S']] = item
+    for pk, items in wanted.items():
+        current = existing.get(pk, {})
+        for sk, item in items.items():
+            if current.get(sk) == item:
+                stats.unchanged += 1
+            else:
+                requests.append({'PutRequest': {'Item': item}})
+        for sk in current.keys() - items.keys():
+            requests.append({'DeleteRequest': {'Key': {'PK': {'S': pk}, 'SK': {'S': sk}}}})
+    return requests
+
+
+def seed(dynamodb, table_name: str, items: List[Item], concurrency: int = DEFAULT_CONCURRENCY,
+         dry_run: bool = False) -> Tuple[SeedStats, List[dict]]:
+    """Bring the catalogue partitions in line with items, returning the stats and the requests made"""
+    stats = SeedStats()
+    partitions = sorted({item['PK']['S'] for item in items})
+    stats.partitions = len(partitions)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.monotonic()
+        existing = dict(zip(partitions, executor.map(
+            lambda pk: read_partition(dynamodb, table_name, pk), partitions)))
+        stats.read_seconds = time.monotonic() - started
+        stats.existing = sum(len(current) for current in existing.values())
+
+        requests = diff_items(items, existing, stats)
+        if dry_run:
+            return stats, requests
+
+        write_all(dynamodb, table_name, requests, executor, stats)
+    return stats, requests
+
+
+def load_catalogue(weapons_file: str, templates_file: str, seed_dir: str = SEED_DIR) -> List[Item]:
+    items = template_items(_load_json(templates_file), seed_dir)
+    if os.path.exists(weapons_file):
+        items += weapon_items(_load_json(weapons_file))
+    else:
+        print(f"No weapons file at {weapons_file}; leaving weapons presets as they are")
+    return items
+
+
+def _load_json(path: str):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_stats(stats: SeedStats, requests: List[dict], dry_run: bool):
+    puts = sum(1 for request in requests if 'PutRequest' in request)
+    deletes = len(requests) - puts
+    print(f"Read {stats.existing} existing items from {stats.partitions} partitions in {stats.read_seconds:.2f}s")
+    print(f"{stats.unchanged} unchanged, {puts} to put, {deletes} to delete")
+    for request in requests:
+        item = request['PutRequest']['Item'] if 'PutRequest' in request else request['DeleteRequest']['Key']
+        print(f"  {'put' if 'PutRequest' in request else 'delete'} {item['PK']['S']} {item['SK']['S']}")
+    if dry_run or not requests:
+        return
+    print(f"Wrote {stats.put} and deleted {stats.deleted} items in {stats.write_seconds:.2f}s "
+          f"({stats.items_per_second:.1f} items/s) with {stats.write_calls} BatchWriteItem calls, "
+          f"{stats.retries} for unprocessed items")
+    for error in stats.errors:
+        print(f"  ✗ {error}")
+
+
+def main():
+    table_name = os.getenv('TABLE_NAME')
+    if not table_name:
+        print("Error: TABLE_NAME is required")
+        sys.exit(1)
+    concurrency = int(os.getenv('SEED_CONCURRENCY') or DEFAULT_CONCURRENCY)
+    dry_run = bool(os.getenv('DRY_RUN'))
+
+    items = load_catalogue(os.getenv('WEAPONS_FILE') or DEFAULT_WEAPONS_FILE,
+                           os.getenv('TEMPLATES_FILE') or DEFAULT_TEMPLATES_FILE)
+    print(f"Seeding {len(items)} catalogue items into {table_name}{' (dry run)' if dry_run else ''}")
+    stats, requests = seed(create_client(concurrency), table_name, items, concurrency, dry_run)
+    print_stats(stats, requests, dry_run)
+    if stats.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Offline check of the rollDice dice logic, with no API calls or credentials.
+
+Replays the resolver's Jest cases against the Python port in dice_engine,
+checks the vectorised grading against the scalar port for every possible
+total, then simulates rolls for each scenario and compares the totals' and
+grades' frequencies with their exact probabilities by chi-square.
+
+With NumPy, 10^8 rolls per scenario run in seconds; without it, a smaller
+pure-Python simulation is run instead.
+
+Usage: python3 simulate_dice.py [rolls per scenario] [--seed N] [--benchmark]
+"""
+
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import dice_engine
+from dice_engine import (GRADES, GRADE_CRITICAL_SUCCESS, GRADE_FAILURE, GRADE_FUMBLE, GRADE_NEUTRAL,
+                         GRADE_SUCCESS, ROLL_TYPE_DELTA_GREEN, ROLL_TYPE_SUM, np)
+from randomness_tests import chi_square_p_value
+
+NUMPY_ROLLS = 10 ** 8
+PURE_PYTHON_ROLLS = 10 ** 6
+CHUNK_ROLLS = 10 ** 7  # Bounds memory at about 100 MB however many rolls
+DEFAULT_SEED = 20240101
+# Many scenarios are checked, so a lone failure must be very unlikely by chance
+SIGNIFICANCE = 0.001
+MIN_EXPECTED = 5  # Totals and grades expected fewer times are pooled
+
+
+@dataclass
+class Scenario:
+    name: str
+    dice: List[dict]
+    roll_type: str
+    target: int = 0
+
+
+# Rolls the UI makes: Delta Green skill checks, sanity loss and upgrade dice
+SCENARIOS = [
+    Scenario('d100 deltaGreen target 50', [{'type': 'd100', 'size': 100}], ROLL_TYPE_DELTA_GREEN, 50),
+    Scenario('d100 deltaGreen target 1', [{'type': 'd100', 'size': 100}], ROLL_TYPE_DELTA_GREEN, 1),
+    Scenario('d100 deltaGreen target 99', [{'type': 'd100', 'size': 100}], ROLL_TYPE_DELTA_GREEN, 99),
+    Scenario('d100 deltaGreen target 35', [{'type': 'd100', 'size': 100}], ROLL_TYPE_DELTA_GREEN, 35),
+    Scenario('1d4 sum', [{'type': 'd4', 'size': 4}], ROLL_TYPE_SUM),
+    Scenario('1d6 sum', [{'type': 'd6', 'size': 6}], ROLL_TYPE_SUM),
+    Scenario('1d8 sum', [{'type': 'd8', 'size': 8}], ROLL_TYPE_SUM),
+    Scenario('1d10 sum', [{'type': 'd10', 'size': 10}], ROLL_TYPE_SUM),
+    Scenario('1d20 sum', [{'type': 'd20', 'size': 20}], ROLL_TYPE_SUM),
+    Scenario('2d6-2 sum', [{'type': 'd6', 'size': 6, 'modifier': -1}] * 2, ROLL_TYPE_SUM),
+    Scenario('1d4-10 sum', [{'type': 'd4', 'size': 4, 'modifier': -10}], ROLL_TYPE_SUM),
+    Scenario('2d10 deltaGreen target 12', [{'type': 'd10', 'size': 10}] * 2, ROLL_TYPE_DELTA_GREEN, 12),
+]
+
+# Math.random() values, inputs and expected results from graphql/tests/rollDice.test.ts
+D100 = [{'type': 'd100', 'size': 100}]
+JEST_CASES = [
+    ([0.01], D100, ROLL_TYPE_DELTA_GREEN, 50, 1, GRADE_CRITICAL_SUCCESS),
+    ([0.0], D100, ROLL_TYPE_DELTA_GREEN, 50, 0, GRADE_CRITICAL_SUCCESS),
+    ([0.22], D100, ROLL_TYPE_DELTA_GREEN, 50, 22, GRADE_CRITICAL_SUCCESS),
+    ([0.66], D100, ROLL_TYPE_DELTA_GREEN, 50, 66, GRADE_FUMBLE),
+    ([0.25], D100, ROLL_TYPE_DELTA_GREEN, 50, 25, GRADE_SUCCESS),
+    ([0.75], D100, ROLL_TYPE_DELTA_GREEN, 50, 75, GRADE_FAILURE),
+    ([0.5], D100, ROLL_TYPE_DELTA_GREEN, 50, 50, GRADE_SUCCESS),
+    ([0.33], D100, ROLL_TYPE_DELTA_GREEN, 33, 33, GRADE_CRITICAL_SUCCESS),
+    ([0.5, 0.5], [{'type': 'd6', 'size': 6}] * 2, ROLL_TYPE_SUM, 7, 8, GRADE_NEUTRAL),
+    ([0.99], [{'type': '1d4-1', 'size': 4, 'modifier': -1}], ROLL_TYPE_SUM, 0, 3, GRADE_NEUTRAL),
+    ([0.01], [{'type': '1d4-1', 'size': 4, 'modifier': -1}], ROLL_TYPE_SUM, 0, 0, GRADE_NEUTRAL),
+    ([0.99], [{'type': '1d6+2', 'size': 6, 'modifier': 2}], ROLL_TYPE_SUM, 0, 8, GRADE_NEUTRAL),
+    ([0.01], [{'type': '1d6+2', 'size': 6, 'modifier': 2}], ROLL_TYPE_SUM, 0, 3, GRADE_NEUTRAL),
+    ([0.99, 0.99], [{'type': '2d6-2', 'size': 6, 'modifier': -1}] * 2, ROLL_TYPE_SUM, 0, 10, GRADE_NEUTRAL),
+    ([0.01, 0.01], [{'type': '2d6-2', 'size': 6, 'modifier': -1}] * 2, ROLL_TYPE_SUM, 0, 0, GRADE_NEUTRAL),
+    ([0.5], [{'type': '1d6+0', 'size': 6, 'modifier': 0}], ROLL_TYPE_SUM, 0, 4, GRADE_NEUTRAL),
+    ([0.99], [{'type': '1d4-10', 'size': 4, 'modifier': -10}], ROLL_TYPE_SUM, 0, -6, GRADE_NEUTRAL),
+]
+
+
+@dataclass
+class Simulation:
+    rolls: int = 0
+    seconds: float = 0.0
+    totals: Dict[int, int] = field(default_factory=dict)
+    grades: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rolls_per_second(self) -> float:
+        return self.rolls / self.seconds if self.seconds else 0.0
+
+
+def replay_jest_cases() -> List[str]:
+    """Failures replaying the resolver's Jest cases against the port"""
+    failures = []
+    for randoms, dice, roll_type, target, value, grade in JEST_CASES:
+        sequence = iter(randoms)
+        result = dice_engine.roll_dice({'dice': dice, 'rollType': roll_type, 'target': target},
+                                       random=lambda: next(sequence))
+        if (result['value'], result['grade']) != (value, grade):
+            failures.append(f"random={randoms} {roll_type} target {target}: expected {value} {grade}, "
+                            f"got {result['value']} {result['grade']}")
+    return failures
+
+
+def check_vectorised_grades() -> List[str]:
+    """Failures where grade_codes disagrees with the scalar port, over every total and target"""
+    if np is None:
+        return []
+    failures = []
+    totals = np.arange(-20, 200, dtype=np.int32)
+    for roll_type in (ROLL_TYPE_DELTA_GREEN, ROLL_TYPE_SUM):
+        for target in range(-1, 101):
+            codes = dice_engine.grade_codes(totals, roll_type, target)
+            for total, code in zip(totals.tolist(), codes.tolist()):
+                expected = dice_engine.calculate_grade(roll_type, total, target)
+                if GRADES[code] != expected:
+                    failures.append(f"{roll_type} total {total} target {target}: "
+                                    f"vectorised {GRADES[code]}, scalar {expected}")
+    return failures
+
+
+def simulate(scenario: Scenario, rolls: int, seed: int) -> Simulation:
+    """Roll the scenario's dice, counting totals and grades"""
+    simulation = Simulation(rolls=rolls)
+    started = time.perf_counter()
+    if np is not None:
+        generator = np.random.default_rng(seed)
+        grade_counts = np.zeros(len(GRADES), dtype=np.int64)
+        for start in range(0, rolls, CHUNK_ROLLS):
+            totals = dice_engine.roll_totals(scenario.dice, scenario.roll_type,
+                                             min(CHUNK_ROLLS, rolls - start), generator)
+            codes = dice_engine.grade_codes(totals, scenario.roll_type, scenario.target)
+            grade_counts += np.bincount(codes, minlength=len(GRADES))
+            lowest = int(totals.min())
+            for offset, count in enumerate(np.bincount(totals - lowest).tolist()):
+                if count:
+                    simulation.totals[lowest + offset] = simulation.totals.get(lowest + offset, 0) + count
+        simulation.grades = {grade: int(count) for grade, count in zip(GRADES, grade_counts)}
+    else:
+        import random
+        generator = random.Random(seed)
+        roll_input = {'dice': scenario.dice, 'rollType': scenario.roll_type, 'target': scenario.target}
+        for _ in range(rolls):
+            result = dice_engine.roll_dice(roll_input, random=generator.random)
+            simulation.totals[result['value']] = simulation.totals.get(result['value'], 0) + 1
+            simulation.grades[result['grade']] = simulation.grades.get(result['grade'], 0) + 1
+    simulation.seconds = time.perf_counter() - started
+    return simulation
+
+
+def chi_square(observed: Dict, probabilities: Dict, n: int):
+    """(statistic, p-value, df) of observed counts against exact probabilities, pooling rare categories"""
+    unexpected = sum(count for key, count in observed.items() if not probabilities.get(key))
+    if unexpected:
+        # A total or grade the dice can't produce
+        return float('inf'), 0.0, 0
+    categories = []
+    pooled_observed = pooled_expected = 0.0
+    for key, probability in probabilities.items():
+        if not probability:
+            continue
+        expected = n * probability
+        if expected < MIN_EXPECTED:
+            pooled_observed += observed.get(key, 0)
+            pooled_expected += expected
+        else:
+            categories.append((observed.get(key, 0), expected))
+    if pooled_expected:
+        categories.append((pooled_observed, pooled_expected))
+    if len(categories) < 2:
+        return 0.0, 1.0, 0
+    statistic = sum((o - e) ** 2 / e for o, e in categories)
+    df = len(categories) - 1
+    return statistic, chi_square_p_value(statistic, df), df
+
+
+def check_scenario(scenario: Scenario, rolls: int, seed: int) -> List[str]:
+    """Simulate a scenario and compare it with the analytic expectation"""
+    distribution = dice_engine.total_distribution(scenario.dice, scenario.roll_type)
+    expected_grades = dice_engine.grade_probabilities(scenario.dice, scenario.roll_type, scenario.target,
+                                                      distribution)
+    simulation = simulate(scenario, rolls, seed)
+
+    failures = []
+    print(f"\n{scenario.name}: {rolls:,} rolls in {simulation.seconds:.2f}s "
+          f"({simulation.rolls_per_second / 1e6:.1f}M rolls/s)")
+    for grade in GRADES:
+        if expected_grades[grade] or simulation.grades.get(grade):
+            observed = simulation.grades.get(grade, 0) / rolls
+            print(f"  {grade:<16} expected {expected_grades[grade]:.6f}  observed {observed:.6f}")
+
+    for name, observed, probabilities in (('totals', simulation.totals, distribution),
+                                          ('grades', simulation.grades, expected_grades)):
+        statistic, p_value, df = chi_square(observed, probabilities, rolls)
+        status = "✓" if p_value > SIGNIFICANCE else "✗"
+        print(f"  {status} {name}: χ² = {statistic:.2f}, df = {df}, p = {p_value:.4f}")
+        if p_value <= SIGNIFICANCE:
+            failures.append(f"{scenario.name}: {name} differ from expectation (p = {p_value:.2g})")
+    return failures
+
+
+def benchmark(seed: int):
+    """Time the scalar port, the vectorised engine, and a full simulation"""
+    scenario = SCENARIOS[0]
+    roll_input = {'dice': scenario.dice, 'rollType': scenario.roll_type, 'target': scenario.target}
+    print("\nBENCHMARK (d100 deltaGreen target 50):")
+
+    rolls = 10 ** 5
+    started = time.perf_counter()
+    for _ in range(rolls):
+        dice_engine.roll_dice(roll_input)
+    seconds = time.perf_counter() - started
+    print(f"  Scalar port:       {rolls / seconds / 1e6:8.2f}M rolls/s ({rolls:,} rolls)")
+
+    if np is None:
+        print("  NumPy not installed - vectorised benchmarks skipped")
+        return
+    generator = np.random.default_rng(seed)
+    rolls = CHUNK_ROLLS
+    started = time.perf_counter()
+    totals = dice_engine.roll_totals(scenario.dice, scenario.roll_type, rolls, generator)
+    rolled = time.perf_counter()
+    dice_engine.grade_codes(totals, scenario.roll_type, scenario.target)
+    graded = time.perf_counter()
+    print(f"  Vectorised roll:   {rolls / (rolled - started) / 1e6:8.2f}M rolls/s ({rolls:,} rolls)")
+    print(f"  Vectorised grade:  {rolls / (graded - rolled) / 1e6:8.2f}M rolls/s ({rolls:,} rolls)")
+    simulation = simulate(scenario, NUMPY_ROLLS, seed)
+    print(f"  Full simulation:   {simulation.rolls_per_second / 1e6:8.2f}M rolls/s "
+          f"({NUMPY_ROLLS:,} rolls in {simulation.seconds:.2f}s)")
+
+
+def main():
+    args = sys.argv[1:]
+    seed = DEFAULT_SEED
+    if '--seed' in args:
+        index = args.index('--seed')
+        seed = int(args[index + 1])
+        del args[index:index + 2]
+    run_benchmark = '--benchmark' in args
+    args = [arg for arg in args if arg != '--benchmark']
+    rolls = int(args[0]) if args else (NUMPY_ROLLS if np is not None else PURE_PYTHON_ROLLS)
+
+    print(f"Dice engine check: {'NumPy' if np is not None else 'pure Python (install NumPy for 10^8 rolls)'}, "
+          f"seed {seed}")
+    failures = replay_jest_cases()
+    print(f"{'✓' if not failures else '✗'} Replayed {len(JEST_CASES)} resolver test cases")
+    grade_failures = check_vectorised_grades()
+    if np is not None:
+        print(f"{'✓' if not grade_failures else '✗'} Vectorised grades match the scalar port")
+    failures.extend(grade_failures[:10])
+
+    for n, scenario in enumerate(SCENARIOS):
+        failures.extend(check_scenario(scenario, rolls, seed + n))
+
+    if run_benchmark:
+        benchmark(seed)
+
+    if failures:
+        print("\n✗ Dice engine check failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\n✓ Dice engine matches the resolver and its expected distribution")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Subscription fan-out benchmark: how long a mutation takes to reach every
+subscriber on the game, as the number of subscribers grows.
+
+For each subscriber count K, opens K real-time connections subscribed to
+diceRolled (or updatedSection) on the game, then sends mutations at a
+constant rate. Each mutation carries a unique marker (the roll's action, or
+the section's content), so every subscriber's copy can be matched to when
+the mutation was sent. Latency is measured from just before the mutation
+is sent to when each subscriber reads the message, on one clock.
+
+The subscribers and the mutations all run on this process's event loop, so
+at large K the client's own scheduling adds to the measured latency; run
+steps beyond a few hundred subscribers from several machines instead.
+
+Set MOCK_GRAPHQL=1 to run against the local mock API and real-time endpoint,
+with no deployment or credentials needed.
+
+Environment:
+  SUBSCRIBER_COUNTS     Subscriber counts to step through (default 1,5,10,25)
+  FANOUT_MUTATIONS      Mutations per step (default 50)
+  FANOUT_RATE           Mutations per second (default 5)
+  FANOUT_SUBSCRIPTION   diceRolled (default) or updatedSection, which needs SECTION_ID
+  DELIVERY_TIMEOUT      Seconds to wait for stragglers after the last mutation (default 10)
+  LATENCY_REPORT        Path to export the results to, .json or .csv
+
+Usage: python3 subscription_fanout_benchmark.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from appsync_realtime import RealtimeClient, RealtimeError, realtime_url
+from cognito_auth import AuthError, CognitoSession, create_cognito_transport
+from graphql_client import Document, GraphQLClient, GraphQLError
+from latency_histogram import LatencyHistogram, export_report, format_summary
+from load_generator import TransportError, create_transport, run_load
+
+DEFAULT_SUBSCRIBER_COUNTS = '1,5,10,25'
+DEFAULT_MUTATIONS = 50
+DEFAULT_RATE = 5
+DEFAULT_DELIVERY_TIMEOUT_SECONDS = 10
+CONNECT_CONCURRENCY = 20
+MUTATION_CONNECTIONS = 4
+POLL_SECONDS = 0.05
+
+SUBSCRIPTIONS = {
+    'diceRolled': """
+subscription diceRolled($gameId: ID!) {
+  diceRolled(gameId: $gameId) { gameId action value grade }
+}
+""",
+    'updatedSection': """
+subscription updatedSection($gameId: ID!) {
+  updatedSection(gameId: $gameId) { gameId sectionId content }
+}
+""",
+}
+
+ROLL_DICE = Document("""
+mutation rollDice($input: RollDiceInput!) {
+  rollDice(input: $input) { gameId action value grade }
+}
+""")
+
+UPDATE_SECTION = Document("""
+mutation updateSection($input: UpdateSectionInput!) {
+  updateSection(input: $input) { gameId sectionId content }
+}
+""")
+
+
+def mutation_for(subscription: str, game_id: str, section_id: Optional[str], marker: str):
+    """The mutation that triggers the subscription, carrying the marker"""
+    if subscription == 'diceRolled':
+        return ROLL_DICE, {'input': {'gameId': game_id, 'dice': [{'type': 'd100', 'size': 100}],
+                                     'rollType': 'deltaGreen', 'target': 50, 'action': marker}}
+    return UPDATE_SECTION, {'input': {'gameId': game_id, 'sectionId': section_id,
+                                      'content': json.dumps({'fanoutMarker': marker})}}
+
+
+def marker_of(subscription: str, payload: dict) -> Optional[str]:
+    """The marker in a delivered message, if it has one"""
+    data = (payload.get('data') or {}).get(subscription) or {}
+    if subscription == 'diceRolled':
+        return data.get('action')
+    try:
+        return json.loads(data.get('content') or '{}').get('fanoutMarker')
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class Subscriber:
+    index: int
+    received: Dict[str, float] = field(default_factory=dict)
+    client: Optional[RealtimeClient] = None
+
+
+@dataclass
+class StepResult:
+    subscribers: int
+    sent: int
+    expected: int
+    delivered: int
+    histogram: LatencyHistogram
+    mutation_histogram: LatencyHistogram
+    per_subscriber: List[LatencyHistogram]
+    mutation_errors: int
+
+    @property
+    def lost(self) -> int:
+        return self.expected - self.delivered
+
+    @property
+    def worst_subscriber_p99(self) -> float:
+        return max((h.percentile(99) for h in self.per_subscriber if h.count), default=0.0)
+
+
+async def open_subscribers(count: int, graphql_url: str, token: str, subscription: str,
+                           game_id: str, run_id: str) -> List[Subscriber]:
+    """Connect and subscribe count subscribers, a few at a time"""
+    slots = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    subscribers = [Subscriber(index) for index in range(count)]
+
+    async def open_one(subscriber: Subscriber):
+        def on_data(subscription_id, payload, received_at):
+            marker = marker_of(subscription, payload)
+            # Only this run's markers; anything else on the game is ignored
+            if marker and marker.startswith(run_id):
+                subscriber.received.setdefault(marker, received_at)
+
+        async with slots:
+            subscriber.client = RealtimeClient(graphql_url, token, on_data)
+            await subscriber.client.connect()
+            await subscriber.client.subscribe(SUBSCRIPTIONS[subscription], {'gameId': game_id})
+
+    try:
+        await asyncio.gather(*(open_one(subscriber) for subscriber in subscribers))
+    except BaseException:
+        await close_subscribers(subscribers)
+        raise
+    return subscribers
+
+
+async def close_subscribers(subscribers: List[Subscriber]):
+    await asyncio.gather(*(subscriber.client.close() for subscriber in subscribers if subscriber.client))
+
+
+async def run_step(count: int, client: GraphQLClient, graphql_url: str, token: str, subscription: str,
+                   game_id: str, section_id: Optional[str], mutations: int, rate: float,
+                   delivery_timeout: float) -> StepResult:
+    run_id = f"fanout-{uuid.uuid4().hex[:8]}-{count}-"
+    subscribers = await open_subscribers(count, graphql_url, token, subscription, game_id, run_id)
+    sent: Dict[str, float] = {}
+    sequence = iter(range(mutations))
+
+    async def mutate():
+        marker = f"{run_id}{next(sequence)}"
+        query, variables = mutation_for(subscription, game_id, section_id, marker)
+        sent[marker] = time.perf_counter()
+        try:
+            await client.execute(query, variables)
+            return None
+        except (GraphQLError, TransportError) as e:
+            del sent[marker]  # It was never applied, so nothing will be delivered
+            return str(e)
+
+    try:
+        run = await run_load(mutate, mutations, MUTATION_CONNECTIONS, rate)
+
+        # Wait for stragglers
+        deadline = time.perf_counter() + delivery_timeout
+        while time.perf_counter() < deadline:
+            if all(len(subscriber.received) >= len(sent) for subscriber in subscribers):
+                break
+            await asyncio.sleep(POLL_SECONDS)
+    finally:
+        await close_subscribers(subscribers)
+
+    histogram = LatencyHistogram()
+    mutation_histogram = LatencyHistogram()
+    per_subscriber = []
+    for sample in run.samples:
+        mutation_histogram.record(sample.latency)
+    for subscriber in subscribers:
+        own = LatencyHistogram()
+        for marker, received_at in subscriber.received.items():
+            if marker in sent:
+                own.record(received_at - sent[marker])
+        histogram.merge(own)
+        per_subscriber.append(own)
+
+    errors = [sample.result for sample in run.samples if sample.result]
+    if errors:
+        print(f"  {len(errors)} mutations failed, e.g. {errors[0]}")
+    return StepResult(subscribers=count, sent=len(sent), expected=len(sent) * count,
+                      delivered=histogram.count, histogram=histogram, mutation_histogram=mutation_histogram,
+                      per_subscriber=per_subscriber, mutation_errors=len(errors))
+
+
+def print_step(result: StepResult):
+    print(f"{result.subscribers:>11} {result.delivered:>9}/{result.expected:<9} {result.lost:>5}  "
+          f"{format_summary(result.histogram)}  (worst subscriber p99 {result.worst_subscriber_p99 * 1000:.1f} ms)")
+
+
+def report_row(result: StepResult) -> dict:
+    return {
+        'subscribers': result.subscribers,
+        'mutations': result.sent,
+        'mutation_errors': result.mutation_errors,
+        'expected': result.expected,
+        'delivered': result.delivered,
+        'lost': result.lost,
+        'worst_subscriber_p99_ms': round(result.worst_subscriber_p99 * 1000, 3),
+        'mutation_p50_ms': round(result.mutation_histogram.percentile(50) * 1000, 3),
+        **result.histogram.summary(),
+    }
+
+
+async def benchmark(graphql_url: str, token: str, game_id: str, section_id: Optional[str]) -> bool:
+    subscription = os.getenv('FANOUT_SUBSCRIPTION') or 'diceRolled'
+    if subscription not in SUBSCRIPTIONS:
+        raise ValueError(f"FANOUT_SUBSCRIPTION must be one of {', '.join(SUBSCRIPTIONS)}")
+    if subscription == 'updatedSection' and not section_id:
+        raise ValueError("SECTION_ID is required for updatedSection")
+    counts = [int(count) for count in (os.getenv('SUBSCRIBER_COUNTS') or DEFAULT_SUBSCRIBER_COUNTS).split(',')]
+    mutations = int(os.getenv('FANOUT_MUTATIONS') or DEFAULT_MUTATIONS)
+    rate = float(os.getenv('FANOUT_RATE') or DEFAULT_RATE)
+    delivery_timeout = float(os.getenv('DELIVERY_TIMEOUT') or DEFAULT_DELIVERY_TIMEOUT_SECONDS)
+
+    print(f"Real-time endpoint: {realtime_url(graphql_url)}")
+    print(f"{mutations} {subscription} mutations at {rate:g}/s per step\n")
+    print(f"{'SUBSCRIBERS':>11} {'DELIVERED':>19} {'LOST':>5}  FAN-OUT LATENCY (ms)")
+
+    client = GraphQLClient(create_transport(graphql_url, MUTATION_CONNECTIONS), token)
+    results = []
+    overall = LatencyHistogram()
+    try:
+        for count in counts:
+            try:
+                result = await run_step(count, client, graphql_url, token, subscription, game_id, section_id,
+                                        mutations, rate, delivery_timeout)
+            except (RealtimeError, asyncio.TimeoutError) as e:
+                print(f"{count:>11} could not subscribe: {str(e) or type(e).__name__}")
+                break
+            print_step(result)
+            results.append(result)
+            overall.merge(result.histogram)
+    finally:
+        await client.close()
+
+    report_path = os.getenv('LATENCY_REPORT')
+    if report_path and results:
+        metadata = {'graphql_url': graphql_url, 'subscription': subscription, 'rate': rate,
+                    'mutations_per_step': mutations}
+        if report_path.endswith('.json'):
+            metadata['per_subscriber'] = {str(result.subscribers): [h.summary() for h in result.per_subscriber]
+                                          for result in results}
+        export_report(report_path, [report_row(result) for result in results], overall,
+                      totals={'delivered': overall.count, 'lost': sum(result.lost for result in results)},
+                      metadata=metadata, label='subscribers')
+        print(f"\nLatency report written to {report_path}")
+
+    return bool(results) and len(results) == len(counts) and not any(result.lost for result in results)
+
+
+def main():
+    if os.getenv('MOCK_GRAPHQL'):
+        from mock_graphql_server import start_mock_server
+        from mock_realtime_server import start_mock_realtime_server
+        graphql_url, graphql_server = start_mock_server()
+        delivery_latency = float(os.getenv('MOCK_DELIVERY_LATENCY_MS') or 0) / 1000
+        os.environ['REALTIME_URL'], _ = start_mock_realtime_server(graphql_server, delivery_latency=delivery_latency)
+        os.environ['COGNITO_ENDPOINT'] = graphql_url
+        client_id, region, game_id, section_id = 'mock-client', 'mock', 'mock-game', 'mock-section'
+        username, password = 'fanout', 'mock-password'
+        print(f"Using mock GraphQL API at {graphql_url}")
+    else:
+        graphql_url = os.getenv('GRAPHQL_URL')
+        client_id = os.getenv('COGNITO_CLIENT_ID')
+        region = os.getenv('AWS_REGION')
+        game_id = os.getenv('GAME_ID')
+        section_id = os.getenv('SECTION_ID')
+        username = os.getenv('COGNITO_USERNAME')
+        password = os.getenv('COGNITO_PASSWORD')
+        if not all([graphql_url, client_id, region, game_id, username, password]):
+            print("Error: Missing required environment variables")
+            print("Required: GRAPHQL_URL, COGNITO_CLIENT_ID, AWS_REGION, GAME_ID, COGNITO_USERNAME, COGNITO_PASSWORD")
+            print("Or set MOCK_GRAPHQL=1 to use a local mock API")
+            sys.exit(1)
+
+    async def run():
+        auth_transport = create_cognito_transport(region, 1)
+        try:
+            token = await CognitoSession(auth_transport, username, password, client_id).token()
+        finally:
+            await auth_transport.close()
+        return await benchmark(graphql_url, token, game_id, section_id)
+
+    try:
+        ok = asyncio.run(run())
+    except AuthError as e:
+        print(f"Sign-in failed: {str(e)}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(1)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/bin/bash
+set -e
+
+# Usage: GAME_ID=... COGNITO_USERNAME=... COGNITO_PASSWORD='pass' ./scripts/subscription_fanout_benchmark.sh
+#    or: MOCK_GRAPHQL=1 ./scripts/subscription_fanout_benchmark.sh
+
+# LATENCY_REPORT=path.json (or .csv) exports per-step and per-subscriber latency when the run ends
+REPORT_ARGS=()
+if [ -n "$LATENCY_REPORT" ]; then
+    REPORT_DIR=$(cd "$(dirname "$LATENCY_REPORT")" && pwd)
+    REPORT_ARGS=(-v "$REPORT_DIR:/reports" -e LATENCY_REPORT="/reports/$(basename "$LATENCY_REPORT")")
+fi
+
+# Benchmark settings shared by mock and real runs
+FANOUT_ARGS=(
+    -e SUBSCRIBER_COUNTS="$SUBSCRIBER_COUNTS"
+    -e FANOUT_MUTATIONS="$FANOUT_MUTATIONS"
+    -e FANOUT_RATE="$FANOUT_RATE"
+    -e FANOUT_SUBSCRIPTION="$FANOUT_SUBSCRIPTION"
+    -e DELIVERY_TIMEOUT="$DELIVERY_TIMEOUT"
+)
+
+# MOCK_GRAPHQL=1 runs against a local mock API and real-time endpoint, with no deployment or credentials needed
+if [ -n "$MOCK_GRAPHQL" ]; then
+    echo "Running subscription fan-out benchmark against the mock API in Docker container..."
+    docker run --rm \
+        -v "$(pwd)/scripts:/scripts" \
+        -e MOCK_GRAPHQL=1 \
+        -e MOCK_DELIVERY_LATENCY_MS="$MOCK_DELIVERY_LATENCY_MS" \
+        "${FANOUT_ARGS[@]}" \
+        "${REPORT_ARGS[@]}" \
+        python:3.11-slim \
+        python -u /scripts/subscription_fanout_benchmark.py
+    exit 0
+fi
+
+if [ -z "$GAME_ID" ] || [ -z "$COGNITO_USERNAME" ] || [ -z "$COGNITO_PASSWORD" ]; then
+    echo "Error: GAME_ID, COGNITO_USERNAME and COGNITO_PASSWORD are required"
+    echo "Usage:"
+    echo "  GAME_ID=... COGNITO_USERNAME=... COGNITO_PASSWORD='pass' ./scripts/subscription_fanout_benchmark.sh"
+    exit 1
+fi
+
+# Change to correct terraform directory and get outputs
+cd terraform/environment/wildsea-dev
+TERRAFORM_OUTPUT=$(AWS_PROFILE=wildsea terraform output -json)
+cd - > /dev/null
+
+# Parse terraform outputs using jq
+GRAPHQL_URL=$(echo "$TERRAFORM_OUTPUT" | jq -r '.graphql_uri.value')
+COGNITO_CLIENT_ID=$(echo "$TERRAFORM_OUTPUT" | jq -r '.cognito_web_client_id.value')
+AWS_REGION=$(echo "$TERRAFORM_OUTPUT" | jq -r '.region.value')
+
+echo "Running subscription fan-out benchmark in Docker container..."
+echo "GraphQL URL: $GRAPHQL_URL"
+echo "Game ID: $GAME_ID"
+
+docker run --rm \
+    -v "$(pwd)/scripts:/scripts" \
+    -e GRAPHQL_URL="$GRAPHQL_URL" \
+    -e COGNITO_CLIENT_ID="$COGNITO_CLIENT_ID" \
+    -e AWS_REGION="$AWS_REGION" \
+    -e GAME_ID="$GAME_ID" \
+    -e SECTION_ID="$SECTION_ID" \
+    -e COGNITO_USERNAME="$COGNITO_USERNAME" \
+    -e COGNITO_PASSWORD="$COGNITO_PASSWORD" \
+    "${FANOUT_ARGS[@]}" \
+    "${REPORT_ARGS[@]}" \
+    python:3.11-slim \
+    sh -c "pip install --quiet 'httpx[http2]' && python -u /scripts/subscription_fanout_benchmark.py"
@@ -1,19 +1,38 @@
 #!/usr/bin/env python3
 """
 Test script to call the rollDice GraphQL mutation with Cognito authentication.
+
+Rolls are sent by an asyncio load generator over pooled keep-alive
+connections. Set ROLL_CONCURRENCY for the number of connections (default
+10) and ROLL_RATE for a constant arrival rate in rolls/s (default: as fast
+as the connections allow). Set MOCK_GRAPHQL=1 to run against a local mock
+API instead, with no Cognito credentials needed.
+
+Each roll's latency is recorded in a histogram, and p50/p90/p99/p999, error
+rate and throughput are shown per loop. Set LATENCY_REPORT to a .json or
+.csv path to export them when the run ends.
 """
 
-import json
+import asyncio
 import sys
 import os
-import urllib.request
-from urllib.parse import urlparse
-import urllib.error
-import concurrent.futures
-import time
 import math
+from collections import deque
 from dataclasses import dataclass
 from typing import Optional, List
+from cognito_auth import AuthError
+from graphql_client import Document, GraphQLError, sign_in
+from load_generator import TransportError, run_load
+from latency_histogram import LatencyHistogram, export_report, format_summary
+import randomness_tests
+
+ROLLS_PER_LOOP = 100
+DEFAULT_CONCURRENCY = 10
+# The rolls are d100 under deltaGreen, which reads 0-99
+ROLL_MIN_VALUE = 0
+ROLL_MAX_VALUE = 99
+# The sequence tests (runs, serial correlation, gap) look at this many of the latest rolls
+SEQUENCE_WINDOW = 10000
 
 @dataclass
 class DiceRoll:
@@ -28,75 +47,57 @@ class DiceRoll:
     def is_error(self) -> bool:
         return self.error is not None
 
-def _validate_https_url(url: str, allowed_hosts: Optional[List[str]] = None) -> None:
-    """Raise ValueError unless url is https:// and (optionally) host is allowed."""
-    parsed = urlparse(url)
-    if parsed.scheme != "https" or not parsed.netloc or parsed.username or parsed.password:
-        raise ValueError("URL must be HTTPS, contain a host, and have no credentials")
-    if allowed_hosts:
-        host = (parsed.hostname or "").lower()
-        if not any(host == h or host.endswith("." + h) for h in (h.lower() for h in allowed_hosts)):
-            raise ValueError(f"Host '{host}' is not in the allowed list")
-
-def get_cognito_token(username, password, user_pool_id, client_id, region):
-    """Authenticate with Cognito and get access token"""
-
-    # Validate region to ensure we only hit AWS endpoints (security: prevent file:// schemes)
-    if not region or not region.replace('-', '').isalnum():
-        raise ValueError("Invalid AWS region")
-
-    # Cognito Identity Provider endpoint (controlled AWS URL, not user input)
-    cognito_idp_url = f"https://cognito-idp.{region}.amazonaws.com/"
-    _validate_https_url(cognito_idp_url, allowed_hosts=["amazonaws.com"])
-
-    payload = {
-        'AuthFlow': 'USER_PASSWORD_AUTH',
-        'ClientId': client_id,
-        'AuthParameters': {
-            'USERNAME': username,
-            'PASSWORD': password
-        }
-    }
-
-    data = json.dumps(payload).encode('utf-8')
-
-    req = urllib.request.Request(
-        cognito_idp_url,
-        data=data,
-        headers={
-            'X-Amz-Target': 'AWSCognitoIdentityProviderService.InitiateAuth',
-            'Content-Type': 'application/x-amz-json-1.1'
-        }
-    )
-
-    try:
-        # nosemgrep: B310 - always https://
-        with urllib.request.urlopen(req) as response: # nosec B310  # nosemgrep  # noqa: S310
-            result = json.loads(response.read().decode('utf-8'))
+class RollStats:
+    """
+    Running totals of the rolls so far, for the graph and randomness tests
 
-        if 'AuthenticationResult' in result:
-            return result['AuthenticationResult']['AccessToken']
-        else:
-            return None
+    Each roll updates a fixed array of per-face counts in O(1), and the
+    distribution tests read only that array. The sequence tests read a
+    bounded window of the latest rolls, so a long run's CPU and memory stay
+    flat however many rolls it makes.
+    """
 
-    except urllib.error.HTTPError:
-        return None
+    def __init__(self, min_value: int = ROLL_MIN_VALUE, max_value: int = ROLL_MAX_VALUE):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.counts = [0] * (max_value - min_value + 1)
+        # The first grade seen for each face, which colours its column in the graph
+        self.grades: List[Optional[str]] = [None] * len(self.counts)
+        self.recent = deque(maxlen=SEQUENCE_WINDOW)
+        self.total = 0
+        self.errors = 0
+        self.out_of_range = 0
+
+    def add(self, roll: DiceRoll):
+        self.total += 1
+        if roll.is_error:
+            self.errors += 1
+            return
+        index = roll.value - self.min_value
+        if not 0 <= index < len(self.counts):
+            self.out_of_range += 1
+            return
+        self.counts[index] += 1
+        self.recent.append(roll.value)
+        if self.grades[index] is None:
+            self.grades[index] = roll.grade
 
-def make_single_roll(access_token, graphql_url, game_id):
+    @property
+    def successful(self) -> int:
+        return self.total - self.errors - self.out_of_range
+
+ROLL_MUTATION = Document("""
+mutation rollDice($input: RollDiceInput!) {
+  rollDice(input: $input) {
+    diceList { ... on SingleDie { value } }
+    grade
+  }
+}
+""")
+
+async def make_single_roll(client, game_id):
     """Make a single roll and return the result"""
 
-    # Validate GraphQL URL to ensure it's HTTPS (security: prevent file:// schemes)
-    _validate_https_url(graphql_url)
-
-    mutation = """
-    mutation rollDice($input: RollDiceInput!) {
-      rollDice(input: $input) {
-        diceList { ... on SingleDie { value } }
-        grade
-      }
-    }
-    """
-
     variables = {
         "input": {
             "gameId": game_id,
@@ -106,62 +107,21 @@ def make_single_roll(access_token, graphql_url, game_id):
         }
     }
 
-    payload = {
-        "query": mutation,
-        "variables": variables
-    }
-
-    data = json.dumps(payload).encode('utf-8')
-
-    req = urllib.request.Request(
-        graphql_url,
-        data=data,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}"
-        }
-    )
-
     try:
-        with urllib.request.urlopen(req) as response:  # nosec B310  # nosemgrep: python.lang.security.audit.urllib.urlopen.file-access  # noqa: S310
-            result = json.loads(response.read().decode('utf-8'))
-
-        if 'errors' in result:
-            error_msg = result['errors'][0].get('message', 'GraphQL error')
-            return DiceRoll(-1, 'ERROR', error_msg)
-
-        if 'data' in result and result['data'].get('rollDice'):
-            roll = result['data']['rollDice']
-            return DiceRoll(roll['diceList'][0]['value'], roll['grade'])
-        else:
-            return DiceRoll(-1, 'ERROR', 'No roll data returned')
-
-    except urllib.error.HTTPError as e:
-        return DiceRoll(-1, 'ERROR', f'HTTP {e.code}')
+        data = await client.execute(ROLL_MUTATION, variables)
+    except (GraphQLError, TransportError) as e:
+        return DiceRoll(-1, 'ERROR', str(e))
     except Exception as e:
         return DiceRoll(-1, 'ERROR', str(e))
 
-def make_100_rolls(access_token, graphql_url, game_id):
-    """Make 100 rolls concurrently and return list of DiceRoll objects"""
+    if data.get('rollDice'):
+        roll = data['rollDice']
+        return DiceRoll(roll['diceList'][0]['value'], roll['grade'])
+    return DiceRoll(-1, 'ERROR', 'No roll data returned')
 
-    results = []
-
-    def roll_worker():
-        return make_single_roll(access_token, graphql_url, game_id)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        # Submit all 100 rolls
-        futures = [executor.submit(roll_worker) for _ in range(100)]
-
-        # Collect results as they complete
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                dice_roll = future.result()
-                results.append(dice_roll)
-            except Exception as e:
-                results.append(DiceRoll(-1, 'ERROR', f'Exception: {str(e)}'))
-
-    return results
+async def make_rolls(client, game_id, count, concurrency, rate=None):
+    """Make count rolls concurrently and return the LoadRun of DiceRoll results"""
+    return await run_load(lambda: make_single_roll(client, game_id), count, concurrency, rate)
 
 def _get_graph_colors():
     """Get color codes for different dice roll grades"""
@@ -173,15 +133,6 @@ def _get_graph_colors():
         'ERROR': '\033[95m'              # Magenta
     }
 
-def _count_rolls_by_value(successful_rolls):
-    """Count rolls grouped by their values"""
-    roll_counts = {}
-    for roll in successful_rolls:
-        if roll.value not in roll_counts:
-            roll_counts[roll.value] = []
-        roll_counts[roll.value].append(roll)
-    return roll_counts
-
 def _print_graph_scale(min_val, max_val, range_size):
     """Print the scale line showing value range"""
     if range_size <= 50:
@@ -195,21 +146,9 @@ def _print_graph_scale(min_val, max_val, range_size):
         right_pad = range_size - len(str(min_val)) - len(str(mid_val)) - len(str(max_val)) - left_pad
         print(f"{min_val}{' ' * left_pad}{mid_val}{' ' * right_pad}{max_val}")
 
-def _find_min_full_line(roll_counts, min_val, max_val, max_count):
+def _find_min_full_line(counts):
     """Find the minimum line level where all positions are filled"""
-    min_full_line = 1
-    for line in range(1, max_count + 1):
-        all_filled = True
-        for val in range(min_val, max_val + 1):
-            rolls_at_val = roll_counts.get(val, [])
-            if len(rolls_at_val) < line:
-                all_filled = False
-                break
-        if all_filled:
-            min_full_line = line
-        else:
-            break
-    return min_full_line
+    return max(min(counts), 1)
 
 def _determine_lines_to_show(is_bottom_line_full, max_count, min_full_line):
     """Determine which graph lines to display"""
@@ -225,133 +164,84 @@ def _determine_lines_to_show(is_bottom_line_full, max_count, min_full_line):
         show_summary = False
     return lines_to_show, lines_not_shown, show_summary
 
-def _draw_graph_line(line, min_val, max_val, roll_counts, colors, reset):
+def _draw_graph_line(line, counts, grades, colors, reset):
     """Draw a single line of the frequency graph"""
     graph_line = []
-    for val in range(min_val, max_val + 1):
-        rolls_at_val = roll_counts.get(val, [])
-
-        if len(rolls_at_val) >= line:
-            # Show a mark for this line level
-            roll = rolls_at_val[0]  # Use first roll for color
-            color = colors.get(roll.grade, '')
+    for count, grade in zip(counts, grades):
+        if count >= line:
+            # Show a mark for this line level, coloured by the first roll's grade
+            color = colors.get(grade, '')
             graph_line.append(f"{color}█{reset}")
         else:
             graph_line.append('.')
 
     print(''.join(graph_line))
 
-def draw_roll_graph(results):
+def draw_roll_graph(stats: RollStats):
     """Draw a horizontal graph with one character per roll value, multiple lines for frequency"""
     colors = _get_graph_colors()
     reset = '\033[0m'
 
-    # Get successful rolls only for the graph
-    successful_rolls = [roll for roll in results if roll.is_success]
-
-    if not successful_rolls:
+    if not stats.successful:
         print("No successful rolls to graph")
         return
 
-    # Count rolls per value and find range
-    roll_counts = _count_rolls_by_value(successful_rolls)
-    min_val = min(roll.value for roll in successful_rolls)
-    max_val = max(roll.value for roll in successful_rolls)
+    # Trim to the range of values rolled so far
+    rolled = [index for index, count in enumerate(stats.counts) if count]
+    first, last = rolled[0], rolled[-1]
+    counts = stats.counts[first:last + 1]
+    grades = stats.grades[first:last + 1]
+    min_val = stats.min_value + first
+    max_val = stats.min_value + last
     range_size = max_val - min_val + 1
-    max_count = max(len(rolls) for rolls in roll_counts.values()) if roll_counts else 0
+    max_count = max(counts)
 
     # Print scale
     _print_graph_scale(min_val, max_val, range_size)
 
     # Check if bottom line would be solid
-    filled_positions = sum(1 for val in range(min_val, max_val + 1) if roll_counts.get(val, []))
-    total_positions = max_val - min_val + 1
-    is_bottom_line_full = filled_positions == total_positions
+    is_bottom_line_full = all(counts)
 
     # Find minimum full line and determine what to show
-    min_full_line = _find_min_full_line(roll_counts, min_val, max_val, max_count) if is_bottom_line_full else 1
+    min_full_line = _find_min_full_line(counts) if is_bottom_line_full else 1
     lines_to_show, lines_not_shown, show_summary = _determine_lines_to_show(is_bottom_line_full, max_count, min_full_line)
 
     # Draw the graph lines
     for line in lines_to_show:
-        _draw_graph_line(line, min_val, max_val, roll_counts, colors, reset)
+        _draw_graph_line(line, counts, grades, colors, reset)
 
     # Show summary if we omitted full lines
     if show_summary:
         print(f"[{lines_not_shown} line(s) with all values filled not shown]")
 
-def calculate_chi_square(values: List[int]) -> tuple[float, float, str]:
-    """Calculate chi-square goodness of fit test for uniform distribution"""
-    if not values:
+def calculate_chi_square(counts: List[int]) -> tuple[float, float, str]:
+    """Calculate chi-square goodness of fit test for uniform distribution over per-face counts"""
+    if not sum(counts):
         return 0.0, 1.0, "ERROR: No data"
 
-    min_val = min(values)
-    max_val = max(values)
-    num_categories = max_val - min_val + 1
-    n = len(values)
-
-    # Expected frequency for uniform distribution
-    expected_freq = n / num_categories
-
-    # Count observed frequencies
-    observed_counts = {}
-    for val in values:
-        observed_counts[val] = observed_counts.get(val, 0) + 1
-
-    # Calculate chi-square statistic
-    chi_square = 0.0
-    for val in range(min_val, max_val + 1):
-        observed = observed_counts.get(val, 0)
-        chi_square += (observed - expected_freq) ** 2 / expected_freq
-
-    # Degrees of freedom
-    df = num_categories - 1
-
-    # Simple p-value approximation (not exact, but good enough for assessment)
-    # For large df, chi-square approaches normal distribution
-    if df > 30:
-        # Normal approximation
-        z_score = (chi_square - df) / math.sqrt(2 * df)
-        p_value = 0.5 * (1 + math.erf(-abs(z_score) / math.sqrt(2)))
-    else:
-        # Rough approximation for smaller df
-        critical_values = {
-            1: 3.841, 10: 18.307, 20: 31.410, 30: 43.773, 40: 55.758,
-            50: 67.505, 60: 79.082, 70: 90.531, 80: 101.879, 90: 113.145, 99: 123.225
-        }
-        # Find closest critical value
-        closest_df = min(critical_values.keys(), key=lambda x: abs(x - df))
-        critical_val = critical_values[closest_df]
-        p_value = 0.05 if chi_square < critical_val else 0.01
+    result = randomness_tests.chi_square_test(counts)
 
     # Assessment
-    if p_value > 0.05:
+    if result.assessment == "GOOD":
         assessment = "GOOD - Distribution appears random"
-    elif p_value > 0.01:
+    elif result.assessment == "FAIR":
         assessment = "FAIR - Some deviation from randomness"
     else:
         assessment = "POOR - Significant deviation from randomness"
 
-    return chi_square, p_value, assessment
+    return result.statistic, result.p_value, assessment
 
-def calculate_entropy(values: List[int]) -> tuple[float, float, str]:
-    """Calculate Shannon entropy of the distribution"""
-    if not values:
+def calculate_entropy(counts: List[int]) -> tuple[float, float, str]:
+    """Calculate Shannon entropy of the distribution over per-face counts"""
+    n = sum(counts)
+    if not n:
         return 0.0, 0.0, "ERROR: No data"
 
-    min_val = min(values)
-    max_val = max(values)
-    num_categories = max_val - min_val + 1
-    n = len(values)
-
-    # Count frequencies
-    counts = {}
-    for val in values:
-        counts[val] = counts.get(val, 0) + 1
+    num_categories = len(counts)
 
     # Calculate entropy
     entropy = 0.0
-    for count in counts.values():
+    for count in counts:
         if count > 0:
             probability = count / n
             entropy -= probability * math.log2(probability)
@@ -374,26 +264,18 @@ def calculate_entropy(values: List[int]) -> tuple[float, float, str]:
 
     return entropy, entropy_ratio, assessment
 
-def calculate_frequency_variance(values: List[int]) -> tuple[float, str]:
+def calculate_frequency_variance(counts: List[int]) -> tuple[float, str]:
     """Calculate variance in frequencies across all possible values"""
-    if not values:
+    n = sum(counts)
+    if not n:
         return 0.0, "ERROR: No data"
 
-    min_val = min(values)
-    max_val = max(values)
-    n = len(values)
-    num_categories = max_val - min_val + 1
+    num_categories = len(counts)
     expected_freq = n / num_categories
 
-    # Count frequencies
-    counts = {}
-    for val in values:
-        counts[val] = counts.get(val, 0) + 1
-
     # Calculate variance from expected frequency
     variance = 0.0
-    for val in range(min_val, max_val + 1):
-        observed = counts.get(val, 0)
+    for observed in counts:
         variance += (observed - expected_freq) ** 2
 
     variance /= num_categories
@@ -413,116 +295,205 @@ def calculate_frequency_variance(values: List[int]) -> tuple[float, str]:
 
     return std_dev, assessment
 
-def analyze_randomness(results: List[DiceRoll]):
+def analyze_randomness(stats: RollStats):
     """Analyze randomness of successful dice rolls"""
-    successful_rolls = [roll for roll in results if roll.is_success]
-
-    if not successful_rolls:
+    if not stats.successful:
         print("\nRANDOMNESS ANALYSIS:")
         print("No successful rolls to analyze")
         return
 
-    values = [roll.value for roll in successful_rolls]
-    n = len(values)
+    counts = stats.counts
+    n = stats.successful
 
     print(f"\nRANDOMNESS ANALYSIS ({n} successful rolls):")
     print("=" * 50)
 
     # Basic statistics
-    min_val, max_val = min(values), max(values)
-    range_size = max_val - min_val + 1
-    print(f"Range: {min_val}-{max_val} ({range_size} possible values)")
+    range_size = len(counts)
+    print(f"Range: {stats.min_value}-{stats.max_value} ({range_size} possible values)")
     print(f"Expected frequency per value: {n/range_size:.1f}")
+    if stats.out_of_range:
+        print(f"⚠ {stats.out_of_range} rolls outside the range were left out")
 
     # Chi-square test
-    chi_sq, p_val, chi_assessment = calculate_chi_square(values)
+    chi_sq, p_val, chi_assessment = calculate_chi_square(counts)
     print("\nChi-square test:")
     print(f"  χ² = {chi_sq:.2f}, p ≈ {p_val:.3f}")
     print(f"  {chi_assessment}")
 
     # Entropy analysis
-    entropy, entropy_ratio, entropy_assessment = calculate_entropy(values)
+    entropy, entropy_ratio, entropy_assessment = calculate_entropy(counts)
     print("\nEntropy analysis:")
     print(f"  Entropy = {entropy:.2f} bits (ratio: {entropy_ratio:.3f})")
     print(f"  {entropy_assessment}")
 
     # Frequency variance
-    freq_std, freq_assessment = calculate_frequency_variance(values)
+    freq_std, freq_assessment = calculate_frequency_variance(counts)
     print("\nFrequency variance:")
     print(f"  Standard deviation = {freq_std:.2f}")
     print(f"  {freq_assessment}")
 
+    # Distribution shape and sequence tests
+    values = list(stats.recent)
+    other_tests = [
+        randomness_tests.ks_test(counts),
+        randomness_tests.runs_test(values, stats.min_value, stats.max_value),
+        randomness_tests.serial_correlation_test(values),
+        randomness_tests.gap_test(values, stats.min_value, stats.max_value),
+    ]
+    print(f"\nDistribution and sequence tests (sequence tests over the last {len(values)} rolls):")
+    randomness_tests.print_results(other_tests)
+
     # Overall assessment
-    good_tests = sum([
+    assessments = [
         "GOOD" in chi_assessment or "EXCELLENT" in chi_assessment,
         "GOOD" in entropy_assessment or "EXCELLENT" in entropy_assessment,
         "GOOD" in freq_assessment
-    ])
+    ] + [result.assessment == "GOOD" for result in other_tests]
+    good_tests = sum(assessments)
 
     print("\nOVERALL ASSESSMENT:")
-    if good_tests >= 3:
+    if good_tests == len(assessments):
         print("✓ EXCELLENT - All tests indicate good randomness")
-    elif good_tests >= 2:
+    elif good_tests >= len(assessments) * 2 / 3:
         print("✓ GOOD - Most tests indicate acceptable randomness")
     elif good_tests >= 1:
         print("⚠ FAIR - Some concerns about randomness")
     else:
         print("✗ POOR - Multiple indicators suggest poor randomness")
 
-def main():
-    # Get max loops from command line argument, default to 600
-    max_loops = 600
-    if len(sys.argv) > 1:
-        try:
-            max_loops = int(sys.argv[1])
-        except ValueError:
-            print(f"Error: Invalid number of loops '{sys.argv[1]}'. Using default of 600.")
-
-    # Get required environment variables
-    graphql_url = os.getenv('GRAPHQL_URL')
-    user_pool_id = os.getenv('COGNITO_USER_POOL_ID')
-    client_id = os.getenv('COGNITO_CLIENT_ID')
-    region = os.getenv('AWS_REGION')
-    game_id = os.getenv('GAME_ID')
-    username = os.getenv('COGNITO_USERNAME')
-    password = os.getenv('COGNITO_PASSWORD')
-
-    if not all([graphql_url, user_pool_id, client_id, region, game_id, username, password]):
-        print("Error: Missing required environment variables")
-        print("Required: GRAPHQL_URL, COGNITO_USER_POOL_ID, COGNITO_CLIENT_ID, AWS_REGION, GAME_ID, COGNITO_USERNAME, COGNITO_PASSWORD")
-        sys.exit(1)
-
-    print("Getting Cognito access token...")
-    access_token = get_cognito_token(username, password, user_pool_id, client_id, region)
-
-    if not access_token:
-        print("Failed to get access token")
-        sys.exit(1)
-
-    # Continuous rolling loop
-    all_results = []
+def _env_number(name, default, convert=int):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return convert(value)
+    except ValueError:
+        print(f"Error: Invalid {name} '{value}'. Using default of {default}.")
+        return default
+
+def summarise_loop(loop_number, run, histogram):
+    """Record a loop's latencies and return its row for the live screen and report"""
+    loop_histogram = LatencyHistogram()
+    errors = 0
+    for sample in run.samples:
+        loop_histogram.record(sample.latency)
+        if not sample.result.is_success:
+            errors += 1
+    histogram.merge(loop_histogram)
+    return {
+        'loop': loop_number,
+        'errors': errors,
+        'error_rate': round(errors / len(run.samples), 4) if run.samples else 0.0,
+        'throughput': round(run.throughput, 1),
+        **loop_histogram.summary(),
+    }, loop_histogram
+
+def print_latency(row, loop_histogram, histogram):
+    """Print the loop's and the whole run's latency percentiles"""
+    print(f"\nLATENCY (ms) - {row['throughput']:.0f} rolls/s, "
+          f"{row['errors']} errors ({row['error_rate']:.1%})")
+    print(f"  This loop: {format_summary(loop_histogram)}")
+    print(f"  All loops: {format_summary(histogram)}")
+
+async def run_loops(client, game_id, max_loops, concurrency, rate, report_path=None):
+    """Roll ROLLS_PER_LOOP dice per loop, redrawing the screen after each loop"""
+    stats = RollStats()
     loop_count = 0
+    histogram = LatencyHistogram()
+    loops = []
+    rolling_seconds = 0.0
 
     try:
         while loop_count < max_loops:
-            # Get 100 more rolls
-            batch_results = make_100_rolls(access_token, graphql_url, game_id)
-            all_results.extend(batch_results)
+            # Get more rolls, reusing the pooled connections
+            run = await make_rolls(client, game_id, ROLLS_PER_LOOP, concurrency, rate)
+            for sample in run.samples:
+                stats.add(sample.result)
             loop_count += 1
+            rolling_seconds += run.elapsed
+            row, loop_histogram = summarise_loop(loop_count, run, histogram)
+            loops.append(row)
 
             # Clear screen and draw graph
             print('\033[2J\033[H', end='')
-            print(f"Loop {loop_count}/{max_loops} - Total rolls: {len(all_results)}")
-            draw_roll_graph(all_results)
-            analyze_randomness(all_results)
+            print(f"Loop {loop_count}/{max_loops} - Total rolls: {stats.total} - "
+                  f"{run.throughput:.0f} rolls/s via {client.transport.name}")
+            draw_roll_graph(stats)
+            print_latency(row, loop_histogram, histogram)
+            analyze_randomness(stats)
 
-            # Sleep before next batch (intentional: controls update rate for visualization)
+            # Pause before next batch (intentional: controls update rate for visualization)
             # nosemgrep: arbitrary-sleep - B608 - stop us from spamming the server
-            time.sleep(0.5)
+            await asyncio.sleep(0.5)
+
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print(f"\nStopped after {loop_count} loops with {stats.total} total rolls")
+    finally:
+        await client.close()
+        if report_path:
+            errors = sum(row['errors'] for row in loops)
+            export_report(report_path, loops, histogram, totals={
+                'errors': errors,
+                'error_rate': round(errors / histogram.count, 4) if histogram.count else 0.0,
+                'throughput': round(histogram.count / rolling_seconds, 1) if rolling_seconds else 0.0,
+            }, metadata={
+                'graphql_url': client.transport.url,
+                'transport': client.transport.name,
+                'concurrency': concurrency,
+                'rate': rate,
+                'rolls_per_loop': ROLLS_PER_LOOP,
+            })
+            print(f"Latency report written to {report_path}")
 
-    except KeyboardInterrupt:
-        print(f"\nStopped after {loop_count} loops with {len(all_results)} total rolls")
+def main():
+    # Get max loops from command line argument, default to 600
+    max_loops = 600
+    if len(sys.argv) > 1 and sys.argv[1]:
+        try:
+            max_loops = int(sys.argv[1])
+        except ValueError:
+            print(f"Error: Invalid number of loops '{sys.argv[1]}'. Using default of 600.")
+
+    concurrency = _env_number('ROLL_CONCURRENCY', DEFAULT_CONCURRENCY)
+    rate = _env_number('ROLL_RATE', None, float)
+
+    if os.getenv('MOCK_GRAPHQL'):
+        from mock_graphql_server import start_mock_server
+        graphql_url, _ = start_mock_server()
+        os.environ['COGNITO_ENDPOINT'] = graphql_url
+        client_id, region, game_id = 'mock-client', 'mock', 'mock-game'
+        username, password = 'mock-player', 'mock-password'
+        print(f"Using mock GraphQL API at {graphql_url}")
+    else:
+        # Get required environment variables
+        graphql_url = os.getenv('GRAPHQL_URL')
+        client_id = os.getenv('COGNITO_CLIENT_ID')
+        region = os.getenv('AWS_REGION')
+        game_id = os.getenv('GAME_ID')
+        username = os.getenv('COGNITO_USERNAME')
+        password = os.getenv('COGNITO_PASSWORD')
+
+        if not all([graphql_url, client_id, region, game_id, username, password]):
+            print("Error: Missing required environment variables")
+            print("Required: GRAPHQL_URL, COGNITO_CLIENT_ID, AWS_REGION, GAME_ID, COGNITO_USERNAME, COGNITO_PASSWORD")
+            print("Or set MOCK_GRAPHQL=1 to use a local mock API")
+            sys.exit(1)
+
+    async def run():
+        # The client's transports must be created inside the running event loop
+        print("Getting Cognito access token...")
+        try:
+            client = await sign_in(graphql_url, username, password, client_id, region, concurrency)
+        except (AuthError, TransportError) as e:
+            print(f"Failed to get access token: {str(e)}")
+            sys.exit(1)
+        await run_loops(client, game_id, max_loops, concurrency, rate, os.getenv('LATENCY_REPORT'))
 
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
     main()
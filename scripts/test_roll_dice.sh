@@ -1,6 +1,27 @@
 #!/bin/bash
 set -e
 
+# LATENCY_REPORT=path.json (or .csv) exports latency percentiles when the run ends
+REPORT_ARGS=()
+if [ -n "$LATENCY_REPORT" ]; then
+    REPORT_DIR=$(cd "$(dirname "$LATENCY_REPORT")" && pwd)
+    REPORT_ARGS=(-v "$REPORT_DIR:/reports" -e LATENCY_REPORT="/reports/$(basename "$LATENCY_REPORT")")
+fi
+
+# MOCK_GRAPHQL=1 runs against a local mock API, with no deployment or credentials needed
+if [ -n "$MOCK_GRAPHQL" ]; then
+    echo "Running rollDice test against the mock API in Docker container..."
+    docker run --rm \
+        -v "$(pwd)/scripts:/scripts" \
+        -e MOCK_GRAPHQL=1 \
+        -e ROLL_CONCURRENCY="$ROLL_CONCURRENCY" \
+        -e ROLL_RATE="$ROLL_RATE" \
+        "${REPORT_ARGS[@]}" \
+        python:3.11-slim \
+        python -u /scripts/test_roll_dice.py "$1"
+    exit 0
+fi
+
 # Change to correct terraform directory and get outputs
 cd terraform/environment/wildsea-dev
 TERRAFORM_OUTPUT=$(AWS_PROFILE=wildsea terraform output -json)
@@ -33,8 +54,10 @@ echo "Game ID: $GAME_ID"
 echo "Username: $COGNITO_USERNAME"
 
 # Build docker run command with required environment variables
+# httpx gives HTTP/2 multiplexing; without it the script falls back to an HTTP/1.1 keep-alive pool.
+# NumPy speeds up the randomness tests; they run in pure Python without it.
 docker run --rm \
-    -v "$(pwd)/scripts/test_roll_dice.py:/test_roll_dice.py" \
+    -v "$(pwd)/scripts:/scripts" \
     -e GRAPHQL_URL="$GRAPHQL_URL" \
     -e COGNITO_USER_POOL_ID="$COGNITO_USER_POOL_ID" \
     -e COGNITO_CLIENT_ID="$COGNITO_CLIENT_ID" \
@@ -42,5 +65,8 @@ docker run --rm \
     -e GAME_ID="$GAME_ID" \
     -e COGNITO_USERNAME="$COGNITO_USERNAME" \
     -e COGNITO_PASSWORD="$COGNITO_PASSWORD" \
+    -e ROLL_CONCURRENCY="$ROLL_CONCURRENCY" \
+    -e ROLL_RATE="$ROLL_RATE" \
+    "${REPORT_ARGS[@]}" \
     python:3.11-slim \
-    python -u /test_roll_dice.py "$1"
\ No newline at end of file
+    sh -c "pip install --quiet 'httpx[http2]' numpy && python -u /scripts/test_roll_dice.py \"\$1\"" -- "$1"
\ No newline at end of file
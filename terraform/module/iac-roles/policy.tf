@@ -70,6 +70,8 @@ data "aws_iam_policy_document" "ro" {
       "rum:ListRumMetricsDestinations",
       "cloudwatch:DescribeAlarms",
       "cloudwatch:ListTagsForResource",
+      "lambda:GetEventSourceMapping",
+      "lambda:ListEventSourceMappings",
     ]
     resources = [
       "*"
@@ -169,6 +171,7 @@ data "aws_iam_policy_document" "ro" {
       "lambda:ListTags",
       "lambda:ListVersionsByFunction",
       "lambda:GetFunctionCodeSigningConfig",
+      "lambda:GetPolicy",
     ]
     resources = [
       "arn:${data.aws_partition.current.id}:states:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:stateMachine:*",
@@ -219,6 +222,8 @@ data "aws_iam_policy_document" "rw" {
       "dynamodb:PutItem",
       "dynamodb:UpdateItem",
       "dynamodb:DeleteItem",
+      "dynamodb:Query",
+      "dynamodb:BatchWriteItem",
       "dynamodb:TagResource",
       "dynamodb:UntagResource",
       "dynamodb:Update*",
@@ -275,6 +280,9 @@ data "aws_iam_policy_document" "rw" {
       "cloudfront:*",
       "rum:*",
       "cloudwatch:*",
+      "lambda:CreateEventSourceMapping",
+      "lambda:DeleteEventSourceMapping",
+      "lambda:UpdateEventSourceMapping",
     ]
     resources = [
       "*"
@@ -419,6 +427,7 @@ data "aws_iam_policy_document" "rw" {
       "events:CreateEventBus",
       "events:DeleteEventBus",
       "events:PutPermission",
+      "events:RemovePermission",
       "events:PutRule",
       "events:DeleteRule",
       "events:PutTargets",
@@ -446,6 +455,9 @@ data "aws_iam_policy_document" "rw" {
       "lambda:UntagResource",
       "lambda:ListVersionsByFunction",
       "lambda:GetFunctionCodeSigningConfig",
+      "lambda:AddPermission",
+      "lambda:RemovePermission",
+      "lambda:GetPolicy",
     ]
     resources = [
       "arn:${data.aws_partition.current.id}:states:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:stateMachine:*",
@@ -518,6 +530,11 @@ data "aws_iam_policy_document" "rw_boundary" {
       "logs:ListLogDeliveries",
       "logs:PutResourcePolicy",
       "logs:DescribeResourcePolicies",
+      "lambda:CreateEventSourceMapping",
+      "lambda:DeleteEventSourceMapping",
+      "lambda:UpdateEventSourceMapping",
+      "lambda:GetEventSourceMapping",
+      "lambda:ListEventSourceMappings",
     ]
     resources = [
       "*"
@@ -659,6 +676,9 @@ data "aws_iam_policy_document" "rw_boundary" {
       "lambda:UntagResource",
       "lambda:ListVersionsByFunction",
       "lambda:GetFunctionCodeSigningConfig",
+      "lambda:AddPermission",
+      "lambda:RemovePermission",
+      "lambda:GetPolicy",
     ]
     resources = [
       "arn:${data.aws_partition.current.id}:states:${data.aws_region.current.id}:${data.aws_caller_identity.current.account_id}:stateMachine:*",
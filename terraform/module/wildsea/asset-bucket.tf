@@ -436,7 +436,7 @@ resource "aws_pipes_pipe" "asset_uploads_pipe" {
     }
   }
 
-  # Step Function enrichment to extract gameId, sectionId, assetId from S3 object key
+  # Step Function enrichment to extract gameId, sectionId, assetId from S3 object key, and its size
   enrichment = aws_sfn_state_machine.asset_path_parser.arn
 
   target_parameters {
@@ -544,7 +544,7 @@ resource "aws_sfn_state_machine" "asset_path_parser" {
   }
 
   definition = jsonencode({
-    Comment       = "Extract gameId, sectionId, assetId from S3 object key using JSONata"
+    Comment       = "Extract gameId, sectionId, assetId from S3 object key, and its size, using JSONata"
     StartAt       = "ParseS3Path"
     QueryLanguage = "JSONata"
     States = {
@@ -556,6 +556,7 @@ resource "aws_sfn_state_machine" "asset_path_parser" {
           assetId : "{% ($parse($states.input[0].body).Records[0].s3.object.key ~> $split('/'))[5] %}"
           bucket : "{% $parse($states.input[0].body).Records[0].s3.bucket.name %}"
           key : "{% $parse($states.input[0].body).Records[0].s3.object.key %}"
+          sizeBytes : "{% $parse($states.input[0].body).Records[0].s3.object.size %}"
           eventName : "{% $parse($states.input[0].body).Records[0].eventName %}"
         }
         End = true
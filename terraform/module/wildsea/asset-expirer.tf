@@ -0,0 +1,136 @@
+# Asset expirer infrastructure
+# Schedule -> Lambda sweeping GSI2 for pending assets that are due -> ExpireAsset events,
+# which the rule in deleter.tf passes on to _expireAsset. Each sweep resumes from the
+# bucket the last one recorded in the EXPIRYSWEEP item.
+
+resource "aws_lambda_function" "expire_assets" {
+  filename      = data.archive_file.expire_assets_zip.output_path
+  function_name = "${var.prefix}-expire-assets"
+  role          = aws_iam_role.lambda_expire_assets.arn
+  handler       = "lambda_function.lambda_handler"
+  runtime       = "python3.12"
+  timeout       = 60
+
+  environment {
+    variables = {
+      TABLE_NAME         = aws_dynamodb_table.table.name
+      EVENT_BUS_NAME     = aws_cloudwatch_event_bus.bus.name
+      EXPIRE_SOURCE      = local.expire_asset_source
+      EXPIRE_DETAIL_TYPE = local.expire_asset_detail_type
+    }
+  }
+
+  source_code_hash = data.archive_file.expire_assets_zip.output_base64sha256
+
+  tags = {
+    Name = "${var.prefix}-expire-assets"
+  }
+}
+
+data "archive_file" "expire_assets_zip" {
+  type        = "zip"
+  output_path = "${path.module}/../../../lambda/expireAssets.zip"
+
+  source {
+    content  = file("${path.module}/../../../lambda/expireAssets/lambda_function.py")
+    filename = "lambda_function.py"
+  }
+
+  source {
+    content  = file("${path.module}/../../../lambda/common/lambda_utils.py")
+    filename = "lambda_utils.py"
+  }
+}
+
+resource "aws_iam_role" "lambda_expire_assets" {
+  name               = "${var.prefix}-lambda-expire-assets"
+  assume_role_policy = data.aws_iam_policy_document.lambda_generate_presigned_url_assume.json
+
+  tags = {
+    Name = "${var.prefix}-lambda-expire-assets"
+  }
+}
+
+resource "aws_iam_role_policy" "lambda_expire_assets" {
+  name   = "${var.prefix}-lambda-expire-assets"
+  role   = aws_iam_role.lambda_expire_assets.id
+  policy = data.aws_iam_policy_document.lambda_expire_assets.json
+}
+
+data "aws_iam_policy_document" "lambda_expire_assets" {
+  statement {
+    effect = "Allow"
+    actions = [
+      "logs:CreateLogStream",
+      "logs:PutLogEvents"
+    ]
+    resources = ["${aws_cloudwatch_log_group.lambda_expire_assets.arn}:*"]
+  }
+
+  statement {
+    sid = "QueryExpiryIndex"
+    actions = [
+      "dynamodb:Query",
+      "dynamodb:Scan"
+    ]
+    resources = [
+      "${aws_dynamodb_table.table.arn}/index/GSI2"
+    ]
+  }
+
+  statement {
+    sid = "SweepCursor"
+    actions = [
+      "dynamodb:GetItem",
+      "dynamodb:PutItem"
+    ]
+    resources = [
+      aws_dynamodb_table.table.arn
+    ]
+    condition {
+      test     = "ForAllValues:StringEquals"
+      variable = "dynamodb:LeadingKeys"
+      values   = ["EXPIRYSWEEP"]
+    }
+  }
+
+  statement {
+    sid = "SendToBus"
+    actions = [
+      "events:PutEvents"
+    ]
+    resources = [
+      aws_cloudwatch_event_bus.bus.arn
+    ]
+  }
+}
+
+resource "aws_cloudwatch_log_group" "lambda_expire_assets" {
+  name              = "/aws/lambda/${var.prefix}-expire-assets"
+  retention_in_days = 14
+
+  tags = {
+    Name = "${var.prefix}-lambda-expire-assets"
+  }
+}
+
+# On the default bus - scheduled rules can't be created on custom buses
+resource "aws_cloudwatch_event_rule" "expire_assets_schedule" {
+  name                = "${var.prefix}-expire-assets-schedule"
+  description         = "Sweep for pending assets whose upload window has passed"
+  schedule_expression = "rate(1 minute)"
+}
+
+resource "aws_cloudwatch_event_target" "expire_assets_schedule" {
+  target_id = "lambda-expire-assets"
+  rule      = aws_cloudwatch_event_rule.expire_assets_schedule.name
+  arn       = aws_lambda_function.expire_assets.arn
+}
+
+resource "aws_lambda_permission" "expire_assets_schedule" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.expire_assets.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.expire_assets_schedule.arn
+}
@@ -1,162 +1,138 @@
 # Asset mover infrastructure
-# DynamoDB Stream -> Pipe -> Step Function to move assets from incoming/ to asset/
+# DynamoDB Stream -> Lambda (in batches) to move assets from incoming/ to asset/,
+# sharing originals with identical content
+
+resource "aws_lambda_function" "move_assets" {
+  filename      = data.archive_file.move_assets_zip.output_path
+  function_name = "${var.prefix}-move-assets"
+  role          = aws_iam_role.lambda_move_assets.arn
+  handler       = "lambda_function.lambda_handler"
+  runtime       = "python3.12"
+  timeout       = 300
+  memory_size   = 1024 # Hashing is CPU-bound; CPU scales with memory
+
+  environment {
+    variables = {
+      ASSET_BUCKET              = aws_s3_bucket.assets.bucket
+      TABLE_NAME                = aws_dynamodb_table.table.name
+      EVENT_BUS_NAME            = aws_cloudwatch_event_bus.bus.name
+      ASSET_STREAM_BUFFER_BYTES = tostring(4 * 1024 * 1024) # Per concurrent move
+    }
+  }
 
-resource "aws_cloudwatch_log_group" "move_asset_pipe" {
-  # checkov:skip=CKV_AWS_158:AWS-managed keys are sufficient for pipe logs
-  # checkov:skip=CKV_AWS_338:30-day retention is sufficient for pipe logs
-  # nosemgrep: aws-cloudwatch-log-group-aws-managed-key
-  name              = "/aws/vendedlogs/pipes/${var.prefix}-move-asset"
-  retention_in_days = 30
+  source_code_hash = data.archive_file.move_assets_zip.output_base64sha256
 
   tags = {
-    Application = var.prefix
+    Name = "${var.prefix}-move-assets"
   }
 }
 
-resource "aws_iam_role" "move_asset_pipe" {
-  name               = "${var.prefix}-move-asset-pipe"
-  assume_role_policy = data.aws_iam_policy_document.move_asset_pipe_assume.json
-}
+data "archive_file" "move_assets_zip" {
+  type        = "zip"
+  output_path = "${path.module}/../../../lambda/moveAssets.zip"
 
-data "aws_iam_policy_document" "move_asset_pipe_assume" {
-  statement {
-    actions = ["sts:AssumeRole"]
-    principals {
-      type        = "Service"
-      identifiers = ["pipes.amazonaws.com"]
-    }
+  source {
+    content  = file("${path.module}/../../../lambda/moveAssets/lambda_function.py")
+    filename = "lambda_function.py"
   }
-}
-
-resource "aws_iam_policy" "move_asset_pipe" {
-  name   = "${var.prefix}-move-asset-pipe"
-  policy = data.aws_iam_policy_document.move_asset_pipe.json
-}
 
-data "aws_iam_policy_document" "move_asset_pipe" {
-  statement {
-    sid = "ReadStream"
-    actions = [
-      "dynamodb:DescribeStream",
-      "dynamodb:GetRecords",
-      "dynamodb:GetShardIterator",
-      "dynamodb:ListStreams",
-    ]
-    resources = [
-      aws_dynamodb_table.table.stream_arn,
-    ]
+  source {
+    content  = file("${path.module}/../../../lambda/common/asset_dedup.py")
+    filename = "asset_dedup.py"
   }
 
-  statement {
-    sid = "InvokeStepFunction"
-    actions = [
-      "states:StartExecution"
-    ]
-    resources = [
-      aws_sfn_state_machine.move_asset_sm.arn
-    ]
+  source {
+    content  = file("${path.module}/../../../lambda/common/asset_stream.py")
+    filename = "asset_stream.py"
   }
 
-  statement {
-    sid = "WriteLogs"
-    actions = [
-      "logs:CreateLogStream",
-      "logs:PutLogEvents",
-    ]
-    resources = [
-      "${aws_cloudwatch_log_group.move_asset_pipe.arn}:*",
-    ]
+  source {
+    content  = file("${path.module}/../../../lambda/common/lambda_utils.py")
+    filename = "lambda_utils.py"
   }
 }
 
-resource "aws_iam_role_policy_attachment" "move_asset_pipe" {
-  role       = aws_iam_role.move_asset_pipe.name
-  policy_arn = aws_iam_policy.move_asset_pipe.arn
-}
-
-resource "aws_pipes_pipe" "move_asset_pipe" {
-  name     = "${var.prefix}-move-asset"
-  role_arn = aws_iam_role.move_asset_pipe.arn
-  source   = aws_dynamodb_table.table.stream_arn
-  target   = aws_sfn_state_machine.move_asset_sm.arn
-  source_parameters {
-    dynamodb_stream_parameters {
-      batch_size                         = 1
-      starting_position                  = "LATEST"
-      maximum_record_age_in_seconds      = 60
-      maximum_batching_window_in_seconds = 3
-      maximum_retry_attempts             = 3
-    }
-    filter_criteria {
-      filter {
-        pattern = jsonencode({
-          eventName = ["MODIFY"]
-          dynamodb = {
-            NewImage = {
-              type = {
-                S = ["ASSET"]
-              }
-              status = {
-                S = ["FINALISING"]
-              }
+resource "aws_lambda_event_source_mapping" "move_assets" {
+  event_source_arn                   = aws_dynamodb_table.table.stream_arn
+  function_name                      = aws_lambda_function.move_assets.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 3
+  maximum_record_age_in_seconds      = 3600
+  maximum_retry_attempts             = 3
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({
+        eventName = ["MODIFY"]
+        dynamodb = {
+          NewImage = {
+            type = {
+              S = ["ASSET"]
+            }
+            status = {
+              S = ["FINALISING"]
             }
           }
-        })
-      }
-    }
-  }
-  target_parameters {
-    step_function_state_machine_parameters {
-      invocation_type = "FIRE_AND_FORGET"
-    }
-  }
-  log_configuration {
-    level = "ERROR"
-    cloudwatch_logs_log_destination {
-      log_group_arn = aws_cloudwatch_log_group.move_asset_pipe.arn
+          # Only the transition into FINALISING - the mover itself updates
+          # FINALISING assets when it records their content hash
+          OldImage = {
+            status = {
+              S = ["PENDING"]
+            }
+          }
+        }
+      })
     }
   }
 }
 
-resource "aws_cloudwatch_log_group" "move_asset_sm" {
-  # checkov:skip=CKV_AWS_158:AWS-managed keys are sufficient for Step Function logs
-  # checkov:skip=CKV_AWS_338:30-day retention is sufficient for Step Function logs
-  # nosemgrep: aws-cloudwatch-log-group-aws-managed-key
-  name              = "/aws/vendedlogs/states/${var.prefix}-move-asset"
-  retention_in_days = 30
+resource "aws_iam_role" "lambda_move_assets" {
+  name               = "${var.prefix}-lambda-move-assets"
+  assume_role_policy = data.aws_iam_policy_document.lambda_generate_presigned_url_assume.json
 
   tags = {
-    Application = var.prefix
+    Name = "${var.prefix}-lambda-move-assets"
   }
 }
 
-resource "aws_iam_role" "move_asset_sm" {
-  name               = "${var.prefix}-move-asset"
-  assume_role_policy = data.aws_iam_policy_document.move_asset_sm_assume.json
+resource "aws_iam_role_policy" "lambda_move_assets" {
+  name   = "${var.prefix}-lambda-move-assets"
+  role   = aws_iam_role.lambda_move_assets.id
+  policy = data.aws_iam_policy_document.lambda_move_assets.json
 }
 
-data "aws_iam_policy_document" "move_asset_sm_assume" {
+data "aws_iam_policy_document" "lambda_move_assets" {
   statement {
-    actions = ["sts:AssumeRole"]
-    principals {
-      type        = "Service"
-      identifiers = ["states.amazonaws.com"]
-    }
+    effect = "Allow"
+    actions = [
+      "logs:CreateLogStream",
+      "logs:PutLogEvents"
+    ]
+    resources = ["${aws_cloudwatch_log_group.lambda_move_assets.arn}:*"]
   }
-}
 
-resource "aws_iam_policy" "move_asset_sm" {
-  name   = "${var.prefix}-move-asset"
-  policy = data.aws_iam_policy_document.move_asset_sm.json
-}
+  statement {
+    sid = "ReadStream"
+    actions = [
+      "dynamodb:DescribeStream",
+      "dynamodb:GetRecords",
+      "dynamodb:GetShardIterator",
+      "dynamodb:ListStreams",
+    ]
+    resources = [
+      aws_dynamodb_table.table.stream_arn,
+    ]
+  }
 
-data "aws_iam_policy_document" "move_asset_sm" {
   statement {
     sid = "S3Operations"
     actions = [
       "s3:GetObject",
       "s3:PutObject",
-      "s3:DeleteObject"
+      "s3:DeleteObject",
+      "s3:AbortMultipartUpload"
     ]
     resources = [
       "${aws_s3_bucket.assets.arn}/incoming/*",
@@ -164,57 +140,47 @@ data "aws_iam_policy_document" "move_asset_sm" {
     ]
   }
 
+  # Without ListBucket, S3 answers a missing key with AccessDenied rather than
+  # NoSuchKey, so uploads that were already moved couldn't be skipped
   statement {
-    sid = "WriteLogs"
+    sid = "S3List"
     actions = [
-      "logs:CreateLogDelivery",
-      "logs:CreateLogStream",
-      "logs:GetLogDelivery",
-      "logs:UpdateLogDelivery",
-      "logs:DeleteLogDelivery",
-      "logs:ListLogDeliveries",
-      "logs:PutLogEvents",
-      "logs:PutResourcePolicy",
-      "logs:DescribeResourcePolicies",
-      "logs:DescribeLogGroups",
+      "s3:ListBucket"
+    ]
+    resources = [
+      aws_s3_bucket.assets.arn
     ]
-    resources = ["*"]
   }
 
   statement {
-    sid = "XRayTracing"
+    sid = "ContentIndex"
     actions = [
-      "xray:PutTraceSegments",
-      "xray:PutTelemetryRecords"
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
+      "dynamodb:DeleteItem",
+      "dynamodb:UpdateItem"
+    ]
+    resources = [
+      aws_dynamodb_table.table.arn
     ]
-    resources = ["*"]
   }
-}
 
-resource "aws_iam_role_policy_attachment" "move_asset_sm" {
-  role       = aws_iam_role.move_asset_sm.name
-  policy_arn = aws_iam_policy.move_asset_sm.arn
+  statement {
+    sid = "SendToBus"
+    actions = [
+      "events:PutEvents"
+    ]
+    resources = [
+      aws_cloudwatch_event_bus.bus.arn
+    ]
+  }
 }
 
-resource "aws_sfn_state_machine" "move_asset_sm" {
-  name     = "${var.prefix}-move-asset"
-  role_arn = aws_iam_role.move_asset_sm.arn
-  tracing_configuration {
-    enabled = true
-  }
-  logging_configuration {
-    log_destination        = "${aws_cloudwatch_log_group.move_asset_sm.arn}:*"
-    include_execution_data = true
-    level                  = "ALL"
+resource "aws_cloudwatch_log_group" "lambda_move_assets" {
+  name              = "/aws/lambda/${var.prefix}-move-assets"
+  retention_in_days = 14
+
+  tags = {
+    Name = "${var.prefix}-lambda-move-assets"
   }
-  definition = jsonencode(yamldecode(templatefile(
-    "${path.module}/../../../sfn/asset-mover.yaml",
-    {
-      bucket_name = aws_s3_bucket.assets.bucket
-    }
-  )))
-  depends_on = [
-    aws_iam_policy.move_asset_sm,
-    aws_iam_role_policy_attachment.move_asset_sm,
-  ]
 }
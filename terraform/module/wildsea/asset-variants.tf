@@ -0,0 +1,107 @@
+# Asset variant infrastructure
+# asset.promoted event -> Lambda to write resized WebP/AVIF copies under variantsPrefix
+
+resource "aws_lambda_function" "generate_asset_variants" {
+  filename      = data.archive_file.generate_asset_variants_zip.output_path
+  function_name = "${var.prefix}-generate-asset-variants"
+  role          = aws_iam_role.lambda_generate_asset_variants.arn
+  handler       = "lambda_function.lambda_handler"
+  runtime       = "python3.12"
+  architectures = ["x86_64"] # Must match the platform in the Makefile's pip install
+  timeout       = 60
+  memory_size   = 1024 # Decoding and AVIF encoding are CPU-bound; CPU scales with memory
+
+  environment {
+    variables = {
+      # Ranged GET cache for the original; decoded pixels are bounded separately by MAX_IMAGE_PIXELS
+      ASSET_STREAM_BUFFER_BYTES = tostring(16 * 1024 * 1024)
+    }
+  }
+
+  source_code_hash = data.archive_file.generate_asset_variants_zip.output_base64sha256
+
+  tags = {
+    Name = "${var.prefix}-generate-asset-variants"
+  }
+}
+
+# ZIP the Lambda code along with Pillow - built by `make lambda/generateAssetVariants/build/.installed`
+data "archive_file" "generate_asset_variants_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../../../lambda/generateAssetVariants/build"
+  output_path = "${path.module}/../../../lambda/generateAssetVariants.zip"
+  excludes    = [".installed"]
+}
+
+resource "aws_iam_role" "lambda_generate_asset_variants" {
+  name               = "${var.prefix}-lambda-generate-asset-variants"
+  assume_role_policy = data.aws_iam_policy_document.lambda_generate_presigned_url_assume.json
+
+  tags = {
+    Name = "${var.prefix}-lambda-generate-asset-variants"
+  }
+}
+
+resource "aws_iam_role_policy" "lambda_generate_asset_variants" {
+  name   = "${var.prefix}-lambda-generate-asset-variants"
+  role   = aws_iam_role.lambda_generate_asset_variants.id
+  policy = data.aws_iam_policy_document.lambda_generate_asset_variants.json
+}
+
+data "aws_iam_policy_document" "lambda_generate_asset_variants" {
+  statement {
+    effect = "Allow"
+    actions = [
+      "logs:CreateLogStream",
+      "logs:PutLogEvents"
+    ]
+    resources = ["${aws_cloudwatch_log_group.lambda_generate_asset_variants.arn}:*"]
+  }
+
+  statement {
+    sid = "ReadOriginals"
+    actions = [
+      "s3:GetObject"
+    ]
+    resources = ["${aws_s3_bucket.assets.arn}/asset/*/original"]
+  }
+
+  statement {
+    sid = "WriteVariants"
+    actions = [
+      "s3:PutObject",
+      "s3:AbortMultipartUpload"
+    ]
+    resources = ["${aws_s3_bucket.assets.arn}/asset/*/variants/*"]
+  }
+}
+
+resource "aws_cloudwatch_log_group" "lambda_generate_asset_variants" {
+  name              = "/aws/lambda/${var.prefix}-generate-asset-variants"
+  retention_in_days = 14
+
+  tags = {
+    Name = "${var.prefix}-lambda-generate-asset-variants"
+  }
+}
+
+# Second target on the promotion rule, alongside _promoteAsset
+resource "aws_cloudwatch_event_target" "generate_asset_variants_target" {
+  target_id      = "lambda-generate-asset-variants"
+  rule           = aws_cloudwatch_event_rule.promote_asset_rule.name
+  arn            = aws_lambda_function.generate_asset_variants.arn
+  event_bus_name = aws_cloudwatch_event_bus.bus.name
+
+  retry_policy {
+    maximum_event_age_in_seconds = 3600
+    maximum_retry_attempts       = 3
+  }
+}
+
+resource "aws_lambda_permission" "generate_asset_variants_events" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.generate_asset_variants.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.promote_asset_rule.arn
+}
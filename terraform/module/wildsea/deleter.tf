@@ -1,4 +1,4 @@
-// ddb stream -> pipe -> Step function -> bus -> rules to delete left-over players 
+// ddb stream -> Lambda -> bus -> rules to delete left-over players, with the rest of the game deleted directly
 locals {
   graphql_hostname = split("/", aws_appsync_graphql_api.graphql.uris["GRAPHQL"])[2]
   graphql_id       = split(".", local.graphql_hostname)[0]
@@ -87,39 +87,107 @@ locals {
   promote_asset_detail_type       = "ObjectCreated"
 }
 
-resource "aws_cloudwatch_log_group" "delete_player_pipe" {
-  # checkov:skip=CKV_AWS_158:AWS-managed keys are sufficient for pipe logs
-  # checkov:skip=CKV_AWS_338:30-day retention is sufficient for pipe logs
-  # nosemgrep: aws-cloudwatch-log-group-aws-managed-key
-  name              = "/aws/vendedlogs/pipes/${var.prefix}-delete"
-  retention_in_days = 30
+resource "aws_lambda_function" "delete_game" {
+  filename      = data.archive_file.delete_game_zip.output_path
+  function_name = "${var.prefix}-delete-game"
+  role          = aws_iam_role.lambda_delete_game.arn
+  handler       = "lambda_function.lambda_handler"
+  runtime       = "python3.12"
+  timeout       = 300
+
+  environment {
+    variables = {
+      TABLE_NAME                = aws_dynamodb_table.table.name
+      ASSET_BUCKET              = aws_s3_bucket.assets.bucket
+      EVENT_BUS_NAME            = aws_cloudwatch_event_bus.bus.name
+      DELETE_SOURCE             = local.delete_source
+      DELETE_PLAYER_DETAIL_TYPE = local.delete_player_detail_type
+    }
+  }
+
+  source_code_hash = data.archive_file.delete_game_zip.output_base64sha256
 
   tags = {
-    Application = var.prefix
+    Name = "${var.prefix}-delete-game"
   }
 }
 
-resource "aws_iam_role" "delete_player_pipe" {
-  name               = "${var.prefix}-delete-pipe"
-  assume_role_policy = data.aws_iam_policy_document.delete_pipe_assume.json
+data "archive_file" "delete_game_zip" {
+  type        = "zip"
+  output_path = "${path.module}/../../../lambda/deleteGame.zip"
+
+  source {
+    content  = file("${path.module}/../../../lambda/deleteGame/lambda_function.py")
+    filename = "lambda_function.py"
+  }
+
+  source {
+    content  = file("${path.module}/../../../lambda/common/asset_dedup.py")
+    filename = "asset_dedup.py"
+  }
+
+  source {
+    content  = file("${path.module}/../../../lambda/common/asset_stream.py")
+    filename = "asset_stream.py"
+  }
+
+  source {
+    content  = file("${path.module}/../../../lambda/common/lambda_utils.py")
+    filename = "lambda_utils.py"
+  }
 }
 
-data "aws_iam_policy_document" "delete_pipe_assume" {
-  statement {
-    actions = ["sts:AssumeRole"]
-    principals {
-      type        = "Service"
-      identifiers = ["pipes.amazonaws.com"]
+resource "aws_lambda_event_source_mapping" "delete_game" {
+  event_source_arn                   = aws_dynamodb_table.table.stream_arn
+  function_name                      = aws_lambda_function.delete_game.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 10
+  maximum_batching_window_in_seconds = 3
+  maximum_record_age_in_seconds      = 3600
+  maximum_retry_attempts             = 3
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({
+        eventName = ["REMOVE"]
+        dynamodb = {
+          Keys = {
+            SK = {
+              S = ["GAME"]
+            }
+          }
+        }
+      })
     }
   }
 }
 
-resource "aws_iam_policy" "delete_player_pipe" {
-  name   = "${var.prefix}-delete-pipe"
-  policy = data.aws_iam_policy_document.delete_player_pipe.json
+resource "aws_iam_role" "lambda_delete_game" {
+  name               = "${var.prefix}-lambda-delete-game"
+  assume_role_policy = data.aws_iam_policy_document.lambda_generate_presigned_url_assume.json
+
+  tags = {
+    Name = "${var.prefix}-lambda-delete-game"
+  }
+}
+
+resource "aws_iam_role_policy" "lambda_delete_game" {
+  name   = "${var.prefix}-lambda-delete-game"
+  role   = aws_iam_role.lambda_delete_game.id
+  policy = data.aws_iam_policy_document.lambda_delete_game.json
 }
 
-data "aws_iam_policy_document" "delete_player_pipe" {
+data "aws_iam_policy_document" "lambda_delete_game" {
+  statement {
+    effect = "Allow"
+    actions = [
+      "logs:CreateLogStream",
+      "logs:PutLogEvents"
+    ]
+    resources = ["${aws_cloudwatch_log_group.lambda_delete_game.arn}:*"]
+  }
+
   statement {
     sid = "ReadStream"
     actions = [
@@ -134,140 +202,68 @@ data "aws_iam_policy_document" "delete_player_pipe" {
   }
 
   statement {
-    sid = "InvokeStepFunction"
+    sid = "CleanUpGame"
     actions = [
-      "states:StartExecution"
+      "dynamodb:Query",
+      "dynamodb:BatchWriteItem"
     ]
     resources = [
-      aws_sfn_state_machine.delete_player_sm.arn
+      aws_dynamodb_table.table.arn,
     ]
   }
 
   statement {
-    sid = "WriteLogs"
+    sid = "ContentIndex"
     actions = [
-      "logs:CreateLogStream",
-      "logs:PutLogEvents",
+      "dynamodb:GetItem",
+      "dynamodb:UpdateItem",
+      "dynamodb:DeleteItem"
     ]
     resources = [
-      "${aws_cloudwatch_log_group.delete_player_pipe.arn}:*",
+      aws_dynamodb_table.table.arn,
     ]
   }
-}
-
-resource "aws_iam_role_policy_attachment" "delete_player_pipe" {
-  role       = aws_iam_role.delete_player_pipe.name
-  policy_arn = aws_iam_policy.delete_player_pipe.arn
-}
-
-resource "aws_pipes_pipe" "delete_player_pipe" {
-  name     = "${var.prefix}-delete"
-  role_arn = aws_iam_role.delete_player_pipe.arn
-  source   = aws_dynamodb_table.table.stream_arn
-  target   = aws_sfn_state_machine.delete_player_sm.arn
-  source_parameters {
-    dynamodb_stream_parameters {
-      batch_size                         = 1
-      starting_position                  = "LATEST"
-      maximum_record_age_in_seconds      = 60
-      maximum_batching_window_in_seconds = 3
-      maximum_retry_attempts             = 3
-    }
-    filter_criteria {
-      filter {
-        pattern = jsonencode({
-          eventName = ["REMOVE"]
-          dynamodb = {
-            Keys = {
-              SK = {
-                S = ["GAME"]
-              }
-            }
-          }
-        })
-      }
-    }
-  }
-  target_parameters {
-    step_function_state_machine_parameters {
-      invocation_type = "FIRE_AND_FORGET"
-    }
-  }
-  log_configuration {
-    level = "ERROR"
-    cloudwatch_logs_log_destination {
-      log_group_arn = aws_cloudwatch_log_group.delete_player_pipe.arn
-    }
-  }
-}
-
-resource "aws_iam_role" "delete_player_sm" {
-  name               = "${var.prefix}-delete-player"
-  assume_role_policy = data.aws_iam_policy_document.delete_sm_assume.json
-}
 
-data "aws_iam_policy_document" "delete_sm_assume" {
   statement {
-    actions = ["sts:AssumeRole"]
-    principals {
-      type        = "Service"
-      identifiers = ["states.amazonaws.com"]
-    }
+    sid = "DeleteObjects"
+    actions = [
+      "s3:DeleteObject"
+    ]
+    resources = [
+      "${aws_s3_bucket.assets.arn}/incoming/*",
+      # Originals and variants no longer referenced by any asset
+      "${aws_s3_bucket.assets.arn}/asset/*"
+    ]
   }
-}
-
-resource "aws_iam_policy" "delete_player_sm" {
-  name   = "${var.prefix}-delete-player"
-  policy = data.aws_iam_policy_document.delete_player_sm.json
-}
 
-data "aws_iam_policy_document" "delete_player_sm" {
   statement {
-    sid = "SendToBus"
+    sid = "ListVariants"
     actions = [
-      "events:PutEvents"
+      "s3:ListBucket"
     ]
     resources = [
-      aws_cloudwatch_event_bus.bus.arn
+      aws_s3_bucket.assets.arn
     ]
   }
 
   statement {
-    sid = "QueryDynamoDB"
+    sid = "SendToBus"
     actions = [
-      "dynamodb:Query"
+      "events:PutEvents"
     ]
     resources = [
-      aws_dynamodb_table.table.arn,
+      aws_cloudwatch_event_bus.bus.arn
     ]
   }
 }
 
-resource "aws_iam_role_policy_attachment" "delete_player_sm" {
-  role       = aws_iam_role.delete_player_sm.name
-  policy_arn = aws_iam_policy.delete_player_sm.arn
-}
+resource "aws_cloudwatch_log_group" "lambda_delete_game" {
+  name              = "/aws/lambda/${var.prefix}-delete-game"
+  retention_in_days = 14
 
-resource "aws_sfn_state_machine" "delete_player_sm" {
-  # checkov:skip=CKV_AWS_285: Figure out logging later
-  name     = "${var.prefix}-delete-player"
-  role_arn = aws_iam_role.delete_player_sm.arn
-  tracing_configuration {
-    enabled = true
+  tags = {
+    Name = "${var.prefix}-lambda-delete-game"
   }
-  definition = jsonencode(yamldecode(templatefile(
-    "${path.module}/../../../sfn/deleter.yaml",
-    {
-      bus_arn     = aws_cloudwatch_event_bus.bus.arn
-      table_name  = aws_dynamodb_table.table.name
-      source      = local.delete_source
-      detail_type = local.delete_player_detail_type
-    }
-  )))
-  depends_on = [
-    aws_iam_policy.delete_player_sm,
-    aws_iam_role_policy_attachment.delete_player_sm,
-  ]
 }
 
 resource "aws_iam_role" "deleter_bus" {
@@ -346,181 +342,7 @@ resource "aws_cloudwatch_event_target" "delete_target" {
 }
 
 # Asset expiration infrastructure
-
-resource "aws_cloudwatch_log_group" "expire_asset_pipe" {
-  # checkov:skip=CKV_AWS_158:AWS-managed keys are sufficient for pipe logs
-  # checkov:skip=CKV_AWS_338:30-day retention is sufficient for pipe logs
-  # nosemgrep: aws-cloudwatch-log-group-aws-managed-key
-  name              = "/aws/vendedlogs/pipes/${var.prefix}-expire-asset"
-  retention_in_days = 30
-
-  tags = {
-    Application = var.prefix
-  }
-}
-
-resource "aws_iam_role" "expire_asset_pipe" {
-  name               = "${var.prefix}-expire-asset-pipe"
-  assume_role_policy = data.aws_iam_policy_document.expire_asset_pipe_assume.json
-}
-
-data "aws_iam_policy_document" "expire_asset_pipe_assume" {
-  statement {
-    actions = ["sts:AssumeRole"]
-    principals {
-      type        = "Service"
-      identifiers = ["pipes.amazonaws.com"]
-    }
-  }
-}
-
-resource "aws_iam_policy" "expire_asset_pipe" {
-  name   = "${var.prefix}-expire-asset-pipe"
-  policy = data.aws_iam_policy_document.expire_asset_pipe.json
-}
-
-data "aws_iam_policy_document" "expire_asset_pipe" {
-  statement {
-    sid = "ReadStream"
-    actions = [
-      "dynamodb:DescribeStream",
-      "dynamodb:GetRecords",
-      "dynamodb:GetShardIterator",
-      "dynamodb:ListStreams",
-    ]
-    resources = [
-      aws_dynamodb_table.table.stream_arn,
-    ]
-  }
-
-  statement {
-    sid = "InvokeStepFunction"
-    actions = [
-      "states:StartExecution"
-    ]
-    resources = [
-      aws_sfn_state_machine.expire_asset_sm.arn
-    ]
-  }
-
-  statement {
-    sid = "WriteLogs"
-    actions = [
-      "logs:CreateLogStream",
-      "logs:PutLogEvents",
-    ]
-    resources = [
-      "${aws_cloudwatch_log_group.expire_asset_pipe.arn}:*",
-    ]
-  }
-}
-
-resource "aws_iam_role_policy_attachment" "expire_asset_pipe" {
-  role       = aws_iam_role.expire_asset_pipe.name
-  policy_arn = aws_iam_policy.expire_asset_pipe.arn
-}
-
-resource "aws_pipes_pipe" "expire_asset_pipe" {
-  name     = "${var.prefix}-expire-asset"
-  role_arn = aws_iam_role.expire_asset_pipe.arn
-  source   = aws_dynamodb_table.table.stream_arn
-  target   = aws_sfn_state_machine.expire_asset_sm.arn
-  source_parameters {
-    dynamodb_stream_parameters {
-      batch_size                         = 1
-      starting_position                  = "LATEST"
-      maximum_record_age_in_seconds      = 60
-      maximum_batching_window_in_seconds = 3
-      maximum_retry_attempts             = 3
-    }
-    filter_criteria {
-      filter {
-        pattern = jsonencode({
-          eventName = ["INSERT"]
-          dynamodb = {
-            NewImage = {
-              type = {
-                S = ["ASSET"]
-              }
-              status = {
-                S = ["PENDING"]
-              }
-            }
-          }
-        })
-      }
-    }
-  }
-  target_parameters {
-    step_function_state_machine_parameters {
-      invocation_type = "FIRE_AND_FORGET"
-    }
-  }
-  log_configuration {
-    level = "ERROR"
-    cloudwatch_logs_log_destination {
-      log_group_arn = aws_cloudwatch_log_group.expire_asset_pipe.arn
-    }
-  }
-}
-
-resource "aws_iam_role" "expire_asset_sm" {
-  name               = "${var.prefix}-expire-asset"
-  assume_role_policy = data.aws_iam_policy_document.expire_asset_sm_assume.json
-}
-
-data "aws_iam_policy_document" "expire_asset_sm_assume" {
-  statement {
-    actions = ["sts:AssumeRole"]
-    principals {
-      type        = "Service"
-      identifiers = ["states.amazonaws.com"]
-    }
-  }
-}
-
-resource "aws_iam_policy" "expire_asset_sm" {
-  name   = "${var.prefix}-expire-asset"
-  policy = data.aws_iam_policy_document.expire_asset_sm.json
-}
-
-data "aws_iam_policy_document" "expire_asset_sm" {
-  statement {
-    sid = "SendToBus"
-    actions = [
-      "events:PutEvents"
-    ]
-    resources = [
-      aws_cloudwatch_event_bus.bus.arn
-    ]
-  }
-}
-
-resource "aws_iam_role_policy_attachment" "expire_asset_sm" {
-  role       = aws_iam_role.expire_asset_sm.name
-  policy_arn = aws_iam_policy.expire_asset_sm.arn
-}
-
-resource "aws_sfn_state_machine" "expire_asset_sm" {
-  # checkov:skip=CKV_AWS_285: Figure out logging later
-  name     = "${var.prefix}-expire-asset"
-  role_arn = aws_iam_role.expire_asset_sm.arn
-  tracing_configuration {
-    enabled = true
-  }
-  definition = jsonencode(yamldecode(templatefile(
-    "${path.module}/../../../sfn/asset-expirer.yaml",
-    {
-      bus_arn     = aws_cloudwatch_event_bus.bus.arn
-      source      = local.expire_asset_source
-      detail_type = local.expire_asset_detail_type
-    }
-  )))
-  depends_on = [
-    aws_iam_policy.expire_asset_sm,
-    aws_iam_role_policy_attachment.expire_asset_sm,
-  ]
-}
+# ExpireAsset events from the expirer (asset-expirer.tf) -> _expireAsset
 
 resource "aws_iam_role" "expire_asset_bus" {
   name               = "${var.prefix}-expire-asset-bus"
@@ -660,13 +482,15 @@ resource "aws_cloudwatch_event_target" "finalise_asset_target" {
       gameId    = "$.detail.gameId"
       assetId   = "$.detail.assetId"
       sectionId = "$.detail.sectionId"
+      sizeBytes = "$.detail.sizeBytes"
     }
     input_template = <<-EOT
       {
           "input": {
               "gameId": "<gameId>",
               "assetId": "<assetId>",
-              "sectionId": "<sectionId>"
+              "sectionId": "<sectionId>",
+              "sizeBytes": <sizeBytes>
           }
       }
     EOT
@@ -0,0 +1,183 @@
+# Game snapshot infrastructure
+# DynamoDB Stream -> Lambda (in batches) to keep a compressed copy of each game's
+# partition in one item, so a game can be read with a GetItem instead of a query
+
+resource "aws_lambda_function" "update_game_snapshots" {
+  filename      = data.archive_file.update_game_snapshots_zip.output_path
+  function_name = "${var.prefix}-update-game-snapshots"
+  role          = aws_iam_role.lambda_update_game_snapshots.arn
+  handler       = "lambda_function.lambda_handler"
+  runtime       = "python3.12"
+  timeout       = 60
+  memory_size   = 512 # Compression is CPU-bound; CPU scales with memory
+
+  environment {
+    variables = {
+      TABLE_NAME = aws_dynamodb_table.table.name
+    }
+  }
+
+  source_code_hash = data.archive_file.update_game_snapshots_zip.output_base64sha256
+
+  tags = {
+    Name = "${var.prefix}-update-game-snapshots"
+  }
+}
+
+data "archive_file" "update_game_snapshots_zip" {
+  type        = "zip"
+  output_path = "${path.module}/../../../lambda/updateGameSnapshots.zip"
+
+  source {
+    content  = file("${path.module}/../../../lambda/updateGameSnapshots/lambda_function.py")
+    filename = "lambda_function.py"
+  }
+
+  source {
+    content  = file("${path.module}/../../../lambda/common/lambda_utils.py")
+    filename = "lambda_utils.py"
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "update_game_snapshots" {
+  event_source_arn                   = aws_dynamodb_table.table.stream_arn
+  function_name                      = aws_lambda_function.update_game_snapshots.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_record_age_in_seconds      = 3600
+  maximum_retry_attempts             = 3
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  # Records that run out of retries are dropped; the Lambda deletes the
+  # snapshots of games it fails on, but a batch that times out or crashes
+  # never gets that far
+  destination_config {
+    on_failure {
+      destination_arn = aws_sqs_queue.update_game_snapshots_failures.arn
+    }
+  }
+
+  filter_criteria {
+    filter {
+      # Every change to a game partition - the snapshots themselves are under GAMESNAPSHOT#
+      pattern = jsonencode({
+        dynamodb = {
+          Keys = {
+            PK = {
+              S = [{ prefix = "GAME#" }]
+            }
+          }
+        }
+      })
+    }
+  }
+}
+
+resource "aws_iam_role" "lambda_update_game_snapshots" {
+  name               = "${var.prefix}-lambda-update-game-snapshots"
+  assume_role_policy = data.aws_iam_policy_document.lambda_generate_presigned_url_assume.json
+
+  tags = {
+    Name = "${var.prefix}-lambda-update-game-snapshots"
+  }
+}
+
+resource "aws_iam_role_policy" "lambda_update_game_snapshots" {
+  name   = "${var.prefix}-lambda-update-game-snapshots"
+  role   = aws_iam_role.lambda_update_game_snapshots.id
+  policy = data.aws_iam_policy_document.lambda_update_game_snapshots.json
+}
+
+data "aws_iam_policy_document" "lambda_update_game_snapshots" {
+  statement {
+    effect = "Allow"
+    actions = [
+      "logs:CreateLogStream",
+      "logs:PutLogEvents"
+    ]
+    resources = ["${aws_cloudwatch_log_group.lambda_update_game_snapshots.arn}:*"]
+  }
+
+  statement {
+    sid = "ReadStream"
+    actions = [
+      "dynamodb:DescribeStream",
+      "dynamodb:GetRecords",
+      "dynamodb:GetShardIterator",
+      "dynamodb:ListStreams",
+    ]
+    resources = [
+      aws_dynamodb_table.table.stream_arn,
+    ]
+  }
+
+  statement {
+    sid = "SendFailures"
+    actions = [
+      "sqs:SendMessage"
+    ]
+    resources = [
+      aws_sqs_queue.update_game_snapshots_failures.arn
+    ]
+  }
+
+  statement {
+    sid = "Snapshots"
+    actions = [
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
+      "dynamodb:DeleteItem",
+      "dynamodb:Query"
+    ]
+    resources = [
+      aws_dynamodb_table.table.arn
+    ]
+  }
+}
+
+resource "aws_cloudwatch_log_group" "lambda_update_game_snapshots" {
+  name              = "/aws/lambda/${var.prefix}-update-game-snapshots"
+  retention_in_days = 14
+
+  tags = {
+    Name = "${var.prefix}-lambda-update-game-snapshots"
+  }
+}
+
+# Details of stream batches dropped after their last retry: the shard and
+# sequence number range, to find the affected games' snapshots and delete them
+resource "aws_sqs_queue" "update_game_snapshots_failures" {
+  name = "${var.prefix}-update-game-snapshots-failures"
+
+  message_retention_seconds = 1209600 # 14 days, the longest SQS keeps a message
+
+  tags = {
+    Application = var.prefix
+  }
+}
+
+resource "aws_cloudwatch_metric_alarm" "update_game_snapshots_failures" {
+  alarm_name          = "${var.prefix}-update-game-snapshots-dropped"
+  comparison_operator = "GreaterThanThreshold"
+  evaluation_periods  = 1
+  metric_name         = "ApproximateNumberOfMessagesVisible"
+  namespace           = "AWS/SQS"
+  period              = 300
+  statistic           = "Maximum"
+  threshold           = 0
+  alarm_description   = "Game snapshot updates were dropped after their last retry - the affected snapshots may be stale"
+
+  dimensions = {
+    QueueName = aws_sqs_queue.update_game_snapshots_failures.name
+  }
+
+  alarm_actions      = [var.sns_alarm_topic_arn]
+  ok_actions         = [var.sns_alarm_topic_arn]
+  treat_missing_data = "notBreaching"
+
+  tags = {
+    Name        = "${var.prefix}-update-game-snapshots-dropped"
+    Environment = var.prefix
+  }
+}
@@ -346,10 +346,13 @@ locals {
       "path" : "../../../graphql/function/${function}/appsync.js",
       "make" : "graphql/function/${function}/appsync.js",
       "source" : "../../../graphql/function/${function}/appsync.ts",
-      "data_source" : replace(function, "../../../graphql/function/", "") == "generatePresignedUrl" ? "lambda" : "dynamodb"
+      "data_source" : contains(local.lambda_functions, replace(function, "../../../graphql/function/", "")) ? "lambda" : "dynamodb"
     }
   }
 
+  # Pipeline functions that invoke the presigned URL Lambda rather than DynamoDB
+  lambda_functions = ["generatePresignedUrl", "generatePresignedUrls"]
+
   # Resolvers that should not use the DynamoDB data source (use local/none data source)
   local_data_source_resolvers = ["updatedUserSettings", "systemNotificationUpdated"]
 
@@ -369,6 +372,10 @@ locals {
       type : "Query",
       functions = ["checkGameAccess", "getGame"]
     }
+    getAsset = {
+      type : "Query",
+      functions = ["checkGameAccess", "getAsset"]
+    }
     updateGame = {
       type : "Mutation",
       functions = ["checkGameGMAccess", "findAllPlayers", "updateGameOnPlayers", "updateGame"]
@@ -401,6 +408,10 @@ locals {
       type : "Mutation",
       functions = ["requestAssetUpload", "generatePresignedUrl"]
     }
+    requestAssetUploads = {
+      type : "Mutation",
+      functions = ["requestAssetUploads", "generatePresignedUrls"]
+    }
   }
 }
 
@@ -1,4 +1,5 @@
 terraform {
+  required_version = ">= 1.7"
   required_providers {
     aws = {
       source                = "hashicorp/aws"
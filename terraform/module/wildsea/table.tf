@@ -24,6 +24,16 @@ resource "aws_dynamodb_table" "table" {
     type = "S"
   }
 
+  attribute {
+    name = "GSI2PK"
+    type = "S"
+  }
+
+  attribute {
+    name = "expireUploadAt"
+    type = "S"
+  }
+
   global_secondary_index {
     name            = "GSI1"
     hash_key        = "GSI1PK"
@@ -31,6 +41,15 @@ resource "aws_dynamodb_table" "table" {
     projection_type = "ALL"
   }
 
+  # Sparse: only pending assets carry GSI2PK, bucketed by expiry time
+  global_secondary_index {
+    name               = "GSI2"
+    hash_key           = "GSI2PK"
+    range_key          = "expireUploadAt"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["gameId", "assetId", "status"]
+  }
+
   point_in_time_recovery {
     enabled = true
   }
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Test the table export analyser against a generated dataset written out as an export.
+Tests: DynamoDB JSON (gzip) export -> per-game counts and sizes -> Ion export -> stream write rates -> risk ranking -> report
+"""
+
+import base64
+import gzip
+import json
+import os
+import sys
+import tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+import analyse_table_export  # noqa: E402
+import generate_dataset  # noqa: E402
+
+def write_json_export(directory, items, files=3):
+    """Lay items out as an export to S3 does: manifests beside gzipped DynamoDB JSON data files"""
+    data = os.path.join(directory, 'data')
+    os.makedirs(data)
+    for index in range(files):
+        with gzip.open(os.path.join(data, f"part-{index}.json.gz"), 'wt', encoding='utf-8') as f:
+            for item in items[index::files]:
+                f.write(json.dumps({'Item': to_export_json(item)}) + '\n')
+    with open(os.path.join(directory, 'manifest-summary.json'), 'w') as f:
+        json.dump({'itemCount': len(items), 'outputFormat': 'DYNAMODB_JSON'}, f)
+
+def to_export_json(value):
+    """Binary attributes are base64 in DynamoDB JSON"""
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, dict):
+        return {name: to_export_json(entry) for name, entry in value.items()}
+    if isinstance(value, list):
+        return [to_export_json(entry) for entry in value]
+    return value
+
+def write_ion_export(directory, items):
+    from amazon.ion import simpleion
+    from amazon.ion.core import IonType
+    from amazon.ion.simple_types import IonPyList
+    from decimal import Decimal
+
+    def to_ion(value):
+        kind, data = next(iter(value.items()))
+        if kind == 'M':
+            return {name: to_ion(entry) for name, entry in data.items()}
+        if kind == 'L':
+            return [to_ion(entry) for entry in data]
+        if kind == 'SS':
+            return IonPyList.from_value(IonType.LIST, list(data), ('$dynamodb_SS',))
+        if kind == 'N':
+            return Decimal(data)
+        if kind == 'NULL':
+            return None
+        return data
+
+    data = os.path.join(directory, 'data')
+    os.makedirs(data)
+    with gzip.open(os.path.join(data, 'part-0.ion.gz'), 'wb') as f:
+        for item in items:
+            f.write(simpleion.dumps({'Item': to_ion({'M': item})}, binary=False).encode('utf-8') + b'\n')
+
+def stream_record(item, created, old_item=None):
+    record = {
+        'eventName': 'MODIFY' if old_item else 'INSERT',
+        'dynamodb': {
+            'ApproximateCreationDateTime': created,
+            'Keys': {'PK': item['PK'], 'SK': item['SK']},
+            'NewImage': item,
+            'SizeBytes': generate_dataset.item_size(item),
+        },
+    }
+    if old_item:
+        record['dynamodb']['OldImage'] = old_item
+    return record
+
+def compare(analysis, expected, label, failures):
+    for game in expected.games:
+        partition = analysis.partitions.get(f"GAME#{game.game_id}")
+        if not partition or partition.items != game.items or partition.bytes != game.bytes:
+            found = (partition.items, partition.bytes) if partition else None
+            failures.append(f"{label}: game {game.game_id} expected {game.items} items, {game.bytes} bytes, got {found}")
+    total = sum(generate_dataset.item_size(item) for item in expected.items)
+    if analysis.items != len(expected.items) or analysis.bytes != total:
+        failures.append(f"{label}: expected {len(expected.items)} items, {total} bytes, "
+                        f"got {analysis.items}, {analysis.bytes}")
+
+def main():
+    failures = []
+    config = generate_dataset.DatasetConfig(games=20, users=40, players_median=5)
+    dataset = generate_dataset.generate(config)
+    games = {f"GAME#{game.game_id}": game for game in dataset.games}
+
+    # One game gets a section close to the item limit, and a binary attribute exports base64 encode
+    large_game, hot_game = dataset.games[0], dataset.games[1]
+    section = next(item for item in dataset.items
+                   if item['PK']['S'] == f"GAME#{large_game.game_id}" and item['type']['S'] == 'SECTION')
+    before = generate_dataset.item_size(section)
+    section['content'] = {'S': json.dumps({'showEmpty': False, 'items': [{'name': 'x' * 350_000}]})}
+    section['thumbnail'] = {'B': b'\x89PNG' + bytes(1020)}
+    large_game.bytes += generate_dataset.item_size(section) - before
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_export = os.path.join(directory, 'json')
+        write_json_export(json_export, dataset.items)
+        analysis = analyse_table_export.analyse(analyse_table_export.read_export(json_export))
+        compare(analysis, dataset, 'JSON', failures)
+        print(f"✓ Read {analysis.items} items, {analysis.bytes / 1e6:.1f} MB from a gzipped DynamoDB JSON export")
+
+        largest = analysis.largest_items()[0]
+        if (largest[1], largest[2]) != (section['PK']['S'], section['SK']['S']) \
+                or largest[0] != generate_dataset.item_size(section):
+            failures.append(f"Largest item should be the oversized section, got {largest}")
+        partition = analysis.partitions[section['PK']['S']]
+        if partition.largest_attribute_name != 'content' or partition.largest_item_sk != section['SK']['S']:
+            failures.append(f"Largest attribute should be the section content, got {partition.largest_attribute_name}")
+        thumbnail = analysis.attributes.get('thumbnail')
+        if not thumbnail or thumbnail.largest != len('thumbnail') + 1024:
+            failures.append(f"Binary attribute should count decoded bytes, got {thumbnail}")
+        print(f"✓ Largest item {largest[0] / 1024:.0f} KB, largest attribute {partition.largest_attribute_name}")
+
+        try:
+            import amazon.ion  # noqa: F401
+        except ImportError:
+            print("- amazon.ion isn't installed, skipping the Ion export")
+        else:
+            ion_export = os.path.join(directory, 'ion')
+            write_ion_export(ion_export, dataset.items)
+            ion = analyse_table_export.analyse(analyse_table_export.read_export(ion_export))
+            compare(ion, dataset, 'Ion', failures)
+            ion_sizes = {pk: partition.bytes for pk, partition in ion.partitions.items()}
+            if ion_sizes != {pk: partition.bytes for pk, partition in analysis.partitions.items()}:
+                failures.append("Ion and JSON exports gave different partition sizes")
+            print(f"✓ Read {ion.items} items from a gzipped Ion export")
+
+        # The hot game takes 1,500 single-unit writes in one second; every other game a write a minute
+        player = next(item for item in dataset.items
+                      if item['PK']['S'] == f"GAME#{hot_game.game_id}" and item['type']['S'] == 'CHARACTER')
+        burst = [stream_record(player, 1_700_000_000 + index / 1500, old_item=player) for index in range(1500)]
+        quiet = [stream_record(item, 1_700_000_000 + index * 60)
+                 for index, item in enumerate(item for item in dataset.items if item['type']['S'] == 'GAME')]
+        lines_file = os.path.join(directory, 'records.jsonl.gz')
+        with gzip.open(lines_file, 'wt', encoding='utf-8') as f:
+            for record in burst:
+                f.write(json.dumps(record) + '\n')
+        event_file = os.path.join(directory, 'event.json')
+        with open(event_file, 'w') as f:
+            json.dump({'Records': quiet}, f, indent=2)
+
+        analysis = analyse_table_export.analyse(
+            analyse_table_export.read_export(json_export),
+            analyse_table_export.read_stream_files([lines_file, event_file]))
+        if analysis.stream_records != len(burst) + len(quiet):
+            failures.append(f"Expected {len(burst) + len(quiet)} stream records, read {analysis.stream_records}")
+        hot = analysis.partitions[f"GAME#{hot_game.game_id}"]
+        units = -(-generate_dataset.item_size(player) // 1024)
+        if hot.writes != 1501 or hot.peak_write_units != 1500 * units:
+            failures.append(f"Hot game expected 1501 writes peaking at {1500 * units} WCU/s, "
+                            f"got {hot.writes} peaking at {hot.peak_write_units}")
+        print(f"✓ Hot game peaked at {hot.peak_write_units} WCU/s over {hot.writes} writes")
+
+        ranked = analysis.ranked_games()
+        if ranked[0].pk != f"GAME#{hot_game.game_id}" or ranked[0].risk()[1] != 'write':
+            failures.append(f"Expected the hot game first for its writes, got {ranked[0].summary(1)}")
+        if analysis.partitions[f"GAME#{large_game.game_id}"].risk()[1] != 'item':
+            failures.append("Expected the game with the large section to be at risk for its item size")
+        for partition in ranked:
+            if partition.bytes > 1024 * 1024 and partition.risk()[0] < partition.bytes / (1024 * 1024):
+                failures.append(f"{partition.pk} needs more than one getGame page but isn't ranked for it")
+        risks = [partition.risk()[0] for partition in ranked]
+        if risks != sorted(risks, reverse=True):
+            failures.append("Games aren't ranked by risk")
+        if len(ranked) != len(games) or any(partition.pk not in games for partition in ranked):
+            failures.append("Ranking should cover exactly the games")
+        reasons = Counter(partition.risk()[1] for partition in ranked)
+        print(f"✓ Ranked {len(ranked)} games by risk: {dict(reasons)}")
+
+        # The script end to end, as run from the command line
+        report = os.path.join(directory, 'report.json')
+        os.environ.update({'EXPORT': json_export, 'STREAM_FILES': f"{lines_file},{event_file}",
+                           'REPORT': report, 'TOP': '5'})
+        analyse_table_export.main()
+        with open(report) as f:
+            results = json.load(f)
+        if results['items'] != len(dataset.items) or results['games'][0]['pk'] != f"GAME#{hot_game.game_id}":
+            failures.append("Report doesn't match the analysis")
+        print("✓ Report written")
+
+    if failures:
+        print("✗ Export analysis failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("✓ Export analysis behaves as expected")
+
+
+if __name__ == "__main__":
+    main()
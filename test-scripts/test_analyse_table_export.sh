@@ -0,0 +1,15 @@
+#!/bin/bash
+set -e
+
+# Runs the table export analyser over a generated dataset written out as JSON and Ion exports.
+
+echo "Running table export analyser test in Docker container..."
+echo ""
+
+# Delta Green sections are generated from the UI's seed data
+docker run --rm \
+    -v "$(pwd)/test-scripts:/work/test-scripts" \
+    -v "$(pwd)/scripts:/work/scripts" \
+    -v "$(pwd)/ui/src/seed:/work/ui/src/seed" \
+    python:3.12-slim \
+    bash -c "pip install boto3 amazon.ion && python -u /work/test-scripts/test_analyse_table_export.py"
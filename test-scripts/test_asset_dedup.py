@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Test the shared content index (lambda/common/asset_dedup.py) against local S3 and DynamoDB stand-ins.
+Tests: hashing -> indexing -> concurrent indexing of the same content -> stale entries -> linking assets
+       -> reference counts
+"""
+
+import hashlib
+import os
+import sys
+import threading
+
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common')
+BUCKET = 'wildsea-dedup-test'
+TABLE_NAME = 'Wildsea-dedup-test'
+GAME_ID = 'test-game'
+RACERS = 4
+
+def start_local_aws():
+    """Start an in-process moto server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+def keys_for(asset_id):
+    prefix = f"asset/game/{GAME_ID}/section/test-section/{asset_id}"
+    return f"{prefix}/original", f"{prefix}/variants/"
+
+def create_asset(dynamodb, asset_id, status):
+    original_key, variants_prefix = keys_for(asset_id)
+    dynamodb.put_item(TableName=TABLE_NAME, Item={
+        'PK': {'S': f"GAME#{GAME_ID}"},
+        'SK': {'S': f"ASSET#{asset_id}"},
+        'type': {'S': 'ASSET'},
+        'status': {'S': status},
+        'gameId': {'S': GAME_ID},
+        'assetId': {'S': asset_id},
+        'originalKey': {'S': original_key},
+        'variantsPrefix': {'S': variants_prefix},
+    })
+
+def get_asset(dynamodb, asset_id):
+    return dynamodb.get_item(TableName=TABLE_NAME, Key={
+        'PK': {'S': f"GAME#{GAME_ID}"}, 'SK': {'S': f"ASSET#{asset_id}"}
+    }, ConsistentRead=True)['Item']
+
+def ref_count(dynamodb, content_hash):
+    item = dynamodb.get_item(TableName=TABLE_NAME, Key={
+        'PK': {'S': f"ASSETHASH#{content_hash}"}, 'SK': {'S': 'ASSETHASH'}
+    }, ConsistentRead=True).get('Item')
+    return int(item['refCount']['N']) if item and 'refCount' in item else None
+
+def record(index, content_hash, asset_id, size_bytes):
+    original_key, variants_prefix = keys_for(asset_id)
+    return index.record(content_hash, BUCKET, original_key, variants_prefix, size_bytes, GAME_ID, asset_id)
+
+def main():
+    # Dummy credentials - nothing is sent to AWS
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+
+    server = None
+    if not os.environ.get('AWS_ENDPOINT_URL'):
+        endpoint_url, server = start_local_aws()
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+    print(f"Using endpoint: {os.environ['AWS_ENDPOINT_URL']}")
+
+    sys.path.insert(0, COMMON_DIR)
+    import lambda_utils
+    from asset_dedup import ContentIndex, find_duplicate, hash_object
+
+    try:
+        s3 = lambda_utils.get_client('s3')
+        dynamodb = lambda_utils.get_client('dynamodb', RACERS)
+        s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={'LocationConstraint': 'ap-southeast-2'})
+        dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': 'PK', 'AttributeType': 'S'},
+                                  {'AttributeName': 'SK', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        index = ContentIndex(dynamodb, TABLE_NAME)
+        failures = []
+
+        # Several chunks, so the ranged reads are stitched together
+        content = os.urandom(3 * 1024 * 1024 + 17)
+        content_hash = hashlib.sha256(content).hexdigest()
+        first_key, _ = keys_for('first')
+        s3.put_object(Bucket=BUCKET, Key=first_key, Body=content)
+        if hash_object(s3, BUCKET, first_key, buffer_bytes=1024 * 1024) != (len(content), content_hash):
+            failures.append("hash_object doesn't match hashlib")
+        print("✓ Objects hashed in ranged reads")
+
+        if not record(index, content_hash, 'first', len(content)):
+            failures.append("First original wasn't indexed")
+        if record(index, content_hash, 'second', len(content)):
+            failures.append("A second original replaced the indexed one")
+        if index.lookup(content_hash)['originalKey'] != first_key:
+            failures.append(f"Index should still point at the first original: {index.lookup(content_hash)}")
+        if find_duplicate(s3, index, content_hash, first_key) is not None:
+            failures.append("A retried move found its own original as a duplicate")
+        duplicate = find_duplicate(s3, index, content_hash, keys_for('second')[0])
+        if not duplicate or duplicate['originalKey'] != first_key:
+            failures.append(f"Identical content should share the first original: {duplicate}")
+        print("✓ First original indexed, later ones pointed at it")
+
+        # Assets with the same content moved at once all try to index their own original
+        race_hash = hashlib.sha256(b'race').hexdigest()
+        barrier = threading.Barrier(RACERS)
+        results = {}
+
+        def race(asset_id):
+            barrier.wait()
+            results[asset_id] = record(index, race_hash, asset_id, 4)
+
+        threads = [threading.Thread(target=race, args=(f"racer-{n}",)) for n in range(RACERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        winners = [asset_id for asset_id, won in results.items() if won]
+        if len(winners) != 1:
+            failures.append(f"Exactly one concurrent record should win, got {results}")
+        elif index.lookup(race_hash)['originalKey'] != keys_for(winners[0])[0]:
+            failures.append(f"Index doesn't point at the winner {winners[0]}: {index.lookup(race_hash)}")
+        print(f"✓ {RACERS} concurrent records of the same content: only {winners} indexed")
+
+        # An original deleted under the index (e.g. by a lifecycle rule) is forgotten, not shared
+        s3.delete_object(Bucket=BUCKET, Key=first_key)
+        if find_duplicate(s3, index, content_hash, keys_for('third')[0]) is not None:
+            failures.append("A stale index entry was returned as a duplicate")
+        if index.lookup(content_hash) is not None:
+            failures.append("A stale index entry wasn't dropped")
+        if not record(index, content_hash, 'third', len(content)):
+            failures.append("Content couldn't be indexed again after its stale entry was dropped")
+        # A forget() that lost the race to a replacement leaves the new entry alone
+        index.forget(content_hash, first_key)
+        if (index.lookup(content_hash) or {}).get('originalKey') != keys_for('third')[0]:
+            failures.append("forget() of the old original dropped its replacement")
+        print("✓ Stale entries dropped, without dropping their replacement")
+
+        create_asset(dynamodb, 'finalising', 'FINALISING')
+        original = index.lookup(content_hash)
+        if not index.link_asset(GAME_ID, 'finalising', content_hash, original):
+            failures.append("Couldn't link a finalising asset")
+        asset = get_asset(dynamodb, 'finalising')
+        if asset.get('contentHash', {}).get('S') != content_hash \
+                or asset['originalKey']['S'] != original['originalKey'] \
+                or asset['variantsPrefix']['S'] != original['variantsPrefix']:
+            failures.append(f"Linked asset wasn't pointed at the shared original: {asset}")
+
+        # Expired or deleted while its upload was being hashed
+        for status in ('PENDING', 'EXPIRED'):
+            asset_id = status.lower()
+            create_asset(dynamodb, asset_id, status)
+            before = get_asset(dynamodb, asset_id)
+            if index.link_asset(GAME_ID, asset_id, content_hash, original):
+                failures.append(f"Linked a {status} asset")
+            if get_asset(dynamodb, asset_id) != before:
+                failures.append(f"A {status} asset was changed by a refused link")
+        if index.link_asset(GAME_ID, 'missing', content_hash, original):
+            failures.append("Linked an asset that doesn't exist")
+        print("✓ Only finalising assets are linked")
+
+        # 'third' indexed it and 'finalising' is linked to it
+        if ref_count(dynamodb, content_hash) != 2:
+            failures.append(f"Expected the indexing and linked assets counted, got {ref_count(dynamodb, content_hash)}")
+        # A retried move finds the asset already linked, and doesn't count it again
+        if not index.link_asset(GAME_ID, 'finalising', content_hash, original) \
+                or ref_count(dynamodb, content_hash) != 2:
+            failures.append(f"A repeated link was counted twice: {ref_count(dynamodb, content_hash)}")
+        if index.release(GAME_ID, 'finalising', content_hash, original['originalKey']):
+            failures.append("Released an original that another asset still references")
+        # A retried game cleanup releases the same asset again
+        index.release(GAME_ID, 'finalising', content_hash, original['originalKey'])
+        if ref_count(dynamodb, content_hash) != 1:
+            failures.append(f"A repeated release was counted twice: {ref_count(dynamodb, content_hash)}")
+        create_asset(dynamodb, 'third', 'READY')
+        if not index.release(GAME_ID, 'third', content_hash, original['originalKey']) \
+                or ref_count(dynamodb, content_hash) != 0:
+            failures.append(f"The last reference didn't release the original: {ref_count(dynamodb, content_hash)}")
+        # Nothing can be linked to an original that is being deleted
+        create_asset(dynamodb, 'late', 'FINALISING')
+        try:
+            index.link_asset(GAME_ID, 'late', content_hash, original)
+            failures.append("Linked an asset to an original with no references left")
+        except Exception:
+            pass
+        print("✓ References counted once per asset, and released to zero")
+
+        # The losing racers kept their own originals, which the index doesn't count
+        loser = next(asset_id for asset_id, won in results.items() if not won)
+        create_asset(dynamodb, loser, 'READY')
+        if not index.release(GAME_ID, loser, race_hash, keys_for(loser)[0]):
+            failures.append("An unindexed original should belong to its asset alone")
+        # Entries written before references were counted may be shared by anyone
+        legacy_hash = hashlib.sha256(b'legacy').hexdigest()
+        record(index, legacy_hash, 'legacy', 6)
+        dynamodb.update_item(TableName=TABLE_NAME, Key={'PK': {'S': f"ASSETHASH#{legacy_hash}"},
+                                                        'SK': {'S': 'ASSETHASH'}}, UpdateExpression='REMOVE refCount')
+        create_asset(dynamodb, 'legacy', 'READY')
+        if index.release(GAME_ID, 'legacy', legacy_hash, keys_for('legacy')[0]):
+            failures.append("Released an original indexed before references were counted")
+        print("✓ Unindexed originals released, uncounted entries kept")
+
+        if failures:
+            print("✗ Content index failed:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("✓ Content index behaves as expected")
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
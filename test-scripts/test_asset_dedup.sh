@@ -0,0 +1,16 @@
+#!/bin/bash
+set -e
+
+# Runs the shared content index against an in-process moto server.
+# Set AWS_ENDPOINT_URL to use other local S3/DynamoDB stand-ins instead.
+
+echo "Running asset dedup test in Docker container..."
+echo ""
+
+docker run --rm \
+    -v "$(pwd)/lambda/common:/lambda/common" \
+    -v "$(pwd)/test-scripts/test_asset_dedup.py:/test-scripts/test_asset_dedup.py" \
+    -e AWS_ENDPOINT_URL="$AWS_ENDPOINT_URL" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install boto3 'moto[server]' && python -u /test-scripts/test_asset_dedup.py"
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Test the expireAssets sweep against local DynamoDB and EventBridge stand-ins.
+Tests: due pending assets found via GSI2 -> ExpireAsset events in batches of 10 -> resuming from the last sweep
+"""
+
+import json
+import os
+import sys
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'expireAssets')
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common')
+TABLE_NAME = 'Wildsea-expiry-test'
+BUS_NAME = 'wildsea-expiry-test'
+GAME_ID = 'test-game'
+NOW_SECONDS = 1767225600 + 90  # 90 seconds into a bucket
+
+def start_local_aws():
+    """Start an in-process moto server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+def put_asset(lambda_function, dynamodb, asset_id, expire_at_seconds, status='PENDING'):
+    """Write an asset record the way requestAssetUpload and the status mutations leave it"""
+    item = {
+        'PK': {'S': f"GAME#{GAME_ID}"},
+        'SK': {'S': f"ASSET#{asset_id}"},
+        'type': {'S': 'ASSET'},
+        'gameId': {'S': GAME_ID},
+        'assetId': {'S': asset_id},
+        'status': {'S': status},
+        'expireUploadAt': {'S': lambda_function.to_iso8601(expire_at_seconds)},
+    }
+    if status == 'PENDING':
+        bucket_start = (expire_at_seconds // lambda_function.EXPIRY_BUCKET_SECONDS) * lambda_function.EXPIRY_BUCKET_SECONDS
+        item['GSI2PK'] = {'S': lambda_function.bucket_key(bucket_start)}
+    dynamodb.put_item(TableName=TABLE_NAME, Item=item)
+
+class CountingEvents:
+    """Wraps the events client to record the size of each PutEvents call"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def put_events(self, Entries):
+        self.calls.append(len(Entries))
+        return self.client.put_events(Entries=Entries)
+
+class FailingEvents:
+    """An events client whose PutEvents calls all fail"""
+
+    def put_events(self, Entries):
+        raise RuntimeError("Simulated PutEvents failure")
+
+def load_cursor(lambda_function, dynamodb):
+    return lambda_function.load_cursor(dynamodb, TABLE_NAME)
+
+def receive_all(sqs, queue_url):
+    details = []
+    while True:
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10,
+                                       WaitTimeSeconds=1).get('Messages', [])
+        if not messages:
+            return details
+        for message in messages:
+            details.append(json.loads(message['Body'])['detail'])
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+
+def main():
+    # Dummy credentials - nothing is sent to AWS
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+    os.environ['TABLE_NAME'] = TABLE_NAME
+    os.environ['EVENT_BUS_NAME'] = BUS_NAME
+    os.environ['EXPIRE_SOURCE'] = 'wildsea.table'
+    os.environ['EXPIRE_DETAIL_TYPE'] = 'ExpireAsset'
+
+    server = None
+    if not os.environ.get('AWS_ENDPOINT_URL'):
+        endpoint_url, server = start_local_aws()
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+    print(f"Using endpoint: {os.environ['AWS_ENDPOINT_URL']}")
+
+    sys.path.insert(0, COMMON_DIR)
+    sys.path.insert(0, LAMBDA_DIR)
+    import lambda_function
+    MAX_SWEEP_BUCKETS = lambda_function.MAX_SWEEP_BUCKETS
+
+    try:
+        dynamodb = lambda_function.get_client('dynamodb')
+        events = lambda_function.get_client('events')
+        sqs = lambda_function.get_client('sqs')
+        dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'}
+                                  for name in ('PK', 'SK', 'GSI2PK', 'expireUploadAt')],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'GSI2',
+                'KeySchema': [{'AttributeName': 'GSI2PK', 'KeyType': 'HASH'},
+                              {'AttributeName': 'expireUploadAt', 'KeyType': 'RANGE'}],
+                'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': ['gameId', 'assetId', 'status']},
+            }],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        # Capture expiry events in a queue
+        events.create_event_bus(Name=BUS_NAME)
+        queue_url = sqs.create_queue(QueueName=BUS_NAME)['QueueUrl']
+        queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+        events.put_rule(Name='expire', EventBusName=BUS_NAME,
+                        EventPattern=json.dumps({'detail-type': ['ExpireAsset']}))
+        events.put_targets(Rule='expire', EventBusName=BUS_NAME, Targets=[{'Id': 'queue', 'Arn': queue_arn}])
+
+        failures = []
+        bucket = lambda_function.EXPIRY_BUCKET_SECONDS
+        current = lambda_function.bucket_start(NOW_SECONDS)
+        expected = set()
+
+        # 13 due in an earlier bucket, 10 due earlier in the current bucket
+        for n in range(13):
+            put_asset(lambda_function, dynamodb, f"old-{n}", NOW_SECONDS - bucket - n)
+            expected.add(f"old-{n}")
+        for n in range(10):
+            put_asset(lambda_function, dynamodb, f"due-{n}", NOW_SECONDS - 60 - n)
+            expected.add(f"due-{n}")
+        # Long overdue; the first sweep starts from the oldest bucket in the index, so it is found
+        put_asset(lambda_function, dynamodb, 'ancient', NOW_SECONDS - 20 * bucket)
+        expected.add('ancient')
+        # Not due yet, in the current bucket and the next
+        put_asset(lambda_function, dynamodb, 'later', NOW_SECONDS + 60)
+        put_asset(lambda_function, dynamodb, 'next-bucket', NOW_SECONDS + bucket)
+        # Already finalised, so no longer in the index
+        put_asset(lambda_function, dynamodb, 'finalised', NOW_SECONDS - 30, status='FINALISING')
+
+        counting = CountingEvents(events)
+        result = lambda_function.run_sweep(dynamodb, counting, TABLE_NAME, NOW_SECONDS)
+        details = receive_all(sqs, queue_url)
+        sent = {detail['assetId'] for detail in details}
+        if sent != expected or len(details) != len(expected):
+            failures.append(f"Expected events for {sorted(expected)}, got {sorted(detail['assetId'] for detail in details)}")
+        if result.failed or result.sent != len(expected):
+            failures.append(f"Unexpected sweep result: {result}")
+        if sorted(counting.calls) != [1, 3, 10, 10]:
+            failures.append(f"Expected PutEvents calls of 1, 10, 3 and 10 entries, got {counting.calls}")
+        if load_cursor(lambda_function, dynamodb) != current - bucket:
+            failures.append(f"Expected the next sweep to start a bucket back, at {current - bucket}, "
+                            f"got {load_cursor(lambda_function, dynamodb)}")
+        print(f"✓ Sent {result.sent} expiry events in {len(counting.calls)} PutEvents calls "
+              f"across {result.buckets} buckets, starting from the oldest")
+
+        # _expireAsset marks them EXPIRED and drops them from the index; the next sweep resumes from its cursor
+        for asset_id in expected:
+            put_asset(lambda_function, dynamodb, asset_id, NOW_SECONDS, status='EXPIRED')
+        result = lambda_function.run_sweep(dynamodb, counting, TABLE_NAME, NOW_SECONDS + 30)
+        if result.due != 0 or receive_all(sqs, queue_url):
+            failures.append(f"Repeat sweep sent events for expired assets: {result}")
+        if result.buckets != 2:
+            failures.append(f"Repeat sweep should resume from the last bucket swept, checked {result.buckets}")
+        print(f"✓ Repeat sweep resumes from its cursor ({result.buckets} buckets) and sends nothing")
+
+        # Once its time comes, the later asset is swept
+        result = lambda_function.run_sweep(dynamodb, counting, TABLE_NAME, NOW_SECONDS + 61)
+        if [detail['assetId'] for detail in receive_all(sqs, queue_url)] != ['later']:
+            failures.append("Asset was not swept once it became due")
+        put_asset(lambda_function, dynamodb, 'later', NOW_SECONDS, status='EXPIRED')
+        print("✓ Assets are swept once they are due")
+
+        # Sweeps stop for three hours: the asset that came due in the meantime is still found
+        put_asset(lambda_function, dynamodb, 'missed', NOW_SECONDS + 2 * 3600)
+        result = lambda_function.run_sweep(dynamodb, counting, TABLE_NAME, NOW_SECONDS + 3 * 3600)
+        if {detail['assetId'] for detail in receive_all(sqs, queue_url)} != {'next-bucket', 'missed'}:
+            failures.append(f"Assets due while sweeps were missed were not sent: {result}")
+        for asset_id in ('next-bucket', 'missed'):
+            put_asset(lambda_function, dynamodb, asset_id, NOW_SECONDS, status='EXPIRED')
+        print(f"✓ Caught up on {result.buckets} buckets after three hours without a sweep")
+
+        # A bucket whose events fail to send is swept again next time
+        retry_at = NOW_SECONDS + 4 * 3600
+        put_asset(lambda_function, dynamodb, 'retry', retry_at)
+        result = lambda_function.run_sweep(dynamodb, FailingEvents(), TABLE_NAME, retry_at + 2 * bucket)
+        cursor = load_cursor(lambda_function, dynamodb)
+        if result.failed != ['retry'] or cursor != lambda_function.bucket_start(retry_at):
+            failures.append(f"Cursor should stay at the failed bucket: {result}, cursor {cursor}")
+        result = lambda_function.run_sweep(dynamodb, counting, TABLE_NAME, retry_at + 3 * bucket)
+        if [detail['assetId'] for detail in receive_all(sqs, queue_url)] != ['retry']:
+            failures.append(f"Failed bucket was not swept again: {result}")
+        print("✓ A bucket with failed events is swept again")
+
+        # After a long outage, each sweep covers at most MAX_SWEEP_BUCKETS and the next one carries on
+        lambda_function.MAX_SWEEP_BUCKETS = 5
+        try:
+            cursor = load_cursor(lambda_function, dynamodb)
+            result = lambda_function.run_sweep(dynamodb, counting, TABLE_NAME, retry_at + 86400)
+            if result.buckets != 5 or load_cursor(lambda_function, dynamodb) != cursor + 5 * bucket:
+                failures.append(f"Expected 5 buckets swept and the cursor moved on by 5, got {result}")
+        finally:
+            lambda_function.MAX_SWEEP_BUCKETS = MAX_SWEEP_BUCKETS
+        print("✓ Long catch-ups are spread over several sweeps")
+
+        if failures:
+            print("✗ Expiry sweep failed:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("✓ Expiry sweep behaves as expected")
+
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+#!/bin/bash
+set -e
+
+# Runs the expireAssets sweep against an in-process moto server.
+# Set AWS_ENDPOINT_URL to use other local DynamoDB/EventBridge stand-ins instead.
+
+echo "Running asset expiry sweep test in Docker container..."
+echo ""
+
+docker run --rm \
+    -v "$(pwd)/lambda/expireAssets:/lambda/expireAssets" \
+    -v "$(pwd)/lambda/common:/lambda/common" \
+    -v "$(pwd)/test-scripts/test_asset_expiry.py:/test-scripts/test_asset_expiry.py" \
+    -e AWS_ENDPOINT_URL="$AWS_ENDPOINT_URL" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install boto3 'moto[server]' && python -u /test-scripts/test_asset_expiry.py"
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Test the moveAssets Lambda against local S3, DynamoDB and EventBridge stand-ins.
+Tests: batch move -> multipart copy -> deduplication -> stale and racing index entries -> partial batch failures
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'moveAssets')
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common')
+BUCKET = 'wildsea-mover-test'
+TABLE_NAME = 'Wildsea-mover-test'
+BUS_NAME = 'wildsea-mover-test'
+GAME_ID = 'test-game'
+
+def start_local_aws():
+    """Start an in-process moto server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+class Uploads:
+    """Creates finalising assets and the stream records the mover is invoked with"""
+
+    def __init__(self, s3, dynamodb):
+        self.s3 = s3
+        self.dynamodb = dynamodb
+        self.sequence = 0
+
+    def create(self, section_id, asset_id, content):
+        prefix = f"game/{GAME_ID}/section/{section_id}/{asset_id}"
+        image = {
+            'PK': {'S': f"GAME#{GAME_ID}"},
+            'SK': {'S': f"ASSET#{asset_id}"},
+            'type': {'S': 'ASSET'},
+            'status': {'S': 'FINALISING'},
+            'gameId': {'S': GAME_ID},
+            'sectionId': {'S': section_id},
+            'assetId': {'S': asset_id},
+            'incomingKey': {'S': f"incoming/{prefix}/original"},
+            'originalKey': {'S': f"asset/{prefix}/original"},
+            'variantsPrefix': {'S': f"asset/{prefix}/variants/"},
+            'sizeBytes': {'N': str(len(content))},
+        }
+        self.s3.put_object(Bucket=BUCKET, Key=image['incomingKey']['S'], Body=content,
+                           ContentType='image/png')
+        self.dynamodb.put_item(TableName=TABLE_NAME, Item=image)
+
+        self.sequence += 1
+        old_image = dict(image, status={'S': 'PENDING'})
+        return {
+            'eventID': f"event-{self.sequence}",
+            'eventName': 'MODIFY',
+            'dynamodb': {
+                'SequenceNumber': str(self.sequence),
+                'NewImage': image,
+                'OldImage': old_image,
+            },
+        }
+
+def get_asset(dynamodb, asset_id):
+    return dynamodb.get_item(TableName=TABLE_NAME, Key={
+        'PK': {'S': f"GAME#{GAME_ID}"}, 'SK': {'S': f"ASSET#{asset_id}"}
+    })['Item']
+
+def hash_entry(dynamodb, content):
+    return dynamodb.get_item(TableName=TABLE_NAME, Key={
+        'PK': {'S': f"ASSETHASH#{hashlib.sha256(content).hexdigest()}"}, 'SK': {'S': 'ASSETHASH'}
+    }, ConsistentRead=True).get('Item')
+
+def object_body(s3, key):
+    return s3.get_object(Bucket=BUCKET, Key=key)['Body'].read()
+
+def object_exists(s3, key):
+    return s3.list_objects_v2(Bucket=BUCKET, Prefix=key).get('KeyCount', 0) > 0
+
+def main():
+    # Dummy credentials - nothing is sent to AWS
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+    os.environ['ASSET_BUCKET'] = BUCKET
+    os.environ['TABLE_NAME'] = TABLE_NAME
+    os.environ['EVENT_BUS_NAME'] = BUS_NAME
+
+    server = None
+    if not os.environ.get('AWS_ENDPOINT_URL'):
+        endpoint_url, server = start_local_aws()
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+    print(f"Using endpoint: {os.environ['AWS_ENDPOINT_URL']}")
+
+    sys.path.insert(0, COMMON_DIR)
+    sys.path.insert(0, LAMBDA_DIR)
+    import lambda_function
+    import lambda_utils
+
+    # Exercise the multipart copy without a 64 MiB fixture
+    lambda_function.MULTIPART_COPY_THRESHOLD_BYTES = 8 * 1024 * 1024
+    lambda_function.MULTIPART_COPY_PART_BYTES = 5 * 1024 * 1024
+
+    try:
+        s3 = lambda_function.get_client('s3')
+        dynamodb = lambda_function.get_client('dynamodb')
+        events = lambda_function.get_client('events')
+        sqs = lambda_function.get_client('sqs')
+        s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={
+            'LocationConstraint': os.environ['AWS_DEFAULT_REGION']
+        })
+        dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': 'PK', 'AttributeType': 'S'},
+                                  {'AttributeName': 'SK', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        # Capture promotion events in a queue
+        events.create_event_bus(Name=BUS_NAME)
+        queue_url = sqs.create_queue(QueueName=BUS_NAME)['QueueUrl']
+        queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+        events.put_rule(Name='promoted', EventBusName=BUS_NAME,
+                        EventPattern=json.dumps({'source': ['asset.promoted']}))
+        events.put_targets(Rule='promoted', EventBusName=BUS_NAME, Targets=[{'Id': 'queue', 'Arn': queue_arn}])
+
+        failures = []
+        uploads = Uploads(s3, dynamodb)
+        portrait = os.urandom(256 * 1024)
+        large = os.urandom(12 * 1024 * 1024)
+
+        # A batch of distinct uploads, one of them large enough for a multipart copy
+        records = [uploads.create('section-a', f"asset-{n}", os.urandom(64 * 1024)) for n in range(20)]
+        records.append(uploads.create('section-a', 'asset-portrait', portrait))
+        records.append(uploads.create('section-a', 'asset-large', large))
+        result = lambda_function.lambda_handler({'Records': records}, None)
+        if result['batchItemFailures']:
+            failures.append(f"Batch reported failures: {result['batchItemFailures']}")
+        for record in records:
+            image = record['dynamodb']['NewImage']
+            if not object_exists(s3, image['originalKey']['S']):
+                failures.append(f"{image['assetId']['S']} was not copied to asset/")
+            if object_exists(s3, image['incomingKey']['S']):
+                failures.append(f"{image['assetId']['S']} upload was not deleted")
+        large_key = records[-1]['dynamodb']['NewImage']['originalKey']['S']
+        if object_body(s3, large_key) != large:
+            failures.append("Multipart copy does not match its source")
+        if s3.head_object(Bucket=BUCKET, Key=large_key).get('ContentType') != 'image/png':
+            failures.append("Multipart copy lost the content type")
+        print(f"✓ Moved a batch of {len(records)} assets, including a 12 MiB multipart copy")
+
+        # Same content in another section: shares the original and is promoted directly
+        duplicate = uploads.create('section-b', 'asset-duplicate', portrait)
+        result = lambda_function.lambda_handler({'Records': [duplicate]}, None)
+        record = get_asset(dynamodb, 'asset-duplicate')
+        shared_key = records[-2]['dynamodb']['NewImage']['originalKey']['S']
+        if result['batchItemFailures'] or record['originalKey']['S'] != shared_key:
+            failures.append(f"Identical upload was not deduplicated: {result}")
+        if object_exists(s3, duplicate['dynamodb']['NewImage']['originalKey']['S']):
+            failures.append("Duplicate asset got its own copy")
+        if hash_entry(dynamodb, portrait).get('refCount', {}).get('N') != '2':
+            failures.append(f"Shared original should be referenced twice: {hash_entry(dynamodb, portrait)}")
+        if object_exists(s3, duplicate['dynamodb']['NewImage']['incomingKey']['S']):
+            failures.append("Duplicate upload was not deleted")
+        messages = sqs.receive_message(QueueUrl=queue_url, WaitTimeSeconds=2).get('Messages', [])
+        details = [json.loads(message['Body'])['detail'] for message in messages]
+        if not any(detail['assetId'] == 'asset-duplicate' and detail['deduplicated'] for detail in details):
+            failures.append(f"No promotion event for the duplicate: {details}")
+        print(f"✓ Identical upload shares {shared_key}")
+
+        # A retried move of the indexed asset must not be treated as its own duplicate
+        retried = uploads.create('section-a', 'asset-portrait', portrait)
+        result = lambda_function.lambda_handler({'Records': [retried]}, None)
+        if result['batchItemFailures'] or get_asset(dynamodb, 'asset-portrait')['originalKey']['S'] != shared_key:
+            failures.append(f"Retried move of the indexed asset was not moved onto its own key: {result}")
+        if object_exists(s3, retried['dynamodb']['NewImage']['incomingKey']['S']):
+            failures.append("Retried upload was not deleted")
+        print("✓ Retried move of the indexed asset is not its own duplicate")
+
+        # An index entry whose original was deleted is dropped, and the next upload takes its place
+        s3.delete_object(Bucket=BUCKET, Key=shared_key)
+        stale = uploads.create('section-d', 'asset-stale', portrait)
+        result = lambda_function.lambda_handler({'Records': [stale]}, None)
+        stale_key = stale['dynamodb']['NewImage']['originalKey']['S']
+        if result['batchItemFailures'] or get_asset(dynamodb, 'asset-stale')['originalKey']['S'] != stale_key:
+            failures.append(f"Asset was pointed at a deleted original: {result}")
+        if not object_exists(s3, stale_key):
+            failures.append("Asset behind a stale index entry was not copied")
+        if hash_entry(dynamodb, portrait)['originalKey']['S'] != stale_key:
+            failures.append("Stale index entry was not replaced by the new original")
+        print(f"✓ Stale index entry replaced by {stale_key}")
+
+        # Two uploads of the same content race: both miss the index, so both are copied and one wins it
+        token = os.urandom(64 * 1024)
+        racing = [uploads.create(section_id, f"asset-race-{section_id}", token)
+                  for section_id in ('section-e', 'section-f')]
+        barrier = threading.Barrier(len(racing), timeout=30)
+        real_copy = lambda_function.copy_object
+        lambda_function.copy_object = lambda *args: (barrier.wait(), real_copy(*args))
+        try:
+            result = lambda_function.lambda_handler({'Records': racing}, None)
+        finally:
+            lambda_function.copy_object = real_copy
+        racing_keys = [record['dynamodb']['NewImage']['originalKey']['S'] for record in racing]
+        if result['batchItemFailures'] or not all(object_exists(s3, key) for key in racing_keys):
+            failures.append(f"Racing uploads should both keep their own original: {result}")
+        winner = hash_entry(dynamodb, token)
+        if not winner or winner['originalKey']['S'] not in racing_keys:
+            failures.append(f"Racing uploads should leave one index entry for either original, got {winner}")
+        later = uploads.create('section-g', 'asset-race-later', token)
+        lambda_function.lambda_handler({'Records': [later]}, None)
+        if winner and get_asset(dynamodb, 'asset-race-later')['originalKey']['S'] != winner['originalKey']['S']:
+            failures.append("Upload after the race was not pointed at the indexed original")
+        print(f"✓ Racing uploads both kept, index won by {winner['assetId']['S'] if winner else None}")
+
+        # A missing upload (already moved) is skipped; a broken record is retried alone
+        moved_again = dict(records[0])
+        broken = uploads.create('section-c', 'asset-broken', os.urandom(1024))
+        broken_image = broken['dynamodb']['NewImage']
+        fine = uploads.create('section-c', 'asset-fine', os.urandom(1024))
+        lambda_function.copy_object, real_copy = _failing_copy(lambda_function.copy_object, broken_image['originalKey']['S'])
+        try:
+            result = lambda_function.lambda_handler({'Records': [moved_again, broken, fine]}, None)
+        finally:
+            lambda_function.copy_object = real_copy
+        expected = [{'itemIdentifier': broken['dynamodb']['SequenceNumber']}]
+        if result['batchItemFailures'] != expected:
+            failures.append(f"Expected only the broken record to fail, got {result['batchItemFailures']}")
+        if not object_exists(s3, broken_image['incomingKey']['S']):
+            failures.append("Failed asset's upload was deleted")
+        if not object_exists(s3, fine['dynamodb']['NewImage']['originalKey']['S']):
+            failures.append("Record after the failure was not moved")
+        print("✓ Failures are reported per record")
+
+        # Without s3:ListBucket, S3 answers the same already-moved upload with AccessDenied
+        lambda_utils._clients['s3'] = DeniedWhenMissing(s3)
+        try:
+            result = lambda_function.lambda_handler({'Records': [moved_again]}, None)
+        finally:
+            lambda_utils._clients['s3'] = s3
+        if result['batchItemFailures'] != [{'itemIdentifier': moved_again['dynamodb']['SequenceNumber']}]:
+            failures.append(f"AccessDenied for a missing upload should be retried: {result['batchItemFailures']}")
+        print("✓ AccessDenied on a missing upload is retried, not skipped (the role needs s3:ListBucket)")
+
+        if failures:
+            print("✗ Asset mover failed:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("✓ Asset mover behaves as expected")
+
+    finally:
+        if server:
+            server.stop()
+
+class DeniedWhenMissing:
+    """S3 as a role without s3:ListBucket sees it: a missing key is AccessDenied, not NoSuchKey"""
+
+    def __init__(self, s3):
+        self._s3 = s3
+
+    def __getattr__(self, name):
+        method = getattr(self._s3, name)
+        if name not in ('get_object', 'head_object', 'copy_object'):
+            return method
+
+        def call(**kwargs):
+            from botocore.exceptions import ClientError
+
+            try:
+                return method(**kwargs)
+            except ClientError as e:
+                if e.response['Error']['Code'] not in ('NoSuchKey', '404', 'NotFound'):
+                    raise
+                raise ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'Access Denied'}},
+                                  ''.join(part.title() for part in name.split('_'))) from e
+        return call
+
+def _failing_copy(copy_object, failing_key):
+    """Wrap copy_object so copies to failing_key raise, returning (wrapper, original)"""
+    def copy(s3, bucket, source_key, destination_key, size_bytes):
+        if destination_key == failing_key:
+            raise RuntimeError(f"Simulated copy failure for {destination_key}")
+        return copy_object(s3, bucket, source_key, destination_key, size_bytes)
+    return copy, copy_object
+
+
+if __name__ == "__main__":
+    main()
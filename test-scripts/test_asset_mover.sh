@@ -0,0 +1,17 @@
+#!/bin/bash
+set -e
+
+# Runs the moveAssets Lambda against an in-process moto server.
+# Set AWS_ENDPOINT_URL to use other local S3/DynamoDB/EventBridge stand-ins instead.
+
+echo "Running asset mover test in Docker container..."
+echo ""
+
+docker run --rm \
+    -v "$(pwd)/lambda/moveAssets:/lambda/moveAssets" \
+    -v "$(pwd)/lambda/common:/lambda/common" \
+    -v "$(pwd)/test-scripts/test_asset_mover.py:/test-scripts/test_asset_mover.py" \
+    -e AWS_ENDPOINT_URL="$AWS_ENDPOINT_URL" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install boto3 'moto[server]' && python -u /test-scripts/test_asset_mover.py"
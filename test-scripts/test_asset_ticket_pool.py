@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test the pre-signed upload ticket pool against a stand-in for requestAssetUploads and a fake clock.
+Tests: claiming a ticket -> TTL eviction -> refill to the target size -> background refill -> idle slots
+       -> hit rate and quota cost
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+import asset_ticket_pool  # noqa: E402
+from asset_ticket_pool import AssetTicketPool  # noqa: E402
+
+GAME_ID = 'game-1'
+SECTION_ID = 'section-1'
+MIME_TYPE = 'image/png'
+CLAIMS = 200
+MINUTE = 60
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeUploads:
+    """Stands in for requestAssetUploads, recording the size of each batch and the items in it"""
+
+    def __init__(self):
+        self.batches = []
+        self.items = []
+        self.issued = 0
+
+    def __call__(self, game_id, section_id, items):
+        self.batches.append(len(items))
+        self.items.extend(items)
+        tickets = []
+        for item in items:
+            self.issued += 1
+            asset = {'gameId': game_id, 'sectionId': section_id, 'assetId': f"asset-{self.issued}",
+                     'mimeType': item['mimeType'], 'sizeBytes': item.get('sizeBytes')}
+            # AWSJSON fields come back encoded, sometimes twice
+            tickets.append({'asset': asset, 'uploadUrl': 'https://bucket.s3.amazonaws.com/',
+                            'uploadFields': json.dumps(json.dumps({'key': f"incoming/{asset['assetId']}"})),
+                            'headers': json.dumps({'assetId': asset['assetId']})})
+        return tickets, []
+
+def make_pool(**kwargs):
+    clock, uploads = Clock(), FakeUploads()
+    pool = AssetTicketPool(uploads, clock=clock, background_refill=False, **kwargs)
+    return pool, clock, uploads
+
+def check_claim(failures):
+    pool, _, uploads = make_pool(target_size=5, low_water_mark=2)
+    pool.prefill(GAME_ID, SECTION_ID, MIME_TYPE)
+    ticket = pool.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    if uploads.batches != [5] or pool.stats.hits != 1 or pool.size(GAME_ID, SECTION_ID, MIME_TYPE) != 4:
+        failures.append(f"Claim from a prefilled slot: batches {uploads.batches}, stats {pool.stats}")
+    if ticket.upload_fields != {'key': f"incoming/{ticket.asset_id}"} or ticket.headers['assetId'] != ticket.asset_id:
+        failures.append(f"Ticket fields weren't decoded: {ticket}")
+    # Reserved without a size, so any upload up to the limit can use them
+    if any('sizeBytes' in item for item in uploads.items):
+        failures.append(f"Pooled tickets were reserved for a size: {uploads.items}")
+    # The Content-Type is signed, so another type's tickets can't serve it
+    pool.claim(GAME_ID, SECTION_ID, 'image/jpeg')
+    if pool.stats.misses != 1 or uploads.batches != [5, 1]:
+        failures.append(f"Claim for another type should miss and reserve one: {uploads.batches}, {pool.stats}")
+    print("✓ Claims served from the slot for their type, whatever their size")
+
+def check_ttl(failures):
+    pool, clock, _ = make_pool(target_size=3, low_water_mark=0)
+    ttl = min(asset_ticket_pool.PRESIGNED_URL_EXPIRES_SECONDS, asset_ticket_pool.ASSET_CLEANUP_TIMEOUT_SECONDS) \
+        - asset_ticket_pool.DEFAULT_SAFETY_MARGIN_SECONDS
+    if ttl != 25:
+        failures.append(f"Expected a 25 s ticket lifetime, got {ttl}")
+    pool.prefill(GAME_ID, SECTION_ID, MIME_TYPE)
+    clock.now += ttl - 0.1
+    if pool.size(GAME_ID, SECTION_ID, MIME_TYPE) != 3:
+        failures.append("Tickets were evicted before their lifetime was up")
+    clock.now += 0.1
+    if pool.size(GAME_ID, SECTION_ID, MIME_TYPE) != 0 or pool.stats.evicted != 3:
+        failures.append(f"Tickets should be evicted {ttl} s after reservation: {pool.stats}")
+    pool.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    if pool.stats.hits or pool.stats.misses != 1:
+        failures.append(f"An expired ticket was handed out: {pool.stats}")
+    print(f"✓ Tickets evicted after min(900, 30) - 5 = {ttl} s")
+
+def check_refill(failures):
+    pool, _, uploads = make_pool(target_size=5, low_water_mark=2)
+    pool.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    if uploads.batches != [1]:
+        failures.append(f"A slot claimed once should only reserve its own ticket: {uploads.batches}")
+    pool.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    if uploads.batches != [1, 5, 1] or pool.size(GAME_ID, SECTION_ID, MIME_TYPE) != 5:
+        failures.append(f"A slot claimed again should fill in one batch: {uploads.batches}")
+    for _ in range(3):
+        pool.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    # Down to the low-water mark, so topped back up with one batch of the difference
+    if uploads.batches != [1, 5, 1, 3] or pool.size(GAME_ID, SECTION_ID, MIME_TYPE) != 5:
+        failures.append(f"Slot should be topped up at its low-water mark: {uploads.batches}")
+    print(f"✓ Slot refilled in batches {uploads.batches[1:]} once claimed again")
+
+    background = AssetTicketPool(FakeUploads(), target_size=5, low_water_mark=2, refill_after_claims=1)
+    background.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    deadline = time.monotonic() + 5
+    while background.size(GAME_ID, SECTION_ID, MIME_TYPE) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    if background.size(GAME_ID, SECTION_ID, MIME_TYPE) != 5:
+        failures.append("Background refill didn't fill the slot")
+    print("✓ Background refill fills the slot")
+
+def check_idle(failures):
+    pool, clock, uploads = make_pool(target_size=5, low_water_mark=2)
+    pool.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    clock.now += MINUTE
+    pool.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    # Claims further apart than a ticket's lifetime would only leave refilled tickets to expire
+    if uploads.batches != [1, 1]:
+        failures.append(f"A slot idle for a ticket's lifetime was refilled: {uploads.batches}")
+    print("✓ Slot not refilled for claims a ticket's lifetime apart")
+
+def measure(gaps):
+    """Claim a ticket after each gap in seconds; returns (hit rate, reserved, unused)"""
+    pool, clock, uploads = make_pool(target_size=5, low_water_mark=2)
+    for gap in gaps:
+        clock.now += gap
+        pool.claim(GAME_ID, SECTION_ID, MIME_TYPE)
+    # Every reserved ticket used up a remainingAssets slot; those not claimed were reserved for nothing
+    return pool.stats.hit_rate, uploads.issued, uploads.issued - len(gaps)
+
+def main():
+    failures = []
+    check_claim(failures)
+    check_ttl(failures)
+    check_refill(failures)
+    check_idle(failures)
+
+    print(f"\n{CLAIMS} claims:")
+    print(f"  {'pastes':<32}{'hits':>6}{'reserved':>10}{'unused':>8}")
+    steady, bursts, single = (
+        ('steady, a second apart', [1] * CLAIMS),
+        ('bursts of 5, a minute apart', [MINUTE if n % 5 == 0 else 1 for n in range(CLAIMS)]),
+        ('single, a minute apart', [MINUTE] * CLAIMS),
+    )
+    results = {}
+    for label, gaps in (steady, bursts, single):
+        hit_rate, reserved, unused = results[label] = measure(gaps)
+        print(f"  {label:<32}{hit_rate:>6.0%}{reserved:>10}{unused:>8}")
+    if results[steady[0]][0] < 0.9:
+        failures.append(f"{steady[0]}: expected most claims served from the pool, got {results[steady[0]][0]:.0%}")
+    if results[steady[0]][2] > 5:
+        failures.append(f"{steady[0]}: more than a slot's worth of tickets unclaimed: {results[steady[0]][2]}")
+    if results[single[0]][2]:
+        failures.append(f"{single[0]}: {results[single[0]][2]} tickets reserved that were never claimed")
+
+    if failures:
+        print("✗ Ticket pool failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("✓ Ticket pool behaves as expected")
+
+
+if __name__ == "__main__":
+    main()
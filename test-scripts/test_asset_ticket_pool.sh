@@ -0,0 +1,13 @@
+#!/bin/bash
+set -e
+
+# Tests the upload ticket pool's claims, TTL eviction and refill, and measures its hit rate and quota cost.
+
+echo "Running asset ticket pool test in Docker container..."
+echo ""
+
+docker run --rm \
+    -v "$(pwd)/scripts:/work/scripts" \
+    -v "$(pwd)/test-scripts:/work/test-scripts" \
+    python:3.12-slim \
+    python -u /work/test-scripts/test_asset_ticket_pool.py
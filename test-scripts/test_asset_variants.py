@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test the generateAssetVariants Lambda against a local S3 stand-in.
+Tests: streaming reader and writer -> original in asset/ -> lambda_handler -> variants under variantsPrefix
+"""
+
+import gc
+import hashlib
+import io
+import os
+import sys
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'generateAssetVariants')
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common')
+# Small enough that the original is read in several ranged GETs
+STREAM_BUFFER_BYTES = 1024 * 1024
+BUCKET = 'wildsea-variants-test'
+ORIGINAL_KEY = 'asset/game/test-game/section/test-section/test-asset/original'
+VARIANTS_PREFIX = 'asset/game/test-game/section/test-section/test-asset/variants/'
+MULTIPART_TEST_KEY = 'asset/game/test-game/section/test-section/multipart-test/original'
+MULTIPART_WHOLE_KEY = 'asset/game/test-game/section/test-section/multipart-whole/original'
+MULTIPART_ABANDONED_KEY = 'asset/game/test-game/section/test-section/multipart-abandoned/original'
+MULTIPART_TEST_BYTES = 12 * 1024 * 1024  # Three 5 MiB parts, the last one short
+
+def start_local_s3():
+    """Start an in-process moto S3 server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+def create_test_image(width, height):
+    """Create a noisy JPEG, so it is large enough to need several ranged GETs"""
+    from PIL import Image
+
+    gradient = Image.radial_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 64)
+    image = Image.merge('RGB', (gradient, noise, Image.blend(gradient, noise, 0.5)))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+def main():
+    # Dummy credentials - nothing is sent to AWS
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+
+    server = None
+    if not os.environ.get('S3_ENDPOINT_URL'):
+        endpoint_url, server = start_local_s3()
+        os.environ['S3_ENDPOINT_URL'] = endpoint_url
+    print(f"Using S3 endpoint: {os.environ['S3_ENDPOINT_URL']}")
+
+    os.environ.setdefault('ASSET_STREAM_BUFFER_BYTES', str(STREAM_BUFFER_BYTES))
+    sys.path.insert(0, COMMON_DIR)
+    sys.path.insert(0, LAMBDA_DIR)
+    import lambda_function
+    from asset_stream import MIN_PART_BYTES, RangedObjectReader, MultipartUploadWriter, digest_stream
+    from PIL import Image
+
+    try:
+        s3 = lambda_function.get_s3_client()
+        s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={
+            'LocationConstraint': os.environ['AWS_DEFAULT_REGION']
+        })
+        original = create_test_image(3000, 2000)
+        s3.put_object(Bucket=BUCKET, Key=ORIGINAL_KEY, Body=original, ContentType='image/jpeg')
+        print(f"✓ Uploaded original ({len(original)} bytes)")
+
+        failures = []
+
+        # The ranged reader must return exactly the bytes that were uploaded
+        with RangedObjectReader(s3, BUCKET, ORIGINAL_KEY) as reader:
+            size, sha256 = digest_stream(reader)
+            print(f"  Verified original in {reader.requests} ranged GETs")
+        if (size, sha256) != (len(original), hashlib.sha256(original).hexdigest()):
+            failures.append("Original read back through RangedObjectReader does not match the upload")
+
+        # Anything over one part must go through a multipart upload and come back intact
+        payload = os.urandom(MULTIPART_TEST_BYTES)
+        with MultipartUploadWriter(s3, BUCKET, MULTIPART_TEST_KEY) as writer:
+            for offset in range(0, len(payload), 1024 * 1024):
+                writer.write(payload[offset:offset + 1024 * 1024])
+        with RangedObjectReader(s3, BUCKET, MULTIPART_TEST_KEY) as reader:
+            if digest_stream(reader) != (len(payload), hashlib.sha256(payload).hexdigest()):
+                failures.append("Multipart upload does not match what was written")
+        print(f"  Verified {len(payload)} byte multipart upload")
+
+        # One large write is uploaded a part at a time, never buffered whole
+        buffered = []
+        with MultipartUploadWriter(s3, BUCKET, MULTIPART_WHOLE_KEY) as writer:
+            upload_part = writer._upload_part
+            writer._upload_part = lambda data: (buffered.append(len(data)), upload_part(data))
+            writer.write(payload)
+            buffered.append(len(writer._buffer))
+        with RangedObjectReader(s3, BUCKET, MULTIPART_WHOLE_KEY) as reader:
+            if digest_stream(reader) != (len(payload), hashlib.sha256(payload).hexdigest()):
+                failures.append("Multipart upload from a single write does not match what was written")
+        if max(buffered) > MIN_PART_BYTES:
+            failures.append(f"A single write buffered {max(buffered)} bytes, more than a part")
+        print(f"  Verified a single {len(payload)} byte write, buffering at most {max(buffered)} bytes")
+
+        # A writer dropped without being closed aborts, rather than completing a partial object
+        writer = MultipartUploadWriter(s3, BUCKET, MULTIPART_ABANDONED_KEY)
+        writer.write(payload[:MIN_PART_BYTES + 1])
+        del writer
+        gc.collect()
+        uploads = s3.list_multipart_uploads(Bucket=BUCKET, Prefix=MULTIPART_ABANDONED_KEY).get('Uploads', [])
+        listed = s3.list_objects_v2(Bucket=BUCKET, Prefix=MULTIPART_ABANDONED_KEY).get('Contents', [])
+        if uploads or listed:
+            failures.append(f"Abandoned writer left {len(uploads)} uploads and {len(listed)} objects")
+        print("  Verified an abandoned writer aborts its upload")
+
+        event = {
+            'source': 'asset.promoted',
+            'detail-type': 'ObjectCreated',
+            'detail': {
+                'bucket': BUCKET,
+                'key': ORIGINAL_KEY,
+                'gameId': 'test-game',
+                'sectionId': 'test-section',
+                'assetId': 'test-asset',
+            }
+        }
+        result = lambda_function.lambda_handler(event, None)
+
+        listed = s3.list_objects_v2(Bucket=BUCKET, Prefix=VARIANTS_PREFIX)
+        keys = sorted(obj['Key'] for obj in listed.get('Contents', []))
+        expected = sorted(v['key'] for v in result['variants'])
+
+        if keys != expected:
+            failures.append(f"Variants in bucket {keys} do not match result {expected}")
+        for variant in result['variants']:
+            longest = max(variant['width'], variant['height'])
+            limit = 256 if '/thumb.' in variant['key'] else 1024
+            if longest != limit:
+                failures.append(f"{variant['key']} is {variant['width']}x{variant['height']}, expected longest side {limit}")
+            head = s3.head_object(Bucket=BUCKET, Key=variant['key'])
+            if head['ContentType'] != variant['mimeType']:
+                failures.append(f"{variant['key']} has Content-Type {head['ContentType']}")
+            if head['ContentLength'] != variant['sizeBytes']:
+                failures.append(f"{variant['key']} is {head['ContentLength']} bytes, expected {variant['sizeBytes']}")
+            # Decode the stored variant to check it is a valid image of the reported size
+            with RangedObjectReader(s3, BUCKET, variant['key']) as reader:
+                with Image.open(reader) as stored:
+                    if stored.size != (variant['width'], variant['height']):
+                        failures.append(f"{variant['key']} decodes as {stored.size[0]}x{stored.size[1]}")
+            print(f"  {variant['key']}: {variant['width']}x{variant['height']}, "
+                  f"{head['ContentLength']} bytes, {head['ContentType']}")
+
+        if failures:
+            print("✗ Variant generation failed:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print(f"✓ Generated {len(keys)} variants under {VARIANTS_PREFIX}")
+
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+#!/bin/bash
+set -e
+
+# Runs the generateAssetVariants Lambda against an in-process moto S3 server.
+# Set S3_ENDPOINT_URL to use another local S3 stand-in (e.g. MinIO) instead.
+
+echo "Running asset variant generation test in Docker container..."
+echo ""
+
+docker run --rm \
+    -v "$(pwd)/lambda/generateAssetVariants:/lambda/generateAssetVariants" \
+    -v "$(pwd)/lambda/common:/lambda/common" \
+    -v "$(pwd)/test-scripts/test_asset_variants.py:/test-scripts/test_asset_variants.py" \
+    -e S3_ENDPOINT_URL="$S3_ENDPOINT_URL" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install -r /lambda/generateAssetVariants/requirements.txt boto3 'moto[server]' && python -u /test-scripts/test_asset_variants.py"
@@ -2,136 +2,105 @@
 """
 Complete end-to-end test for asset upload and event-driven finalization.
 Tests: requestAssetUpload -> S3 upload -> EventBridge -> _finaliseAsset -> status change
+
+The status change is seen on the updatedAsset subscription, timed from the end
+of the upload. If the subscription is unavailable, getAsset is polled with
+exponential backoff instead.
 """
 
+import asyncio
 import json
 import sys
 import os
+import tempfile
 import time
-import urllib.request
-from urllib.parse import urlparse
-import urllib.error
 import requests
 
-def _validate_https_url(url: str, allowed_hosts=None):
-    """Raise ValueError unless url is https:// and (optionally) host is allowed."""
-    parsed = urlparse(url)
-    if parsed.scheme != "https" or not parsed.netloc or parsed.username or parsed.password:
-        raise ValueError("URL must be HTTPS, contain a host, and have no credentials")
-    if allowed_hosts:
-        host = (parsed.hostname or "").lower()
-        if not any(host == h or host.endswith("." + h) for h in (h.lower() for h in allowed_hosts)):
-            raise ValueError(f"Host '{host}' is not in the allowed list")
-
-def get_cognito_token(username, password, user_pool_id, client_id, region):
-    """Authenticate with Cognito and get access token"""
-    if not region or not region.replace('-', '').isalnum():
-        raise ValueError("Invalid AWS region")
-
-    cognito_idp_url = f"https://cognito-idp.{region}.amazonaws.com/"
-    _validate_https_url(cognito_idp_url, allowed_hosts=["amazonaws.com"])
-
-    payload = {
-        'AuthFlow': 'USER_PASSWORD_AUTH',
-        'ClientId': client_id,
-        'AuthParameters': {
-            'USERNAME': username,
-            'PASSWORD': password
-        }
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from appsync_realtime import RealtimeClient, RealtimeError  # noqa: E402
+from cognito_auth import AuthError  # noqa: E402
+from graphql_client import Document, GraphQLError, sign_in  # noqa: E402
+from load_generator import TransportError  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common'))
+from asset_stream import MultipartFormBody  # noqa: E402
+
+FINALISED_STATUSES = ('FINALISING', 'READY')
+FAILED_STATUSES = ('EXPIRED', 'CANCELED')
+POLL_INITIAL_SECONDS = 0.1
+POLL_MAX_SECONDS = 2.0
+WATCHER_CHECK_SECONDS = 0.5
+TEST_FILE_BYTES = 0  # Within MAX_ASSET_SIZE_BYTES, whatever it is set to
+UPLOAD_TIMEOUT_SECONDS = 30
+
+UPDATED_ASSET_SUBSCRIPTION = """
+subscription UpdatedAsset($gameId: ID!) {
+    updatedAsset(gameId: $gameId) {
+        assetId
+        status
     }
+}
+"""
 
-    data = json.dumps(payload).encode('utf-8')
-    req = urllib.request.Request(
-        cognito_idp_url,
-        data=data,
-        headers={
-            'X-Amz-Target': 'AWSCognitoIdentityProviderService.InitiateAuth',
-            'Content-Type': 'application/x-amz-json-1.1'
-        }
-    )
-
-    try:
-        with urllib.request.urlopen(req) as response:  # nosec B310
-            result = json.loads(response.read().decode('utf-8'))
-
-        if 'AuthenticationResult' in result:
-            return result['AuthenticationResult']['AccessToken']
-        else:
-            return None
-    except urllib.error.HTTPError:
-        return None
-
-def request_asset_upload(access_token, graphql_url, game_id, section_id):
-    """Step 1: Request asset upload to get presigned URL"""
-    _validate_https_url(graphql_url)
-
-    mutation = """
-    mutation RequestAssetUpload($input: RequestAssetUploadInput!) {
-        requestAssetUpload(input: $input) {
-            uploadUrl
-            uploadFields
-            asset {
-                gameId
-                sectionId
-                assetId
-                status
-                mimeType
-                sizeBytes
-                createdAt
-                type
-            }
+REQUEST_ASSET_UPLOAD = Document("""
+mutation RequestAssetUpload($input: RequestAssetUploadInput!) {
+    requestAssetUpload(input: $input) {
+        uploadUrl
+        uploadFields
+        asset {
+            gameId
+            sectionId
+            assetId
+            status
+            mimeType
+            sizeBytes
+            createdAt
+            type
         }
     }
-    """
+}
+""")
+
+GET_ASSET = Document("""
+query GetAsset($input: GetAssetInput!) {
+    getAsset(input: $input) {
+        assetId
+        status
+    }
+}
+""")
 
+async def request_asset_upload(client, game_id, section_id):
+    """Step 1: Request asset upload to get presigned URL"""
     variables = {
         "input": {
             "gameId": game_id,
             "sectionId": section_id,
             "mimeType": "image/jpeg",
-            "sizeBytes": 0,  # 0 byte test file
+            "sizeBytes": TEST_FILE_BYTES,
             "label": "End-to-end test image"
         }
     }
 
-    payload = {
-        "query": mutation,
-        "variables": variables
-    }
-
-    data = json.dumps(payload).encode('utf-8')
-    req = urllib.request.Request(
-        graphql_url,
-        data=data,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}"
-        }
-    )
-
     try:
-        with urllib.request.urlopen(req) as response:  # nosec B310
-            result = json.loads(response.read().decode('utf-8'))
-
-        if 'errors' in result:
-            print(f"GraphQL Error: {result['errors'][0].get('message', 'Unknown error')}")
-            return None
-
-        if 'data' in result and result['data'].get('requestAssetUpload'):
-            upload_result = result['data']['requestAssetUpload']
-            print(f"✓ Asset upload requested - Asset ID: {upload_result['asset']['assetId']}")
-            print(f"  Status: {upload_result['asset']['status']}")
-            return upload_result
-        else:
-            print("✗ No upload data returned from requestAssetUpload")
-            return None
-
-    except Exception as e:
+        data = await client.execute(REQUEST_ASSET_UPLOAD, variables)
+    except GraphQLError as e:
+        print(f"GraphQL Error: {str(e)}")
+        return None
+    except (TransportError, AuthError) as e:
         print(f"✗ Error requesting asset upload: {str(e)}")
         return None
 
-def upload_file_to_s3(upload_url, upload_fields, file_content):
-    """Step 2: Upload file to S3 using requests library"""
+    upload_result = data.get('requestAssetUpload')
+    if not upload_result:
+        print("✗ No upload data returned from requestAssetUpload")
+        return None
+    print(f"✓ Asset upload requested - Asset ID: {upload_result['asset']['assetId']}")
+    print(f"  Status: {upload_result['asset']['status']}")
+    return upload_result
+
+def upload_file_to_s3(upload_url, upload_fields, file_path):
+    """Step 2: Upload file to S3, streaming it from disk"""
     try:
         # Parse upload fields
         if isinstance(upload_fields, str):
@@ -144,11 +113,10 @@ def upload_file_to_s3(upload_url, upload_fields, file_content):
         print(f"  Upload URL: {upload_url}")
         print(f"  S3 Object Key: {fields.get('key', 'unknown')}")
 
-        # Prepare multipart form data
-        files = {'file': ('test.jpg', file_content, 'image/jpeg')}
-
-        # Use requests to upload (handles multipart properly)
-        response = requests.post(upload_url, data=fields, files=files, timeout=30)
+        # The form is streamed with its Content-Length, rather than built in memory
+        body = MultipartFormBody(fields, file_path, 'image/jpeg', filename='test.jpg')
+        response = requests.post(upload_url, data=body, headers={'Content-Type': body.content_type},
+                                 timeout=UPLOAD_TIMEOUT_SECONDS)
 
         if response.status_code == 204:
             print("✓ File uploaded to S3 successfully")
@@ -162,83 +130,198 @@ def upload_file_to_s3(upload_url, upload_fields, file_content):
         print(f"✗ Error uploading file to S3: {str(e)}")
         return False
 
-def get_asset_status(access_token, graphql_url, game_id, asset_id):
+async def get_asset_status(client, game_id, asset_id):
     """Query current asset status"""
-    _validate_https_url(graphql_url)
-
-    query = """
-    query GetGame($input: GetGameInput!) {
-        getGame(input: $input) {
-            playerSheets {
-                sections {
-                    assets
-                }
-            }
-        }
-    }
-    """
-
-    # Note: This is a simplified check - in a real implementation you'd want
-    # a more direct way to query asset status, but this works for testing
     variables = {
         "input": {
             "gameId": game_id,
-            "language": "en"
+            "assetId": asset_id
         }
     }
 
-    payload = {
-        "query": query,
-        "variables": variables
-    }
+    try:
+        data = await client.execute(GET_ASSET, variables)
+    except GraphQLError as e:
+        print(f"GraphQL Error checking status: {str(e)}")
+        return None
+    except (TransportError, AuthError) as e:
+        print(f"Error checking asset status: {str(e)}")
+        return None
+    return data['getAsset']['status']
 
-    data = json.dumps(payload).encode('utf-8')
-    req = urllib.request.Request(
-        graphql_url,
-        data=data,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}"
-        }
-    )
+class FinalisationWatcher:
+    """
+    Listens on the game's updatedAsset subscription
 
-    try:
-        with urllib.request.urlopen(req) as response:  # nosec B310
-            result = json.loads(response.read().decode('utf-8'))
+    Started before the upload, so the finalisation event can't be missed.
+    Each status is recorded with the time.perf_counter() it arrived at.
+    """
 
-        if 'errors' in result:
-            print(f"GraphQL Error checking status: {result['errors'][0].get('message', 'Unknown error')}")
-            return None
+    def __init__(self, access_token, graphql_url, game_id):
+        self._client = RealtimeClient(graphql_url, access_token, self._on_data)
+        self._game_id = game_id
+        self._changed = asyncio.Event()
+        self._statuses = {}  # asset_id -> {status: received_at}
+
+    def _on_data(self, subscription_id, payload, received_at):
+        asset = (payload.get('data') or {}).get('updatedAsset') or {}
+        self._statuses.setdefault(asset.get('assetId'), {}).setdefault(asset.get('status'), received_at)
+        self._changed.set()
+
+    async def start(self):
+        """Connect and subscribe, returning False (and printing why) if the subscription can't be used"""
+        try:
+            await self._client.connect()
+            await self._client.subscribe(UPDATED_ASSET_SUBSCRIPTION, {'gameId': self._game_id})
+            return True
+        except (RealtimeError, asyncio.TimeoutError) as e:
+            print(f"⚠ updatedAsset subscription unavailable: {str(e) or type(e).__name__}")
+            await self.stop()
+            return False
 
-        # For this test, we'll assume if we can query without error, the asset exists
-        # A proper implementation would have a direct asset query
-        return "EXISTS"
+    @property
+    def connected(self):
+        return self._client.connected
+
+    async def wait(self, asset_id, statuses, deadline):
+        """(status, received_at) of the asset's first event in statuses, or None if the deadline or a disconnect comes first"""
+        while True:
+            seen = self._statuses.get(asset_id, {})
+            for status in statuses:
+                if status in seen:
+                    return status, seen[status]
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self.connected:
+                return None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), min(remaining, WATCHER_CHECK_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self):
+        await self._client.close()
+
+async def poll_for_finalization(client, game_id, asset_id, deadline):
+    """
+    Poll getAsset with exponential backoff until the asset leaves PENDING
 
-    except Exception as e:
-        print(f"Error checking asset status: {str(e)}")
-        return None
+    Returns (status, seen_at, uncertainty): the status changed some time in
+    the uncertainty seconds before seen_at.
+    """
+    delay = POLL_INITIAL_SECONDS
+    last_poll = time.perf_counter()
+    while True:
+        status = await get_asset_status(client, game_id, asset_id)
+        now = time.perf_counter()
+        if status in FINALISED_STATUSES or status in FAILED_STATUSES:
+            return status, now, now - last_poll
+        last_poll = now
+        if now + delay > deadline:
+            return None
+        print(f"  Still {status or 'unknown'}, checking again in {delay * 1000:.0f} ms...")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, POLL_MAX_SECONDS)
 
-def wait_for_finalization(access_token, graphql_url, game_id, asset_id, max_wait_seconds=30):
+async def wait_for_finalization(client, game_id, asset_id, uploaded_at, watcher=None, max_wait_seconds=30):
     """Step 3: Wait for EventBridge to process S3 event and finalize asset"""
     print(f"⏳ Waiting up to {max_wait_seconds} seconds for asset finalization...")
+    deadline = uploaded_at + max_wait_seconds
+
+    result = None
+    source = "updatedAsset subscription"
+    uncertainty = 0.0
+    if watcher and watcher.connected:
+        result = await watcher.wait(asset_id, FINALISED_STATUSES + FAILED_STATUSES, deadline)
+        if result is None and not watcher.connected:
+            print("⚠ Subscription dropped, falling back to polling getAsset")
+    if result is None and not (watcher and watcher.connected):
+        source = "getAsset polling"
+        polled = await poll_for_finalization(client, game_id, asset_id, deadline)
+        if polled:
+            status, seen_at, uncertainty = polled
+            result = status, seen_at
+
+    if result is None:
+        print(f"✗ Timeout waiting for asset finalization after {max_wait_seconds} seconds")
+        return False
 
-    start_time = time.time()
-    while time.time() - start_time < max_wait_seconds:
-        status = get_asset_status(access_token, graphql_url, game_id, asset_id)
-        if status == "EXISTS":
-            print("✓ Asset finalization completed (asset still exists in system)")
-            return True
+    status, seen_at = result
+    if status in FAILED_STATUSES:
+        print(f"✗ Asset was {status} instead of being finalised")
+        return False
+
+    elapsed_ms = (seen_at - uploaded_at) * 1000
+    accuracy = f" (±{uncertainty * 1000:.0f} ms)" if uncertainty else ""
+    print(f"✓ Asset {status} {elapsed_ms:.0f} ms{accuracy} after upload, seen via {source}")
+    return True
+
+async def run_flow(graphql_url, client_id, region, game_id, section_id, username, password, upload_delay):
+    # Step 1: Get Cognito token
+    print("1️⃣  Getting Cognito access token...")
+    try:
+        client = await sign_in(graphql_url, username, password, client_id, region, max_connections=1)
+    except (AuthError, TransportError) as e:
+        print(f"✗ Failed to get access token: {str(e)}")
+        return False
+    print("✓ Access token obtained")
+
+    watcher = None
+    try:
+        # Listen for the finalisation event before uploading, so it can't be missed
+        watcher = FinalisationWatcher(await client.auth.token(), graphql_url, game_id)
+        if not await watcher.start():
+            print("  Finalization will be checked by polling getAsset instead")
+            watcher = None
+
+        # Step 2: Request asset upload
+        print("\n2️⃣  Requesting asset upload...")
+        upload_result = await request_asset_upload(client, game_id, section_id)
+        if not upload_result:
+            print("✗ Failed to request asset upload")
+            return False
 
-        print("  Still waiting for finalization...")
-        time.sleep(2)
+        asset_id = upload_result['asset']['assetId']
+        upload_url = upload_result['uploadUrl']
+        upload_fields = upload_result['uploadFields']
+
+        # Step 2.5: Optional delay between request and upload
+        if upload_delay > 0:
+            print(f"\n⏱️  Waiting {upload_delay} seconds before upload...")
+            await asyncio.sleep(upload_delay)
+            print("✓ Delay completed")
+
+        # Step 3: Create test file content (exactly as many bytes as declared in requestAssetUpload)
+        print("\n3️⃣  Uploading file to S3...")
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as test_file:
+            test_file.write(b'\xff' * TEST_FILE_BYTES)
+            test_file.flush()
+            print(f"  File size: {os.path.getsize(test_file.name)} bytes")
+
+            success = await asyncio.to_thread(upload_file_to_s3, upload_url, upload_fields, test_file.name)
+        uploaded_at = time.perf_counter()
+        if not success:
+            print("✗ Failed to upload file to S3")
+            return False
+
+        # Step 4: Wait for finalization
+        print("\n4️⃣  Waiting for event-driven finalization...")
+        if not await wait_for_finalization(client, game_id, asset_id, uploaded_at, watcher):
+            print("✗ Asset finalization failed or timed out")
+            return False
+    finally:
+        if watcher:
+            await watcher.stop()
+        await client.close()
 
-    print(f"✗ Timeout waiting for asset finalization after {max_wait_seconds} seconds")
-    return False
+    print("\n🎉 Complete asset upload and finalization test successful!")
+    print(f"   Asset ID {asset_id} processed through entire flow:")
+    print("   requestAssetUpload → S3 upload → EventBridge → _finaliseAsset")
+    return True
 
 def main():
     # Get required environment variables
     graphql_url = os.getenv('GRAPHQL_URL')
-    user_pool_id = os.getenv('COGNITO_USER_POOL_ID')
     client_id = os.getenv('COGNITO_CLIENT_ID')
     region = os.getenv('AWS_REGION')
     game_id = os.getenv('GAME_ID')
@@ -247,9 +330,9 @@ def main():
     password = os.getenv('COGNITO_PASSWORD')
     upload_delay = int(os.getenv('UPLOAD_DELAY', '0'))
 
-    if not all([graphql_url, user_pool_id, client_id, region, game_id, section_id, username, password]):
+    if not all([graphql_url, client_id, region, game_id, section_id, username, password]):
         print("✗ Missing required environment variables")
-        print("Required: GRAPHQL_URL, COGNITO_USER_POOL_ID, COGNITO_CLIENT_ID, AWS_REGION, GAME_ID, SECTION_ID, COGNITO_USERNAME, COGNITO_PASSWORD")
+        print("Required: GRAPHQL_URL, COGNITO_CLIENT_ID, AWS_REGION, GAME_ID, SECTION_ID, COGNITO_USERNAME, COGNITO_PASSWORD")
         sys.exit(1)
 
     print("🚀 Starting complete asset upload and finalization test")
@@ -259,52 +342,8 @@ def main():
         print(f"Upload Delay: {upload_delay} seconds")
     print()
 
-    # Step 1: Get Cognito token
-    print("1️⃣  Getting Cognito access token...")
-    access_token = get_cognito_token(username, password, user_pool_id, client_id, region)
-    if not access_token:
-        print("✗ Failed to get access token")
-        sys.exit(1)
-    print("✓ Access token obtained")
-
-    # Step 2: Request asset upload
-    print("\n2️⃣  Requesting asset upload...")
-    upload_result = request_asset_upload(access_token, graphql_url, game_id, section_id)
-    if not upload_result:
-        print("✗ Failed to request asset upload")
-        sys.exit(1)
-
-    asset_id = upload_result['asset']['assetId']
-    upload_url = upload_result['uploadUrl']
-    upload_fields = upload_result['uploadFields']
-
-    # Step 2.5: Optional delay between request and upload
-    if upload_delay > 0:
-        print(f"\n⏱️  Waiting {upload_delay} seconds before upload...")
-        time.sleep(upload_delay)
-        print("✓ Delay completed")
-
-    # Step 3: Create test file content (exactly 1024 bytes as declared in requestAssetUpload)
-    print("\n3️⃣  Uploading file to S3...")
-    # Create exactly 1024 bytes of content
-    test_file_content = b''  # 0 byte file
-    print(f"  File size: {len(test_file_content)} bytes")
-
-    success = upload_file_to_s3(upload_url, upload_fields, test_file_content)
-    if not success:
-        print("✗ Failed to upload file to S3")
+    if not asyncio.run(run_flow(graphql_url, client_id, region, game_id, section_id, username, password, upload_delay)):
         sys.exit(1)
 
-    # Step 4: Wait for finalization
-    print("\n4️⃣  Waiting for event-driven finalization...")
-    success = wait_for_finalization(access_token, graphql_url, game_id, asset_id)
-    if not success:
-        print("✗ Asset finalization failed or timed out")
-        sys.exit(1)
-
-    print("\n🎉 Complete asset upload and finalization test successful!")
-    print(f"   Asset ID {asset_id} processed through entire flow:")
-    print("   requestAssetUpload → S3 upload → EventBridge → _finaliseAsset")
-
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -17,7 +17,7 @@ usage() {
     echo "2. Optional delay (useful for testing upload URL expiration)"
     echo "3. S3 file upload using presigned URL"
     echo "4. S3 event → EventBridge → _finaliseAsset resolver"
-    echo "5. Asset status change from PENDING to READY"
+    echo "5. Asset status change from PENDING, seen on the updatedAsset subscription (or by polling getAsset)"
     echo ""
     echo "Examples:"
     echo "  $0 username 'mypassword' 'cd69661a-57e4-450d-8670-1058958b1bfe' '9187e56a-07f2-4ca8-945a-264ad970e2e2'"
@@ -64,8 +64,12 @@ echo "Upload Delay: $UPLOAD_DELAY seconds"
 echo ""
 
 # Build docker run command with required environment variables
+# The GraphQL and subscription clients are shared with the load scripts,
+# and the upload body is streamed by the shared Lambda layer's asset_stream module
 docker run --rm \
-    -v "$(pwd)/test-scripts/test_complete_asset_flow.py:/test_complete_asset_flow.py" \
+    -v "$(pwd)/test-scripts:/work/test-scripts" \
+    -v "$(pwd)/scripts:/work/scripts" \
+    -v "$(pwd)/lambda/common:/work/lambda/common" \
     -e GRAPHQL_URL="$GRAPHQL_URL" \
     -e COGNITO_USER_POOL_ID="$COGNITO_USER_POOL_ID" \
     -e COGNITO_CLIENT_ID="$COGNITO_CLIENT_ID" \
@@ -76,4 +80,4 @@ docker run --rm \
     -e COGNITO_PASSWORD="$COGNITO_PASSWORD" \
     -e UPLOAD_DELAY="$UPLOAD_DELAY" \
     python:3.11-slim \
-    bash -c "pip install requests && python -u /test_complete_asset_flow.py"
\ No newline at end of file
+    bash -c "pip install requests && python -u /work/test-scripts/test_complete_asset_flow.py"
\ No newline at end of file
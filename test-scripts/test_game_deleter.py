@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Test the deleteGame Lambda against local DynamoDB, S3 and EventBridge stand-ins.
+Tests: paginated partition sweep -> DeletePlayer events in 10s -> BatchWriteItem in 25s -> upload cleanup
+       -> originals deleted once no asset references them
+"""
+
+import json
+import os
+import sys
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'deleteGame')
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common')
+TABLE_NAME = 'Wildsea-deleter-test'
+BUCKET = 'wildsea-deleter-test'
+BUS_NAME = 'wildsea-deleter-test'
+GAME_ID = 'deleted-game'
+OTHER_GAME_ID = 'other-game'
+OWNER_GAME_ID = 'owner-game'
+SHARER_GAME_ID = 'sharer-game'
+PLAYERS = 23
+SECTIONS = 60
+ASSETS = 40
+SECTION_PADDING_BYTES = 100 * 1024  # Pushes the partition well past one 1 MB query page
+
+def start_local_aws():
+    """Start an in-process moto server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+class CallSizes:
+    """Wraps a client to record the number of entries in each write call"""
+
+    def __init__(self, client, method, count):
+        self._client = client
+        self._method = method
+        self._count = count
+        self.calls = []
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name != self._method:
+            return attribute
+
+        def call(**kwargs):
+            self.calls.append(self._count(kwargs))
+            return attribute(**kwargs)
+        return call
+
+def create_game(dynamodb, s3, game_id):
+    """Write a game partition with players, NPCs, sections and assets; returns the upload and original keys"""
+    items = [{'PK': {'S': f"GAME#{game_id}"}, 'SK': {'S': 'GAME'}, 'type': {'S': 'GAME'}}]
+    for n in range(PLAYERS):
+        items.append({'PK': {'S': f"GAME#{game_id}"}, 'SK': {'S': f"PLAYER#player-{n}"},
+                      'userId': {'S': f"player-{n}"}, 'type': {'S': 'NPC' if n % 3 else 'CHARACTER'}})
+    for n in range(SECTIONS):
+        items.append({'PK': {'S': f"GAME#{game_id}"}, 'SK': {'S': f"SECTION#section-{n}"},
+                      'userId': {'S': f"player-{n % PLAYERS}"}, 'type': {'S': 'SECTION'},
+                      'content': {'S': 'x' * SECTION_PADDING_BYTES}})
+    uploads, originals = [], []
+    for n in range(ASSETS):
+        prefix = f"game/{game_id}/section/section-{n % SECTIONS}/asset-{n}"
+        item = {'PK': {'S': f"GAME#{game_id}"}, 'SK': {'S': f"ASSET#asset-{n}"}, 'type': {'S': 'ASSET'},
+                'status': {'S': 'PENDING' if n % 2 else 'READY'},
+                'incomingKey': {'S': f"incoming/{prefix}/original"},
+                'originalKey': {'S': f"asset/{prefix}/original"},
+                'variantsPrefix': {'S': f"asset/{prefix}/variants/"}}
+        if n % 2:
+            # Still pending, so the upload is in incoming/
+            s3.put_object(Bucket=BUCKET, Key=item['incomingKey']['S'], Body=b'upload')
+            uploads.append(item['incomingKey']['S'])
+        else:
+            s3.put_object(Bucket=BUCKET, Key=item['originalKey']['S'], Body=b'original')
+            s3.put_object(Bucket=BUCKET, Key=item['variantsPrefix']['S'] + 'thumb.webp', Body=b'variant')
+            originals.append(item['originalKey']['S'])
+        items.append(item)
+    for item in items:
+        dynamodb.put_item(TableName=TABLE_NAME, Item=item)
+    return uploads, originals
+
+def create_shared_asset(dynamodb, s3, index, game_id, content_hash):
+    """Write a moved asset with content_hash, owning the indexed original or linked to it"""
+    prefix = f"asset/game/{game_id}/section/section-0/shared"
+    dynamodb.put_item(TableName=TABLE_NAME, Item={
+        'PK': {'S': f"GAME#{game_id}"}, 'SK': {'S': 'ASSET#shared'}, 'type': {'S': 'ASSET'},
+        'status': {'S': 'FINALISING'}, 'gameId': {'S': game_id}, 'assetId': {'S': 'shared'},
+        'originalKey': {'S': f"{prefix}/original"}, 'variantsPrefix': {'S': f"{prefix}/variants/"},
+    })
+    original = index.lookup(content_hash)
+    if not original:
+        s3.put_object(Bucket=BUCKET, Key=f"{prefix}/original", Body=b'shared')
+        s3.put_object(Bucket=BUCKET, Key=f"{prefix}/variants/thumb.webp", Body=b'variant')
+        index.record(content_hash, BUCKET, f"{prefix}/original", f"{prefix}/variants/", 6, game_id, 'shared')
+    index.link_asset(game_id, 'shared', content_hash, original)
+    dynamodb.update_item(TableName=TABLE_NAME, Key={'PK': {'S': f"GAME#{game_id}"}, 'SK': {'S': 'ASSET#shared'}},
+                         UpdateExpression='SET #status = :ready', ExpressionAttributeNames={'#status': 'status'},
+                         ExpressionAttributeValues={':ready': {'S': 'READY'}})
+
+def ref_count(dynamodb, content_hash):
+    """The index entry's refCount, or None if there is no entry"""
+    item = dynamodb.get_item(TableName=TABLE_NAME, Key={
+        'PK': {'S': f"ASSETHASH#{content_hash}"}, 'SK': {'S': 'ASSETHASH'}
+    }, ConsistentRead=True).get('Item')
+    return int(item['refCount']['N']) if item else None
+
+def object_count(s3, prefix):
+    return s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix)['KeyCount']
+
+def partition_keys(dynamodb, game_id):
+    keys = []
+    params = {'TableName': TABLE_NAME, 'KeyConditionExpression': 'PK = :pk', 'ProjectionExpression': 'SK',
+              'ExpressionAttributeValues': {':pk': {'S': f"GAME#{game_id}"}}}
+    while True:
+        response = dynamodb.query(**params)
+        keys.extend(item['SK']['S'] for item in response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return keys
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def receive_all(sqs, queue_url):
+    details = []
+    while True:
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10,
+                                       WaitTimeSeconds=1).get('Messages', [])
+        if not messages:
+            return details
+        for message in messages:
+            details.append(json.loads(message['Body'])['detail'])
+            sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+
+def main():
+    # Dummy credentials - nothing is sent to AWS
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+    os.environ['TABLE_NAME'] = TABLE_NAME
+    os.environ['ASSET_BUCKET'] = BUCKET
+    os.environ['EVENT_BUS_NAME'] = BUS_NAME
+    os.environ['DELETE_SOURCE'] = 'wildsea.table'
+    os.environ['DELETE_PLAYER_DETAIL_TYPE'] = 'DeletePlayer'
+
+    server = None
+    if not os.environ.get('AWS_ENDPOINT_URL'):
+        endpoint_url, server = start_local_aws()
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+    print(f"Using endpoint: {os.environ['AWS_ENDPOINT_URL']}")
+
+    sys.path.insert(0, COMMON_DIR)
+    sys.path.insert(0, LAMBDA_DIR)
+    import lambda_function
+    import lambda_utils
+    from asset_dedup import ContentIndex
+
+    try:
+        dynamodb = lambda_function.get_client('dynamodb')
+        events = lambda_function.get_client('events')
+        s3 = lambda_function.get_client('s3')
+        sqs = lambda_function.get_client('sqs')
+        dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': 'PK', 'AttributeType': 'S'},
+                                  {'AttributeName': 'SK', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={
+            'LocationConstraint': os.environ['AWS_DEFAULT_REGION']
+        })
+        # Capture DeletePlayer events in a queue
+        events.create_event_bus(Name=BUS_NAME)
+        queue_url = sqs.create_queue(QueueName=BUS_NAME)['QueueUrl']
+        queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=['QueueArn'])['Attributes']['QueueArn']
+        events.put_rule(Name='delete-player', EventBusName=BUS_NAME,
+                        EventPattern=json.dumps({'detail-type': ['DeletePlayer']}))
+        events.put_targets(Rule='delete-player', EventBusName=BUS_NAME, Targets=[{'Id': 'queue', 'Arn': queue_arn}])
+
+        uploads, originals = create_game(dynamodb, s3, GAME_ID)
+        create_game(dynamodb, s3, OTHER_GAME_ID)
+        # The game record itself is what deleteGame removes
+        dynamodb.delete_item(TableName=TABLE_NAME, Key={'PK': {'S': f"GAME#{GAME_ID}"}, 'SK': {'S': 'GAME'}})
+
+        # Record the size of every write call the Lambda makes
+        events_calls = CallSizes(events, 'put_events', lambda kwargs: len(kwargs['Entries']))
+        write_calls = CallSizes(dynamodb, 'batch_write_item',
+                                lambda kwargs: len(kwargs['RequestItems'][TABLE_NAME]))
+        lambda_utils._clients.update({'events': events_calls, 'dynamodb': write_calls})
+
+        stats = lambda_function.delete_game(GAME_ID, write_calls, events_calls, s3, TABLE_NAME, BUCKET)
+        failures = []
+        print(f"✓ Swept {stats.items} items over {stats.pages} pages in {stats.seconds:.2f}s "
+              f"({stats.items_per_second:.0f} items/s, {stats.write_calls} write calls)")
+
+        if stats.errors:
+            failures.append(f"Cleanup reported errors: {stats.errors}")
+        if stats.pages < 2:
+            failures.append(f"Expected the partition to span several query pages, got {stats.pages}")
+        if max(events_calls.calls) > 10 or sum(events_calls.calls) != PLAYERS:
+            failures.append(f"Unexpected PutEvents call sizes: {events_calls.calls}")
+        if max(write_calls.calls) > 25 or stats.items_deleted != SECTIONS + ASSETS:
+            failures.append(f"Unexpected BatchWriteItem call sizes: {write_calls.calls}")
+
+        remaining = partition_keys(dynamodb, GAME_ID)
+        if sorted(remaining) != sorted(f"PLAYER#player-{n}" for n in range(PLAYERS)):
+            failures.append(f"Expected only players left for deletePlayer, got {len(remaining)} items")
+        details = receive_all(sqs, queue_url)
+        if sorted(detail['userId'] for detail in details) != sorted(f"player-{n}" for n in range(PLAYERS)):
+            failures.append(f"Expected one DeletePlayer event per player, got {len(details)}")
+        print(f"✓ {len(details)} DeletePlayer events sent in {len(events_calls.calls)} PutEvents calls")
+
+        left = [key for key in uploads if s3.list_objects_v2(Bucket=BUCKET, Prefix=key)['KeyCount']]
+        if left:
+            failures.append(f"{len(left)} uploads were not deleted")
+        if object_count(s3, f"asset/game/{GAME_ID}/"):
+            failures.append(f"{object_count(s3, f'asset/game/{GAME_ID}/')} originals and variants were left behind")
+        if stats.originals_deleted != len(originals):
+            failures.append(f"Expected {len(originals)} originals deleted, got {stats.originals_deleted}")
+        print(f"✓ {stats.items_deleted} items deleted in {len(write_calls.calls)} BatchWriteItem calls, "
+              f"{stats.uploads_deleted} uploads and {stats.originals_deleted} originals removed")
+
+        if len(partition_keys(dynamodb, OTHER_GAME_ID)) != 1 + PLAYERS + SECTIONS + ASSETS:
+            failures.append("Another game's items were deleted")
+        if object_count(s3, f"asset/game/{OTHER_GAME_ID}/") != ASSETS:
+            failures.append("Another game's originals were deleted")
+
+        # One game's asset owns the indexed original, and another game's identical asset shares it
+        index = ContentIndex(dynamodb, TABLE_NAME)
+        content_hash = 'f' * 64
+        create_shared_asset(dynamodb, s3, index, OWNER_GAME_ID, content_hash)
+        create_shared_asset(dynamodb, s3, index, SHARER_GAME_ID, content_hash)
+        shared_prefix = f"asset/game/{OWNER_GAME_ID}/section/section-0/shared/"
+        if ref_count(dynamodb, content_hash) != 2:
+            failures.append(f"Expected both assets counted, got {ref_count(dynamodb, content_hash)}")
+
+        stats = lambda_function.delete_game(OWNER_GAME_ID, dynamodb, events, s3, TABLE_NAME, BUCKET)
+        if stats.errors or stats.originals_kept != 1 or object_count(s3, shared_prefix) != 2:
+            failures.append(f"Original still shared by another game wasn't kept: {stats}")
+        if ref_count(dynamodb, content_hash) != 1 or partition_keys(dynamodb, OWNER_GAME_ID):
+            failures.append(f"Owner's reference wasn't released: refCount {ref_count(dynamodb, content_hash)}")
+        stats = lambda_function.delete_game(SHARER_GAME_ID, dynamodb, events, s3, TABLE_NAME, BUCKET)
+        if stats.errors or stats.originals_deleted != 1 or object_count(s3, shared_prefix):
+            failures.append(f"Original and variants should go with the last reference: {stats}")
+        if ref_count(dynamodb, content_hash) is not None:
+            failures.append("Index entry for a deleted original was left behind")
+        print("✓ Shared original kept until the last game referencing it was deleted")
+
+        # The handler reports nothing failed, and a repeat is a no-op apart from the remaining players
+        result = lambda_function.lambda_handler({'Records': [{
+            'eventID': 'event-1',
+            'eventName': 'REMOVE',
+            'dynamodb': {'SequenceNumber': '1', 'Keys': {'PK': {'S': f"GAME#{GAME_ID}"}, 'SK': {'S': 'GAME'}}},
+        }]}, None)
+        if result['batchItemFailures']:
+            failures.append(f"Repeat cleanup reported failures: {result}")
+        print("✓ Repeat cleanup succeeds")
+
+        if failures:
+            print("✗ Game deletion failed:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("✓ Game deletion behaves as expected")
+
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
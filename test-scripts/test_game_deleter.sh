@@ -0,0 +1,17 @@
+#!/bin/bash
+set -e
+
+# Runs the deleteGame Lambda against an in-process moto server.
+# Set AWS_ENDPOINT_URL to use other local DynamoDB/S3/EventBridge stand-ins instead.
+
+echo "Running game deleter test in Docker container..."
+echo ""
+
+docker run --rm \
+    -v "$(pwd)/lambda/deleteGame:/lambda/deleteGame" \
+    -v "$(pwd)/lambda/common:/lambda/common" \
+    -v "$(pwd)/test-scripts/test_game_deleter.py:/test-scripts/test_game_deleter.py" \
+    -e AWS_ENDPOINT_URL="$AWS_ENDPOINT_URL" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install boto3 'moto[server]' && python -u /test-scripts/test_game_deleter.py"
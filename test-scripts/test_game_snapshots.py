@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Test the updateGameSnapshots Lambda against a local DynamoDB stand-in and its stream.
+Tests: first record rebuilds from the partition -> incremental changes -> retried batch -> version conflict ->
+oversized game -> game deletion -> partial batch failure -> dropped records
+"""
+
+import gzip
+import json
+import os
+import random
+import string
+import sys
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'updateGameSnapshots')
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common')
+TABLE_NAME = 'Wildsea-snapshots-test'
+GAME_ID = 'snapshot-game'
+LARGE_GAME_ID = 'large-game'
+PLAYERS = 6
+SECTIONS = 30
+
+def start_local_aws():
+    """Start an in-process moto server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+class CallCounts:
+    """Wraps a client to count calls, optionally running a hook before one method's calls"""
+
+    def __init__(self, client, hooks=None):
+        self._client = client
+        self._hooks = hooks or {}
+        self.calls = {}
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute) or name.startswith('_'):
+            return attribute
+
+        def call(**kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if name in self._hooks:
+                self._hooks[name](**kwargs)
+            return attribute(**kwargs)
+        return call
+
+class StreamReader:
+    """Reads new records from the table's stream, filtered as the event source mapping is"""
+
+    def __init__(self, streams, stream_arn):
+        self.streams = streams
+        shard_id = streams.describe_stream(StreamArn=stream_arn)['StreamDescription']['Shards'][0]['ShardId']
+        self.iterator = streams.get_shard_iterator(StreamArn=stream_arn, ShardId=shard_id,
+                                                   ShardIteratorType='TRIM_HORIZON')['ShardIterator']
+
+    def read(self):
+        response = self.streams.get_records(ShardIterator=self.iterator)
+        self.iterator = response['NextShardIterator']
+        return {'Records': [record for record in response['Records']
+                            if record['dynamodb']['Keys']['PK']['S'].startswith('GAME#')]}
+
+def game_items(game_id, content=lambda n: json.dumps({'showEmpty': False, 'items': [{'name': f"Item {n}"}] * 20})):
+    pk = {'S': f"GAME#{game_id}"}
+    items = [{'PK': pk, 'SK': {'S': 'GAME'}, 'type': {'S': 'GAME'}, 'gameId': {'S': game_id},
+              'gameName': {'S': 'Snapshot test'}, 'gmUserId': {'S': 'gm'}}]
+    items.append({'PK': pk, 'SK': {'S': 'PLAYER#gm'}, 'type': {'S': 'GM'}, 'userId': {'S': 'gm'}})
+    for n in range(PLAYERS):
+        items.append({'PK': pk, 'SK': {'S': f"PLAYER#player-{n}"}, 'type': {'S': 'CHARACTER'},
+                      'userId': {'S': f"player-{n}"}, 'characterName': {'S': f"Character {n}"}})
+    for n in range(SECTIONS):
+        items.append({'PK': pk, 'SK': {'S': f"SECTION#section-{n}"}, 'type': {'S': 'SECTION'},
+                      'userId': {'S': f"player-{n % PLAYERS}"}, 'sectionId': {'S': f"section-{n}"},
+                      'position': {'N': str(n)}, 'content': {'S': content(n)}})
+        items.append({'PK': pk, 'SK': {'S': f"ASSET#asset-{n}"}, 'type': {'S': 'ASSET'},
+                      'sectionId': {'S': f"section-{n}"}, 'status': {'S': 'PENDING'}})
+    return items
+
+def partition(dynamodb, game_id):
+    items = []
+    params = {'TableName': TABLE_NAME, 'KeyConditionExpression': 'PK = :pk', 'ConsistentRead': True,
+              'ExpressionAttributeValues': {':pk': {'S': f"GAME#{game_id}"}}}
+    while True:
+        response = dynamodb.query(**params)
+        items += response['Items']
+        if 'LastEvaluatedKey' not in response:
+            return items
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def snapshot_item(dynamodb, game_id):
+    import lambda_function
+
+    return dynamodb.get_item(TableName=TABLE_NAME, Key=lambda_function.snapshot_key(game_id)).get('Item')
+
+def check_snapshot(dynamodb, game_id, label, failures):
+    """The snapshot must hold exactly what getGame's query returns, in the same order"""
+    import lambda_function
+
+    item = snapshot_item(dynamodb, game_id)
+    if not item or 'snapshot' not in item:
+        failures.append(f"{label}: no snapshot for {game_id}")
+        return None
+    if lambda_function.decode_items(item['snapshot']['B']) != partition(dynamodb, game_id):
+        failures.append(f"{label}: snapshot doesn't match the partition")
+    return item
+
+def main():
+    # Dummy credentials - nothing is sent to AWS
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+    os.environ['TABLE_NAME'] = TABLE_NAME
+
+    server = None
+    if not os.environ.get('AWS_ENDPOINT_URL'):
+        endpoint_url, server = start_local_aws()
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+    print(f"Using endpoint: {os.environ['AWS_ENDPOINT_URL']}")
+
+    sys.path.insert(0, COMMON_DIR)
+    sys.path.insert(0, LAMBDA_DIR)
+    import lambda_function
+    import lambda_utils
+
+    try:
+        dynamodb = lambda_function.get_client('dynamodb')
+        table = dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': 'PK', 'AttributeType': 'S'},
+                                  {'AttributeName': 'SK', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+            StreamSpecification={'StreamEnabled': True, 'StreamViewType': 'NEW_AND_OLD_IMAGES'},
+        )['TableDescription']
+        stream = StreamReader(lambda_function.get_client('dynamodbstreams'), table['LatestStreamArn'])
+        calls = CallCounts(dynamodb)
+        lambda_utils._clients['dynamodb'] = calls
+        failures = []
+
+        # A new game is built from its partition on its first batch
+        for item in game_items(GAME_ID):
+            dynamodb.put_item(TableName=TABLE_NAME, Item=item)
+        event = stream.read()
+        result = lambda_function.lambda_handler(event, None)
+        if result['batchItemFailures']:
+            failures.append(f"First batch reported failures: {result}")
+        item = check_snapshot(dynamodb, GAME_ID, 'Rebuild', failures)
+        if item:
+            print(f"✓ Snapshot of {item['itemCount']['N']} items from {len(event['Records'])} records: "
+                  f"{item['sizeBytes']['N']} bytes, {len(item['snapshot']['B'])} compressed, one GetItem to read")
+
+        # Later changes are applied to the snapshot without reading the partition
+        pk = {'S': f"GAME#{GAME_ID}"}
+        dynamodb.update_item(TableName=TABLE_NAME, Key={'PK': pk, 'SK': {'S': 'SECTION#section-3'}},
+                             UpdateExpression='SET content = :content',
+                             ExpressionAttributeValues={':content': {'S': '{"showEmpty":true,"items":[]}'}})
+        dynamodb.update_item(TableName=TABLE_NAME, Key={'PK': pk, 'SK': {'S': 'ASSET#asset-3'}},
+                             UpdateExpression='SET #status = :status', ExpressionAttributeNames={'#status': 'status'},
+                             ExpressionAttributeValues={':status': {'S': 'FINALISING'}})
+        dynamodb.delete_item(TableName=TABLE_NAME, Key={'PK': pk, 'SK': {'S': 'SECTION#section-4'}})
+        dynamodb.put_item(TableName=TABLE_NAME, Item={'PK': pk, 'SK': {'S': 'PLAYER#late'}, 'type': {'S': 'CHARACTER'},
+                                                      'userId': {'S': 'late'}})
+        event = stream.read()
+        calls.calls.clear()
+        lambda_function.lambda_handler(event, None)
+        before = check_snapshot(dynamodb, GAME_ID, 'Incremental', failures)
+        if calls.calls.get('query'):
+            failures.append(f"Incremental update queried the partition: {calls.calls}")
+        print(f"✓ {len(event['Records'])} changes applied with {sum(calls.calls.values())} calls, no query")
+
+        # A retried batch sets the same items again, leaving the snapshot as it was
+        lambda_function.lambda_handler(event, None)
+        after = snapshot_item(dynamodb, GAME_ID)
+        if before and after['version'] != before['version']:
+            failures.append("A retried batch rewrote an unchanged snapshot")
+        print("✓ Retried batch leaves the snapshot unchanged")
+
+        # Another writer updates the snapshot between the read and the write
+        bumped = []
+
+        def bump_version(**kwargs):
+            if kwargs.get('Item', {}).get('type', {}).get('S') == lambda_function.TYPE_SNAPSHOT and not bumped:
+                bumped.append(True)
+                dynamodb.update_item(TableName=TABLE_NAME, Key=lambda_function.snapshot_key(GAME_ID),
+                                     UpdateExpression='SET version = version + :one',
+                                     ExpressionAttributeValues={':one': {'N': '1'}})
+        lambda_utils._clients['dynamodb'] = CallCounts(dynamodb, {'put_item': bump_version})
+        dynamodb.update_item(TableName=TABLE_NAME, Key={'PK': pk, 'SK': {'S': 'GAME'}},
+                             UpdateExpression='SET gameName = :name',
+                             ExpressionAttributeValues={':name': {'S': 'Renamed'}})
+        stats, _ = lambda_function.update_snapshots([lambda_function.parse_record(record)
+                                                     for record in stream.read()['Records']],
+                                                    lambda_utils._clients['dynamodb'], TABLE_NAME)
+        check_snapshot(dynamodb, GAME_ID, 'Conflict', failures)
+        if stats.conflicts != 1 or stats.failed:
+            failures.append(f"Expected one conflict, retried: {stats}")
+        print(f"✓ Version conflict retried ({stats.conflicts} conflict)")
+        lambda_utils._clients['dynamodb'] = calls
+
+        # A game too big for one item gets a marker, and is rebuilt from the partition each batch
+        rng = random.Random(1)
+        incompressible = lambda n: ''.join(rng.choices(string.ascii_letters + string.digits, k=20_000))
+        for item in game_items(LARGE_GAME_ID, incompressible):
+            dynamodb.put_item(TableName=TABLE_NAME, Item=item)
+        lambda_function.lambda_handler(stream.read(), None)
+        large = snapshot_item(dynamodb, LARGE_GAME_ID)
+        if not large or 'snapshot' in large:
+            failures.append(f"Expected an oversized marker for {LARGE_GAME_ID}")
+        dynamodb.delete_item(TableName=TABLE_NAME,
+                             Key={'PK': {'S': f"GAME#{LARGE_GAME_ID}"}, 'SK': {'S': 'SECTION#section-0'}})
+        calls.calls.clear()
+        lambda_function.lambda_handler(stream.read(), None)
+        if not calls.calls.get('query') or calls.calls.get('put_item'):
+            failures.append(f"Oversized game should be rebuilt from its partition, leaving the marker: {calls.calls}")
+        print(f"✓ Oversized game ({large['sizeBytes']['N']} bytes) marked for readers to query instead")
+
+        # Deleting the game record deletes the snapshot, and the rest of the cleanup doesn't recreate it
+        dynamodb.delete_item(TableName=TABLE_NAME, Key={'PK': pk, 'SK': {'S': 'GAME'}})
+        lambda_function.lambda_handler(stream.read(), None)
+        if snapshot_item(dynamodb, GAME_ID):
+            failures.append("Snapshot left behind after the game was deleted")
+        for item in partition(dynamodb, GAME_ID)[:10]:
+            dynamodb.delete_item(TableName=TABLE_NAME, Key={'PK': item['PK'], 'SK': item['SK']})
+        lambda_function.lambda_handler(stream.read(), None)
+        if snapshot_item(dynamodb, GAME_ID):
+            failures.append("Snapshot recreated while the game was being cleaned up")
+        print("✓ Snapshot deleted with the game")
+
+        # One game failing is reported from its first record; malformed records are skipped
+        def fail_large_game(**kwargs):
+            if kwargs.get('Key') == lambda_function.snapshot_key(LARGE_GAME_ID):
+                raise RuntimeError('injected failure')
+        lambda_utils._clients['dynamodb'] = CallCounts(dynamodb, {'get_item': fail_large_game})
+        for game_id in (GAME_ID + '-2', LARGE_GAME_ID, GAME_ID + '-2'):
+            dynamodb.put_item(TableName=TABLE_NAME, Item={'PK': {'S': f"GAME#{game_id}"}, 'SK': {'S': 'GAME'},
+                                                          'type': {'S': 'GAME'}, 'gameId': {'S': game_id}})
+        event = stream.read()
+        event['Records'].insert(0, {'eventID': 'malformed', 'eventName': 'INSERT', 'dynamodb': {}})
+        result = lambda_function.lambda_handler(event, None)
+        expected = [{'itemIdentifier': event['Records'][2]['dynamodb']['SequenceNumber']}]
+        if result['batchItemFailures'] != expected:
+            failures.append(f"Expected the failed game's first record reported, got {result}")
+        check_snapshot(dynamodb, GAME_ID + '-2', 'Partial failure', failures)
+        print("✓ Failed game reported as a partial batch failure, others updated")
+
+        # A failed game's snapshot is deleted, so if its records are then dropped the next change rebuilds it
+        other_pk = {'S': f"GAME#{GAME_ID}-2"}
+        dynamodb.put_item(TableName=TABLE_NAME, Item={'PK': other_pk, 'SK': {'S': 'PLAYER#gm'}, 'type': {'S': 'GM'},
+                                                      'userId': {'S': 'gm'}})
+        lambda_function.lambda_handler(stream.read(), None)
+
+        def fail_snapshot_write(**kwargs):
+            if kwargs.get('Item', {}).get('PK') == lambda_function.snapshot_key(GAME_ID + '-2')['PK']:
+                raise RuntimeError('injected failure')
+        lambda_utils._clients['dynamodb'] = CallCounts(dynamodb, {'put_item': fail_snapshot_write})
+        dynamodb.update_item(TableName=TABLE_NAME, Key={'PK': other_pk, 'SK': {'S': 'GAME'}},
+                             UpdateExpression='SET gameName = :name',
+                             ExpressionAttributeValues={':name': {'S': 'Change that gets dropped'}})
+        result = lambda_function.lambda_handler(stream.read(), None)
+        if len(result['batchItemFailures']) != 1 or snapshot_item(dynamodb, GAME_ID + '-2'):
+            failures.append(f"Failed game's snapshot should be deleted: {result}")
+        # The event source mapping gives up on those records; only the game's next change arrives
+        lambda_utils._clients['dynamodb'] = calls
+        dynamodb.put_item(TableName=TABLE_NAME, Item={'PK': other_pk, 'SK': {'S': 'PLAYER#next'},
+                                                      'type': {'S': 'CHARACTER'}, 'userId': {'S': 'next'}})
+        calls.calls.clear()
+        result = lambda_function.lambda_handler(stream.read(), None)
+        rebuilt = check_snapshot(dynamodb, GAME_ID + '-2', 'Dropped records', failures)
+        if result['batchItemFailures'] or not calls.calls.get('query'):
+            failures.append(f"Next change should rebuild the snapshot from the partition: {result}, {calls.calls}")
+        if rebuilt and b'Change that gets dropped' not in gzip.decompress(rebuilt['snapshot']['B']):
+            failures.append("Rebuilt snapshot is missing the dropped change")
+        print("✓ Snapshot deleted on failure and rebuilt, dropped change included, on the next change")
+
+        if failures:
+            print("✗ Game snapshots failed:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("✓ Game snapshots behave as expected")
+
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+#!/bin/bash
+set -e
+
+# Runs the updateGameSnapshots Lambda against an in-process moto server.
+# Set AWS_ENDPOINT_URL to use another local DynamoDB stand-in, with streams, instead.
+
+echo "Running game snapshot test in Docker container..."
+echo ""
+
+docker run --rm \
+    -v "$(pwd)/lambda/updateGameSnapshots:/lambda/updateGameSnapshots" \
+    -v "$(pwd)/lambda/common:/lambda/common" \
+    -v "$(pwd)/test-scripts/test_game_snapshots.py:/test-scripts/test_game_snapshots.py" \
+    -e AWS_ENDPOINT_URL="$AWS_ENDPOINT_URL" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install boto3 'moto[server]' && python -u /test-scripts/test_game_snapshots.py"
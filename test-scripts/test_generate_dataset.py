@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test the synthetic dataset generator against a local DynamoDB stand-in.
+Tests: seeded generation is repeatable -> items hang together as getGame expects -> BatchWriteItem in 25s -> GSI1/GSI2 lookups
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+import generate_dataset  # noqa: E402
+from dynamodb_batch import create_client, create_table  # noqa: E402
+
+TABLE_NAME = 'Wildsea-dataset-test'
+MAX_ITEM_BYTES = 400 * 1024
+
+def start_local_aws():
+    """Start an in-process moto server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+class CallSizes:
+    """Wraps a client to record the number of entries in each write call"""
+
+    def __init__(self, client, method, count):
+        self._client = client
+        self._method = method
+        self._count = count
+        self.calls = []
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name != self._method:
+            return attribute
+
+        def call(**kwargs):
+            self.calls.append(self._count(kwargs))
+            return attribute(**kwargs)
+        return call
+
+def query_all(dynamodb, **params):
+    items = []
+    while True:
+        response = dynamodb.query(TableName=TABLE_NAME, **params)
+        items += response['Items']
+        if 'LastEvaluatedKey' not in response:
+            return items
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def check_dataset(dataset, failures):
+    """Every game must load through getGame: one GAME record, and every section and asset owned within it"""
+    partitions = {}
+    for item in dataset.items:
+        partitions.setdefault(item['PK']['S'], []).append(item)
+    for game in dataset.games:
+        items = partitions.get(f"GAME#{game.game_id}", [])
+        types = Counter(item['type']['S'] for item in items)
+        if types['GAME'] != 1 or types['GM'] != 1 or types['CHARACTER'] != len(game.player_user_ids) \
+                or types['NPC'] != game.npcs or types['SECTION'] != game.sections or types['ASSET'] != game.assets:
+            failures.append(f"Game {game.game_id} has unexpected items: {dict(types)}")
+        sheets = {item['userId']['S'] for item in items if item['SK']['S'].startswith('PLAYER#')}
+        section_ids = {item['sectionId']['S'] for item in items if item['type']['S'] == 'SECTION'}
+        for item in items:
+            if item['type']['S'] == 'SECTION':
+                if item['userId']['S'] not in sheets or item['GSI1PK']['S'] != f"SECTIONUSER#{item['userId']['S']}":
+                    failures.append(f"Section {item['SK']['S']} isn't owned by a sheet in its game")
+                json.loads(item['content']['S'])
+            elif item['type']['S'] == 'ASSET' and item['sectionId']['S'] not in section_ids:
+                failures.append(f"Asset {item['SK']['S']} isn't in a section of its game")
+    largest = max(generate_dataset.item_size(item) for item in dataset.items)
+    if largest > MAX_ITEM_BYTES:
+        failures.append(f"Largest item is {largest} bytes, over the DynamoDB limit")
+    if max(len(game.player_user_ids) for game in dataset.games) < 10:
+        failures.append("Expected some large games")
+
+def main():
+    # Dummy credentials - nothing is sent to AWS
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+
+    server = None
+    if not os.environ.get('AWS_ENDPOINT_URL'):
+        endpoint_url, server = start_local_aws()
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+    print(f"Using endpoint: {os.environ['AWS_ENDPOINT_URL']}")
+
+    try:
+        failures = []
+        config = generate_dataset.DatasetConfig(games=30, users=60, players_median=6)
+        dataset = generate_dataset.generate(config)
+        if generate_dataset.generate(config).items != dataset.items:
+            failures.append("The same seed generated different items")
+        if generate_dataset.generate(generate_dataset.DatasetConfig(games=30, users=60, seed=2)).items == dataset.items:
+            failures.append("A different seed generated the same items")
+        check_dataset(dataset, failures)
+        print(f"✓ Generated {len(dataset.games)} games, {len(dataset.items)} items, repeatably")
+
+        dynamodb = create_client()
+        create_table(dynamodb, TABLE_NAME)
+        write_calls = CallSizes(dynamodb, 'batch_write_item', lambda kwargs: len(kwargs['RequestItems'][TABLE_NAME]))
+        stats = generate_dataset.write_dataset(write_calls, TABLE_NAME, dataset)
+        print(f"✓ Wrote {stats.put} items in {stats.write_seconds:.2f}s ({stats.items_per_second:.0f} items/s, "
+              f"{stats.write_calls} write calls)")
+        if stats.errors or stats.put != len(dataset.items):
+            failures.append(f"Expected {len(dataset.items)} items written, got {stats.put}: {stats.errors}")
+        if max(write_calls.calls) > 25:
+            failures.append(f"Unexpected BatchWriteItem call sizes: {write_calls.calls}")
+
+        # getGame reads the whole partition
+        biggest = max(dataset.games, key=lambda game: game.items)
+        items = query_all(dynamodb, KeyConditionExpression='PK = :pk',
+                          ExpressionAttributeValues={':pk': {'S': f"GAME#{biggest.game_id}"}})
+        if len(items) != biggest.items:
+            failures.append(f"getGame query returned {len(items)} items, expected {biggest.items}")
+        print(f"✓ Largest game has {len(items)} items, {biggest.bytes / 1024:.0f} KB")
+
+        # getGames finds every game a user plays in or runs, through GSI1
+        user_games = Counter()
+        for game in dataset.games:
+            user_games.update([game.gm_user_id, *game.player_user_ids])
+        user_id, expected = user_games.most_common(1)[0]
+        games = query_all(dynamodb, IndexName='GSI1', KeyConditionExpression='GSI1PK = :pk',
+                          ExpressionAttributeValues={':pk': {'S': f"USER#{user_id}"}})
+        if len(games) != expected:
+            failures.append(f"GSI1 USER# lookup found {len(games)} games, expected {expected}")
+        sections = query_all(dynamodb, IndexName='GSI1', KeyConditionExpression='GSI1PK = :pk',
+                             ExpressionAttributeValues={':pk': {'S': f"SECTIONUSER#{user_id}"}})
+        expected_sections = sum(1 for item in dataset.items
+                                if item['type']['S'] == 'SECTION' and item['userId']['S'] == user_id)
+        if len(sections) != expected_sections:
+            failures.append(f"GSI1 SECTIONUSER# lookup found {len(sections)} sections, expected {expected_sections}")
+        print(f"✓ Busiest user is in {len(games)} games with {len(sections)} sections")
+
+        pending = [item for item in dataset.items if item['type']['S'] == 'ASSET' and 'GSI2PK' in item]
+        if pending:
+            bucket = pending[0]['GSI2PK']['S']
+            due = query_all(dynamodb, IndexName='GSI2', KeyConditionExpression='GSI2PK = :pk',
+                            ExpressionAttributeValues={':pk': {'S': bucket}})
+            if len(due) != sum(1 for item in pending if item['GSI2PK']['S'] == bucket):
+                failures.append(f"GSI2 expiry bucket {bucket} has {len(due)} assets")
+        print(f"✓ {len(pending)} pending assets in GSI2 expiry buckets")
+
+        if failures:
+            print("✗ Dataset generation failed:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("✓ Dataset generation behaves as expected")
+
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+#!/bin/bash
+set -e
+
+# Runs the synthetic dataset generator against an in-process moto server.
+# Set AWS_ENDPOINT_URL to use another local DynamoDB stand-in, such as DynamoDB Local, instead.
+
+echo "Running dataset generator test in Docker container..."
+echo ""
+
+# Delta Green sections are generated from the UI's seed data
+docker run --rm \
+    -v "$(pwd)/test-scripts:/work/test-scripts" \
+    -v "$(pwd)/scripts:/work/scripts" \
+    -v "$(pwd)/ui/src/seed:/work/ui/src/seed" \
+    -e AWS_ENDPOINT_URL="$AWS_ENDPOINT_URL" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install boto3 'moto[server]' && python -u /work/test-scripts/test_generate_dataset.py"
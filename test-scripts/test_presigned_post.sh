@@ -0,0 +1,13 @@
+#!/bin/bash
+set -e
+
+# Compares the local presigned POST signer with boto3's generate_presigned_post.
+
+echo "Running presigned POST signer test in Docker container..."
+echo ""
+
+docker run --rm \
+    -v "$(pwd)/lambda/generatePresignedUrl:/work/lambda/generatePresignedUrl" \
+    -v "$(pwd)/test-scripts:/work/test-scripts" \
+    python:3.12-slim \
+    bash -c "pip install boto3 && python -u /work/test-scripts/test_presigned_post.py"
@@ -52,8 +52,10 @@ echo "Section ID: $SECTION_ID"
 echo "Username: $COGNITO_USERNAME"
 
 # Build docker run command with required environment variables
+# The GraphQL client is shared with the load scripts
 docker run --rm \
-    -v "$(pwd)/test-scripts/test_request_asset_upload.py:/test_request_asset_upload.py" \
+    -v "$(pwd)/test-scripts:/work/test-scripts" \
+    -v "$(pwd)/scripts:/work/scripts" \
     -e GRAPHQL_URL="$GRAPHQL_URL" \
     -e COGNITO_USER_POOL_ID="$COGNITO_USER_POOL_ID" \
     -e COGNITO_CLIENT_ID="$COGNITO_CLIENT_ID" \
@@ -63,4 +65,4 @@ docker run --rm \
     -e COGNITO_USERNAME="$COGNITO_USERNAME" \
     -e COGNITO_PASSWORD="$COGNITO_PASSWORD" \
     python:3.11-slim \
-    python -u /test_request_asset_upload.py
\ No newline at end of file
+    python -u /work/test-scripts/test_request_asset_upload.py
\ No newline at end of file
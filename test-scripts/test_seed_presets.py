@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Test the preset and template seeder against a local DynamoDB stand-in.
+Tests: catalogue -> items as Terraform wrote them -> diff against the table -> BatchWriteItem in 25s with retries
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+import seed_presets  # noqa: E402
+
+TABLE_NAME = 'Wildsea-seeder-test'
+WEAPONS = 80
+LANGUAGES = ['en', 'tlh']
+
+def start_local_aws():
+    """Start an in-process moto server, returning (endpoint_url, server)"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server
+
+class FlakyWrites:
+    """Wraps a client to record each BatchWriteItem call's size, leaving half of the first calls unprocessed"""
+
+    def __init__(self, client, flaky_calls=0):
+        self._client = client
+        self._flaky_calls = flaky_calls
+        self.calls = []
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name != 'batch_write_item':
+            return attribute
+
+        def call(**kwargs):
+            requests = kwargs['RequestItems'][TABLE_NAME]
+            self.calls.append(len(requests))
+            if self._flaky_calls and len(requests) > 1:
+                self._flaky_calls -= 1
+                half = len(requests) // 2
+                attribute(RequestItems={TABLE_NAME: requests[:half]})
+                return {'UnprocessedItems': {TABLE_NAME: requests[half:]}}
+            return attribute(**kwargs)
+        return call
+
+def make_weapons(count):
+    weapons = {}
+    for n in range(count):
+        weapon = {'weapon_data': {'damage': f"1D{n % 12 + 1}", 'baseRange': f"{n}m", 'ammo': n, 'lethality': 0}}
+        for language in LANGUAGES:
+            weapon[f"display_name_{language}"] = f"Weapon {n} ({language})"
+            weapon[f"description_{language}"] = f"Weapon {n} <{language}> & more"
+            weapon[f"skillId_{language}"] = 'skill-firearms'
+        weapons[f"weapon-{n}"] = weapon
+    return weapons
+
+def write_json(directory, name, value):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f)
+    return path
+
+def scan_all(dynamodb):
+    items = {}
+    params = {'TableName': TABLE_NAME}
+    while True:
+        response = dynamodb.scan(**params)
+        for item in response['Items']:
+            items[(item['PK']['S'], item['SK']['S'])] = item
+        if 'LastEvaluatedKey' not in response:
+            return items
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def check_item_shapes(failures):
+    """Items must match what the Terraform resources wrote, so an existing table is left alone"""
+    weapon = {'weapon_data': {'damage': '1D6', 'lethality': 0},
+              'display_name_en': 'Pistol', 'description_en': 'A <small> gun', 'skillId_en': 'skill-firearms'}
+    expected = {
+        'PK': {'S': 'GAMEPRESETS#deltagreen-weapons#en'},
+        'SK': {'S': 'GAMEPRESETS#pistol'},
+        'dataSetName': {'S': 'deltagreen-weapons'},
+        'language': {'S': 'en'},
+        'displayName': {'S': 'Pistol'},
+        'data': {'S': '{"damage":"1D6","description":"A \\u003csmall\\u003e gun","lethality":0,"skillId":"skill-firearms"}'},
+        'type': {'S': 'GAMEPRESETS'},
+    }
+    if seed_presets.weapon_items({'pistol': weapon}) != [expected]:
+        failures.append(f"Unexpected weapon item: {seed_presets.weapon_items({'pistol': weapon})}")
+
+    catalogue = json.load(open(seed_presets.DEFAULT_TEMPLATES_FILE, encoding='utf-8'))
+    templates = seed_presets.template_items(catalogue)
+    for template, item in zip(catalogue, templates):
+        key = (item['PK']['S'], item['SK']['S'])
+        if key != (f"TEMPLATE#{template['gameType']}#{template['language']}", f"TEMPLATE#{template['templateName']}"):
+            failures.append(f"Unexpected template key: {key}")
+        for source, section in zip(template['sections'], json.loads(item['sections']['S'])):
+            seed = source['content'].get('items')
+            if not isinstance(seed, dict):
+                continue
+            with open(os.path.join(seed_presets.SEED_DIR, f"{seed['seed']}.{template['language']}.json"), encoding='utf-8') as f:
+                entries = json.load(f)
+            items = json.loads(section['content'])['items']
+            if len(items) != len(entries) or not all(entry['id'] and entry['name'] for entry in items):
+                failures.append(f"{key} {section['sectionName']} was not filled from {seed['seed']}")
+    print(f"✓ {len(templates)} templates rendered from the catalogue and the UI seed data")
+
+def main():
+    # Dummy credentials - nothing is sent to AWS
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-southeast-2')
+
+    server = None
+    if not os.environ.get('AWS_ENDPOINT_URL'):
+        endpoint_url, server = start_local_aws()
+        os.environ['AWS_ENDPOINT_URL'] = endpoint_url
+    print(f"Using endpoint: {os.environ['AWS_ENDPOINT_URL']}")
+
+    try:
+        failures = []
+        check_item_shapes(failures)
+
+        dynamodb = seed_presets.create_client(seed_presets.DEFAULT_CONCURRENCY)
+        dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': 'PK', 'AttributeType': 'S'},
+                                  {'AttributeName': 'SK', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        # Items outside the catalogue partitions must never be touched
+        unrelated = {'PK': {'S': 'GAMEDEFAULTS#en'}, 'SK': {'S': 'GAMEDEFAULTS#wildsea'}, 'type': {'S': 'GAMEDEFAULTS'}}
+        dynamodb.put_item(TableName=TABLE_NAME, Item=unrelated)
+
+        with tempfile.TemporaryDirectory() as directory:
+            weapons = make_weapons(WEAPONS)
+            weapons_file = write_json(directory, 'weapons.json', weapons)
+            items = seed_presets.load_catalogue(weapons_file, seed_presets.DEFAULT_TEMPLATES_FILE)
+            expected = len(LANGUAGES) * (WEAPONS + 2)
+            if len(items) != expected:
+                failures.append(f"Expected {expected} catalogue items, got {len(items)}")
+
+            # First run writes everything, retrying what comes back unprocessed
+            client = FlakyWrites(dynamodb, flaky_calls=2)
+            stats, requests = seed_presets.seed(client, TABLE_NAME, items)
+            print(f"✓ First run: {stats.put} items written in {stats.write_seconds:.2f}s "
+                  f"({stats.items_per_second:.0f} items/s, {stats.write_calls} write calls, {stats.retries} retries)")
+            if stats.errors:
+                failures.append(f"First run reported errors: {stats.errors}")
+            if stats.put != len(items) or stats.retries != 2:
+                failures.append(f"Expected {len(items)} puts with 2 retries, got {stats.put} and {stats.retries}")
+            if max(client.calls) > 25:
+                failures.append(f"Unexpected BatchWriteItem call sizes: {client.calls}")
+            table = scan_all(dynamodb)
+            if len(table) != len(items) + 1 or any(table[(item['PK']['S'], item['SK']['S'])] != item for item in items):
+                failures.append(f"Table doesn't match the catalogue: {len(table)} items")
+
+            # An unchanged catalogue writes nothing
+            client = FlakyWrites(dynamodb)
+            stats, requests = seed_presets.seed(client, TABLE_NAME, items)
+            if requests or client.calls or stats.unchanged != len(items):
+                failures.append(f"Repeat run wrote {len(requests)} items in {len(client.calls)} calls")
+            print(f"✓ Repeat run: {stats.unchanged} unchanged items read in {stats.read_seconds:.2f}s, nothing written")
+
+            # Only a changed weapon is rewritten, and a removed one is deleted in every language
+            weapons['weapon-1']['weapon_data']['ammo'] = 99
+            del weapons['weapon-2']
+            weapons_file = write_json(directory, 'weapons.json', weapons)
+            items = seed_presets.load_catalogue(weapons_file, seed_presets.DEFAULT_TEMPLATES_FILE)
+            client = FlakyWrites(dynamodb)
+            stats, requests = seed_presets.seed(client, TABLE_NAME, items)
+            if stats.put != len(LANGUAGES) or stats.deleted != len(LANGUAGES) or stats.errors:
+                failures.append(f"Expected {len(LANGUAGES)} puts and deletes, got {stats.put} and {stats.deleted}")
+            table = scan_all(dynamodb)
+            if any(key[1] == 'GAMEPRESETS#weapon-2' for key in table):
+                failures.append("Removed weapon is still in the table")
+            if '"ammo":99' not in table[('GAMEPRESETS#deltagreen-weapons#tlh', 'GAMEPRESETS#weapon-1')]['data']['S']:
+                failures.append("Changed weapon was not updated")
+            print(f"✓ Changed catalogue: {stats.put} put and {stats.deleted} deleted in {len(client.calls)} write calls")
+
+            # Without a weapons file, weapons presets are left alone
+            items = seed_presets.load_catalogue(os.path.join(directory, 'missing.json'), seed_presets.DEFAULT_TEMPLATES_FILE)
+            stats, requests = seed_presets.seed(dynamodb, TABLE_NAME, items)
+            if requests or len(scan_all(dynamodb)) != len(LANGUAGES) * (WEAPONS - 1 + 2) + 1:
+                failures.append("Seeding without a weapons file changed the weapons presets")
+
+        if scan_all(dynamodb).get((unrelated['PK']['S'], unrelated['SK']['S'])) != unrelated:
+            failures.append("An item outside the catalogue partitions was changed")
+
+        if failures:
+            print("✗ Seeding failed:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("✓ Seeding behaves as expected")
+
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
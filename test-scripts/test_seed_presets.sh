@@ -0,0 +1,19 @@
+#!/bin/bash
+set -e
+
+# Runs the preset and template seeder against an in-process moto server.
+# Set AWS_ENDPOINT_URL to use another local DynamoDB stand-in, such as DynamoDB Local, instead.
+
+echo "Running preset seeder test in Docker container..."
+echo ""
+
+# The seeder reads the template catalogue and the UI's seed data
+docker run --rm \
+    -v "$(pwd)/test-scripts:/work/test-scripts" \
+    -v "$(pwd)/scripts:/work/scripts" \
+    -v "$(pwd)/presets:/work/presets" \
+    -v "$(pwd)/ui/src/seed:/work/ui/src/seed" \
+    -e AWS_ENDPOINT_URL="$AWS_ENDPOINT_URL" \
+    --network host \
+    python:3.12-slim \
+    bash -c "pip install boto3 'moto[server]' && python -u /work/test-scripts/test_seed_presets.py"
@@ -4,11 +4,16 @@ Test script to upload a file using the presigned URL from requestAssetUpload.
 """
 
 import json
+import os
+import sys
 import urllib.request
 import urllib.parse
 from urllib.parse import urlparse
 import urllib.error
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'common'))
+from asset_stream import MultipartFormBody, digest_stream  # noqa: E402
+
 def create_test_image(file_path, size_bytes=1024000):
     """Create a test JPEG file of specified size"""
     # Create a simple test JPEG file
@@ -49,40 +54,20 @@ def upload_file_to_s3(upload_url, upload_fields_json, file_path):
     print(f"Upload URL: {upload_url}")
     print(f"Upload fields keys: {list(upload_fields.keys())}")
 
-    # Read the file
-    with open(file_path, 'rb') as f:
-        file_data = f.read()
-
-    # Prepare multipart form data
-    boundary = 'FormBoundary7MA4YWxkTrZu0gW'
-
-    # Build the multipart body
-    body_parts = []
+    # Stream the multipart body from disk rather than building it in memory
+    body = MultipartFormBody(upload_fields, file_path, 'image/jpeg', filename='test-image.jpg')
 
-    # Add all the form fields first
-    for key, value in upload_fields.items():
-        body_parts.append(f'--{boundary}'.encode())
-        body_parts.append(f'Content-Disposition: form-data; name="{key}"'.encode())
-        body_parts.append(b'')
-        body_parts.append(str(value).encode())
-
-    # Add the file last
-    body_parts.append(f'--{boundary}'.encode())
-    body_parts.append(b'Content-Disposition: form-data; name="file"; filename="test-image.jpg"')
-    body_parts.append(b'Content-Type: image/jpeg')
-    body_parts.append(b'')
-    body_parts.append(file_data)
-    body_parts.append(f'--{boundary}--'.encode())
-
-    body = b'\r\n'.join(body_parts)
+    with open(file_path, 'rb') as f:
+        size_bytes, sha256 = digest_stream(f)
+    print(f"File size: {size_bytes} bytes, SHA-256: {sha256}")
 
     # Create the request
     req = urllib.request.Request(
         upload_url,
-        data=body,
+        data=iter(body),
         headers={
-            'Content-Type': f'multipart/form-data; boundary={boundary}',
-            'Content-Length': str(len(body))
+            'Content-Type': body.content_type,
+            'Content-Length': str(body.content_length)
         }
     )
 
@@ -103,9 +88,6 @@ def upload_file_to_s3(upload_url, upload_fields_json, file_path):
         return False
 
 def main():
-    import sys
-    import os
-
     # Get upload URL and fields from command line arguments or environment variables
     upload_url = sys.argv[1] if len(sys.argv) > 1 else os.getenv('UPLOAD_URL')
     upload_fields_json = sys.argv[2] if len(sys.argv) > 2 else os.getenv('UPLOAD_FIELDS')